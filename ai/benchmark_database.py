@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark personalization database throughput under concurrent chat sessions
+
+Usage:
+    python benchmark_database.py [--sessions 100] [--interactions 20] [--database-url URL]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database_service import DatabaseService
+
+async def simulate_session(db: DatabaseService, session_index: int, interactions: int):
+    """One chat session: profile update + interaction log + profile read per message"""
+    vendor_id = f"bench-vendor-{session_index % 25}"
+    session_id = f"bench-session-{session_index}"
+    for i in range(interactions):
+        db.queue_interaction(
+            vendor_id=vendor_id,
+            interaction_type="benchmark",
+            interaction_data={"message": i},
+            session_id=session_id
+        )
+        async with db.profile_transaction(vendor_id, performance_days=90) as profile:
+            patterns = profile["behavior_patterns"]
+            patterns["benchmark"] = patterns.get("benchmark", 0) + 1
+        await db.get_user_profile(vendor_id)
+
+async def run_benchmark(database_url: str, sessions: int, interactions: int):
+    db = DatabaseService(database_url, interaction_flush_interval=0.5)
+    await db.init_db()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(simulate_session(db, i, interactions) for i in range(sessions)))
+    await db.flush_interactions()
+    elapsed = time.perf_counter() - start
+
+    total = sessions * interactions
+    stored = await db.get_user_interactions("bench-vendor-0", limit=total)
+    await db.close()
+
+    print(f"Database:          {database_url}")
+    print(f"Sessions:          {sessions}")
+    print(f"Interactions:      {total}")
+    print(f"Elapsed:           {elapsed:.2f}s")
+    print(f"Interactions/sec:  {total / elapsed:.0f}")
+    print(f"Rows for vendor 0: {len(stored)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the personalization database")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--interactions", type=int, default=20)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if database_url is None:
+        path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+        database_url = f"sqlite+aiosqlite:///{path}"
+
+    asyncio.run(run_benchmark(database_url, args.sessions, args.interactions))
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 Database models for personalization and recommendation system
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Text, JSON, Boolean, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -32,6 +32,11 @@ class UserProfile(Base):
 class UserInteraction(Base):
     """User interaction tracking"""
     __tablename__ = "user_interactions"
+    __table_args__ = (
+        Index("ix_user_interactions_vendor_timestamp", "vendor_id", "timestamp"),
+        Index("ix_user_interactions_timestamp", "timestamp"),
+        Index("ix_user_interactions_session_id", "session_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     vendor_id = Column(String, ForeignKey("user_profiles.vendor_id"), nullable=False)
@@ -43,9 +48,37 @@ class UserInteraction(Base):
     # Relationships
     profile = relationship("UserProfile", back_populates="interactions")
 
+class InteractionDailyAggregate(Base):
+    """Daily interaction counts kept after raw interactions age out"""
+    __tablename__ = "interaction_daily_aggregates"
+    __table_args__ = (
+        UniqueConstraint("vendor_id", "day", "interaction_type", name="uq_interaction_daily_aggregate"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    vendor_id = Column(String, nullable=False, index=True)
+    day = Column(Date, nullable=False)
+    interaction_type = Column(String, nullable=False)
+    count = Column(Integer, default=0, nullable=False)
+
+class RetentionWatermark(Base):
+    """How far the current retention purge of a table got, so a restart resumes there"""
+    __tablename__ = "retention_watermarks"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    table_name = Column(String, unique=True, nullable=False)
+    cutoff = Column(DateTime, nullable=False)
+    last_id = Column(Integer, default=0, nullable=False)
+    deleted = Column(Integer, default=0, nullable=False)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)  # null while a purge is in progress
+
 class PerformanceHistory(Base):
     """Performance metrics history"""
     __tablename__ = "performance_history"
+    __table_args__ = (
+        Index("ix_performance_history_vendor_timestamp", "vendor_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     vendor_id = Column(String, ForeignKey("user_profiles.vendor_id"), nullable=False)
@@ -64,6 +97,9 @@ class PerformanceHistory(Base):
 class Recommendation(Base):
     """Generated recommendations"""
     __tablename__ = "recommendations"
+    __table_args__ = (
+        Index("ix_recommendations_vendor_created", "vendor_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     vendor_id = Column(String, ForeignKey("user_profiles.vendor_id"), nullable=False)
@@ -89,6 +125,9 @@ class Recommendation(Base):
 class BundleRecommendation(Base):
     """Bundle recommendations"""
     __tablename__ = "bundle_recommendations"
+    __table_args__ = (
+        Index("ix_bundle_recommendations_vendor_created", "vendor_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     vendor_id = Column(String, ForeignKey("user_profiles.vendor_id"), nullable=False)
@@ -109,6 +148,10 @@ class BundleRecommendation(Base):
 class ConversationHistory(Base):
     """Conversation history for context"""
     __tablename__ = "conversation_history"
+    __table_args__ = (
+        Index("ix_conversation_history_session_timestamp", "session_id", "timestamp"),
+        Index("ix_conversation_history_timestamp", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(String, nullable=False, index=True)
@@ -118,6 +161,16 @@ class ConversationHistory(Base):
     function_calls = Column(JSON, default=list)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+class DailyInsights(Base):
+    """Precomputed daily insights per vendor"""
+    __tablename__ = "daily_insights"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    vendor_id = Column(String, ForeignKey("user_profiles.vendor_id"), unique=True, index=True, nullable=False)
+    insights = Column(JSON, nullable=False)
+    source_fingerprint = Column(String, nullable=False)  # hash of orders/inventory the insights were built from
+    generated_at = Column(DateTime, default=datetime.utcnow)
+
 class MarketTrends(Base):
     """Market trends and data"""
     __tablename__ = "market_trends"
@@ -3,38 +3,181 @@ Database service for personalization and recommendation system
 """
 
 import asyncio
-from sqlalchemy import create_engine, select, update, delete
+import copy
+import os
+import weakref
+from contextlib import asynccontextmanager
+from sqlalchemy import create_engine, select, update, delete, insert, event, func
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from typing import Dict, Any, List, Optional
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Set, Tuple, TypeVar
 from datetime import datetime, timedelta
 import logging
 from database_models import (
     Base, UserProfile, UserInteraction, PerformanceHistory, 
-    Recommendation, BundleRecommendation, ConversationHistory, MarketTrends
+    Recommendation, BundleRecommendation, ConversationHistory, MarketTrends,
+    DailyInsights, InteractionDailyAggregate, RetentionWatermark
 )
 
 logger = logging.getLogger("database_service")
 
+DEFAULT_DATABASE_URL = "sqlite+aiosqlite:///./personalization.db"
+
+# Consecutive failed flushes before buffered interactions are written one by one and bad rows dropped
+INTERACTION_FLUSH_RETRIES = 3
+# Upper bound on buffered interactions while flushes fail; the oldest are dropped
+MAX_BUFFERED_INTERACTIONS = 10000
+
+T = TypeVar("T")
+# A unit of write work; it must not commit, the writer commits it with the rest of its batch
+WriteJob = Callable[[AsyncSession], Awaitable[T]]
+
+def _configure_sqlite_connection(dbapi_connection, connection_record):
+    """WAL lets readers run alongside the writer; NORMAL sync is durable enough under WAL"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+def _configure_sqlite_writer(dbapi_connection, connection_record):
+    """Let SQLAlchemy issue BEGIN itself so savepoints nest inside the batch transaction"""
+    _configure_sqlite_connection(dbapi_connection, connection_record)
+    dbapi_connection.isolation_level = None
+
+def _begin_sqlite_write(conn):
+    # Take the write lock up front rather than upgrading a read lock mid-batch
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+class ProfileTransactionAborted(Exception):
+    """The body of a profile_transaction raised, so its write is rolled back"""
+
 class DatabaseService:
-    def __init__(self, database_url: str = "sqlite+aiosqlite:///./personalization.db"):
-        self.database_url = database_url
-        self.engine = create_async_engine(database_url, echo=False)
+    def __init__(self, database_url: Optional[str] = None,
+                 interaction_batch_size: int = 100, interaction_flush_interval: float = 2.0):
+        self.database_url = database_url or os.getenv("AI_DATABASE_URL", DEFAULT_DATABASE_URL)
+        self.is_sqlite = self.database_url.startswith("sqlite")
+        
+        if self.is_sqlite:
+            # Concurrent readers on a small pool; writes are queued to a single writer task
+            # that owns the only write connection and commits them in batches
+            self.engine = create_async_engine(
+                self.database_url, echo=False,
+                pool_size=int(os.getenv("AI_DB_READ_POOL_SIZE", "5")), max_overflow=0
+            )
+            self.write_engine = create_async_engine(
+                self.database_url, echo=False, pool_size=1, max_overflow=0
+            )
+            event.listen(self.engine.sync_engine, "connect", _configure_sqlite_connection)
+            event.listen(self.write_engine.sync_engine, "connect", _configure_sqlite_writer)
+            event.listen(self.write_engine.sync_engine, "begin", _begin_sqlite_write)
+        else:
+            self.engine = create_async_engine(
+                self.database_url, echo=False,
+                pool_size=int(os.getenv("AI_DB_POOL_SIZE", "10")),
+                max_overflow=int(os.getenv("AI_DB_MAX_OVERFLOW", "20")),
+                pool_pre_ping=True,
+                pool_recycle=1800
+            )
+            self.write_engine = self.engine
+        
         self.async_session = sessionmaker(
             self.engine, class_=AsyncSession, expire_on_commit=False
         )
+        self.write_session = sessionmaker(
+            self.write_engine, class_=AsyncSession, expire_on_commit=False
+        )
+        self.write_batch_size = int(os.getenv("AI_DB_WRITE_BATCH_SIZE", "100"))
+        self._write_queue: "asyncio.Queue[Tuple[WriteJob, asyncio.Future]]" = asyncio.Queue()
+        self._writer: Optional[asyncio.Task] = None
+        self.interaction_batch_size = interaction_batch_size
+        self.interaction_flush_interval = interaction_flush_interval
+        self._interaction_buffer: List[Dict[str, Any]] = []
+        self._interaction_flush_failures = 0
+        self.dropped_interactions = 0
+        self._interaction_flusher: Optional[asyncio.Task] = None
+        # Early flushes; the loop only keeps weak references to tasks
+        self._flush_tasks: Set[asyncio.Task] = set()
+        # One profile read-modify-write at a time per vendor; an entry lives while it is in use
+        self._profile_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self.retention_progress: Dict[str, Dict[str, Any]] = {}
     
     async def init_db(self):
         """Initialize database tables"""
-        async with self.engine.begin() as conn:
+        async with self.write_engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(self._create_missing_indexes)
         logger.info("Database initialized successfully")
     
+    @staticmethod
+    def _create_missing_indexes(sync_conn):
+        # create_all skips tables that already exist, so add indexes introduced later
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(sync_conn, checkfirst=True)
+    
     async def get_session(self):
         """Get database session"""
         async with self.async_session() as session:
             yield session
     
+    # Writes
+    async def _write(self, job: WriteJob[T]) -> T:
+        """Run a write job and return its result once it is committed"""
+        if not self.is_sqlite:
+            # Postgres handles concurrent writers itself
+            async with self.write_session() as session:
+                result = await job(session)
+                await session.commit()
+                return result
+        
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._run_writer())
+        future = asyncio.get_running_loop().create_future()
+        self._write_queue.put_nowait((job, future))
+        return await future
+    
+    async def _run_writer(self):
+        """Drain the write queue, committing whatever has accumulated as one transaction"""
+        while True:
+            batch = [await self._write_queue.get()]
+            while len(batch) < self.write_batch_size and not self._write_queue.empty():
+                batch.append(self._write_queue.get_nowait())
+            try:
+                await self._commit_batch(batch)
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+    
+    async def _commit_batch(self, batch: List[Tuple[WriteJob, asyncio.Future]]):
+        outcomes = []
+        try:
+            async with self.write_session() as session:
+                for job, future in batch:
+                    if future.cancelled():
+                        continue
+                    # A savepoint per job, so one failing job does not take down the batch
+                    try:
+                        async with session.begin_nested():
+                            outcomes.append((future, await job(session), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to commit a batch of {len(batch)} writes: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for future, result, error in outcomes:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+    
     # User Profile Operations
     async def get_user_profile(self, vendor_id: str) -> Optional[Dict[str, Any]]:
         """Get user profile by vendor ID"""
@@ -58,7 +201,7 @@ class DatabaseService:
     
     async def create_user_profile(self, vendor_id: str, segment: str = "new_vendor") -> Dict[str, Any]:
         """Create new user profile"""
-        async with self.async_session() as session:
+        async def create(session: AsyncSession) -> UserProfile:
             profile = UserProfile(
                 vendor_id=vendor_id,
                 segment=segment,
@@ -68,44 +211,206 @@ class DatabaseService:
                 confidence_score=0.0
             )
             session.add(profile)
-            await session.commit()
+            await session.flush()
             await session.refresh(profile)
-            return {
-                "vendor_id": profile.vendor_id,
-                "segment": profile.segment,
-                "preferences": profile.preferences,
-                "behavior_patterns": profile.behavior_patterns,
-                "learning_rate": profile.learning_rate,
-                "confidence_score": profile.confidence_score,
-                "created_at": profile.created_at,
-                "updated_at": profile.updated_at
-            }
+            return profile
+        
+        profile = await self._write(create)
+        return {
+            "vendor_id": profile.vendor_id,
+            "segment": profile.segment,
+            "preferences": profile.preferences,
+            "behavior_patterns": profile.behavior_patterns,
+            "learning_rate": profile.learning_rate,
+            "confidence_score": profile.confidence_score,
+            "created_at": profile.created_at,
+            "updated_at": profile.updated_at
+        }
     
     async def update_user_profile(self, vendor_id: str, updates: Dict[str, Any]) -> bool:
         """Update user profile"""
-        async with self.async_session() as session:
+        async def apply(session: AsyncSession) -> bool:
             result = await session.execute(
                 update(UserProfile)
                 .where(UserProfile.vendor_id == vendor_id)
                 .values(**updates, updated_at=datetime.utcnow())
             )
-            await session.commit()
             return result.rowcount > 0
+        
+        # Serialized with profile_transaction, which would otherwise write back what it read before this
+        async with self._profile_lock(vendor_id):
+            return await self._write(apply)
+    
+    def _profile_lock(self, vendor_id: str) -> asyncio.Lock:
+        lock = self._profile_locks.get(vendor_id)
+        if lock is None:
+            lock = self._profile_locks[vendor_id] = asyncio.Lock()
+        return lock
+    
+    @asynccontextmanager
+    async def profile_transaction(self, vendor_id: str, performance_days: Optional[int] = None):
+        """
+        Load (or create) a profile, let the caller mutate it in memory, then persist it in the same transaction
+        
+        The profile is read FOR UPDATE (on SQLite, under the write lock the writer takes), so
+        concurrent updates from other workers wait for this one instead of overwriting it. The
+        body must not write to the database itself: on SQLite that write would queue behind this one.
+        """
+        loop = asyncio.get_running_loop()
+        loaded = loop.create_future()
+        finished = loop.create_future()
+        
+        async def transact(session: AsyncSession):
+            result = await session.execute(
+                select(UserProfile).where(UserProfile.vendor_id == vendor_id).with_for_update()
+            )
+            profile = result.scalar_one_or_none()
+            if not profile:
+                profile = UserProfile(
+                    vendor_id=vendor_id,
+                    segment="new_vendor",
+                    preferences={},
+                    behavior_patterns={},
+                    learning_rate=0.1,
+                    confidence_score=0.0
+                )
+                session.add(profile)
+            
+            state = {
+                "vendor_id": vendor_id,
+                "segment": profile.segment,
+                "preferences": copy.deepcopy(profile.preferences or {}),
+                "behavior_patterns": copy.deepcopy(profile.behavior_patterns or {}),
+                "learning_rate": profile.learning_rate if profile.learning_rate is not None else 0.1,
+                "confidence_score": profile.confidence_score or 0.0,
+                "performance_history": []
+            }
+            if performance_days is not None:
+                since_date = datetime.utcnow() - timedelta(days=performance_days)
+                history = await session.execute(
+                    select(PerformanceHistory.revenue, PerformanceHistory.timestamp)
+                    .where(
+                        PerformanceHistory.vendor_id == vendor_id,
+                        PerformanceHistory.timestamp >= since_date
+                    )
+                    .order_by(PerformanceHistory.timestamp.desc())
+                )
+                state["performance_history"] = [
+                    {"revenue": revenue, "timestamp": timestamp} for revenue, timestamp in history
+                ]
+            
+            loaded.set_result(state)
+            # Raises ProfileTransactionAborted if the caller's body failed, rolling this back
+            await finished
+            
+            # Fresh objects so the JSON columns are flagged dirty
+            profile.segment = state["segment"]
+            profile.preferences = state["preferences"]
+            profile.behavior_patterns = state["behavior_patterns"]
+            profile.confidence_score = state["confidence_score"]
+            profile.updated_at = datetime.utcnow()
+        
+        # In-process callers queue here rather than each holding a connection on the row lock
+        async with self._profile_lock(vendor_id):
+            write = asyncio.ensure_future(self._write(transact))
+            try:
+                await asyncio.wait({loaded, write}, return_when=asyncio.FIRST_COMPLETED)
+                if not loaded.done():
+                    # Failed before the profile was read
+                    await write
+                yield loaded.result()
+            except BaseException:
+                if not finished.done():
+                    finished.set_exception(ProfileTransactionAborted(vendor_id))
+                await asyncio.gather(write, return_exceptions=True)
+                raise
+            finished.set_result(None)
+            await write
     
     # Interaction Tracking
     async def log_interaction(self, vendor_id: str, interaction_type: str, 
                             interaction_data: Dict[str, Any], session_id: str = None) -> bool:
         """Log user interaction"""
-        async with self.async_session() as session:
-            interaction = UserInteraction(
+        async def add(session: AsyncSession) -> bool:
+            session.add(UserInteraction(
                 vendor_id=vendor_id,
                 interaction_type=interaction_type,
                 interaction_data=interaction_data,
                 session_id=session_id
-            )
-            session.add(interaction)
-            await session.commit()
+            ))
             return True
+        
+        return await self._write(add)
+    
+    def queue_interaction(self, vendor_id: str, interaction_type: str,
+                          interaction_data: Dict[str, Any], session_id: str = None):
+        """Buffer an interaction; buffered rows are written in batches by a background flusher"""
+        self._interaction_buffer.append({
+            "vendor_id": vendor_id,
+            "interaction_type": interaction_type,
+            "interaction_data": interaction_data,
+            "session_id": session_id,
+            "timestamp": datetime.utcnow()
+        })
+        if self._interaction_flusher is None or self._interaction_flusher.done():
+            self._interaction_flusher = asyncio.create_task(self._run_interaction_flusher())
+        elif len(self._interaction_buffer) >= self.interaction_batch_size:
+            task = asyncio.create_task(self.flush_interactions())
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+    
+    async def flush_interactions(self) -> int:
+        """Write all buffered interactions with a single multi-row insert"""
+        if not self._interaction_buffer:
+            return 0
+        batch, self._interaction_buffer = self._interaction_buffer, []
+        try:
+            await self._write(lambda session: session.execute(insert(UserInteraction), batch))
+        except Exception as e:
+            self._interaction_flush_failures += 1
+            if self._interaction_flush_failures < INTERACTION_FLUSH_RETRIES:
+                logger.error(f"Failed to flush {len(batch)} interactions: {e}")
+                merged = batch + self._interaction_buffer
+                self.dropped_interactions += max(0, len(merged) - MAX_BUFFERED_INTERACTIONS)
+                self._interaction_buffer = merged[-MAX_BUFFERED_INTERACTIONS:]
+                return 0
+            return await self._flush_interactions_individually(batch, e)
+        self._interaction_flush_failures = 0
+        return len(batch)
+    
+    async def _flush_interactions_individually(self, batch: List[Dict[str, Any]], error: Exception) -> int:
+        """Last attempt for a batch that keeps failing: one write per row, so a bad row only loses itself"""
+        self._interaction_flush_failures = 0
+        results = await asyncio.gather(
+            *(self._write(lambda session, row=row: session.execute(insert(UserInteraction), [row])) for row in batch),
+            return_exceptions=True
+        )
+        failed = sum(1 for result in results if isinstance(result, Exception))
+        if failed:
+            self.dropped_interactions += failed
+            logger.error(
+                f"Dropped {failed} of {len(batch)} interactions after {INTERACTION_FLUSH_RETRIES} failed flushes: {error}"
+            )
+        return len(batch) - failed
+    
+    async def _run_interaction_flusher(self):
+        while self._interaction_buffer:
+            await asyncio.sleep(self.interaction_flush_interval)
+            await self.flush_interactions()
+    
+    async def close(self):
+        """Flush buffered writes and dispose of the engine"""
+        if self._interaction_flusher and not self._interaction_flusher.done():
+            self._interaction_flusher.cancel()
+        await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+        await self.flush_interactions()
+        if self._writer and not self._writer.done():
+            await self._write_queue.join()
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+        await self.engine.dispose()
+        if self.write_engine is not self.engine:
+            await self.write_engine.dispose()
     
     async def get_user_interactions(self, vendor_id: str, limit: int = 100) -> List[Dict[str, Any]]:
         """Get user interactions"""
@@ -131,8 +436,8 @@ class DatabaseService:
     # Performance History
     async def log_performance(self, vendor_id: str, performance_data: Dict[str, Any]) -> bool:
         """Log performance metrics"""
-        async with self.async_session() as session:
-            performance = PerformanceHistory(
+        async def add(session: AsyncSession) -> bool:
+            session.add(PerformanceHistory(
                 vendor_id=vendor_id,
                 revenue=performance_data.get("revenue", 0.0),
                 orders=performance_data.get("orders", 0),
@@ -141,10 +446,10 @@ class DatabaseService:
                 avg_order_value=performance_data.get("avg_order_value", 0.0),
                 low_stock_count=performance_data.get("low_stock_count", 0),
                 pending_orders=performance_data.get("pending_orders", 0)
-            )
-            session.add(performance)
-            await session.commit()
+            ))
             return True
+        
+        return await self._write(add)
     
     async def get_performance_history(self, vendor_id: str, days: int = 30) -> List[Dict[str, Any]]:
         """Get performance history"""
@@ -177,8 +482,8 @@ class DatabaseService:
     # Recommendations
     async def save_recommendation(self, vendor_id: str, recommendation_data: Dict[str, Any]) -> bool:
         """Save recommendation"""
-        async with self.async_session() as session:
-            recommendation = Recommendation(
+        async def add(session: AsyncSession) -> bool:
+            session.add(Recommendation(
                 vendor_id=vendor_id,
                 recommendation_id=recommendation_data["id"],
                 type=recommendation_data["type"],
@@ -192,10 +497,10 @@ class DatabaseService:
                 success_probability=recommendation_data["success_probability"],
                 personalized_reason=recommendation_data["personalized_reason"],
                 action_items=recommendation_data.get("action_items", [])
-            )
-            session.add(recommendation)
-            await session.commit()
+            ))
             return True
+        
+        return await self._write(add)
     
     async def get_recommendations(self, vendor_id: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recommendations for vendor"""
@@ -230,8 +535,8 @@ class DatabaseService:
     # Bundle Recommendations
     async def save_bundle_recommendation(self, vendor_id: str, bundle_data: Dict[str, Any]) -> bool:
         """Save bundle recommendation"""
-        async with self.async_session() as session:
-            bundle = BundleRecommendation(
+        async def add(session: AsyncSession) -> bool:
+            session.add(BundleRecommendation(
                 vendor_id=vendor_id,
                 bundle_id=bundle_data["id"],
                 bundle_name=bundle_data["bundle_name"],
@@ -243,10 +548,10 @@ class DatabaseService:
                 market_trend=bundle_data["market_trend"],
                 confidence=bundle_data["confidence"],
                 personalized_factors=bundle_data.get("personalized_factors", [])
-            )
-            session.add(bundle)
-            await session.commit()
+            ))
             return True
+        
+        return await self._write(add)
     
     async def get_bundle_recommendations(self, vendor_id: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Get bundle recommendations for vendor"""
@@ -276,21 +581,59 @@ class DatabaseService:
                 for b in bundles
             ]
     
+    # Daily Insights
+    async def save_daily_insights(self, vendor_id: str, insights: Dict[str, Any], source_fingerprint: str) -> bool:
+        """Insert or replace the precomputed daily insights for a vendor"""
+        async def upsert(session: AsyncSession) -> bool:
+            result = await session.execute(
+                select(DailyInsights).where(DailyInsights.vendor_id == vendor_id)
+            )
+            record = result.scalar_one_or_none()
+            if record:
+                record.insights = insights
+                record.source_fingerprint = source_fingerprint
+                record.generated_at = datetime.utcnow()
+            else:
+                session.add(DailyInsights(
+                    vendor_id=vendor_id,
+                    insights=insights,
+                    source_fingerprint=source_fingerprint
+                ))
+            return True
+        
+        return await self._write(upsert)
+    
+    async def get_daily_insights(self, vendor_id: str) -> Optional[Dict[str, Any]]:
+        """Get the precomputed daily insights for a vendor"""
+        async with self.async_session() as session:
+            result = await session.execute(
+                select(DailyInsights).where(DailyInsights.vendor_id == vendor_id)
+            )
+            record = result.scalar_one_or_none()
+            if record:
+                return {
+                    "vendor_id": record.vendor_id,
+                    "insights": record.insights,
+                    "source_fingerprint": record.source_fingerprint,
+                    "generated_at": record.generated_at
+                }
+            return None
+    
     # Conversation History
     async def save_conversation(self, session_id: str, vendor_id: str, role: str, 
                               message: str, function_calls: List[Dict] = None) -> bool:
         """Save conversation message"""
-        async with self.async_session() as session:
-            conversation = ConversationHistory(
+        async def add(session: AsyncSession) -> bool:
+            session.add(ConversationHistory(
                 session_id=session_id,
                 vendor_id=vendor_id,
                 role=role,
                 message=message,
                 function_calls=function_calls or []
-            )
-            session.add(conversation)
-            await session.commit()
+            ))
             return True
+        
+        return await self._write(add)
     
     async def get_conversation_history(self, session_id: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Get conversation history"""
@@ -335,17 +678,18 @@ class DatabaseService:
             )
             performance_history = performance_result.scalars().all()
             
-            # Get interaction count
-            interaction_result = await session.execute(
-                select(UserInteraction).where(UserInteraction.vendor_id == vendor_id)
+            # Live interactions plus the daily rollups of purged ones
+            live_interactions = await session.scalar(
+                select(func.count(UserInteraction.id)).where(UserInteraction.vendor_id == vendor_id)
+            )
+            rolled_up_interactions = await session.scalar(
+                select(func.coalesce(func.sum(InteractionDailyAggregate.count), 0))
+                .where(InteractionDailyAggregate.vendor_id == vendor_id)
             )
-            interactions = interaction_result.scalars().all()
             
-            # Get recommendation count
-            recommendation_result = await session.execute(
-                select(Recommendation).where(Recommendation.vendor_id == vendor_id)
+            recommendation_count = await session.scalar(
+                select(func.count(Recommendation.id)).where(Recommendation.vendor_id == vendor_id)
             )
-            recommendations = recommendation_result.scalars().all()
             
             return {
                 "profile": {
@@ -356,8 +700,8 @@ class DatabaseService:
                     "updated_at": profile.updated_at
                 },
                 "performance_history_count": len(performance_history),
-                "interaction_count": len(interactions),
-                "recommendation_count": len(recommendations),
+                "interaction_count": live_interactions + rolled_up_interactions,
+                "recommendation_count": recommendation_count,
                 "recent_performance": [
                     {
                         "revenue": p.revenue,
@@ -368,23 +712,131 @@ class DatabaseService:
                 ]
             }
     
-    async def cleanup_old_data(self, days: int = 90):
-        """Clean up old data"""
+    async def cleanup_old_data(self, days: int = 90, batch_size: int = 1000,
+                               pause: float = 0.1, rollup: bool = True) -> Dict[str, int]:
+        """Clean up old data in bounded primary-key batches so tables are never locked for long"""
+        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        
+        deleted = {
+            "interactions": await self._purge_in_batches(
+                UserInteraction, cutoff_date, batch_size, pause,
+                before_delete=self._rollup_interactions if rollup else None
+            ),
+            "conversations": await self._purge_in_batches(
+                ConversationHistory, cutoff_date, batch_size, pause
+            )
+        }
+        logger.info(f"Cleaned up data older than {days} days: {deleted}")
+        return deleted
+    
+    async def _purge_in_batches(self, model, cutoff_date: datetime, batch_size: int,
+                                pause: float, before_delete=None) -> int:
+        """Delete rows older than the cutoff one id range at a time, committing each batch"""
+        table = model.__tablename__
+        progress = self.retention_progress.setdefault(table, {"last_id": 0, "deleted": 0})
+        
         async with self.async_session() as session:
-            cutoff_date = datetime.utcnow() - timedelta(days=days)
+            watermark = (await session.execute(
+                select(RetentionWatermark).where(RetentionWatermark.table_name == table)
+            )).scalar_one_or_none()
+        if watermark and watermark.finished_at is None:
+            # A purge was interrupted (e.g. by a restart); finish it against its own cutoff
+            cutoff_date = watermark.cutoff
+            progress.update(last_id=watermark.last_id, deleted=watermark.deleted,
+                            started_at=watermark.started_at, finished_at=None)
+            logger.info(f"Retention {table}: resuming after id {watermark.last_id}")
+        else:
+            progress.update(last_id=0, deleted=0, started_at=datetime.utcnow(), finished_at=None)
+            await self._write(lambda session: self._save_watermark(
+                session, table, cutoff=cutoff_date, last_id=0, deleted=0,
+                started_at=progress["started_at"], finished_at=None
+            ))
+        
+        async def purge_batch(session: AsyncSession):
+            ids = (await session.execute(
+                select(model.id)
+                .where(model.timestamp < cutoff_date, model.id > progress["last_id"])
+                .order_by(model.id)
+                .limit(batch_size)
+            )).scalars().all()
+            if not ids:
+                return None
             
-            # Clean old interactions
-            await session.execute(
-                delete(UserInteraction).where(UserInteraction.timestamp < cutoff_date)
+            low, high = ids[0], ids[-1]
+            in_range = (model.id >= low, model.id <= high, model.timestamp < cutoff_date)
+            if before_delete:
+                await before_delete(session, in_range)
+            result = await session.execute(delete(model).where(*in_range))
+            # Committed with the delete, so the watermark never runs ahead of the data
+            await self._save_watermark(
+                session, table, last_id=high, deleted=progress["deleted"] + result.rowcount
             )
+            return high, result.rowcount
+        
+        while True:
+            # Queued like any other write, so chat traffic interleaves with the purge
+            purged = await self._write(purge_batch)
+            if purged is None:
+                break
+            high, rowcount = purged
             
-            # Clean old conversations
-            await session.execute(
-                delete(ConversationHistory).where(ConversationHistory.timestamp < cutoff_date)
+            progress["last_id"] = high
+            progress["deleted"] += rowcount
+            logger.info(f"Retention {table}: deleted {progress['deleted']} rows (through id {high})")
+            await asyncio.sleep(pause)
+        
+        progress["finished_at"] = datetime.utcnow()
+        await self._write(lambda session: self._save_watermark(
+            session, table, finished_at=progress["finished_at"]
+        ))
+        return progress["deleted"]
+    
+    async def _save_watermark(self, session: AsyncSession, table: str, **values):
+        watermark = (await session.execute(
+            select(RetentionWatermark).where(RetentionWatermark.table_name == table)
+        )).scalar_one_or_none()
+        if watermark is None:
+            watermark = RetentionWatermark(table_name=table)
+            session.add(watermark)
+        for key, value in values.items():
+            setattr(watermark, key, value)
+    
+    async def _rollup_interactions(self, session: AsyncSession, in_range):
+        """Fold a batch of interactions into daily per-vendor, per-type counts"""
+        day = func.date(UserInteraction.timestamp)
+        rows = (await session.execute(
+            select(UserInteraction.vendor_id, day, UserInteraction.interaction_type, func.count(UserInteraction.id))
+            .where(*in_range)
+            .group_by(UserInteraction.vendor_id, day, UserInteraction.interaction_type)
+        )).all()
+        
+        for vendor_id, bucket, interaction_type, count in rows:
+            if isinstance(bucket, str):
+                bucket = datetime.strptime(bucket, "%Y-%m-%d").date()
+            result = await session.execute(
+                update(InteractionDailyAggregate)
+                .where(
+                    InteractionDailyAggregate.vendor_id == vendor_id,
+                    InteractionDailyAggregate.day == bucket,
+                    InteractionDailyAggregate.interaction_type == interaction_type
+                )
+                .values(count=InteractionDailyAggregate.count + count)
             )
-            
-            await session.commit()
-            logger.info(f"Cleaned up data older than {days} days")
+            if result.rowcount == 0:
+                session.add(InteractionDailyAggregate(
+                    vendor_id=vendor_id, day=bucket, interaction_type=interaction_type, count=count
+                ))
+        await session.flush()
+    
+    async def run_retention(self, days: int = 90, interval: int = 3600, batch_size: int = 1000,
+                            pause: float = 0.1, rollup: bool = True):
+        """Background loop that keeps applying the retention policy"""
+        while True:
+            try:
+                await self.cleanup_old_data(days, batch_size, pause, rollup)
+            except Exception as e:
+                logger.error(f"Retention run failed: {e}")
+            await asyncio.sleep(interval)
 
 # Global database service instance
 db_service = DatabaseService()
@@ -14,12 +14,16 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from vendor_concierge import vendor_concierge
+from database_service import db_service
 
 load_dotenv()
 
 # Configuration
 BACKEND_BASE_URL = "http://localhost:8000"
 AI_SERVICE_PORT = 8002
+# Retention is off unless RETENTION_DAYS is set
+RETENTION_DAYS = int(os.environ["RETENTION_DAYS"]) if os.environ.get("RETENTION_DAYS") else None
+RETENTION_INTERVAL = int(os.environ.get("RETENTION_INTERVAL", "3600"))
 
 # In-memory conversation storage (in production, use Redis or database)
 conversation_history = {}
@@ -412,7 +416,7 @@ async def getVendorDailyInsights(user_token: Optional[str] = None) -> Dict[str,
         return {"error": "Authentication required for daily insights"}
     
     try:
-        insights = await vendor_concierge.generate_daily_insights(user_token)
+        insights = await vendor_concierge.get_daily_insights(user_token)
         return {
             "daily_insights": insights,
             "status": "success",
@@ -507,8 +511,10 @@ async def getVendorPersonalizedInsights(user_token: Optional[str] = None) -> Dic
     
     try:
         performance = await vendor_concierge.analyze_vendor_performance(user_token)
-        bundles = await vendor_concierge.generate_bundle_recommendations(user_token)
-        recommendations = await vendor_concierge.generate_business_recommendations(user_token)
+        bundles, recommendations = await asyncio.gather(
+            vendor_concierge.generate_bundle_recommendations(user_token),
+            vendor_concierge.generate_business_recommendations(user_token, performance)
+        )
         
         return {
             "performance": performance,
@@ -1239,6 +1245,24 @@ app = FastAPI(
     version="1.0.0"
 )
 
+background_tasks: List[asyncio.Task] = []
+
+@app.on_event("startup")
+async def start_background_jobs():
+    """Start the retention job, if enabled"""
+    await db_service.init_db()
+    if RETENTION_DAYS is not None:
+        background_tasks.append(asyncio.create_task(
+            db_service.run_retention(RETENTION_DAYS, RETENTION_INTERVAL)
+        ))
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    """Cancel background jobs"""
+    for task in background_tasks:
+        task.cancel()
+    await db_service.close()
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
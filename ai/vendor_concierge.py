@@ -4,6 +4,7 @@ Enhanced with personalization, recommendations, and predictive capabilities
 """
 
 import asyncio
+import hashlib
 import json
 import logging
 import numpy as np
@@ -12,7 +13,7 @@ from datetime import datetime, timedelta
 from collections import defaultdict, deque
 import httpx
 import os
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from enum import Enum
 from database_service import db_service
 
@@ -20,6 +21,17 @@ from database_service import db_service
 logger = logging.getLogger("vendor_concierge")
 logging.basicConfig(level=logging.INFO)
 
+# Stored daily insights are served for at most this long, and never past the day they were built
+DAILY_INSIGHTS_TTL = int(os.getenv("DAILY_INSIGHTS_TTL", "3600"))
+
+def unexpected_status(response: httpx.Response) -> httpx.HTTPStatusError:
+    """Error for any backend reply other than 200, including 204 and other 2xx without the expected body"""
+    return httpx.HTTPStatusError(
+        f"Unexpected status {response.status_code} from {response.request.url}",
+        request=response.request,
+        response=response
+    )
+
 class UserSegment(Enum):
     NEW_VENDOR = "new_vendor"
     GROWING_VENDOR = "growing_vendor"
@@ -75,6 +87,31 @@ class BundleRecommendation:
     confidence: float
     personalized_factors: List[str]
 
+@dataclass
+class VendorDataSnapshot:
+    vendor_id: str
+    analytics: Dict[str, Any]
+    products: List[Dict[str, Any]]
+    active_products: List[Dict[str, Any]]
+    orders: List[Dict[str, Any]]
+    low_stock: List[Dict[str, Any]]
+    fetched_at: datetime
+    # Sources whose fetch failed; they are empty here and the snapshot is never cached
+    failed: List[str] = field(default_factory=list)
+    
+    def fingerprint(self) -> str:
+        """Hash of the order and inventory state that daily insights depend on"""
+        state = {
+            "orders": sorted(
+                (str(o.get("id")), o.get("fulfillment_status"), o.get("total_amount")) for o in self.orders
+            ),
+            "low_stock": sorted(
+                (str(p.get("id")), p.get("quantity_available", p.get("quantity"))) for p in self.low_stock
+            ),
+            "products": sorted((str(p.get("id")), p.get("status")) for p in self.products)
+        }
+        return hashlib.sha1(json.dumps(state, default=str).encode()).hexdigest()
+
 class PersonalizationEngine:
     def __init__(self):
         self.recommendation_cache: Dict[str, List[Recommendation]] = {}
@@ -99,36 +136,23 @@ class PersonalizationEngine:
     
     async def update_user_profile(self, vendor_id: str, interaction: Dict[str, Any]):
         """Update user profile based on new interaction"""
-        # Log the interaction to database
-        await db_service.log_interaction(
+        # Interaction log writes are batched in the background
+        db_service.queue_interaction(
             vendor_id=vendor_id,
             interaction_type=interaction.get("type", "general"),
             interaction_data=interaction,
             session_id=interaction.get("session_id")
         )
         
-        # Get or create user profile
-        profile_data = await db_service.get_user_profile(vendor_id)
-        if not profile_data:
-            profile_data = await db_service.create_user_profile(vendor_id)
-        
-        # Update behavior patterns
-        await self._update_behavior_patterns(vendor_id, interaction)
-        
-        # Update preferences
-        await self._update_preferences(vendor_id, interaction)
-        
-        # Update segment based on performance
-        await self._update_user_segment(vendor_id)
+        # Load the profile once, apply every update in memory, persist in one transaction
+        async with db_service.profile_transaction(vendor_id, performance_days=90) as profile:
+            self._update_behavior_patterns(profile, interaction)
+            self._update_preferences(profile, interaction)
+            self._update_user_segment(profile)
     
-    async def _update_behavior_patterns(self, vendor_id: str, interaction: Dict[str, Any]):
+    def _update_behavior_patterns(self, profile: Dict[str, Any], interaction: Dict[str, Any]):
         """Update user behavior patterns based on interaction"""
-        # Get current profile
-        profile_data = await db_service.get_user_profile(vendor_id)
-        if not profile_data:
-            return
-        
-        behavior_patterns = profile_data.get("behavior_patterns", {})
+        behavior_patterns = profile["behavior_patterns"]
         interaction_type = interaction.get("type", "general")
         
         # Update behavior patterns
@@ -149,22 +173,14 @@ class PersonalizationEngine:
                 behavior_patterns["feature_usage"] = {}
             feature = interaction["feature_usage"]
             behavior_patterns["feature_usage"][feature] = behavior_patterns["feature_usage"].get(feature, 0) + 1
-        
-        # Update profile with new behavior patterns
-        await db_service.update_user_profile(vendor_id, {"behavior_patterns": behavior_patterns})
     
-    async def _update_preferences(self, vendor_id: str, interaction: Dict[str, Any]):
+    def _update_preferences(self, profile: Dict[str, Any], interaction: Dict[str, Any]):
         """Update user preferences based on interaction"""
         if "preferences" not in interaction:
             return
         
-        # Get current profile
-        profile_data = await db_service.get_user_profile(vendor_id)
-        if not profile_data:
-            return
-        
-        preferences = profile_data.get("preferences", {})
-        learning_rate = profile_data.get("learning_rate", 0.1)
+        preferences = profile["preferences"]
+        learning_rate = profile["learning_rate"]
         
         # Update preferences
         for key, value in interaction["preferences"].items():
@@ -177,14 +193,10 @@ class PersonalizationEngine:
                     preferences[key] = (1 - learning_rate) * current + learning_rate * value
                 else:
                     preferences[key] = value
-        
-        # Update profile with new preferences
-        await db_service.update_user_profile(vendor_id, {"preferences": preferences})
     
-    async def _update_user_segment(self, vendor_id: str):
+    def _update_user_segment(self, profile: Dict[str, Any]):
         """Update user segment based on performance and behavior"""
-        # Get performance history
-        performance_history = await db_service.get_performance_history(vendor_id, days=90)
+        performance_history = profile["performance_history"]
         if not performance_history:
             return
         
@@ -203,10 +215,7 @@ class PersonalizationEngine:
         else:
             new_segment = "premium_vendor"
         
-        # Update segment if changed
-        profile_data = await db_service.get_user_profile(vendor_id)
-        if profile_data and profile_data.get("segment") != new_segment:
-            await db_service.update_user_profile(vendor_id, {"segment": new_segment})
+        profile["segment"] = new_segment
     
     def _calculate_growth_rate(self, performance_history: List[Dict[str, Any]]) -> float:
         """Calculate growth rate from performance history"""
@@ -562,14 +571,74 @@ class RecommendationEngine:
         return bundles[:5]  # Return top 5 bundle recommendations
 
 class VendorConciergeService:
-    def __init__(self, backend_url: str = "http://localhost:8000"):
+    def __init__(self, backend_url: str = "http://localhost:8000", snapshot_ttl: int = 60):
         self.backend_url = backend_url
         self.client = httpx.AsyncClient(timeout=30.0)
         self.personalization_engine = PersonalizationEngine()
         self.recommendation_engine = RecommendationEngine(self.personalization_engine)
+        self.snapshot_ttl = timedelta(seconds=snapshot_ttl)
+        self.snapshot_cache: Dict[Tuple[str, bool], VendorDataSnapshot] = {}
+        self._snapshot_loads: Dict[Tuple[str, bool], asyncio.Task] = {}
+    
+    async def load_vendor_snapshot(self, vendor_id: str, force_refresh: bool = False,
+                                   record: bool = True) -> VendorDataSnapshot:
+        """
+        Fetch analytics, products, orders and low stock once, concurrently, and cache them briefly
+        
+        record=False fetches without the profile, interaction and performance writes the
+        getters make for a vendor's own requests. Loads are cached per (vendor_id, record), so a
+        record=False snapshot never stands in for a load that should have recorded.
+        """
+        key = (vendor_id, record)
+        cached = self.snapshot_cache.get(key)
+        if cached and not force_refresh and datetime.now() - cached.fetched_at < self.snapshot_ttl:
+            return cached
+        
+        # Callers arriving while a load is in flight share it instead of refetching
+        task = self._snapshot_loads.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_vendor_snapshot(vendor_id, record))
+            self._snapshot_loads[key] = task
+            task.add_done_callback(lambda _: self._snapshot_loads.pop(key, None))
+        return await asyncio.shield(task)
+    
+    async def _fetch_vendor_snapshot(self, vendor_id: str, record: bool = True) -> VendorDataSnapshot:
+        # Create the profile up front so the concurrent fetchers don't race to insert it
+        if record and not await db_service.get_user_profile(vendor_id):
+            await db_service.create_user_profile(vendor_id)
+        
+        sources = {
+            "analytics": self.get_vendor_analytics(vendor_id, strict=True, record=record),
+            "products": self.get_vendor_products(vendor_id, strict=True, record=record),
+            # Filtered by the backend: the catalog fetch is capped at 100 products
+            "active_products": self.get_vendor_products(vendor_id, "active", strict=True, record=record),
+            "orders": self.get_vendor_orders(vendor_id, strict=True, record=record),
+            "low_stock": self.get_low_stock_products(vendor_id, strict=True)
+        }
+        results = dict(zip(sources, await asyncio.gather(*sources.values(), return_exceptions=True)))
+        failed = [name for name, result in results.items() if isinstance(result, BaseException)]
+        for name in failed:
+            results[name] = {} if name == "analytics" else []
+        
+        snapshot = VendorDataSnapshot(
+            vendor_id=vendor_id,
+            fetched_at=datetime.now(),
+            failed=failed,
+            **results
+        )
+        # An empty result from a failed fetch must not be served for the whole TTL
+        if not failed:
+            self.snapshot_cache[(vendor_id, record)] = snapshot
+        return snapshot
     
-    async def get_vendor_analytics(self, vendor_id: str, days: int = 30) -> Dict[str, Any]:
-        """Get comprehensive vendor analytics with personalization"""
+    def invalidate_vendor_snapshot(self, vendor_id: str):
+        """Drop the cached snapshot so the next request refetches"""
+        for record in (True, False):
+            self.snapshot_cache.pop((vendor_id, record), None)
+    
+    async def get_vendor_analytics(self, vendor_id: str, days: int = 30, strict: bool = False,
+                                   record: bool = True) -> Dict[str, Any]:
+        """Get comprehensive vendor analytics with personalization; strict raises instead of returning {} on failure"""
         try:
             response = await self.client.get(
                 f"{self.backend_url}/supplier/products/analytics/overview",
@@ -580,19 +649,24 @@ class VendorConciergeService:
                 analytics = response.json()
                 
                 # Update user profile with analytics data
-                await self.personalization_engine.update_user_profile(vendor_id, {
-                    "type": "analytics_view",
-                    "data": analytics,
-                    "timestamp": datetime.now().isoformat()
-                })
+                if record:
+                    await self.personalization_engine.update_user_profile(vendor_id, {
+                        "type": "analytics_view",
+                        "data": analytics,
+                        "timestamp": datetime.now().isoformat()
+                    })
                 
                 return analytics
+            raise unexpected_status(response)
         except Exception as e:
             logger.error(f"Failed to get vendor analytics: {e}")
+            if strict:
+                raise
         return {}
     
-    async def get_vendor_products(self, vendor_id: str, status: str = "all") -> List[Dict[str, Any]]:
-        """Get vendor's product catalog with enhanced data"""
+    async def get_vendor_products(self, vendor_id: str, status: str = "all", strict: bool = False,
+                                  record: bool = True) -> List[Dict[str, Any]]:
+        """Get vendor's product catalog with enhanced data; strict raises instead of returning [] on failure"""
         try:
             response = await self.client.get(
                 f"{self.backend_url}/supplier/products/",
@@ -604,20 +678,25 @@ class VendorConciergeService:
                 products = data.get("items", [])
                 
                 # Update user profile with product data
-                await self.personalization_engine.update_user_profile(vendor_id, {
-                    "type": "product_view",
-                    "product_count": len(products),
-                    "status": status,
-                    "timestamp": datetime.now().isoformat()
-                })
+                if record:
+                    await self.personalization_engine.update_user_profile(vendor_id, {
+                        "type": "product_view",
+                        "product_count": len(products),
+                        "status": status,
+                        "timestamp": datetime.now().isoformat()
+                    })
                 
                 return products
+            raise unexpected_status(response)
         except Exception as e:
             logger.error(f"Failed to get vendor products: {e}")
+            if strict:
+                raise
         return []
     
-    async def get_vendor_orders(self, vendor_id: str, days: int = 30) -> List[Dict[str, Any]]:
-        """Get recent vendor orders with performance tracking"""
+    async def get_vendor_orders(self, vendor_id: str, days: int = 30, strict: bool = False,
+                                record: bool = True) -> List[Dict[str, Any]]:
+        """Get recent vendor orders with performance tracking; strict raises instead of returning [] on failure"""
         try:
             response = await self.client.get(
                 f"{self.backend_url}/supplier/orders/orders",
@@ -629,7 +708,7 @@ class VendorConciergeService:
                 orders = data.get("items", [])
                 
                 # Update performance history
-                if orders:
+                if orders and record:
                     total_revenue = sum(order.get("total_amount", 0) for order in orders)
                     await self.personalization_engine.update_user_profile(vendor_id, {
                         "type": "performance_update",
@@ -650,12 +729,15 @@ class VendorConciergeService:
                     })
                 
                 return orders
+            raise unexpected_status(response)
         except Exception as e:
             logger.error(f"Failed to get vendor orders: {e}")
+            if strict:
+                raise
         return []
     
-    async def get_low_stock_products(self, vendor_id: str) -> List[Dict[str, Any]]:
-        """Get products with low stock"""
+    async def get_low_stock_products(self, vendor_id: str, strict: bool = False) -> List[Dict[str, Any]]:
+        """Get products with low stock; strict raises instead of returning [] on failure"""
         try:
             response = await self.client.get(
                 f"{self.backend_url}/supplier/products/inventory/low-stock",
@@ -664,16 +746,21 @@ class VendorConciergeService:
             if response.status_code == 200:
                 data = response.json()
                 return data.get("low_stock_products", [])
+            raise unexpected_status(response)
         except Exception as e:
             logger.error(f"Failed to get low stock products: {e}")
+            if strict:
+                raise
         return []
     
-    async def analyze_vendor_performance(self, vendor_id: str) -> Dict[str, Any]:
+    async def analyze_vendor_performance(self, vendor_id: str, snapshot: Optional[VendorDataSnapshot] = None) -> Dict[str, Any]:
         """Comprehensive vendor performance analysis with personalization"""
-        analytics = await self.get_vendor_analytics(vendor_id)
-        products = await self.get_vendor_products(vendor_id)
-        orders = await self.get_vendor_orders(vendor_id)
-        low_stock = await self.get_low_stock_products(vendor_id)
+        if snapshot is None:
+            snapshot = await self.load_vendor_snapshot(vendor_id)
+        analytics = snapshot.analytics
+        products = snapshot.products
+        orders = snapshot.orders
+        low_stock = snapshot.low_stock
         
         # Calculate key metrics
         total_products = len(products)
@@ -701,7 +788,7 @@ class VendorConciergeService:
             insights.append(f"Based on your {segment} status, here are personalized insights:")
         
         # Product performance insights
-        if active_products / total_products < 0.8:
+        if total_products and active_products / total_products < 0.8:
             insights.append("Low product activation rate - consider reviewing inactive products")
         
         # Revenue insights
@@ -739,16 +826,18 @@ class VendorConciergeService:
             }
         }
     
-    async def generate_business_recommendations(self, vendor_id: str) -> List[Dict[str, Any]]:
+    async def generate_business_recommendations(self, vendor_id: str, performance: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Generate AI-powered business recommendations with personalization"""
-        context = await self.analyze_vendor_performance(vendor_id)
+        context = performance if performance is not None else await self.analyze_vendor_performance(vendor_id)
         recommendations = await self.recommendation_engine.generate_personalized_recommendations(vendor_id, context)
         
         return [asdict(rec) for rec in recommendations]
     
-    async def generate_bundle_recommendations(self, vendor_id: str) -> List[Dict[str, Any]]:
+    async def generate_bundle_recommendations(self, vendor_id: str, snapshot: Optional[VendorDataSnapshot] = None) -> List[Dict[str, Any]]:
         """Generate intelligent product bundle recommendations"""
-        products = await self.get_vendor_products(vendor_id, "active")
+        if snapshot is None:
+            snapshot = await self.load_vendor_snapshot(vendor_id)
+        products = snapshot.active_products
         bundles = await self.recommendation_engine.generate_bundle_recommendations(vendor_id, products)
         
         return [asdict(bundle) for bundle in bundles]
@@ -789,15 +878,20 @@ class VendorConciergeService:
                 "Based on your product categories, consider FSC certification",
                 "Your customer base values sustainability - highlight eco-friendly features",
                 "Consider bundling sustainable products together"
-            ] if profile else []
+            ] if profile_data else []
         }
     
-    async def generate_daily_insights(self, vendor_id: str) -> Dict[str, Any]:
+    async def generate_daily_insights(self, vendor_id: str, snapshot: Optional[VendorDataSnapshot] = None) -> Dict[str, Any]:
         """Generate daily insights and action items with personalization"""
-        performance = await self.analyze_vendor_performance(vendor_id)
-        recommendations = await self.generate_business_recommendations(vendor_id)
-        sustainability = await self.get_sustainability_insights(vendor_id)
-        bundles = await self.generate_bundle_recommendations(vendor_id)
+        # One snapshot feeds every generator below
+        if snapshot is None:
+            snapshot = await self.load_vendor_snapshot(vendor_id)
+        performance = await self.analyze_vendor_performance(vendor_id, snapshot)
+        recommendations, sustainability, bundles = await asyncio.gather(
+            self.generate_business_recommendations(vendor_id, performance),
+            self.get_sustainability_insights(vendor_id),
+            self.generate_bundle_recommendations(vendor_id, snapshot)
+        )
         
         # Generate daily action items
         action_items = []
@@ -856,5 +950,38 @@ class VendorConciergeService:
             }
         }
 
+    async def refresh_daily_insights(self, vendor_id: str, stored: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Recompute and store daily insights, reusing the stored ones if the orders and inventory are unchanged"""
+        snapshot = await self.load_vendor_snapshot(vendor_id)
+        if snapshot.failed:
+            # Don't store insights built from gaps
+            raise RuntimeError(f"Backend fetch failed for {', '.join(snapshot.failed)}")
+        fingerprint = snapshot.fingerprint()
+        
+        if (stored and stored["source_fingerprint"] == fingerprint
+                and stored["generated_at"].date() == datetime.utcnow().date()):
+            insights = stored["insights"]
+        else:
+            insights = json.loads(json.dumps(await self.generate_daily_insights(vendor_id, snapshot), default=str))
+        await db_service.save_daily_insights(vendor_id, insights, fingerprint)
+        return insights
+    
+    async def get_daily_insights(self, vendor_id: str) -> Dict[str, Any]:
+        """Serve today's stored insights while they are fresh, recomputing them on request otherwise"""
+        # Refreshed only here, with the caller's own token: vendor_id is the bearer token the
+        # backend is called with, so a background job would be replaying expired tokens
+        stored = await db_service.get_daily_insights(vendor_id)
+        if stored:
+            generated_at = stored["generated_at"]
+            if (generated_at.date() == datetime.utcnow().date()
+                    and datetime.utcnow() - generated_at < timedelta(seconds=DAILY_INSIGHTS_TTL)):
+                return stored["insights"]
+        
+        try:
+            return await self.refresh_daily_insights(vendor_id, stored)
+        except Exception as e:
+            logger.error(f"Failed to refresh daily insights for {vendor_id}: {e}")
+            return await self.generate_daily_insights(vendor_id)
+
 # Global instance
 vendor_concierge = VendorConciergeService()
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Dict
 from pydantic_settings import BaseSettings
 from pydantic import Field
 from dotenv import load_dotenv
@@ -50,6 +50,9 @@ class Settings(BaseSettings):
     WHATSAPP_API_URL: str = Field(default="", env="WHATSAPP_API_URL")
     WHATSAPP_API_TOKEN: str = Field(default="", env="WHATSAPP_API_TOKEN")
     WHATSAPP_PHONE_NUMBER_ID: str = Field(default="", env="WHATSAPP_PHONE_NUMBER_ID")
+    WHATSAPP_CONCURRENCY: int = Field(default=8, env="WHATSAPP_CONCURRENCY")
+    WHATSAPP_QUEUE_SIZE: int = Field(default=10000, env="WHATSAPP_QUEUE_SIZE")
+    WHATSAPP_MAX_ATTEMPTS: int = Field(default=5, env="WHATSAPP_MAX_ATTEMPTS")
     
     DATABASE_URL: str = Field(default="", env="DATABASE_URL")
     
@@ -62,6 +65,9 @@ class Settings(BaseSettings):
     GCP_CDN_BASE_URL: str = Field(default="https://storage.cloud.google.com", env="GCP_CDN_BASE_URL")
     
     LOG_LEVEL: str = Field(default="INFO", env="LOG_LEVEL")
+    LOG_ASYNC: bool = Field(default=True, env="LOG_ASYNC")
+    LOG_INFO_RATE_LIMIT: float = Field(default=20.0, env="LOG_INFO_RATE_LIMIT")
+    LOG_SAMPLING: Dict[str, float] = Field(default={}, env="LOG_SAMPLING")
     DEBUG: bool = Field(default=False, env="DEBUG")
     
     CORS_ORIGINS: List[str] = Field(default=["*"], env="CORS_ORIGINS")
@@ -72,8 +78,39 @@ class Settings(BaseSettings):
     JWT_CACHE_TTL: int = Field(default=3600, env="JWT_CACHE_TTL")
     OTP_EXPIRY_MINUTES: int = Field(default=10, env="OTP_EXPIRY_MINUTES")
     OTP_MAX_ATTEMPTS: int = Field(default=3, env="OTP_MAX_ATTEMPTS")
+    OTP_SWEEP_INTERVAL: int = Field(default=300, env="OTP_SWEEP_INTERVAL")
+    OTP_SEND_LIMIT_PER_PHONE: int = Field(default=5, env="OTP_SEND_LIMIT_PER_PHONE")
+    OTP_SEND_LIMIT_PER_IP: int = Field(default=30, env="OTP_SEND_LIMIT_PER_IP")
+    OTP_VERIFY_LIMIT_PER_PHONE: int = Field(default=20, env="OTP_VERIFY_LIMIT_PER_PHONE")
+    OTP_VERIFY_LIMIT_PER_IP: int = Field(default=100, env="OTP_VERIFY_LIMIT_PER_IP")
+    TRUSTED_PROXY_HOPS: int = Field(default=0, env="TRUSTED_PROXY_HOPS")
     DB_SYNC_MODE: str = Field(default="compare", env="DB_SYNC_MODE")
     
+    POPULARITY_ROLLUP_INTERVAL: int = Field(default=900, env="POPULARITY_ROLLUP_INTERVAL")
+    BEST_SELLER_HOT_CATEGORIES: int = Field(default=20, env="BEST_SELLER_HOT_CATEGORIES")
+    COOCCURRENCE_REFRESH_INTERVAL: int = Field(default=1800, env="COOCCURRENCE_REFRESH_INTERVAL")
+    
+    CF_MODEL_DIR: str = Field(default="media/models/collaborative", env="CF_MODEL_DIR")
+    CF_FACTORS: int = Field(default=64, env="CF_FACTORS")
+    CF_TRAINING_DAYS: int = Field(default=180, env="CF_TRAINING_DAYS")
+    RECOMMENDATION_REFRESH_INTERVAL: int = Field(default=600, env="RECOMMENDATION_REFRESH_INTERVAL")
+    
+    ANALYTICS_SNAPSHOT_DIR: str = Field(default="media/analytics/snapshots", env="ANALYTICS_SNAPSHOT_DIR")
+    ANALYTICS_SNAPSHOT_INTERVAL: int = Field(default=86400, env="ANALYTICS_SNAPSHOT_INTERVAL")
+    
+    EVENT_RETENTION_MONTHS: int = Field(default=13, env="EVENT_RETENTION_MONTHS")
+    PARTITION_MAINTENANCE_INTERVAL: int = Field(default=21600, env="PARTITION_MAINTENANCE_INTERVAL")
+    VIEW_FLUSH_INTERVAL: float = Field(default=5.0, env="VIEW_FLUSH_INTERVAL")
+    SKETCH_FLUSH_INTERVAL: float = Field(default=30.0, env="SKETCH_FLUSH_INTERVAL")
+
+    QUERY_PROFILE_ALL: bool = Field(default=False, env="QUERY_PROFILE_ALL")
+    QUERY_PROFILE_TOKEN: str = Field(default="", env="QUERY_PROFILE_TOKEN")
+    METRICS_TOKEN: str = Field(default="", env="METRICS_TOKEN")
+
+    CART_CACHE_SIZE: int = Field(default=20000, env="CART_CACHE_SIZE")
+    CART_CACHE_TTL: int = Field(default=300, env="CART_CACHE_TTL")
+    CART_CACHE_REVALIDATE: bool = Field(default=True, env="CART_CACHE_REVALIDATE")
+    
     @property
     def gcp_credentials_dict(self):
         try:
@@ -1,35 +1,139 @@
+import atexit
 import logging
+import queue
 import sys
+import threading
+import time
 from datetime import datetime
-from typing import Any, Dict
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Tuple
 from pythonjsonlogger import jsonlogger
 from app.core.config import settings
 
+# Records waiting for the writer thread; past this, new records are dropped rather than
+# making requests wait on a slow stdout
+LOG_QUEUE_SIZE = 10000
+
 class AveoJsonFormatter(jsonlogger.JsonFormatter):
     def add_fields(self, log_record: Dict[str, Any], record: logging.LogRecord, message_dict: Dict[str, Any]) -> None:
         super().add_fields(log_record, record, message_dict)
-        log_record['timestamp'] = datetime.utcnow().isoformat()
+        # When the record was logged, not when the writer thread got to it
+        log_record['timestamp'] = datetime.utcfromtimestamp(record.created).isoformat()
         log_record['service'] = settings.PROJECT_NAME
         log_record['level'] = record.levelname
         log_record['logger'] = record.name
 
-def setup_logging():
+class LogSampler(logging.Filter):
+    """
+    Thins out hot INFO/DEBUG messages before they are queued; warnings and errors always pass
+
+    Each call site (file and line, so f-string messages count as one) may emit up to
+    `rate` records per second, with bursts of the same size. LOG_SAMPLING can also keep
+    only a fraction of a logger's INFO/DEBUG records, e.g. {"aveo.crud.cart": 0.1}. The
+    next record let through from a call site carries `suppressed`, the number dropped before it.
+    """
+
+    def __init__(self, rate: float, sampling: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.rate = rate
+        self.sampling = sampling or {}
+        self._lock = threading.Lock()
+        # (pathname, lineno) -> [tokens, last refill, suppressed since last record]
+        self._buckets: Dict[Tuple[str, int], list] = {}
+        self._seen: Dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        with self._lock:
+            fraction = self.sampling.get(record.name)
+            if fraction is not None:
+                seen = self._seen.get(record.name, 0)
+                self._seen[record.name] = seen + 1
+                # Every n-th record, so a steady stream keeps the configured fraction
+                if fraction <= 0 or seen % max(1, round(1 / fraction)):
+                    return False
+            if self.rate <= 0:
+                return True
+
+            now = time.monotonic()
+            key = (record.pathname, record.lineno)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.rate, now, 0]
+            bucket[0] = min(self.rate, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            if bucket[2]:
+                record.suppressed = bucket[2]
+                bucket[2] = 0
+            return True
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the writer thread; formatting and the stdout write happen there"""
+
+    def __init__(self, log_queue: queue.SimpleQueue, max_size: int = LOG_QUEUE_SIZE):
+        super().__init__(log_queue)
+        self.max_size = max_size
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge the message with its args (they may change after the call returns);
+        # the JSON formatting is left to the listener's handler instead of the request path
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # SimpleQueue (no locks in Python code) is much cheaper per record than Queue,
+        # but unbounded, so the cap is checked here
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+_listener: Optional[QueueListener] = None
+
+def stop_logging() -> None:
+    """Writes out whatever is still queued and stops the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def setup_logging(async_writes: bool = settings.LOG_ASYNC, stream=None):
+    global _listener
     logger = logging.getLogger("aveo")
     logger.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
-    
+
     if logger.handlers:
         logger.handlers.clear()
-    
-    handler = logging.StreamHandler(sys.stdout)
+    stop_logging()
+
+    handler = logging.StreamHandler(stream or sys.stdout)
     formatter = AveoJsonFormatter(
         fmt="%(timestamp)s %(level)s %(logger)s %(message)s"
     )
     handler.setFormatter(formatter)
+
+    if async_writes:
+        queue_handler = NonBlockingQueueHandler(queue.SimpleQueue())
+        _listener = QueueListener(queue_handler.queue, handler, respect_handler_level=True)
+        _listener.start()
+        handler = queue_handler
+    handler.addFilter(LogSampler(settings.LOG_INFO_RATE_LIMIT, settings.LOG_SAMPLING))
     logger.addHandler(handler)
-    
+
     return logger
 
 logger = setup_logging()
+atexit.register(stop_logging)
 
 def get_logger(name: str) -> logging.Logger:
     return logging.getLogger(f"aveo.{name}")
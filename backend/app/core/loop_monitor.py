@@ -0,0 +1,51 @@
+from typing import Dict, Any
+from collections import deque
+import asyncio
+import time
+import numpy as np
+from app.core.logging import get_logger
+
+logger = get_logger("loop_monitor")
+
+# How often the probe wakes up, and how many samples the rolling window keeps (~5 minutes)
+LAG_PROBE_INTERVAL = 0.1
+LAG_WINDOW = 3000
+# A probe waking this late means something held the loop, e.g. a blocking HTTP call
+STALL_THRESHOLD = 0.1
+
+class EventLoopLagMonitor:
+    """Measures how late a periodic sleep wakes up: the time the loop was busy and not serving requests"""
+
+    def __init__(self, interval: float = LAG_PROBE_INTERVAL, window: int = LAG_WINDOW):
+        self.interval = interval
+        self._samples: deque = deque(maxlen=window)
+        self.stalls = 0
+        self.worst = 0.0
+
+    def record(self, lag: float) -> None:
+        self._samples.append(lag)
+        self.worst = max(self.worst, lag)
+        if lag >= STALL_THRESHOLD:
+            self.stalls += 1
+            logger.warning(f"Event loop stalled for {lag * 1000:.0f} ms")
+
+    async def run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, time.perf_counter() - start - self.interval))
+
+    def snapshot(self) -> Dict[str, Any]:
+        samples = np.fromiter(self._samples, dtype=np.float64) * 1000
+        if not len(samples):
+            return {"samples": 0}
+        return {
+            "samples": len(samples),
+            "mean_ms": round(float(samples.mean()), 2),
+            "p99_ms": round(float(np.percentile(samples, 99)), 2),
+            "max_ms": round(float(samples.max()), 2),
+            "worst_ms": round(self.worst * 1000, 2),  # since startup
+            "stalls": self.stalls
+        }
+
+event_loop_monitor = EventLoopLagMonitor()
@@ -217,9 +217,7 @@ class OptimizedStorageService:
             bucket_name = self._get_bucket_for_size(size_name)
             
             # Upload to Supabase storage
-            upload_result = await asyncio.get_event_loop().run_in_executor(
-                None, self.storage_client.upload_file, bucket_name, filename, image_data
-            )
+            upload_result = await self.storage_client.upload_file_async(bucket_name, filename, image_data)
 
             # Supabase client returns a public URL string in current implementation
             if isinstance(upload_result, str):
@@ -304,8 +302,8 @@ class OptimizedStorageService:
         try:
             # Upload metadata to storage
             metadata_json = json.dumps(metadata_record, indent=2)
-            await self.storage_client.upload_file(
-                'metadata', metadata_filename, metadata_json.encode()
+            await self.storage_client.upload_file_async(
+                'metadata', metadata_filename, metadata_json.encode(), content_type='application/json'
             )
             
             return {
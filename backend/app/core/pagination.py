@@ -20,6 +20,8 @@ class PaginatedResponse(BaseModel, Generic[T]):
     pages: int
     has_next: bool
     has_prev: bool
+    # Opaque keyset cursor for the next page, on endpoints that support cursor pagination
+    next_cursor: Optional[str] = None
     
     @classmethod
     def create(
@@ -27,7 +29,8 @@ class PaginatedResponse(BaseModel, Generic[T]):
         items: List[T],
         total: int,
         page: int,
-        limit: int
+        limit: int,
+        next_cursor: Optional[str] = None
     ) -> "PaginatedResponse[T]":
         pages = (total + limit - 1) // limit
         return cls(
@@ -36,8 +39,9 @@ class PaginatedResponse(BaseModel, Generic[T]):
             page=page,
             limit=limit,
             pages=pages,
-            has_next=page < pages,
-            has_prev=page > 1
+            has_next=next_cursor is not None or page < pages,
+            has_prev=page > 1,
+            next_cursor=next_cursor
         )
 
 class SupabasePagination:
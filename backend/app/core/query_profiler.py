@@ -0,0 +1,224 @@
+from typing import Dict, Any, List, Optional, Tuple
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+import heapq
+import hmac
+import re
+import time
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger("query_profiler")
+
+# Request header that switches profiling on ("1") or off ("0") for one request
+PROFILE_HEADER = b"x-query-profile"
+# Request header carrying QUERY_PROFILE_TOKEN; without it PROFILE_HEADER is ignored
+PROFILE_TOKEN_HEADER = b"x-query-profile-token"
+# The same statement shape running this many times in one request is reported as an N+1 loop
+N_PLUS_ONE_THRESHOLD = 5
+# Slowest statements kept per request for the log line
+SLOWEST_STATEMENTS = 5
+# Statements logged at most this long; the shape is enough to find the code
+MAX_STATEMENT_LENGTH = 500
+# Upper bounds (statements per request) of the /metrics histogram
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+# Bind placeholders ($1, $2::UUID, ?, :name) and the lists expanded from IN (...)
+_PLACEHOLDER = re.compile(r"\$\d+(?:::[\w\[\]]+)?|(?<!:):\w+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+def token_matches(presented: Optional[str], expected: str) -> bool:
+    """Constant-time comparison against a configured token; an unset token matches nothing"""
+    if not expected or not presented:
+        return False
+    return hmac.compare_digest(presented.encode(), expected.encode())
+
+def statement_shape(statement: str) -> str:
+    """Statement text with its bind values abstracted, so per-row repeats of one query compare equal"""
+    shape = _PLACEHOLDER.sub("?", statement)
+    shape = _PLACEHOLDER_LIST.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+class RequestQueryProfile:
+    """Statements one request sent: count, time spent waiting on the database and repeated shapes"""
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.shapes: Counter = Counter()
+        self._timings: List[Tuple[float, str]] = []
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.statements += 1
+        self.db_time += elapsed
+        self.shapes[statement_shape(statement)] += 1
+        self._timings.append((elapsed, statement))
+
+    def slowest(self, n: int = SLOWEST_STATEMENTS) -> List[Dict[str, Any]]:
+        return [
+            {"ms": round(elapsed * 1000, 2), "statement": statement[:MAX_STATEMENT_LENGTH]}
+            for elapsed, statement in heapq.nlargest(n, self._timings, key=lambda timing: timing[0])
+        ]
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Dict[str, Any]]:
+        """Shapes that ran often enough to look like a query issued per row of an earlier result"""
+        return [
+            {"count": count, "statement": shape[:MAX_STATEMENT_LENGTH]}
+            for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+_current_profile: ContextVar[Optional[RequestQueryProfile]] = ContextVar("query_profile", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    if profile is not None and conn.info.get("query_start"):
+        profile.record(statement, time.perf_counter() - conn.info["query_start"].pop())
+
+def instrument_engine(engine) -> None:
+    """Time statements on this engine (the sync_engine of an AsyncEngine) for profiled requests"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+class QueryMetrics:
+    """Per-route totals of profiled requests, rendered in the Prometheus text format"""
+
+    def __init__(self, buckets: Tuple[int, ...] = STATEMENT_BUCKETS):
+        self.buckets = buckets
+        self._requests: Counter = Counter()
+        self._statements: Counter = Counter()
+        self._db_seconds: Dict[Tuple[str, str], float] = defaultdict(float)
+        self._n_plus_one: Counter = Counter()
+        self._histogram: Dict[Tuple[str, str], List[int]] = defaultdict(lambda: [0] * len(self.buckets))
+
+    def observe(self, method: str, route: str, profile: RequestQueryProfile, n_plus_one: bool) -> None:
+        key = (method, route)
+        self._requests[key] += 1
+        self._statements[key] += profile.statements
+        self._db_seconds[key] += profile.db_time
+        if n_plus_one:
+            self._n_plus_one[key] += 1
+        counts = self._histogram[key]
+        for i, bound in enumerate(self.buckets):
+            if profile.statements <= bound:
+                counts[i] += 1
+
+    def render(self) -> str:
+        lines = [
+            "# HELP aveo_db_profiled_requests_total Requests profiled for database usage",
+            "# TYPE aveo_db_profiled_requests_total counter",
+            *self._series("aveo_db_profiled_requests_total", self._requests),
+            "# HELP aveo_db_statements_total SQL statements sent by profiled requests",
+            "# TYPE aveo_db_statements_total counter",
+            *self._series("aveo_db_statements_total", self._statements),
+            "# HELP aveo_db_time_seconds_total Time profiled requests spent waiting on SQL statements",
+            "# TYPE aveo_db_time_seconds_total counter",
+            *self._series("aveo_db_time_seconds_total", self._db_seconds),
+            "# HELP aveo_db_n_plus_one_requests_total Profiled requests that repeated one statement shape",
+            "# TYPE aveo_db_n_plus_one_requests_total counter",
+            *self._series("aveo_db_n_plus_one_requests_total", self._n_plus_one),
+            "# HELP aveo_db_statements_per_request SQL statements per profiled request",
+            "# TYPE aveo_db_statements_per_request histogram",
+        ]
+        for key, counts in sorted(self._histogram.items()):
+            labels = self._labels(key)
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f'aveo_db_statements_per_request_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'aveo_db_statements_per_request_bucket{{{labels},le="+Inf"}} {self._requests[key]}')
+            lines.append(f"aveo_db_statements_per_request_sum{{{labels}}} {self._statements[key]}")
+            lines.append(f"aveo_db_statements_per_request_count{{{labels}}} {self._requests[key]}")
+        return "\n".join(lines) + "\n"
+
+    def _series(self, name: str, values) -> List[str]:
+        return [f"{name}{{{self._labels(key)}}} {value:g}" for key, value in sorted(values.items())]
+
+    @staticmethod
+    def _labels(key: Tuple[str, str]) -> str:
+        method, route = key
+        route = route.replace("\\", "\\\\").replace('"', '\\"')
+        return f'method="{method}",route="{route}"'
+
+query_metrics = QueryMetrics()
+
+class QueryProfilerMiddleware:
+    """
+    Counts and times the SQL statements of each profiled request
+
+    Requests are profiled when QUERY_PROFILE_ALL is on. A caller holding QUERY_PROFILE_TOKEN
+    (sent as X-Query-Profile-Token) can also switch it per request with X-Query-Profile: 1 or 0,
+    and gets X-Query-Count and X-Query-Time-Ms response headers back. Every profiled request logs
+    one JSON line with its slowest statements (a warning when a statement shape repeats
+    N+1-style) and is added to the per-route totals served at /metrics. Statements are
+    attributed through a context variable, so concurrent requests don't mix.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requested = self._requested(scope)
+        if not (settings.QUERY_PROFILE_ALL if requested is None else requested):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestQueryProfile()
+        token = _current_profile.set(profile)
+        start = time.perf_counter()
+
+        async def send_with_headers(message):
+            # Timings only go back to trusted callers
+            if message["type"] == "http.response.start" and requested is not None:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(profile.statements).encode()))
+                headers.append((b"x-query-time-ms", f"{profile.db_time * 1000:.1f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current_profile.reset(token)
+            self._report(scope, profile, time.perf_counter() - start)
+
+    @staticmethod
+    def _requested(scope) -> Optional[bool]:
+        """The X-Query-Profile choice of a caller holding the profiling token, else None"""
+        headers = dict(scope.get("headers", []))
+        value = headers.get(PROFILE_HEADER)
+        if value is None:
+            return None
+        presented = headers.get(PROFILE_TOKEN_HEADER, b"").decode("latin-1")
+        if not token_matches(presented, settings.QUERY_PROFILE_TOKEN):
+            return None
+        return value.strip() not in (b"0", b"false", b"off")
+
+    @staticmethod
+    def _report(scope, profile: RequestQueryProfile, elapsed: float) -> None:
+        # The matched route's template (e.g. /products/{product_id}) keeps /metrics labels bounded
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        repeated = profile.repeated()
+        query_metrics.observe(scope["method"], route, profile, bool(repeated))
+        fields = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route,
+            "duration_ms": round(elapsed * 1000, 2),
+            "db_statements": profile.statements,
+            "db_time_ms": round(profile.db_time * 1000, 2),
+            "slowest_statements": profile.slowest(),
+            "repeated_statements": repeated,
+        }
+        if repeated:
+            logger.warning(f"Possible N+1 queries in {scope['method']} {route}", extra=fields)
+        else:
+            logger.info(f"Query profile for {scope['method']} {route}", extra=fields)
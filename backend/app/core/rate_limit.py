@@ -0,0 +1,67 @@
+from typing import Iterable, Optional, Tuple
+from collections import OrderedDict
+import time
+from fastapi import Request
+from app.core.config import settings
+from app.core.exceptions import RateLimitException
+
+# Keys tracked per limiter; the least recently used (closest to refilled anyway) are forgotten first
+MAX_TRACKED_KEYS = 100000
+
+class TokenBucketLimiter:
+    """
+    Per-key token bucket: `capacity` requests at once, refilled at `capacity` per `period` seconds
+
+    State lives in this process, so with several workers each one allows the full rate;
+    size the limits per worker.
+    """
+
+    def __init__(self, capacity: int, period: float, max_keys: int = MAX_TRACKED_KEYS):
+        self.capacity = float(capacity)
+        self.refill_rate = capacity / period
+        self.max_keys = max_keys
+        # key -> (tokens, last refill)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def allow(self, key: str) -> bool:
+        if self.capacity <= 0:
+            return True
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.refill_rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # A full bucket is the default state, no need to remember it
+        if tokens < self.capacity:
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed
+
+    def retry_after(self, key: str) -> float:
+        """Seconds until `key` has a token again"""
+        tokens, updated = self._buckets.get(key, (self.capacity, time.monotonic()))
+        tokens = min(self.capacity, tokens + (time.monotonic() - updated) * self.refill_rate)
+        return max(0.0, (1 - tokens) / self.refill_rate)
+
+def client_ip(request: Request) -> Optional[str]:
+    """
+    Address of the caller, for per-IP limits
+
+    Behind TRUSTED_PROXY_HOPS proxies the socket peer is the nearest proxy; each proxy appends
+    the address it received from to X-Forwarded-For, so the caller is that many entries from
+    the right. Anything further left was sent by the client and cannot be trusted.
+    """
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops > 0:
+        forwarded = [ip.strip() for ip in request.headers.get("x-forwarded-for", "").split(",") if ip.strip()]
+        if forwarded:
+            return forwarded[-min(hops, len(forwarded))]
+    return request.client.host if request.client else None
+
+def enforce_limits(checks: Iterable[Tuple[TokenBucketLimiter, Optional[str], str]]) -> None:
+    """Takes a token for each (limiter, key, label) in order; raises RateLimitException at the first that is out"""
+    for limiter, key, label in checks:
+        if key and not limiter.allow(key):
+            raise RateLimitException(f"Too many requests for this {label}, retry in {limiter.retry_after(key):.0f} seconds")
@@ -4,9 +4,9 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.exceptions import AuthenticationException, AuthorizationException
 from app.core.logging import get_logger
-from app.database.base import get_supabase_client
+from app.database.base import get_supabase_client, supabase_clients
 from app.database.session import get_async_session
-from app.features.auth.cruds.auth_crud import AuthCrud
+from app.features.auth.cruds.auth_crud import get_auth_crud
 from enum import Enum
 import os
 from app.core.config import settings
@@ -33,7 +33,11 @@ async def get_user_from_token(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: AsyncSession = Depends(get_async_session),
 ) -> Dict[str, Any]:
-    logger.info(f"get_user_from_token called: DEBUG={settings.DEBUG}, path={request.url.path if request else 'unknown'}, has_token={credentials and hasattr(credentials, 'credentials') and bool(credentials.credentials)}")
+    logger.debug(
+        "get_user_from_token called: DEBUG=%s, path=%s, has_token=%s",
+        settings.DEBUG, request.url.path if request else "unknown",
+        bool(credentials and getattr(credentials, "credentials", None))
+    )
     
     # FIRST: Try to authenticate with real token if provided (even in DEBUG mode)
     # Make sure we catch all exceptions during token validation
@@ -42,24 +46,20 @@ async def get_user_from_token(
         # Don't treat obvious debug tokens as real
         if token not in ["debug-token", "auth-bypass", "dev-bypass"] and len(token) > 20:
             try:
-                logger.info(f"Attempting real authentication with token (length: {len(token)})")
+                logger.debug("Attempting real authentication with token (length: %s)", len(token))
                 # Use ANON_KEY client for token validation, not SERVICE_ROLE_KEY
-                from supabase import create_client
-                supabase_url = settings.SUPABASE_URL
-                supabase_anon_key = settings.SUPABASE_ANON_KEY
-                
-                if not supabase_url or not supabase_anon_key:
+                if not settings.SUPABASE_URL or not settings.SUPABASE_ANON_KEY:
                     logger.error("Supabase configuration missing - URL or ANON_KEY not set")
                     raise AuthenticationException("Supabase configuration missing")
                 
-                # Create a client with ANON_KEY for token validation
-                auth_client = create_client(supabase_url, supabase_anon_key)
+                # Shared anon-key client; get_user validates the token it is given
+                auth_client = supabase_clients.anon
                 
                 try:
                     # Use get_user with the token directly - this validates the JWT token
                     # The token should be the access_token from Supabase session
                     user_response = auth_client.auth.get_user(token)
-                    logger.info(f"✅ Token validated successfully via get_user()")
+                    logger.debug("Token validated successfully via get_user()")
                 except Exception as get_user_err:
                     logger.error(f"supabase.auth.get_user() raised exception: {get_user_err}")
                     # Try alternative method - verify JWT token manually and get user via Admin API
@@ -72,8 +72,8 @@ async def get_user_from_token(
                             if user_id_from_token:
                                 logger.warning(f"Token decode succeeded but Supabase validation failed, using user_id from token: {user_id_from_token}")
                                 # Get user info from Supabase Admin API using service role
-                                from app.features.auth.cruds.auth_crud import AuthCrud
-                                auth_crud = AuthCrud()
+                                from app.features.auth.cruds.auth_crud import get_auth_crud
+                                auth_crud = get_auth_crud()
                                 admin_response = auth_crud.admin_client.auth.admin.get_user_by_id(user_id_from_token)
                                 if admin_response and hasattr(admin_response, 'user') and admin_response.user:
                                     # Create a mock response object that matches the expected structure
@@ -94,14 +94,14 @@ async def get_user_from_token(
                         raise get_user_err
                 
                 if user_response and hasattr(user_response, 'user') and user_response.user:
-                    logger.info(f"✅ Real user authenticated: {user_response.user.email} ({user_response.user.id})")
+                    logger.info("Real user authenticated: %s (%s)", user_response.user.email, user_response.user.id)
                     user_id = user_response.user.id
                     
-                    # Import AuthCrud here to avoid scoping issues
-                    from app.features.auth.cruds.auth_crud import AuthCrud
-                    auth_crud = AuthCrud()
+                    # Import here to avoid scoping issues
+                    from app.features.auth.cruds.auth_crud import get_auth_crud
+                    auth_crud = get_auth_crud()
                     try:
-                    user_data = await auth_crud.get_by_id(db, user_id)
+                        user_data = await auth_crud.get_by_id(db, user_id)
                     except Exception as db_err:
                         logger.warning(f"Could not get user from database: {db_err}, using Supabase Auth data")
                         user_data = None
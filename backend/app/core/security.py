@@ -10,7 +10,7 @@ from app.core.config import settings
 from app.core.exceptions import AuthenticationException, AuthorizationException, ExternalServiceException
 from app.core.logging import get_logger
 from enum import Enum
-from app.features.auth.cruds.auth_crud import AuthCrud
+from app.features.auth.cruds.auth_crud import get_auth_crud
 
 logger = get_logger("security")
 security = HTTPBearer(auto_error=False)
@@ -157,7 +157,7 @@ async def get_current_user(claims: Dict[str, Any] = Depends(verify_supabase_jwt)
         raise AuthenticationException("Invalid token: missing user ID")
     
     # Try to get user from database using the Supabase Auth ID
-    auth_crud = AuthCrud()
+    auth_crud = get_auth_crud()
     user_data = await auth_crud.get_by_id(user_id)
     
     if not user_data:
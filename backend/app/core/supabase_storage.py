@@ -1,5 +1,6 @@
-from supabase import create_client, Client
-from typing import Optional, Union, BinaryIO
+from supabase import Client
+from typing import Optional, Union, BinaryIO, Iterable
+import asyncio
 import uuid
 import os
 from PIL import Image
@@ -7,9 +8,14 @@ from io import BytesIO
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.core.exceptions import ValidationException
+from app.database.base import supabase_clients
+from app.database.supabase_async import async_supabase
 
 logger = get_logger("supabase_storage")
 
+# Buckets already confirmed this process, so uploads don't list buckets every time
+_known_buckets: set = set()
+
 class SupabaseStorageClient:
     def __init__(self):
         self._client: Optional[Client] = None
@@ -22,22 +28,8 @@ class SupabaseStorageClient:
             if not settings.SUPABASE_SERVICE_ROLE_KEY:
                 raise ValidationException("SUPABASE_SERVICE_ROLE_KEY must be set in environment variables for storage operations")
             
-            try:
-                self._client = create_client(
-                    settings.SUPABASE_URL,
-                    settings.SUPABASE_SERVICE_ROLE_KEY
-                )
-                # Test connection by attempting to list buckets
-                try:
-                    self._client.storage.list_buckets()
-                except Exception as e:
-                    logger.error(f"Supabase storage authentication failed. Please verify SUPABASE_SERVICE_ROLE_KEY is correct: {str(e)}")
-                    raise ValidationException(f"Supabase storage authentication failed. Please check your SUPABASE_SERVICE_ROLE_KEY: {str(e)}")
-            except ValidationException:
-                raise
-            except Exception as e:
-                logger.error(f"Failed to initialize Supabase storage client: {str(e)}")
-                raise ValidationException(f"Failed to initialize Supabase storage: {str(e)}")
+            # Shared service-role client; bucket access is verified once at startup
+            self._client = supabase_clients.admin
         return self._client
     
     def upload_file(
@@ -136,34 +128,13 @@ class SupabaseStorageClient:
         Upload and optimize an image to Supabase Storage
         """
         try:
-            # Open and process image
-            if isinstance(image_data, bytes):
-                image = Image.open(BytesIO(image_data))
-            else:
-                image = Image.open(image_data)
-            
-            # Resize if needed
-            if image.width > max_width or image.height > max_height:
-                image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-            
-            # Convert to RGB if necessary
-            if image.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                if image.mode == 'P':
-                    image = image.convert('RGBA')
-                background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-                image = background
-            
-            # Save optimized image
-            output = BytesIO()
-            image.save(output, format='JPEG', quality=quality, optimize=True)
-            output.seek(0)
+            optimized = _optimize_image(image_data, max_width, max_height, quality)
             
             # Upload optimized image
             return self.upload_file(
                 bucket_name,
                 file_path,
-                output.getvalue(),
+                optimized,
                 content_type='image/jpeg',
                 public=True
             )
@@ -200,19 +171,131 @@ class SupabaseStorageClient:
             logger.error(f"Failed to get file info: {str(e)}")
             return {}
 
+    async def ensure_bucket_exists_async(self, bucket_name: str) -> None:
+        """
+        Non-blocking _ensure_bucket_exists; lists buckets only the first time a bucket is seen
+        """
+        if bucket_name in _known_buckets:
+            return
+        try:
+            buckets = await async_supabase.storage.list_buckets()
+            _known_buckets.update(bucket.name for bucket in buckets or [])
+            
+            if bucket_name not in _known_buckets:
+                try:
+                    await async_supabase.storage.create_bucket(bucket_name)
+                    logger.info(f"Created bucket: {bucket_name}")
+                except Exception as create_error:
+                    logger.warning(f"Could not create bucket {bucket_name}: {str(create_error)}")
+                # Either created or not listable; don't list again for every upload
+                _known_buckets.add(bucket_name)
+        except Exception as e:
+            error_msg = str(e)
+            if "signature verification failed" in error_msg or "Unauthorized" in error_msg or "403" in error_msg:
+                logger.error(f"Supabase storage authentication failed for bucket '{bucket_name}'. Please verify SUPABASE_SERVICE_ROLE_KEY is correct and has storage permissions.")
+            else:
+                logger.warning(f"Could not ensure bucket exists: {str(e)}")
+    
+    async def ensure_buckets_exist_async(self, bucket_names: Iterable[str]) -> None:
+        await asyncio.gather(*(self.ensure_bucket_exists_async(bucket_name) for bucket_name in bucket_names))
+    
+    async def upload_file_async(
+        self,
+        bucket_name: str,
+        file_path: str,
+        file_data: Union[bytes, BinaryIO],
+        content_type: Optional[str] = None
+    ) -> str:
+        """
+        Upload a file to Supabase Storage without blocking the event loop; returns its public URL
+        """
+        try:
+            await self.ensure_bucket_exists_async(bucket_name)
+            if not isinstance(file_data, bytes):
+                file_data = await asyncio.to_thread(file_data.read)
+            
+            bucket = async_supabase.storage.from_(bucket_name)
+            await bucket.upload(
+                file_path,
+                file_data,
+                file_options={
+                    "content-type": content_type or "application/octet-stream",
+                    "upsert": "true"
+                }
+            )
+            return await bucket.get_public_url(file_path)
+        except Exception as e:
+            logger.error(f"Failed to upload file to Supabase Storage: {str(e)}")
+            raise ValidationException(f"Failed to upload file: {str(e)}")
+    
+    async def upload_image_async(
+        self,
+        bucket_name: str,
+        file_path: str,
+        image_data: Union[bytes, BinaryIO],
+        max_width: int = 1920,
+        max_height: int = 1080,
+        quality: int = 85
+    ) -> str:
+        """
+        Optimize an image in a worker thread and upload it without blocking the event loop
+        """
+        try:
+            optimized = await asyncio.to_thread(_optimize_image, image_data, max_width, max_height, quality)
+        except Exception as e:
+            logger.error(f"Failed to upload image: {str(e)}")
+            raise ValidationException(f"Failed to upload image: {str(e)}")
+        return await self.upload_file_async(bucket_name, file_path, optimized, content_type="image/jpeg")
+    
+    async def delete_file_async(self, bucket_name: str, file_path: str) -> bool:
+        """
+        Delete a file from Supabase Storage without blocking the event loop
+        """
+        try:
+            await async_supabase.storage.from_(bucket_name).remove([file_path])
+            return True
+        except Exception as e:
+            logger.error(f"Failed to delete file from Supabase Storage: {str(e)}")
+            return False
+
+def _optimize_image(image_data: Union[bytes, BinaryIO], max_width: int, max_height: int, quality: int) -> bytes:
+    """Resize to fit and re-encode as JPEG (CPU-bound)"""
+    # Open and process image
+    if isinstance(image_data, bytes):
+        image = Image.open(BytesIO(image_data))
+    else:
+        image = Image.open(image_data)
+    
+    # Resize if needed
+    if image.width > max_width or image.height > max_height:
+        image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+    
+    # Convert to RGB if necessary
+    if image.mode in ('RGBA', 'LA', 'P'):
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
+        image = background
+    
+    # Save optimized image
+    output = BytesIO()
+    image.save(output, format='JPEG', quality=quality, optimize=True)
+    return output.getvalue()
+
 
 # Convenience functions for backward compatibility
-def upload_user_avatar(avatar_file, user_id: str) -> str:
+async def upload_user_avatar(avatar_file, user_id: str) -> str:
     """
     Upload user avatar to Supabase Storage
     """
     storage_client = SupabaseStorageClient()
     file_path = f"avatars/{user_id}/{uuid.uuid4()}.jpg"
     
-    return storage_client.upload_image(
+    return await storage_client.upload_image_async(
         bucket_name="user-uploads",
         file_path=file_path,
-        image_data=avatar_file.file.read(),
+        image_data=await avatar_file.read(),
         max_width=512,
         max_height=512,
         quality=90
@@ -240,6 +323,15 @@ def delete_file_from_url(file_url: str) -> bool:
     
     return False
 
+async def delete_file_from_url_async(file_url: str) -> bool:
+    """
+    Non-blocking delete_file_from_url
+    """
+    bucket_name, file_path = extract_blob_path_from_url(file_url)
+    if not bucket_name:
+        return False
+    return await SupabaseStorageClient().delete_file_async(bucket_name, file_path)
+
 def extract_blob_path_from_url(file_url: str) -> tuple:
     """
     Extract bucket name and file path from Supabase Storage URL
@@ -265,17 +357,17 @@ def list_images(bucket_name: str, folder_path: str = "") -> list:
     storage_client = SupabaseStorageClient()
     return storage_client.list_files(bucket_name, folder_path)
 
-def upload_product_image(image_file, supplier_id: str) -> str:
+async def upload_product_image(image_file, supplier_id: str) -> str:
     """
     Upload product image to Supabase Storage
     """
     storage_client = SupabaseStorageClient()
     file_path = f"products/{supplier_id}/{uuid.uuid4()}.jpg"
     
-    return storage_client.upload_image(
+    return await storage_client.upload_image_async(
         bucket_name="product-assets",
         file_path=file_path,
-        image_data=image_file.file.read(),
+        image_data=await image_file.read(),
         max_width=1920,
         max_height=1080,
         quality=85
@@ -3,7 +3,8 @@ Helper functions to ensure user exists in public.users table
 """
 from typing import Dict, Any, Optional
 from app.core.logging import get_logger
-from app.features.auth.cruds.auth_crud import AuthCrud
+from app.features.auth.cruds.auth_crud import AuthCrud, get_auth_crud
+from app.database.supabase_async import async_supabase
 from app.features.auth.models.user import User
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -26,7 +27,7 @@ async def ensure_user_exists_in_db(
     user_id = current_user["id"]
     
     if not auth_crud:
-        auth_crud = AuthCrud()
+        auth_crud = get_auth_crud()
     
     # First, check if user exists
     try:
@@ -40,7 +41,7 @@ async def ensure_user_exists_in_db(
     # User doesn't exist, create them
     logger.info(f"User {user_id} not found in database, creating user record")
     try:
-        admin_client = auth_crud.admin_client
+        admin_client = async_supabase.admin
         
         # Get user info from Supabase Auth
         user_email = current_user.get("email", "")
@@ -53,7 +54,7 @@ async def ensure_user_exists_in_db(
         
         # Try to get more info from Supabase Auth
         try:
-            auth_user_response = admin_client.auth.admin.get_user_by_id(user_id)
+            auth_user_response = await admin_client.auth.admin.get_user_by_id(user_id)
             if auth_user_response and hasattr(auth_user_response, 'user') and auth_user_response.user:
                 auth_user = auth_user_response.user
                 if not user_email:
@@ -233,7 +234,7 @@ async def ensure_user_exists_in_db(
                 if not settings.SUPABASE_SERVICE_ROLE_KEY:
                     raise Exception("SUPABASE_SERVICE_ROLE_KEY not configured")
                 # Fallback to Supabase client
-                rest_response = admin_client.table("users").insert(user_rest_data).execute()
+                rest_response = await admin_client.table("users").insert(user_rest_data).execute()
                 if rest_response.data and len(rest_response.data) > 0:
                     logger.info(f"✅ Created user {user_id} via REST API")
                     import asyncio
@@ -241,7 +242,7 @@ async def ensure_user_exists_in_db(
                     return True
                 else:
                     logger.warning("REST API insert returned no data, checking if user exists...")
-                    check_response = admin_client.table("users").select("id").eq("id", user_id).limit(1).execute()
+                    check_response = await admin_client.table("users").select("id").eq("id", user_id).limit(1).execute()
                     if check_response.data and len(check_response.data) > 0:
                         logger.info(f"✅ User {user_id} exists (verified after insert)")
                         return True
@@ -271,7 +272,7 @@ async def ensure_user_exists_in_db(
         
         # Final check - maybe user was created by another process
         try:
-            final_check = admin_client.table("users").select("id").eq("id", user_id).limit(1).execute()
+            final_check = await admin_client.table("users").select("id").eq("id", user_id).limit(1).execute()
             if final_check.data and len(final_check.data) > 0:
                 logger.info(f"✅ User {user_id} exists (verified after failures)")
                 return True
@@ -297,7 +298,7 @@ async def ensure_user_exists_in_db(
         
         # Try one more REST API check via admin_client
         try:
-            final_rest_check = admin_client.table("users").select("id").eq("id", user_id).limit(1).execute()
+            final_rest_check = await admin_client.table("users").select("id").eq("id", user_id).limit(1).execute()
             if final_rest_check.data and len(final_rest_check.data) > 0:
                 logger.info(f"✅ User {user_id} exists (verified via REST API final check)")
                 return True
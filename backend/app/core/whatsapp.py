@@ -1,128 +1,247 @@
 import httpx
-from typing import Dict, Any
+import asyncio
+import hashlib
+import json
+import random
+import time
+from collections import OrderedDict, Counter
+from itertools import count
+from typing import Dict, Any, Optional, Tuple
 from app.core.config import settings
-from app.core.exceptions import ExternalServiceException, ValidationException
+from app.core.exceptions import ExternalServiceException, ValidationException, ServiceUnavailableException
 from app.core.logging import get_logger
 
 logger = get_logger("whatsapp")
 
+# A request handler only waits to enqueue; the API call itself gets a short, bounded budget
+HTTP_TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+# Retried with full-jitter exponential backoff; other 4xx responses are final
+RETRY_BACKOFF = 0.5
+RETRY_MAX_BACKOFF = 30.0
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+# The same message to the same number within this window (double submits, client retries) is sent once
+DEDUPE_WINDOW = 60
+# On shutdown, queued messages get this long to go out before the workers are cancelled
+DRAIN_TIMEOUT = 10.0
+
+class WhatsAppDeliveryError(ExternalServiceException):
+    def __init__(self, message: str, retryable: bool):
+        super().__init__(message, "WhatsApp")
+        self.retryable = retryable
+
 class WhatsAppService:
+    """Builds Cloud API message payloads and posts them on a shared client"""
+
     def __init__(self):
         self.api_url = settings.WHATSAPP_API_URL
         self.api_token = settings.WHATSAPP_API_TOKEN
         self.phone_number_id = settings.WHATSAPP_PHONE_NUMBER_ID
-        
+
         if not all([self.api_url, self.api_token, self.phone_number_id]):
             raise ValidationException("WhatsApp API credentials not configured")
-    
-    async def send_otp(self, phone: str, otp_code: str) -> Dict[str, Any]:
-        try:
-            headers = {
-                "Authorization": f"Bearer {self.api_token}",
-                "Content-Type": "application/json"
-            }
-            
-            clean_phone = phone.replace("+", "").replace("-", "").replace(" ", "")
-            
-            message_body = {
-                "messaging_product": "whatsapp",
-                "to": clean_phone,
-                "type": "template",
-                "template": {
-                    "name": "aveo_otp",
-                    "language": {"code": "en"},
-                    "components": [
-                        {
-                            "type": "body",
-                            "parameters": [
-                                {"type": "text", "text": otp_code}
-                            ]
-                        }
-                    ]
-                }
+        self.url = f"{self.api_url}/{self.phone_number_id}/messages"
+        self.headers = {
+            "Authorization": f"Bearer {self.api_token}",
+            "Content-Type": "application/json"
+        }
+
+    @staticmethod
+    def clean_phone(phone: str) -> str:
+        return phone.replace("+", "").replace("-", "").replace(" ", "")
+
+    def otp_message(self, phone: str, otp_code: str) -> Dict[str, Any]:
+        return {
+            "messaging_product": "whatsapp",
+            "to": self.clean_phone(phone),
+            "type": "template",
+            "template": {
+                "name": "aveo_otp",
+                "language": {"code": "en"},
+                "components": [
+                    {
+                        "type": "body",
+                        "parameters": [
+                            {"type": "text", "text": otp_code}
+                        ]
+                    }
+                ]
             }
-            
-            url = f"{self.api_url}/{self.phone_number_id}/messages"
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    json=message_body,
-                    headers=headers,
-                    timeout=30
-                )
-                
-                if response.status_code != 200:
-                    logger.error(f"WhatsApp API error: {response.status_code} - {response.text}")
-                    raise ExternalServiceException(f"WhatsApp API error: {response.status_code}", "WhatsApp")
-                
-                result = response.json()
-                
-                if result.get("error"):
-                    logger.error(f"WhatsApp API error: {result['error']}")
-                    raise ExternalServiceException(f"WhatsApp error: {result['error']['message']}", "WhatsApp")
-                
-                logger.info(f"OTP sent successfully to {phone}")
-                return {
-                    "success": True,
-                    "message_id": result.get("messages", [{}])[0].get("id"),
-                    "phone": phone
-                }
-                
-        except ExternalServiceException:
-            raise
-        except Exception as e:
-            logger.error(f"WhatsApp service error: {str(e)}")
-            raise ExternalServiceException(f"Failed to send OTP: {str(e)}", "WhatsApp")
-    
-    async def send_simple_message(self, phone: str, message: str) -> Dict[str, Any]:
+        }
+
+    def text_message(self, phone: str, message: str) -> Dict[str, Any]:
+        return {
+            "messaging_product": "whatsapp",
+            "to": self.clean_phone(phone),
+            "type": "text",
+            "text": {"body": message}
+        }
+
+    async def deliver(self, client: httpx.AsyncClient, message_body: Dict[str, Any]) -> Dict[str, Any]:
+        """One API call; raises WhatsAppDeliveryError, saying whether a retry could succeed"""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_token}",
-                "Content-Type": "application/json"
-            }
-            
-            clean_phone = phone.replace("+", "").replace("-", "").replace(" ", "")
-            
-            message_body = {
-                "messaging_product": "whatsapp",
-                "to": clean_phone,
-                "type": "text",
-                "text": {"body": message}
-            }
-            
-            url = f"{self.api_url}/{self.phone_number_id}/messages"
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    json=message_body,
-                    headers=headers,
-                    timeout=30
-                )
-                
-                if response.status_code != 200:
-                    logger.error(f"WhatsApp API error: {response.status_code} - {response.text}")
-                    raise ExternalServiceException(f"WhatsApp API error: {response.status_code}", "WhatsApp")
-                
-                result = response.json()
-                
-                if result.get("error"):
-                    logger.error(f"WhatsApp API error: {result['error']}")
-                    raise ExternalServiceException(f"WhatsApp error: {result['error']['message']}", "WhatsApp")
-                
-                logger.info(f"Message sent successfully to {phone}")
-                return {
-                    "success": True,
-                    "message_id": result.get("messages", [{}])[0].get("id"),
-                    "phone": phone
-                }
-                
-        except ExternalServiceException:
-            raise
-        except Exception as e:
-            logger.error(f"WhatsApp service error: {str(e)}")
-            raise ExternalServiceException(f"Failed to send message: {str(e)}", "WhatsApp")
+            response = await client.post(self.url, json=message_body, headers=self.headers)
+        except httpx.TransportError as e:
+            raise WhatsAppDeliveryError(f"WhatsApp API unreachable: {str(e)}", retryable=True)
+
+        if response.status_code != 200:
+            raise WhatsAppDeliveryError(
+                f"WhatsApp API error: {response.status_code} - {response.text[:200]}",
+                retryable=response.status_code in RETRY_STATUSES
+            )
+
+        result = response.json()
+        if result.get("error"):
+            raise WhatsAppDeliveryError(f"WhatsApp error: {result['error'].get('message')}", retryable=False)
+        return {
+            "success": True,
+            "message_id": result.get("messages", [{}])[0].get("id"),
+            "phone": message_body["to"]
+        }
+
+class WhatsAppDispatcher:
+    """
+    Sends WhatsApp messages from background workers so request handlers only enqueue
+
+    One pooled client (owned by the application lifespan) and WHATSAPP_CONCURRENCY workers
+    drain a bounded queue. Failed sends that may succeed later (timeouts, 429, 5xx) are
+    re-queued after a jittered exponential backoff, up to WHATSAPP_MAX_ATTEMPTS, without
+    holding a worker. Messages sharing a collapse key (e.g. a phone's OTP) are sent once
+    with the newest content if several are queued, and an identical message to the same
+    number within DEDUPE_WINDOW seconds is dropped.
+    """
+
+    def __init__(self, service_factory=WhatsAppService):
+        self.service_factory = service_factory
+        self._service: Optional[WhatsAppService] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._retries = set()
+        # (phone, collapse key) -> (payload, attempt); a key is queued at most once
+        self._pending: Dict[Tuple[str, str], Tuple[Dict[str, Any], int]] = {}
+        # (phone, payload digest) -> expiry, oldest first
+        self._recent: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._ids = count()
+        self.stats: Counter = Counter()
+
+    @property
+    def service(self) -> WhatsAppService:
+        if self._service is None:
+            self._service = self.service_factory()
+        return self._service
+
+    def start(self) -> "WhatsAppDispatcher":
+        if self._workers:
+            return self
+        concurrency = settings.WHATSAPP_CONCURRENCY
+        self._client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        )
+        self._queue = asyncio.Queue(settings.WHATSAPP_QUEUE_SIZE)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(concurrency)]
+        return self
+
+    async def stop(self, drain_timeout: float = DRAIN_TIMEOUT) -> None:
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            pass
+        unsent = self._queue.qsize() + len(self._retries)
+        if unsent:
+            logger.warning(f"WhatsApp dispatcher stopped with {unsent} messages unsent")
+        for task in [*self._workers, *self._retries]:
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._retries, return_exceptions=True)
+        self._workers = []
+        self._retries.clear()
+        self._pending.clear()
+        await self._client.aclose()
+        self._client = None
+
+    def send_otp(self, phone: str, otp_code: str) -> bool:
+        # A newer code for the same phone replaces a queued one: only the latest OTP verifies
+        return self.enqueue(phone, self.service.otp_message(phone, otp_code), collapse_key="otp")
+
+    def send_simple_message(self, phone: str, message: str) -> bool:
+        return self.enqueue(phone, self.service.text_message(phone, message))
+
+    def enqueue(self, phone: str, payload: Dict[str, Any], collapse_key: Optional[str] = None) -> bool:
+        """Queues a message; False if it duplicates one just sent. Raises 503 when the queue is full"""
+        self.start()
+        now = time.monotonic()
+        while self._recent and next(iter(self._recent.values())) <= now:
+            self._recent.popitem(last=False)
+        digest = (phone, hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest())
+        if digest in self._recent:
+            self.stats["deduplicated"] += 1
+            return False
+
+        key = (phone, collapse_key or f"message:{next(self._ids)}")
+        if key in self._pending:
+            self._pending[key] = (payload, 0)
+            self.stats["collapsed"] += 1
+        else:
+            try:
+                self._queue.put_nowait(key)
+            except asyncio.QueueFull:
+                self.stats["dropped"] += 1
+                logger.error(f"WhatsApp queue full, dropping message to {phone}")
+                raise ServiceUnavailableException("Messaging is busy, please retry shortly")
+            self._pending[key] = (payload, 0)
+        self._recent[digest] = now + DEDUPE_WINDOW
+        self.stats["enqueued"] += 1
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            key = await self._queue.get()
+            try:
+                payload, attempt = self._pending.pop(key)
+                await self._send(key, payload, attempt)
+            except Exception as e:
+                logger.error(f"WhatsApp dispatch error: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _send(self, key: Tuple[str, str], payload: Dict[str, Any], attempt: int) -> None:
+        try:
+            await self.service.deliver(self._client, payload)
+            self.stats["sent"] += 1
+        except WhatsAppDeliveryError as e:
+            attempt += 1
+            if not e.retryable or attempt >= settings.WHATSAPP_MAX_ATTEMPTS:
+                self.stats["failed"] += 1
+                logger.error(f"WhatsApp message to {key[0]} failed after {attempt} attempts: {e.message}")
+                return
+            if key in self._pending:
+                # Superseded by a newer message already queued
+                return
+            self.stats["retried"] += 1
+            self._pending[key] = (payload, attempt)
+            delay = random.uniform(0, min(RETRY_MAX_BACKOFF, RETRY_BACKOFF * 2 ** attempt))
+            task = asyncio.create_task(self._requeue_later(key, delay))
+            self._retries.add(task)
+            task.add_done_callback(self._retries.discard)
+
+    async def _requeue_later(self, key: Tuple[str, str], delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self._queue.put(key)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": bool(self._workers),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "retry_waiting": len(self._retries),
+            **self.stats
+        }
+
+whatsapp_dispatcher = WhatsAppDispatcher()
 
 def get_whatsapp_service() -> WhatsAppService:
     return WhatsAppService()
+
+def get_whatsapp_dispatcher() -> WhatsAppDispatcher:
+    return whatsapp_dispatcher
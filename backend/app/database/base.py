@@ -1,4 +1,6 @@
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
+from supabase_auth import SyncGoTrueClient
+import httpx
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.core.exceptions import ValidationException
@@ -15,13 +17,110 @@ def create_supabase_client() -> Client:
     client = create_client(settings.SUPABASE_URL, key)
     return client
 
-_supabase_client: Optional[Client] = None
+class SupabaseClientRegistry:
+    """
+    Process-wide Supabase clients, built once at startup and shared by every request
+
+    Each client owns its own HTTP connection pools (PostgREST, GoTrue, Storage), so
+    building one per request costs tens of milliseconds and throws the pools away.
+    The shared clients never sign anyone in: calls that leave a user session on the
+    client they run on go through create_auth_client instead.
+    """
+
+    def __init__(self):
+        self._admin: Optional[Client] = None
+        self._anon: Optional[Client] = None
+        self._auth_http: Optional[httpx.Client] = None
+
+    def init(self) -> "SupabaseClientRegistry":
+        """Build the clients eagerly; called from the application lifespan"""
+        self.admin
+        self.anon
+        logger.info("Supabase client registry initialized")
+        return self
+
+    @property
+    def admin(self) -> Client:
+        """Service-role client: table access, auth admin API and storage, bypassing RLS"""
+        if self._admin is None:
+            self._admin = create_supabase_client()
+        return self._admin
+
+    @property
+    def anon(self) -> Client:
+        """Anon-key client for token validation and session-less auth calls (resend, password reset email)"""
+        if self._anon is None:
+            if settings.SUPABASE_URL and settings.SUPABASE_ANON_KEY:
+                # Shared across requests: no refresh timer
+                self._anon = create_client(
+                    settings.SUPABASE_URL,
+                    settings.SUPABASE_ANON_KEY,
+                    ClientOptions(persist_session=False, auto_refresh_token=False)
+                )
+            else:
+                self._anon = self.admin
+        return self._anon
+
+    @property
+    def auth_http(self) -> httpx.Client:
+        """Connection pool shared by the per-call auth clients"""
+        if self._auth_http is None:
+            self._auth_http = httpx.Client(follow_redirects=True, http2=True)
+        return self._auth_http
+
+    @property
+    def storage(self):
+        """Storage API of the service-role client"""
+        return self.admin.storage
+
+    def close(self) -> None:
+        clients = [client for client in (self._admin, self._anon) if client is not None]
+        for client in (clients[:1] if self._anon is self._admin else clients):
+            try:
+                client.postgrest.session.close()
+            except Exception as e:
+                logger.error(f"Error closing Supabase client: {str(e)}")
+        if self._auth_http is not None:
+            self._auth_http.close()
+        self._admin = self._anon = None
+        self._auth_http = None
+
+supabase_clients = SupabaseClientRegistry()
 
 def get_supabase_client() -> Client:
-    global _supabase_client
-    if _supabase_client is None:
-        _supabase_client = create_supabase_client()
-    return _supabase_client
+    return supabase_clients.admin
+
+def create_auth_client() -> SyncGoTrueClient:
+    """
+    GoTrue client for one sign-in, sign-up, OTP or token refresh call
+
+    Those calls keep the user's session on the client they run on, so each gets its
+    own client, dropped with the request. Only the connection pool is shared.
+    """
+    if not settings.SUPABASE_URL:
+        raise ValidationException("SUPABASE_URL must be set")
+    key = settings.SUPABASE_ANON_KEY or settings.SUPABASE_SERVICE_ROLE_KEY
+    if not key:
+        raise ValidationException("SUPABASE_ANON_KEY or SUPABASE_SERVICE_ROLE_KEY must be set")
+    return SyncGoTrueClient(
+        url=f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1",
+        headers={"apiKey": key, "Authorization": f"Bearer {key}"},
+        auto_refresh_token=False,
+        persist_session=False,
+        http_client=supabase_clients.auth_http
+    )
+
+def get_supabase_admin_client() -> Client:
+    """FastAPI dependency for the shared service-role client"""
+    return supabase_clients.admin
+
+def get_supabase_anon_client() -> Client:
+    """FastAPI dependency for the shared anon-key client"""
+    return supabase_clients.anon
+
+def get_supabase_storage():
+    """FastAPI dependency for the shared storage API"""
+    return supabase_clients.storage
 
 def get_authenticated_supabase_client(user_token: str) -> Client:
     client = create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
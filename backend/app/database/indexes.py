@@ -1,4 +1,5 @@
 from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
 from app.core.logging import get_logger
 import app.database.session as db_session
 
@@ -89,7 +90,6 @@ async def create_database_indexes():
             
             "CREATE INDEX IF NOT EXISTS idx_product_views_product_id ON product_views(product_id);",
             "CREATE INDEX IF NOT EXISTS idx_product_views_user_id ON product_views(user_id);",
-            "CREATE INDEX IF NOT EXISTS idx_product_views_viewed_at ON product_views(viewed_at);",
             "CREATE INDEX IF NOT EXISTS idx_product_views_session_id ON product_views(session_id);",
             
             "CREATE INDEX IF NOT EXISTS idx_wishlists_user_id ON wishlists(user_id);",
@@ -268,3 +268,46 @@ async def create_database_indexes():
 def create_database_indexes_sync():
     logger.warning("Sync index creation is deprecated, use async version")
     return
+
+async def create_indexes_concurrently(engine, indexes) -> None:
+    """
+    Build missing indexes with CREATE INDEX CONCURRENTLY, so the table stays writable meanwhile
+
+    CONCURRENTLY can't run inside a transaction, hence the autocommit connection. A build
+    that was interrupted leaves an invalid index behind, which is dropped and rebuilt.
+    """
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for index in indexes:
+            invalid = await conn.scalar(
+                text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+                {"name": index.name}
+            )
+            if invalid:
+                logger.warning(f"Rebuilding invalid index {index.name}")
+                await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"'))
+            ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect))
+            await conn.execute(text(ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)))
+
+async def ensure_product_listing_indexes(engine) -> None:
+    """Create the partial idx_products_public_* indexes on an existing products table"""
+    from app.features.products.models.product import Product
+    
+    try:
+        await create_indexes_concurrently(engine, [
+            index for index in Product.__table__.indexes if index.name.startswith("idx_products_public_")
+        ])
+        logger.info("Product listing indexes ready")
+    except Exception as e:
+        logger.error(f"Product listing indexes could not be created: {str(e)}")
+
+async def ensure_otp_indexes(engine) -> None:
+    """Create the (phone, created_at) lookup index on an existing otp_verifications table"""
+    from app.features.auth.models.otp_verification import OTPVerification
+    
+    def create(sync_conn) -> None:
+        for index in OTPVerification.__table__.indexes:
+            index.create(sync_conn, checkfirst=True)
+    
+    async with engine.begin() as conn:
+        await conn.run_sync(create)
@@ -0,0 +1,116 @@
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+from datetime import datetime
+import asyncio
+import re
+from app.core.logging import get_logger
+
+logger = get_logger("partitions")
+
+# Append-only event tables, range-partitioned by month on their timestamp column
+PARTITIONED_TABLES = {
+    "user_activities": "created_at",
+    "product_views": "viewed_at",
+    "product_search_logs": "created_at",
+}
+# Months created ahead of time so inserts never fall through to the default partition
+PREMAKE_MONTHS = 3
+
+PARTITION_BOUNDS_SQL = """
+    SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = to_regclass(:table)
+"""
+
+UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+def month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+async def table_kind(conn, table: str) -> Optional[str]:
+    """'p' for a partitioned table, 'r' for a plain heap table, None if missing"""
+    result = await conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+    )
+    kind = result.scalar()
+    return kind.decode() if isinstance(kind, bytes) else kind
+
+async def list_partitions(conn, table: str) -> List[Tuple[str, Optional[datetime]]]:
+    """(name, exclusive upper bound) per partition; the default partition has no bound"""
+    result = await conn.execute(text(PARTITION_BOUNDS_SQL), {"table": table})
+    partitions = []
+    for name, bound in result.all():
+        match = UPPER_BOUND.search(bound or "")
+        partitions.append((name, datetime.fromisoformat(match.group(1)) if match else None))
+    return partitions
+
+async def create_month_partition(conn, table: str, key: str, month: datetime) -> None:
+    """Create one monthly partition, moving any rows the default partition caught for that month"""
+    name = partition_name(table, month)
+    start, end = month.isoformat(sep=" "), add_months(month, 1).isoformat(sep=" ")
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    await conn.execute(text(
+        f"WITH moved AS (DELETE FROM {table}_default WHERE {key} >= '{start}' AND {key} < '{end}' RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ))
+    await conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"))
+
+async def ensure_partitions(conn, table: str, key: str, first_month: datetime, through: datetime) -> int:
+    """Default partition plus one partition per month from first_month through `through`"""
+    await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+    existing = {name for name, _ in await list_partitions(conn, table)}
+
+    created = 0
+    month = first_month
+    while month <= through:
+        if partition_name(table, month) not in existing:
+            await create_month_partition(conn, table, key, month)
+            created += 1
+        month = add_months(month, 1)
+    return created
+
+async def drop_expired_partitions(conn, table: str, cutoff: datetime) -> List[str]:
+    """Detach and drop whole partitions whose rows are all older than cutoff"""
+    dropped = []
+    for name, upper in await list_partitions(conn, table):
+        if upper is not None and upper <= cutoff:
+            await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            await conn.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    return dropped
+
+async def maintain_partitions(engine, retention_months: int) -> Dict[str, Dict[str, int]]:
+    """Create upcoming monthly partitions and drop the ones past retention"""
+    current = month_start(datetime.utcnow())
+    cutoff = add_months(current, -retention_months)
+    stats = {}
+    for table, key in PARTITIONED_TABLES.items():
+        async with engine.begin() as conn:
+            kind = await table_kind(conn, table)
+            if kind != "p":
+                if kind == "r":
+                    logger.warning(f"{table} is not partitioned yet; run partition_event_tables.py to convert it")
+                continue
+            created = await ensure_partitions(conn, table, key, current, add_months(current, PREMAKE_MONTHS))
+            dropped = await drop_expired_partitions(conn, table, cutoff)
+        stats[table] = {"created": created, "dropped": len(dropped)}
+        if created or dropped:
+            logger.info(f"{table}: created {created} partitions, dropped {dropped}")
+    return stats
+
+async def run_partition_scheduler(engine, retention_months: int, interval_seconds: int) -> None:
+    """Background loop that keeps partitions ahead of the clock and enforces retention"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await maintain_partitions(engine, retention_months)
+        except Exception as e:
+            logger.error(f"Partition maintenance failed: {str(e)}")
@@ -6,6 +6,7 @@ from typing import AsyncGenerator
 from app.core.logging import get_logger
 from app.core.base import Base
 from app.core.exceptions import ServiceUnavailableException
+from app.core.query_profiler import instrument_engine
 
 logger = get_logger("session")
 
@@ -121,6 +122,7 @@ async def init_database():
             async_url,
             **engine_kwargs
         )
+        instrument_engine(async_engine.sync_engine)
         
         AsyncSessionLocal = async_sessionmaker(
             bind=async_engine,
@@ -0,0 +1,108 @@
+from typing import Optional
+from supabase import acreate_client, AsyncClient, AsyncClientOptions
+import asyncio
+import random
+import httpx
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.exceptions import ValidationException
+
+logger = get_logger("supabase_async")
+
+# Pool shared by PostgREST, Storage and Auth admin calls; HTTP/2 multiplexes them over few sockets
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30)
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+# Retried with full-jitter exponential backoff
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF = 0.2
+RETRY_MAX_BACKOFF = 2.0
+RETRY_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """
+    Retries transient failures: connection errors for any request (nothing was sent),
+    and gateway/overload responses or dropped connections for idempotent ones
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, attempts: int = RETRY_ATTEMPTS):
+        self._transport = transport
+        self.attempts = attempts
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        idempotent = request.method in IDEMPOTENT_METHODS
+        for attempt in range(self.attempts - 1):
+            try:
+                response = await self._transport.handle_async_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                reason = f"connect failed ({str(e)})"
+            except (httpx.ReadError, httpx.RemoteProtocolError) as e:
+                if not idempotent:
+                    raise
+                reason = f"connection dropped ({str(e)})"
+            else:
+                if not idempotent or response.status_code not in RETRY_STATUSES:
+                    return response
+                await response.aclose()
+                reason = f"returned {response.status_code}"
+            logger.warning(f"{request.method} {request.url.path} {reason}, retrying")
+            await asyncio.sleep(random.uniform(0, min(RETRY_MAX_BACKOFF, RETRY_BACKOFF * 2 ** attempt)))
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+def create_http_client() -> httpx.AsyncClient:
+    transport = httpx.AsyncHTTPTransport(http2=True, limits=HTTP_LIMITS)
+    return httpx.AsyncClient(http2=True, timeout=HTTP_TIMEOUT, transport=RetryTransport(transport))
+
+class AsyncSupabaseClientRegistry:
+    """
+    Process-wide non-blocking service-role Supabase client
+
+    Mirrors the sync client's API (`.table(...).select(...).execute()`, `.storage.from_(...)`,
+    `.auth.admin.get_user_by_id`) but every call is awaited on the event loop instead of
+    holding it for the whole HTTP round trip. Built in the application lifespan.
+    """
+
+    def __init__(self):
+        self._admin: Optional[AsyncClient] = None
+        self._http: Optional[httpx.AsyncClient] = None
+
+    async def init(self) -> "AsyncSupabaseClientRegistry":
+        if self._admin is None:
+            if not settings.SUPABASE_URL or not settings.SUPABASE_SERVICE_ROLE_KEY:
+                raise ValidationException("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
+            self._http = create_http_client()
+            self._admin = await acreate_client(
+                settings.SUPABASE_URL,
+                settings.SUPABASE_SERVICE_ROLE_KEY,
+                options=AsyncClientOptions(
+                    httpx_client=self._http,
+                    persist_session=False,
+                    auto_refresh_token=False
+                )
+            )
+            logger.info("Async Supabase client initialized")
+        return self
+
+    @property
+    def admin(self) -> AsyncClient:
+        if self._admin is None:
+            raise ValidationException("Async Supabase client is not initialized")
+        return self._admin
+
+    @property
+    def storage(self):
+        return self.admin.storage
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+        self._admin = self._http = None
+
+async_supabase = AsyncSupabaseClientRegistry()
+
+def get_async_supabase_admin_client() -> AsyncClient:
+    """FastAPI dependency for the shared non-blocking service-role client"""
+    return async_supabase.admin
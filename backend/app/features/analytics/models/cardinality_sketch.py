@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, Date, DateTime, LargeBinary, Index
+from app.core.base import Base
+from datetime import datetime
+
+class CardinalitySketch(Base):
+    """Daily HyperLogLog sketch of distinct visitors (or terms) for one metric and subject"""
+    __tablename__ = "cardinality_sketches"
+    __table_args__ = (
+        Index("idx_cardinality_sketches_day", "day"),
+    )
+
+    metric = Column(String(40), primary_key=True)  # product_viewers, supplier_viewers, searchers, ...
+    subject = Column(String(255), primary_key=True)  # product/supplier/category id, query term, or "all"
+    day = Column(Date, primary_key=True)
+    registers = Column(LargeBinary, nullable=False)  # zlib-compressed HLL registers
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, DateTime, Integer, Float, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.base import Base
+from datetime import datetime
+
+class ProductCoOccurrence(Base):
+    """Product pair seen in the same basket (a browsing session or an order)"""
+    __tablename__ = "product_cooccurrences"
+    __table_args__ = (
+        Index("idx_product_cooccurrences_lookup", "kind", "product_id", "rank"),
+    )
+
+    kind = Column(String(10), primary_key=True)  # view, purchase
+    product_id = Column(UUID(as_uuid=True), primary_key=True)
+    related_product_id = Column(UUID(as_uuid=True), primary_key=True)
+    co_count = Column(Integer, default=0, nullable=False)
+    score = Column(Float, default=0.0, nullable=False)  # Jaccard similarity of the two products' basket sets
+    rank = Column(Integer, nullable=True)  # position among product_id's neighbours by score
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class ProductBasketSupport(Base):
+    """Number of baskets a product has appeared in, used to score co-occurrences"""
+    __tablename__ = "product_basket_supports"
+
+    kind = Column(String(10), primary_key=True)
+    product_id = Column(UUID(as_uuid=True), primary_key=True)
+    baskets = Column(Integer, default=0, nullable=False)
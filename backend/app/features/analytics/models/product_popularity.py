@@ -0,0 +1,52 @@
+from sqlalchemy import Column, String, DateTime, Integer, DECIMAL, UniqueConstraint, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.base import Base
+from datetime import datetime
+
+class ProductPopularityRollup(Base):
+    __tablename__ = "product_popularity_rollups"
+    __table_args__ = (
+        UniqueConstraint("granularity", "bucket_start", "product_id", name="uq_product_popularity_bucket"),
+        Index("idx_product_popularity_granularity_bucket", "granularity", "bucket_start"),
+        Index("idx_product_popularity_category_bucket", "granularity", "category_id", "bucket_start"),
+        Index("idx_product_popularity_brand_bucket", "granularity", "brand_id", "bucket_start"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    granularity = Column(String(10), nullable=False)  # hour, day
+    bucket_start = Column(DateTime, nullable=False)
+    product_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+
+    # Denormalized so category/brand leaderboards don't need to join products
+    category_id = Column(UUID(as_uuid=True), nullable=True)
+    brand_id = Column(UUID(as_uuid=True), nullable=True)
+
+    views = Column(Integer, default=0, nullable=False)
+    add_to_carts = Column(Integer, default=0, nullable=False)
+    purchases = Column(Integer, default=0, nullable=False)  # orders containing the product
+    units_sold = Column(Integer, default=0, nullable=False)
+    revenue = Column(DECIMAL(14, 2), default=0, nullable=False)
+
+class RollupWatermark(Base):
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String(100), primary_key=True)
+    high_watermark = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class CategoryBestSellerLeaderboard(Base):
+    """Precomputed best-seller ranking for a hot category and time period"""
+    __tablename__ = "category_best_seller_leaderboards"
+    __table_args__ = (
+        UniqueConstraint("category_id", "time_period", "rank", name="uq_category_best_seller_rank"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    category_id = Column(UUID(as_uuid=True), nullable=False)
+    time_period = Column(String(20), nullable=False)  # week, month, quarter, year
+    rank = Column(Integer, nullable=False)
+    product_id = Column(UUID(as_uuid=True), nullable=False)
+    units_sold = Column(Integer, default=0, nullable=False)
+    orders = Column(Integer, default=0, nullable=False)
+    revenue = Column(DECIMAL(14, 2), default=0, nullable=False)
+    computed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
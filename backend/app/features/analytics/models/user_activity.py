@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, Integer, Float, Boolean, JSON, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, Integer, Float, Boolean, JSON, ForeignKey, Index, PrimaryKeyConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.core.base import Base
@@ -57,6 +57,12 @@ class ActivityType(str, Enum):
 
 class UserActivity(Base):
     __tablename__ = "user_activities"
+    # Monthly range partitions on created_at, managed by app.database.partitions
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "created_at"),
+        Index("ix_user_activities_created_at_brin", "created_at", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
@@ -106,7 +112,7 @@ class UserActivity(Base):
     funnel_stage = Column(String, nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, primary_key=True, nullable=False)  # partition key
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime, Float
+from sqlalchemy.dialects.postgresql import UUID, ARRAY
+from app.core.base import Base
+from datetime import datetime
+
+class UserRecommendation(Base):
+    """Precomputed top-N product recommendations for one user, best first"""
+    __tablename__ = "user_recommendations"
+
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    product_ids = Column(ARRAY(UUID(as_uuid=True)), nullable=False, default=list)
+    scores = Column(ARRAY(Float), nullable=False, default=list)
+    algorithm = Column(String(50), nullable=False)  # collaborative, heuristic
+    model_version = Column(String(50), nullable=True)
+    computed_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
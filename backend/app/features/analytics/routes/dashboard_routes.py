@@ -411,39 +411,17 @@ async def _get_profit_insights(db: AsyncSession) -> Dict[str, Any]:
 async def _get_trending_products(db: AsyncSession, start_date: datetime) -> List[Dict[str, Any]]:
     """Get trending products"""
     try:
-        from app.features.analytics.models.user_activity import UserActivity
-        from app.features.products.models.product import Product
-        
-        # Get trending products based on activity
-        trending_query = select(
-            Product.id,
-            Product.name,
-            Product.price,
-            func.count(UserActivity.id).label('activity_count')
-        ).join(
-            UserActivity, Product.id == UserActivity.product_id
-        ).where(
-            and_(
-                UserActivity.activity_type.in_([
-                    'product_view', 'add_to_cart', 'purchase'
-                ]),
-                UserActivity.created_at >= start_date
-            )
-        ).group_by(
-            Product.id, Product.name, Product.price
-        ).order_by(
-            desc('activity_count')
-        ).limit(10)
+        from app.features.analytics.services.popularity_rollup import PopularityRollupEngine
         
-        result = await db.execute(trending_query)
-        trending = result.fetchall()
+        # Views, cart adds and purchases come pre-aggregated from the popularity rollup
+        trending = await PopularityRollupEngine(db).get_top_products(start_date, limit=10, order_by="activity")
         
         return [
             {
-                "id": str(product.id),
-                "name": product.name,
-                "price": float(product.price),
-                "activity_count": product.activity_count
+                "id": product["id"],
+                "name": product["name"],
+                "price": product["price"],
+                "activity_count": product["views"] + product["add_to_carts"] + product["purchases"]
             }
             for product in trending
         ]
@@ -455,32 +433,15 @@ async def _get_trending_products(db: AsyncSession, start_date: datetime) -> List
 async def _get_top_categories(db: AsyncSession, start_date: datetime) -> List[Dict[str, Any]]:
     """Get top categories by activity"""
     try:
-        from app.features.analytics.models.user_activity import UserActivity
-        from app.features.products.models.category import Category
-        
-        # Get top categories
-        categories_query = select(
-            Category.id,
-            Category.name,
-            func.count(UserActivity.id).label('activity_count')
-        ).join(
-            UserActivity, Category.id == UserActivity.category_id
-        ).where(
-            UserActivity.created_at >= start_date
-        ).group_by(
-            Category.id, Category.name
-        ).order_by(
-            desc('activity_count')
-        ).limit(10)
+        from app.features.analytics.services.popularity_rollup import PopularityRollupEngine
         
-        result = await db.execute(categories_query)
-        categories = result.fetchall()
+        categories = await PopularityRollupEngine(db).get_top_categories(start_date, limit=10)
         
         return [
             {
-                "id": str(category.id),
-                "name": category.name,
-                "activity_count": category.activity_count
+                "id": category["id"],
+                "name": category["name"],
+                "activity_count": category["activity_count"]
             }
             for category in categories
         ]
@@ -0,0 +1,420 @@
+from typing import List, Dict, Any, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, cast, and_, String, Float
+from datetime import datetime
+import asyncio
+import json
+import os
+import shutil
+import threading
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from app.features.auth.models.user import User
+from app.features.orders.models.order import Order, OrderItem
+from app.features.products.models.product import Product, ProductStatusEnum
+from app.core.logging import get_logger
+
+logger = get_logger("analytics_snapshot")
+
+CURRENT_POINTER = "CURRENT"
+EXPORT_BATCH_SIZE = 50000
+RETRY_AFTER = 3600
+# Older versions are kept briefly so workers still reading them are not cut off
+SNAPSHOT_KEEP = 2
+EXCLUDED_ORDER_STATUSES = ("cancelled", "refunded")
+
+# Segment thresholds, matching the behaviour-profile based analysis
+HIGH_VALUE_THRESHOLD = 1000
+MEDIUM_VALUE_THRESHOLD = 200
+AT_RISK_DAYS = 90
+CHURN_DAYS = 180
+VELOCITY_WINDOW_DAYS = 30
+TOP_PRODUCTS = 10
+
+SNAPSHOT_SCHEMAS = {
+    "orders": pa.schema([
+        ("id", pa.string()),
+        ("user_id", pa.string()),
+        ("status", pa.string()),
+        ("total_amount", pa.float64()),
+        ("created_at", pa.timestamp("us")),
+    ]),
+    "order_items": pa.schema([
+        ("order_id", pa.string()),
+        ("product_id", pa.string()),
+        ("quantity", pa.int32()),
+        ("total_price", pa.float64()),
+    ]),
+    "products": pa.schema([
+        ("id", pa.string()),
+        ("name", pa.string()),
+        ("category_id", pa.string()),
+        ("price", pa.float64()),
+        ("cost_per_item", pa.float64()),
+        ("sellable", pa.bool_()),
+        ("created_at", pa.timestamp("us")),
+    ]),
+    "users": pa.schema([
+        ("id", pa.string()),
+        ("user_type", pa.string()),
+        ("created_at", pa.timestamp("us")),
+    ]),
+}
+
+def _snapshot_queries() -> Dict[str, Any]:
+    """One SELECT per snapshot table, column order matching SNAPSHOT_SCHEMAS"""
+    return {
+        "orders": select(
+            cast(Order.id, String),
+            cast(Order.user_id, String),
+            Order.status,
+            cast(Order.total_amount, Float),
+            Order.created_at
+        ),
+        "order_items": select(
+            cast(OrderItem.order_id, String),
+            cast(OrderItem.product_id, String),
+            OrderItem.quantity,
+            cast(OrderItem.total_price, Float)
+        ),
+        "products": select(
+            cast(Product.id, String),
+            Product.name,
+            cast(Product.category_id, String),
+            cast(Product.price, Float),
+            cast(Product.cost_per_item, Float),
+            and_(
+                Product.status == ProductStatusEnum.ACTIVE,
+                Product.approval_status == "approved",
+                Product.visibility == "visible"
+            ),
+            Product.created_at
+        ),
+        "users": select(
+            cast(User.id, String),
+            cast(User.user_type, String),
+            User.created_at
+        ),
+    }
+
+class AnalyticsSnapshotExporter:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.logger = logger
+
+    async def export(self, snapshot_dir: str) -> str:
+        """Stream every snapshot table into Parquet under a new version and switch CURRENT to it"""
+        exported_at = datetime.utcnow()
+        version = exported_at.strftime("%Y%m%d%H%M%S")
+        path = os.path.join(snapshot_dir, version)
+        staging = f"{path}.tmp"
+        os.makedirs(staging, exist_ok=True)
+
+        # One consistent view across all four tables
+        await self.db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        try:
+            row_counts = {}
+            for name, stmt in _snapshot_queries().items():
+                row_counts[name] = await self._export_table(name, stmt, os.path.join(staging, f"{name}.parquet"))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        finally:
+            await self.db.rollback()
+
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump({"exported_at": exported_at.isoformat(), "rows": row_counts}, f)
+        os.replace(staging, path)
+
+        pointer_tmp = os.path.join(snapshot_dir, f".{CURRENT_POINTER}.tmp")
+        with open(pointer_tmp, "w") as f:
+            f.write(version)
+        os.replace(pointer_tmp, os.path.join(snapshot_dir, CURRENT_POINTER))
+        self._prune(snapshot_dir, version)
+
+        self.logger.info(f"Exported analytics snapshot {version}: {row_counts}")
+        return path
+
+    async def _export_table(self, name: str, stmt, path: str) -> int:
+        schema = SNAPSHOT_SCHEMAS[name]
+        result = await self.db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        written = 0
+        with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+            async for partition in result.partitions():
+                columns = list(zip(*partition))
+                writer.write_batch(pa.RecordBatch.from_arrays(
+                    [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                    schema=schema
+                ))
+                written += len(partition)
+        return written
+
+    def _prune(self, snapshot_dir: str, current: str) -> None:
+        versions = sorted(
+            entry for entry in os.listdir(snapshot_dir)
+            if entry.isdigit() and os.path.isdir(os.path.join(snapshot_dir, entry))
+        )
+        for version in versions[:-SNAPSHOT_KEEP]:
+            if version != current:
+                shutil.rmtree(os.path.join(snapshot_dir, version), ignore_errors=True)
+
+class AnalyticsSnapshot:
+    """Profit analytics over one exported snapshot, computed column-at-a-time with Arrow and NumPy"""
+
+    def __init__(self, version: str, exported_at: datetime, tables: Dict[str, pa.Table]):
+        self.version = version
+        self.exported_at = exported_at
+        self.tables = tables
+        self._report: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def load(cls, snapshot_dir: str) -> Optional["AnalyticsSnapshot"]:
+        pointer = os.path.join(snapshot_dir, CURRENT_POINTER)
+        if not os.path.exists(pointer):
+            return None
+        with open(pointer) as f:
+            version = f.read().strip()
+        path = os.path.join(snapshot_dir, version)
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+
+        tables = {
+            name: pq.read_table(os.path.join(path, f"{name}.parquet"), memory_map=True)
+            for name in SNAPSHOT_SCHEMAS
+        }
+        return cls(version, datetime.fromisoformat(meta["exported_at"]), tables)
+
+    def report(self) -> Dict[str, Any]:
+        """Everything the profit optimization endpoint needs, computed once per snapshot"""
+        if self._report is None:
+            orders = self.tables["orders"]
+            orders = orders.filter(pc.invert(pc.is_in(orders["status"], value_set=pa.array(EXCLUDED_ORDER_STATUSES))))
+            customers = self._customer_metrics(orders)
+            fast_moving, slow_moving = self._product_velocity(orders)
+            high_margin, low_margin = self._margin_products()
+            self._report = {
+                "user_value_analysis": self._user_value_analysis(customers),
+                "churn_analysis": self._churn_analysis(customers),
+                "fast_moving_products": fast_moving,
+                "slow_moving_products": slow_moving,
+                "high_margin_products": high_margin,
+                "low_margin_products": low_margin,
+                "snapshot_version": self.version,
+                "snapshot_at": self.exported_at.isoformat(),
+            }
+        return self._report
+
+    def _days_before_export(self, timestamps: pa.ChunkedArray) -> np.ndarray:
+        values = timestamps.to_numpy().astype("datetime64[us]")
+        return (np.datetime64(self.exported_at, "us") - values) / np.timedelta64(1, "D")
+
+    def _customer_metrics(self, orders: pa.Table) -> Dict[str, np.ndarray]:
+        """Recency, frequency and monetary value per ordering user, plus RFM quintile scores"""
+        encoded = pc.dictionary_encode(orders["user_id"]).combine_chunks()
+        codes = encoded.indices.to_numpy()
+        n_users = len(encoded.dictionary)
+
+        age = self._days_before_export(orders["created_at"])
+        recency = np.full(n_users, np.inf)
+        np.minimum.at(recency, codes, age)
+        frequency = np.bincount(codes, minlength=n_users)
+        monetary = np.bincount(codes, weights=orders["total_amount"].to_numpy(), minlength=n_users)
+
+        # Quintiles: 5 is best, so recent orders score high
+        r_score = 6 - self._quintile(recency)
+        f_score = self._quintile(frequency)
+        m_score = self._quintile(monetary)
+
+        segment = np.full(n_users, "low_value", dtype=object)
+        segment[monetary > MEDIUM_VALUE_THRESHOLD] = "medium_value"
+        segment[monetary > HIGH_VALUE_THRESHOLD] = "high_value"
+        segment[recency > AT_RISK_DAYS] = "at_risk"
+        segment[recency > CHURN_DAYS] = "churned"
+
+        return {
+            "recency": recency,
+            "frequency": frequency,
+            "monetary": monetary,
+            "rfm_score": r_score + f_score + m_score,
+            "segment": segment,
+        }
+
+    @staticmethod
+    def _quintile(values: np.ndarray) -> np.ndarray:
+        if len(values) == 0:
+            return np.zeros(0, dtype=np.int64)
+        edges = np.quantile(values, [0.2, 0.4, 0.6, 0.8])
+        return np.searchsorted(edges, values, side="right") + 1
+
+    def _user_value_analysis(self, customers: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        total_users = len(customers["monetary"])
+        if total_users == 0:
+            return {"error": "No user data available"}
+
+        total_revenue = float(customers["monetary"].sum())
+        segment_metrics = {}
+        for segment_name in ("high_value", "medium_value", "low_value", "at_risk", "churned"):
+            members = customers["segment"] == segment_name
+            count = int(members.sum())
+            if not count:
+                continue
+            revenue = float(customers["monetary"][members].sum())
+            orders = int(customers["frequency"][members].sum())
+            segment_metrics[segment_name] = {
+                "count": count,
+                "percentage": count / total_users * 100,
+                "avg_lifetime_value": revenue / count,
+                "avg_order_value": revenue / orders if orders else 0,
+                "avg_orders": orders / count,
+                "total_revenue": revenue,
+                "avg_recency_days": float(customers["recency"][members].mean()),
+                "avg_rfm_score": float(customers["rfm_score"][members].mean()),
+            }
+
+        buyers = pc.sum(pc.equal(self.tables["users"]["user_type"], "buyer")).as_py() or 0
+        return {
+            "total_users": total_users,
+            "registered_buyers": buyers,
+            "total_revenue": total_revenue,
+            "avg_lifetime_value": total_revenue / total_users,
+            "segments": segment_metrics,
+            "revenue_distribution": {
+                f"{name}_pct": segment_metrics.get(name, {}).get("total_revenue", 0) / total_revenue * 100 if total_revenue > 0 else 0
+                for name in ("high_value", "medium_value", "low_value")
+            }
+        }
+
+    def _churn_analysis(self, customers: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        total_users = len(customers["monetary"])
+        churned = customers["segment"] == "churned"
+        at_risk = customers["segment"] == "at_risk"
+        return {
+            "churn_rate": float(churned.mean()) if total_users else 0,
+            "at_risk_customers": int(at_risk.sum()),
+            "churned_customers": int(churned.sum()),
+            "revenue_at_risk": float(customers["monetary"][at_risk].sum()),
+            "repeat_purchase_rate": float((customers["frequency"] > 1).mean()) if total_users else 0,
+            "at_risk_after_days": AT_RISK_DAYS,
+            "churned_after_days": CHURN_DAYS,
+        }
+
+    def _product_velocity(self, orders: pa.Table):
+        """Units sold per sellable product over the last VELOCITY_WINDOW_DAYS of the snapshot"""
+        products = self.tables["products"]
+        items = self.tables["order_items"]
+
+        recent = orders.filter(pc.less_equal(
+            pa.array(self._days_before_export(orders["created_at"])), VELOCITY_WINDOW_DAYS
+        ))
+        items = items.filter(pc.is_in(items["order_id"], value_set=recent["id"].combine_chunks()))
+        product_index = pc.fill_null(
+            pc.index_in(items["product_id"], value_set=products["id"].combine_chunks()), -1
+        ).to_numpy()
+        known = product_index >= 0
+        product_index = product_index[known]
+
+        units = np.bincount(product_index, weights=items["quantity"].to_numpy()[known], minlength=products.num_rows)
+        revenue = np.bincount(product_index, weights=items["total_price"].to_numpy()[known], minlength=products.num_rows)
+        sellable = products["sellable"].to_numpy(zero_copy_only=False).astype(bool)
+
+        def describe(indices: np.ndarray) -> List[Dict[str, Any]]:
+            return [
+                {
+                    "id": products["id"][i].as_py(),
+                    "name": products["name"][i].as_py(),
+                    "price": products["price"][i].as_py(),
+                    "units_sold": int(units[i]),
+                    "revenue": float(revenue[i]),
+                    "units_per_day": float(units[i]) / VELOCITY_WINDOW_DAYS
+                }
+                for i in indices.tolist()
+            ]
+
+        selling = np.flatnonzero(sellable & (units > 0))
+        fast = selling[np.argsort(-units[selling], kind="stable")[:TOP_PRODUCTS]]
+
+        # Products listed inside the window have not had the chance to sell yet
+        established = sellable & (self._days_before_export(products["created_at"]) > VELOCITY_WINDOW_DAYS)
+        candidates = np.flatnonzero(established)
+        slow = candidates[np.argsort(units[candidates], kind="stable")[:TOP_PRODUCTS]]
+        return describe(fast), describe(slow)
+
+    def _margin_products(self):
+        """Sellable products ranked by gross margin, where a unit cost is recorded"""
+        products = self.tables["products"]
+        price = products["price"].to_numpy(zero_copy_only=False).astype(float)
+        cost = products["cost_per_item"].to_numpy(zero_copy_only=False).astype(float)
+        sellable = products["sellable"].to_numpy(zero_copy_only=False).astype(bool)
+
+        priced = np.flatnonzero(sellable & ~np.isnan(cost) & (price > 0))
+        margin = (price[priced] - cost[priced]) / price[priced]
+        order = np.argsort(-margin, kind="stable")
+
+        def describe(positions: np.ndarray, estimate: str) -> List[Dict[str, Any]]:
+            return [
+                {
+                    "id": products["id"][priced[p]].as_py(),
+                    "name": products["name"][priced[p]].as_py(),
+                    "price": float(price[priced[p]]),
+                    "category_id": products["category_id"][priced[p]].as_py(),
+                    "margin_pct": round(float(margin[p]) * 100, 2),
+                    "margin_estimate": estimate
+                }
+                for p in positions.tolist()
+            ]
+
+        return describe(order[:TOP_PRODUCTS], "high"), describe(order[::-1][:TOP_PRODUCTS], "low")
+
+_snapshot_cache: Dict[str, Any] = {"dir": None, "version": None, "snapshot": None}
+# Requests call in from several worker threads; one loads a new version while the rest wait for it
+_snapshot_lock = threading.Lock()
+
+def get_analytics_report(snapshot_dir: str) -> Optional[Dict[str, Any]]:
+    """Report for the CURRENT snapshot, loaded and computed once per version per process.
+
+    Blocking; call it from a worker thread.
+    """
+    pointer = os.path.join(snapshot_dir, CURRENT_POINTER)
+    try:
+        with open(pointer) as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+
+    with _snapshot_lock:
+        if _snapshot_cache["dir"] != snapshot_dir or _snapshot_cache["version"] != version:
+            snapshot = AnalyticsSnapshot.load(snapshot_dir)
+            if snapshot is not None:
+                snapshot.report()
+                # The pointer may have moved again before load() read it
+                version = snapshot.version
+            _snapshot_cache.update(dir=snapshot_dir, version=version, snapshot=snapshot)
+        snapshot = _snapshot_cache["snapshot"]
+    return snapshot.report() if snapshot else None
+
+def snapshot_age_seconds(snapshot_dir: str) -> Optional[float]:
+    try:
+        with open(os.path.join(snapshot_dir, CURRENT_POINTER)) as f:
+            version = f.read().strip()
+        with open(os.path.join(snapshot_dir, version, "meta.json")) as f:
+            exported_at = datetime.fromisoformat(json.load(f)["exported_at"])
+    except (OSError, KeyError, ValueError):
+        return None
+    return (datetime.utcnow() - exported_at).total_seconds()
+
+async def run_snapshot_scheduler(session_factory, snapshot_dir: str, interval_seconds: int) -> None:
+    """Export whenever the CURRENT snapshot is older than the interval (nightly by default)"""
+    while True:
+        age = snapshot_age_seconds(snapshot_dir)
+        wait = interval_seconds - age if age is not None else 0
+        if wait <= 0:
+            try:
+                async with session_factory() as db:
+                    await AnalyticsSnapshotExporter(db).export(snapshot_dir)
+                wait = interval_seconds
+            except Exception as e:
+                logger.error(f"Analytics snapshot export failed: {str(e)}")
+                wait = RETRY_AFTER
+        await asyncio.sleep(wait)
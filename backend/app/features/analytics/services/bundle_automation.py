@@ -1,26 +1,66 @@
 from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, desc, asc, text
+from sqlalchemy import select, func, and_, desc, case, insert
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-import json
-import math
-from collections import defaultdict, Counter
-import asyncio
-from app.features.analytics.models.user_activity import (
-    UserActivity, UserBehaviorProfile, BundleRecommendation, ActivityType
-)
-from app.features.products.models.product import Product
+import time
+import numpy as np
+from app.features.analytics.models.user_activity import UserBehaviorProfile, BundleRecommendation
+from app.features.analytics.models.product_cooccurrence import ProductCoOccurrence
+from app.features.analytics.services.cooccurrence_index import PURCHASE
+from app.features.analytics.services.popularity_rollup import popularity_subquery
+from app.features.products.models.product import Product, ProductStatusEnum
 from app.features.products.models.category import Category
-from app.features.products.models.brand import Brand
+from app.features.products.models.product_image import ProductImage
+from app.features.products.models.product_inventory import ProductInventory
 from app.core.logging import get_logger
 
 logger = get_logger("bundle_automation")
 
+# Candidate products considered per pool: most popular first, seasonal categories boosted
+POOL_SIZE = 200
+POOL_TTL = 300
+BUNDLE_CACHE_TTL = 300
+POPULARITY_WINDOW = timedelta(days=7)
+
+SEGMENT_BUNDLE_TYPES = ("complementary", "seasonal", "promotional", "upsell")
+
+BUNDLE_NAMES = {
+    "complementary": "Perfect Together Bundle",
+    "seasonal": "Seasonal Special Bundle",
+    "promotional": "Limited Time Promotional Bundle",
+    "cross_sell": "Complete Your Order Bundle",
+    "upsell": "Premium Upgrade Bundle"
+}
+
+@dataclass
+class CandidatePool:
+    """Column arrays for the candidate products, aligned by position"""
+    ids: List[str]
+    names: List[str]
+    images: List[Optional[str]]
+    category_ids: List[str]
+    brand_ids: List[Optional[str]]
+    price: np.ndarray
+    margin: np.ndarray  # NaN where cost is unknown
+    popularity: np.ndarray
+    in_stock: np.ndarray
+    seasonal: np.ndarray
+    category_codes: np.ndarray
+    affinity: np.ndarray  # co-purchase Jaccard score between pool products
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+# Process-wide caches: the candidate pool, and generated bundles per user segment
+_pool_cache: Dict[str, Any] = {"expires_at": 0.0, "pool": None, "month": None}
+_bundle_cache: Dict[Tuple, Tuple[float, List[Dict[str, Any]]]] = {}
+
 class BundleAutomationEngine:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.logger = logger
-    
+
     async def generate_bundle_recommendations(
         self,
         user_id: Optional[str],
@@ -30,8 +70,6 @@ class BundleAutomationEngine:
     ) -> List[Dict[str, Any]]:
         """Generate automated bundle recommendations"""
         try:
-            bundles = []
-            
             # Get user behavior profile for personalization
             user_profile = None
             if user_id:
@@ -40,570 +78,337 @@ class BundleAutomationEngine:
                 )
                 result = await self.db.execute(profile_query)
                 user_profile = result.scalar_one_or_none()
-            
-            # Generate different types of bundles
-            bundle_types = [
-                "complementary",
-                "seasonal", 
-                "promotional",
-                "cross_sell",
-                "upsell"
-            ]
-            
-            for bundle_type in bundle_types:
-                type_bundles = await self._generate_bundle_type(
-                    bundle_type, user_profile, cart_items, limit
-                )
-                bundles.extend(type_bundles)
-            
+
+            bundles = list(await self._get_segment_bundles(user_profile, limit))
+
+            cart_product_ids = [str(item['product_id']) for item in cart_items or [] if item.get('product_id')]
+            if cart_product_ids:
+                pool = await self._get_candidate_pool(cart_product_ids)
+                in_cart = np.isin(np.array(pool.ids), cart_product_ids)
+                bundles.extend(self._build_bundles(pool, "cross_sell", self._price_band(user_profile), limit, in_cart))
+
+            # Personalize the shared segment bundles for this user
+            bundles = [self._personalize_bundle(bundle, user_profile) for bundle in bundles]
+
             # Sort by recommendation score and return top bundles
             bundles.sort(key=lambda x: x['recommendation_score'], reverse=True)
-            
+
             # Log bundle recommendations
             if bundles:
                 await self._log_bundle_recommendations(user_id, session_id, bundles)
-            
+
             return bundles[:limit]
-            
+
         except Exception as e:
             self.logger.error(f"Error generating bundle recommendations: {str(e)}")
             return []
-    
-    async def _generate_bundle_type(
-        self,
-        bundle_type: str,
-        user_profile: Optional[UserBehaviorProfile],
-        cart_items: List[Dict[str, Any]] = None,
-        limit: int = 5
-    ) -> List[Dict[str, Any]]:
-        """Generate bundles of a specific type"""
-        bundles = []
-        
-        try:
-            if bundle_type == "complementary":
-                bundles = await self._generate_complementary_bundles(user_profile, cart_items)
-            elif bundle_type == "seasonal":
-                bundles = await self._generate_seasonal_bundles(user_profile)
-            elif bundle_type == "promotional":
-                bundles = await self._generate_promotional_bundles(user_profile)
-            elif bundle_type == "cross_sell":
-                bundles = await self._generate_cross_sell_bundles(user_profile, cart_items)
-            elif bundle_type == "upsell":
-                bundles = await self._generate_upsell_bundles(user_profile, cart_items)
-            
-            return bundles[:limit]
-            
-        except Exception as e:
-            self.logger.error(f"Error generating {bundle_type} bundles: {str(e)}")
-            return []
-    
-    async def _generate_complementary_bundles(
+
+    async def _get_segment_bundles(
         self,
         user_profile: Optional[UserBehaviorProfile],
-        cart_items: List[Dict[str, Any]] = None
+        limit: int
     ) -> List[Dict[str, Any]]:
-        """Generate complementary product bundles"""
+        """Bundles shared by every user in the same segment, cached with a TTL"""
+        band = self._price_band(user_profile)
+        key = (self._segment_key(user_profile), band, limit)
+        cached = _bundle_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        pool = await self._get_candidate_pool()
         bundles = []
-        
-        try:
-            # Get frequently bought together products
-            frequently_together = await self._get_frequently_bought_together()
-            
-            for product_group in frequently_together:
-                if len(product_group) >= 2:
-                    bundle = await self._create_bundle_from_products(
-                        product_group, "complementary", user_profile
-                    )
-                    if bundle:
-                        bundles.append(bundle)
-            
-            return bundles
-            
-        except Exception as e:
-            self.logger.error(f"Error generating complementary bundles: {str(e)}")
-            return []
-    
-    async def _generate_seasonal_bundles(
+        for bundle_type in SEGMENT_BUNDLE_TYPES:
+            bundles.extend(self._build_bundles(pool, bundle_type, band, limit))
+
+        _bundle_cache[key] = (time.monotonic() + BUNDLE_CACHE_TTL, bundles)
+        return bundles
+
+    def _segment_key(self, user_profile: Optional[UserBehaviorProfile]) -> Tuple:
+        if not user_profile:
+            return ("anonymous",)
+        return (
+            user_profile.customer_lifecycle_stage or "unknown",
+            bool(user_profile.deal_seeking),
+            bool(user_profile.impulse_buying)
+        )
+
+    def _price_band(self, user_profile: Optional[UserBehaviorProfile]) -> str:
+        if user_profile and user_profile.price_sensitivity:
+            if user_profile.price_sensitivity < 0.5:
+                return "premium"
+            if user_profile.price_sensitivity > 0.7:
+                return "budget"
+        return "neutral"
+
+    async def _get_candidate_pool(self, cart_product_ids: Optional[List[str]] = None) -> CandidatePool:
+        """Shared candidate pool, plus any cart products it does not already contain"""
+        month = datetime.utcnow().month
+        pool = _pool_cache["pool"]
+        if pool is None or _pool_cache["expires_at"] <= time.monotonic() or _pool_cache["month"] != month:
+            pool = await self._load_candidate_pool(self._get_seasonal_categories(month))
+            _pool_cache.update(expires_at=time.monotonic() + POOL_TTL, pool=pool, month=month)
+
+        missing = [pid for pid in cart_product_ids or [] if pid not in set(pool.ids)]
+        if missing:
+            pool = await self._load_candidate_pool(self._get_seasonal_categories(month), include_ids=pool.ids + missing)
+        return pool
+
+    async def _load_candidate_pool(
         self,
-        user_profile: Optional[UserBehaviorProfile]
-    ) -> List[Dict[str, Any]]:
-        """Generate seasonal bundles based on current season and trends"""
-        bundles = []
-        
-        try:
-            current_month = datetime.utcnow().month
-            seasonal_categories = self._get_seasonal_categories(current_month)
-            
-            # Get trending products in seasonal categories
-            for category_id in seasonal_categories:
-                trending_products = await self._get_trending_products_in_category(
-                    category_id, limit=3
+        seasonal_categories: List[str],
+        include_ids: Optional[List[str]] = None
+    ) -> CandidatePool:
+        """One query for price, cost, category, popularity, stock and image of every candidate"""
+        popularity = popularity_subquery(datetime.utcnow() - POPULARITY_WINDOW)
+        activity = func.coalesce(popularity.c.views + popularity.c.add_to_carts + popularity.c.purchases, 0)
+        available = select(
+            ProductInventory.product_id,
+            func.sum(ProductInventory.quantity - ProductInventory.reserved_quantity).label("available")
+        ).group_by(ProductInventory.product_id).subquery("available")
+        primary_image = select(ProductImage.url).where(
+            ProductImage.product_id == Product.id
+        ).order_by(
+            desc(ProductImage.is_primary), ProductImage.sort_order
+        ).limit(1).scalar_subquery()
+
+        seasonal_slugs = seasonal_categories + [slug.replace("_", "-") for slug in seasonal_categories]
+        is_seasonal = Category.slug.in_(seasonal_slugs)
+
+        query = select(
+            Product.id,
+            Product.name,
+            Product.price,
+            Product.cost_per_item,
+            Product.category_id,
+            Product.brand_id,
+            is_seasonal.label("seasonal"),
+            activity.label("activity"),
+            available.c.available,
+            primary_image.label("image_url")
+        ).join(
+            Category, Category.id == Product.category_id
+        ).outerjoin(
+            popularity, popularity.c.product_id == Product.id
+        ).outerjoin(
+            available, available.c.product_id == Product.id
+        ).where(
+            and_(
+                Product.status == ProductStatusEnum.ACTIVE,
+                Product.approval_status == "approved",
+                Product.visibility == "visible"
+            )
+        )
+        if include_ids is not None:
+            query = query.where(Product.id.in_(include_ids))
+        else:
+            query = query.order_by(desc(case((is_seasonal, 1), else_=0)), desc(activity)).limit(POOL_SIZE)
+
+        rows = (await self.db.execute(query)).all()
+        ids = [str(row.id) for row in rows]
+        price = np.array([float(row.price or 0) for row in rows], dtype=np.float64)
+        cost = np.array([float(row.cost_per_item) if row.cost_per_item is not None else np.nan for row in rows])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            margin = np.where(price > 0, (price - cost) / price, np.nan)
+        category_ids = [str(row.category_id) for row in rows]
+        _, category_codes = np.unique(np.array(category_ids, dtype=str), return_inverse=True) if rows else (None, np.zeros(0, dtype=int))
+
+        return CandidatePool(
+            ids=ids,
+            names=[row.name for row in rows],
+            images=[row.image_url for row in rows],
+            category_ids=category_ids,
+            brand_ids=[str(row.brand_id) if row.brand_id else None for row in rows],
+            price=price,
+            margin=margin,
+            popularity=np.array([float(row.activity or 0) for row in rows]),
+            # Products without inventory rows are not stock-managed
+            in_stock=np.array([row.available is None or row.available > 0 for row in rows], dtype=bool),
+            seasonal=np.array([bool(row.seasonal) for row in rows], dtype=bool),
+            category_codes=category_codes,
+            affinity=await self._load_affinity(ids)
+        )
+
+    async def _load_affinity(self, ids: List[str]) -> np.ndarray:
+        """Co-purchase scores between pool products from the co-occurrence index"""
+        affinity = np.zeros((len(ids), len(ids)))
+        if not ids:
+            return affinity
+
+        cooc = ProductCoOccurrence
+        result = await self.db.execute(
+            select(cooc.product_id, cooc.related_product_id, cooc.score).where(
+                and_(
+                    cooc.kind == PURCHASE,
+                    cooc.product_id.in_(ids),
+                    cooc.related_product_id.in_(ids)
                 )
-                
-                if len(trending_products) >= 2:
-                    bundle = await self._create_bundle_from_products(
-                        trending_products, "seasonal", user_profile
-                    )
-                    if bundle:
-                        bundles.append(bundle)
-            
-            return bundles
-            
-        except Exception as e:
-            self.logger.error(f"Error generating seasonal bundles: {str(e)}")
-            return []
-    
-    async def _generate_promotional_bundles(
+            )
+        )
+        position = {product_id: i for i, product_id in enumerate(ids)}
+        for product_id, related_id, score in result.all():
+            affinity[position[str(product_id)], position[str(related_id)]] = score or 0.0
+        return affinity
+
+    def _build_bundles(
         self,
-        user_profile: Optional[UserBehaviorProfile]
+        pool: CandidatePool,
+        bundle_type: str,
+        band: str,
+        limit: int,
+        in_cart: Optional[np.ndarray] = None
     ) -> List[Dict[str, Any]]:
-        """Generate promotional bundles with discounts"""
-        bundles = []
-        
-        try:
-            # Get products with high margins for promotional bundles
-            high_margin_products = await self._get_high_margin_products()
-            
-            # Create promotional bundles with attractive discounts
-            for product_group in high_margin_products:
-                if len(product_group) >= 2:
-                    bundle = await self._create_promotional_bundle(
-                        product_group, user_profile
-                    )
-                    if bundle:
-                        bundles.append(bundle)
-            
-            return bundles
-            
-        except Exception as e:
-            self.logger.error(f"Error generating promotional bundles: {str(e)}")
+        """Score every product pair of the pool at once and turn the best into 2-3 item bundles"""
+        n = len(pool)
+        if n < 2:
             return []
-    
-    async def _generate_cross_sell_bundles(
-        self,
-        user_profile: Optional[UserBehaviorProfile],
-        cart_items: List[Dict[str, Any]] = None
-    ) -> List[Dict[str, Any]]:
-        """Generate cross-sell bundles based on cart contents"""
-        bundles = []
-        
-        try:
-            if not cart_items:
-                return bundles
-            
-            # Get cross-sell products for each cart item
-            for cart_item in cart_items:
-                product_id = cart_item.get('product_id')
-                if product_id:
-                    cross_sell_products = await self._get_cross_sell_products(product_id)
-                    
-                    if cross_sell_products:
-                        bundle = await self._create_bundle_from_products(
-                            cross_sell_products, "cross_sell", user_profile
-                        )
-                        if bundle:
-                            bundles.append(bundle)
-            
-            return bundles
-            
-        except Exception as e:
-            self.logger.error(f"Error generating cross-sell bundles: {str(e)}")
+
+        valid = self._pair_mask(pool, bundle_type, in_cart)
+        valid &= np.triu(np.ones((n, n), dtype=bool), k=1)
+        if not valid.any():
             return []
-    
-    async def _generate_upsell_bundles(
-        self,
-        user_profile: Optional[UserBehaviorProfile],
-        cart_items: List[Dict[str, Any]] = None
-    ) -> List[Dict[str, Any]]:
-        """Generate upsell bundles with premium products"""
+
+        score = self._pair_scores(pool, band)
+        popularity = pool.popularity / (pool.popularity.max() or 1.0)
+        # Ranking key: segment score, then co-purchase strength and popularity as tie-breakers
+        key = score + 0.1 * pool.affinity + 0.05 * (popularity[:, None] + popularity[None, :])
+        key = np.where(valid, key, -np.inf)
+
+        # Over-select pairs since several can grow into the same triple
+        flat = key.ravel()
+        count = min(limit * 3, int(valid.sum()))
+        top = np.argpartition(-flat, count - 1)[:count]
+        top = top[np.argsort(-flat[top])]
+
+        # A third item must pair validly with both members of the chosen pair
+        symmetric = np.maximum(np.where(valid, key, -np.inf), np.where(valid.T, key.T, -np.inf))
+
         bundles = []
-        
-        try:
-            # Get premium products in user's preferred categories
-            premium_products = await self._get_premium_products(user_profile)
-            
-            # Create upsell bundles
-            for product_group in premium_products:
-                if len(product_group) >= 2:
-                    bundle = await self._create_bundle_from_products(
-                        product_group, "upsell", user_profile
-                    )
-                    if bundle:
-                        bundles.append(bundle)
-            
-            return bundles
-            
-        except Exception as e:
-            self.logger.error(f"Error generating upsell bundles: {str(e)}")
-            return []
-    
-    async def _get_frequently_bought_together(self) -> List[List[Product]]:
-        """Get products that are frequently bought together"""
-        try:
-            # Query for products that appear together in orders
-            thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-            
-            query = text("""
-                SELECT 
-                    p1.id as product1_id,
-                    p2.id as product2_id,
-                    COUNT(*) as frequency
-                FROM order_items oi1
-                JOIN order_items oi2 ON oi1.order_id = oi2.order_id
-                JOIN products p1 ON oi1.product_id = p1.id
-                JOIN products p2 ON oi2.product_id = p2.id
-                WHERE oi1.product_id != oi2.product_id
-                AND oi1.created_at >= :thirty_days_ago
-                GROUP BY p1.id, p2.id
-                HAVING COUNT(*) >= 2
-                ORDER BY frequency DESC
-                LIMIT 20
-            """)
-            
-            result = await self.db.execute(query, {"thirty_days_ago": thirty_days_ago})
-            frequent_pairs = result.fetchall()
-            
-            # Group products that appear together
-            product_groups = defaultdict(set)
-            for pair in frequent_pairs:
-                product_groups[pair.product1_id].add(pair.product2_id)
-                product_groups[pair.product2_id].add(pair.product1_id)
-            
-            # Convert to product objects
-            bundles = []
-            for main_product_id, related_product_ids in product_groups.items():
-                if len(related_product_ids) >= 1:
-                    # Get main product
-                    main_product_query = select(Product).where(Product.id == main_product_id)
-                    main_result = await self.db.execute(main_product_query)
-                    main_product = main_result.scalar_one_or_none()
-                    
-                    if main_product:
-                        # Get related products
-                        related_products_query = select(Product).where(
-                            and_(
-                                Product.id.in_(list(related_product_ids)[:2]),  # Limit to 2 related products
-                                Product.is_active == True
-                            )
-                        )
-                        related_result = await self.db.execute(related_products_query)
-                        related_products = related_result.scalars().all()
-                        
-                        if related_products:
-                            bundle_products = [main_product] + list(related_products)
-                            bundles.append(bundle_products)
-            
-            return bundles
-            
-        except Exception as e:
-            self.logger.error(f"Error getting frequently bought together: {str(e)}")
-            return []
-    
-    async def _get_trending_products_in_category(
-        self,
-        category_id: str,
-        limit: int = 3
-    ) -> List[Product]:
-        """Get trending products in a specific category"""
-        try:
-            seven_days_ago = datetime.utcnow() - timedelta(days=7)
-            
-            query = select(
-                Product.id,
-                Product.name,
-                Product.price,
-                Product.category_id,
-                Product.brand_id,
-                Product.images,
-                func.count(UserActivity.id).label('view_count')
-            ).join(
-                UserActivity, Product.id == UserActivity.product_id
-            ).where(
-                and_(
-                    Product.category_id == category_id,
-                    Product.is_active == True,
-                    UserActivity.activity_type == ActivityType.PRODUCT_VIEW.value,
-                    UserActivity.created_at >= seven_days_ago
-                )
-            ).group_by(
-                Product.id, Product.name, Product.price, Product.category_id, Product.brand_id, Product.images
-            ).order_by(
-                desc('view_count')
-            ).limit(limit)
-            
-            result = await self.db.execute(query)
-            trending_products = result.fetchall()
-            
-            # Convert to Product objects
-            products = []
-            for product_data in trending_products:
-                product_query = select(Product).where(Product.id == product_data.id)
-                product_result = await self.db.execute(product_query)
-                product = product_result.scalar_one_or_none()
-                if product:
-                    products.append(product)
-            
-            return products
-            
-        except Exception as e:
-            self.logger.error(f"Error getting trending products: {str(e)}")
-            return []
-    
-    async def _get_high_margin_products(self) -> List[List[Product]]:
-        """Get products with high profit margins for promotional bundles"""
-        try:
-            # This would typically query a products table with margin information
-            # For now, we'll get products with higher prices as a proxy
-            query = select(Product).where(
-                and_(
-                    Product.is_active == True,
-                    Product.price > 100  # Assuming higher price = higher margin
-                )
-            ).order_by(desc(Product.price)).limit(10)
-            
-            result = await self.db.execute(query)
-            high_margin_products = result.scalars().all()
-            
-            # Group into bundles of 2-3 products
-            bundles = []
-            for i in range(0, len(high_margin_products), 2):
-                bundle = high_margin_products[i:i+3]
-                if len(bundle) >= 2:
-                    bundles.append(bundle)
-            
-            return bundles
-            
-        except Exception as e:
-            self.logger.error(f"Error getting high margin products: {str(e)}")
-            return []
-    
-    async def _get_cross_sell_products(self, product_id: str) -> List[Product]:
-        """Get cross-sell products for a given product"""
-        try:
-            # Get the product's category
-            product_query = select(Product).where(Product.id == product_id)
-            product_result = await self.db.execute(product_query)
-            product = product_result.scalar_one_or_none()
-            
-            if not product:
-                return []
-            
-            # Get related products in the same category
-            related_query = select(Product).where(
-                and_(
-                    Product.category_id == product.category_id,
-                    Product.id != product_id,
-                    Product.is_active == True
-                )
-            ).limit(3)
-            
-            result = await self.db.execute(related_query)
-            related_products = result.scalars().all()
-            
-            return related_products
-            
-        except Exception as e:
-            self.logger.error(f"Error getting cross-sell products: {str(e)}")
-            return []
-    
-    async def _get_premium_products(
-        self,
-        user_profile: Optional[UserBehaviorProfile]
-    ) -> List[List[Product]]:
-        """Get premium products for upsell bundles"""
-        try:
-            # Get products in user's preferred categories with higher prices
-            preferred_categories = user_profile.preferred_categories if user_profile else []
-            
-            if not preferred_categories:
-                # Fallback to general premium products
-                query = select(Product).where(
-                    and_(
-                        Product.is_active == True,
-                        Product.price > 200  # Premium price threshold
-                    )
-                ).order_by(desc(Product.price)).limit(6)
+        seen = set()
+        for index in top:
+            i, j = divmod(int(index), n)
+            members = [i, j]
+            third_scores = symmetric[i] + symmetric[j]
+            third_scores[[i, j]] = -np.inf
+            k = int(np.argmax(third_scores))
+            if np.isfinite(third_scores[k]):
+                members.append(k)
+            if frozenset(members) in seen:
+                continue
+            seen.add(frozenset(members))
+            bundles.append(self._create_bundle(pool, members, bundle_type, float(score[i, j])))
+            if len(bundles) >= limit:
+                break
+        return bundles
+
+    def _pair_mask(self, pool: CandidatePool, bundle_type: str, in_cart: Optional[np.ndarray]) -> np.ndarray:
+        stocked = pool.in_stock[:, None] & pool.in_stock[None, :]
+
+        if bundle_type == "complementary":
+            mask = pool.affinity > 0
+        elif bundle_type == "seasonal":
+            mask = pool.seasonal[:, None] & pool.seasonal[None, :]
+        elif bundle_type == "promotional":
+            if np.isfinite(pool.margin).any():
+                high = pool.margin >= np.nanquantile(pool.margin, 0.75)
             else:
-                query = select(Product).where(
-                    and_(
-                        Product.category_id.in_(preferred_categories),
-                        Product.is_active == True,
-                        Product.price > 150  # Premium price threshold
-                    )
-                ).order_by(desc(Product.price)).limit(6)
-            
-            result = await self.db.execute(query)
-            premium_products = result.scalars().all()
-            
-            # Group into bundles
-            bundles = []
-            for i in range(0, len(premium_products), 2):
-                bundle = premium_products[i:i+3]
-                if len(bundle) >= 2:
-                    bundles.append(bundle)
-            
-            return bundles
-            
-        except Exception as e:
-            self.logger.error(f"Error getting premium products: {str(e)}")
-            return []
-    
-    async def _create_bundle_from_products(
+                # No cost data: higher price as a proxy for higher margin
+                high = pool.price > 100
+            mask = high[:, None] & high[None, :]
+        elif bundle_type == "cross_sell":
+            if in_cart is None:
+                return np.zeros((len(pool), len(pool)), dtype=bool)
+            one_in_cart = in_cart[:, None] ^ in_cart[None, :]
+            related = (pool.category_codes[:, None] == pool.category_codes[None, :]) | (pool.affinity > 0)
+            mask = one_in_cart & related
+        elif bundle_type == "upsell":
+            premium = pool.price > 200
+            mask = premium[:, None] & premium[None, :]
+        else:
+            mask = np.zeros((len(pool), len(pool)), dtype=bool)
+
+        return mask & stocked
+
+    def _pair_scores(self, pool: CandidatePool, band: str) -> np.ndarray:
+        """Segment-level recommendation score for every pair (personal preferences are added later)"""
+        score = np.full((len(pool), len(pool)), 0.6)
+        avg_price = (pool.price[:, None] + pool.price[None, :]) / 2
+        if band == "premium":
+            score += 0.1 * (avg_price > 100)
+        elif band == "budget":
+            score += 0.1 * (avg_price < 100)
+        return np.minimum(1.0, score)
+
+    def _create_bundle(
         self,
-        products: List[Product],
+        pool: CandidatePool,
+        members: List[int],
         bundle_type: str,
-        user_profile: Optional[UserBehaviorProfile]
-    ) -> Optional[Dict[str, Any]]:
-        """Create a bundle from a list of products"""
-        try:
-            if len(products) < 2:
-                return None
-            
-            # Calculate bundle pricing
-            individual_price = sum(float(product.price) for product in products)
-            bundle_price = individual_price * 0.85  # 15% discount
-            discount_percentage = 15.0
-            savings_amount = individual_price - bundle_price
-            
-            # Calculate recommendation score
-            recommendation_score = self._calculate_bundle_score(products, user_profile)
-            
-            # Create bundle name
-            bundle_name = f"{bundle_type.title()} Bundle"
-            if bundle_type == "complementary":
-                bundle_name = "Perfect Together Bundle"
-            elif bundle_type == "seasonal":
-                bundle_name = "Seasonal Special Bundle"
-            elif bundle_type == "promotional":
-                bundle_name = "Limited Time Bundle"
-            elif bundle_type == "cross_sell":
-                bundle_name = "Complete Your Order Bundle"
-            elif bundle_type == "upsell":
-                bundle_name = "Premium Upgrade Bundle"
-            
-            bundle = {
-                'id': f"bundle_{bundle_type}_{len(products)}",
-                'name': bundle_name,
-                'type': bundle_type,
-                'products': [
-                    {
-                        'id': str(product.id),
-                        'name': product.name,
-                        'price': float(product.price),
-                        'image_url': product.images[0] if product.images else None,
-                        'category_id': str(product.category_id),
-                        'brand_id': str(product.brand_id) if product.brand_id else None
-                    }
-                    for product in products
-                ],
-                'individual_price': individual_price,
-                'bundle_price': bundle_price,
-                'discount_percentage': discount_percentage,
-                'savings_amount': savings_amount,
-                'recommendation_score': recommendation_score,
-                'confidence_score': min(1.0, recommendation_score + 0.2),
-                'expected_conversion_rate': self._calculate_expected_conversion_rate(
-                    bundle_type, recommendation_score, user_profile
-                ),
-                'expected_revenue': bundle_price * self._calculate_expected_conversion_rate(
-                    bundle_type, recommendation_score, user_profile
-                ),
-                'bundle_reason': self._get_bundle_reason(bundle_type, products, user_profile)
-            }
-            
-            return bundle
-            
-        except Exception as e:
-            self.logger.error(f"Error creating bundle: {str(e)}")
-            return None
-    
-    async def _create_promotional_bundle(
-        self,
-        products: List[Product],
-        user_profile: Optional[UserBehaviorProfile]
-    ) -> Optional[Dict[str, Any]]:
-        """Create a promotional bundle with higher discount"""
-        try:
-            if len(products) < 2:
-                return None
-            
-            # Calculate bundle pricing with higher discount
-            individual_price = sum(float(product.price) for product in products)
-            bundle_price = individual_price * 0.75  # 25% discount
-            discount_percentage = 25.0
-            savings_amount = individual_price - bundle_price
-            
-            # Higher recommendation score for promotional bundles
-            recommendation_score = 0.9
-            
-            bundle = {
-                'id': f"bundle_promotional_{len(products)}",
-                'name': "Limited Time Promotional Bundle",
-                'type': 'promotional',
-                'products': [
-                    {
-                        'id': str(product.id),
-                        'name': product.name,
-                        'price': float(product.price),
-                        'image_url': product.images[0] if product.images else None,
-                        'category_id': str(product.category_id),
-                        'brand_id': str(product.brand_id) if product.brand_id else None
-                    }
-                    for product in products
-                ],
-                'individual_price': individual_price,
-                'bundle_price': bundle_price,
-                'discount_percentage': discount_percentage,
-                'savings_amount': savings_amount,
-                'recommendation_score': recommendation_score,
-                'confidence_score': 0.95,
-                'expected_conversion_rate': 0.15,  # Higher for promotional
-                'expected_revenue': bundle_price * 0.15,
-                'bundle_reason': "Limited time offer - Save 25% on this bundle!"
-            }
-            
-            return bundle
-            
-        except Exception as e:
-            self.logger.error(f"Error creating promotional bundle: {str(e)}")
-            return None
-    
-    def _calculate_bundle_score(
+        segment_score: float
+    ) -> Dict[str, Any]:
+        """Create a bundle from pool positions"""
+        discount_percentage = 25.0 if bundle_type == "promotional" else 15.0
+        individual_price = float(pool.price[members].sum())
+        bundle_price = individual_price * (1 - discount_percentage / 100)
+
+        return {
+            'id': f"bundle_{bundle_type}_" + "_".join(pool.ids[i][:8] for i in members),
+            'name': BUNDLE_NAMES.get(bundle_type, f"{bundle_type.title()} Bundle"),
+            'type': bundle_type,
+            'products': [
+                {
+                    'id': pool.ids[i],
+                    'name': pool.names[i],
+                    'price': float(pool.price[i]),
+                    'image_url': pool.images[i],
+                    'category_id': pool.category_ids[i],
+                    'brand_id': pool.brand_ids[i]
+                }
+                for i in members
+            ],
+            'individual_price': individual_price,
+            'bundle_price': bundle_price,
+            'discount_percentage': discount_percentage,
+            'savings_amount': individual_price - bundle_price,
+            'segment_score': 0.9 if bundle_type == "promotional" else segment_score
+        }
+
+    def _personalize_bundle(
         self,
-        products: List[Product],
+        bundle: Dict[str, Any],
         user_profile: Optional[UserBehaviorProfile]
-    ) -> float:
-        """Calculate recommendation score for a bundle"""
-        base_score = 0.6
-        
-        # Category preference bonus
-        if user_profile and user_profile.preferred_categories:
-            category_matches = sum(
-                1 for product in products 
-                if str(product.category_id) in user_profile.preferred_categories
-            )
-            base_score += (category_matches / len(products)) * 0.2
-        
-        # Brand preference bonus
-        if user_profile and user_profile.preferred_brands:
-            brand_matches = sum(
-                1 for product in products 
-                if product.brand_id and str(product.brand_id) in user_profile.preferred_brands
-            )
-            base_score += (brand_matches / len(products)) * 0.2
-        
-        # Price sensitivity adjustment
-        if user_profile and user_profile.price_sensitivity:
-            avg_price = sum(float(product.price) for product in products) / len(products)
-            if user_profile.price_sensitivity < 0.5:  # Low price sensitivity
-                if avg_price > 100:
-                    base_score += 0.1
-            elif user_profile.price_sensitivity > 0.7:  # High price sensitivity
-                if avg_price < 100:
-                    base_score += 0.1
-        
-        return min(1.0, base_score)
-    
+    ) -> Dict[str, Any]:
+        """Apply the user's category and brand preferences to a shared bundle"""
+        bundle = dict(bundle)
+        products = bundle['products']
+        recommendation_score = bundle.pop('segment_score')
+
+        if bundle['type'] != "promotional" and user_profile:
+            if user_profile.preferred_categories:
+                category_matches = sum(1 for p in products if p['category_id'] in user_profile.preferred_categories)
+                recommendation_score += (category_matches / len(products)) * 0.2
+            if user_profile.preferred_brands:
+                brand_matches = sum(1 for p in products if p['brand_id'] and p['brand_id'] in user_profile.preferred_brands)
+                recommendation_score += (brand_matches / len(products)) * 0.2
+        recommendation_score = min(1.0, recommendation_score)
+
+        if bundle['type'] == "promotional":
+            conversion_rate = 0.15  # Higher for promotional
+            confidence_score = 0.95
+            reason = f"Limited time offer - Save {bundle['discount_percentage']:.0f}% on this bundle!"
+        else:
+            conversion_rate = self._calculate_expected_conversion_rate(bundle['type'], recommendation_score, user_profile)
+            confidence_score = min(1.0, recommendation_score + 0.2)
+            reason = self._get_bundle_reason(bundle['type'], products, user_profile)
+
+        bundle.update({
+            'recommendation_score': recommendation_score,
+            'confidence_score': confidence_score,
+            'expected_conversion_rate': conversion_rate,
+            'expected_revenue': bundle['bundle_price'] * conversion_rate,
+            'bundle_reason': reason
+        })
+        return bundle
+
     def _calculate_expected_conversion_rate(
         self,
         bundle_type: str,
@@ -612,7 +417,7 @@ class BundleAutomationEngine:
     ) -> float:
         """Calculate expected conversion rate for a bundle"""
         base_rate = 0.05  # 5% base conversion rate
-        
+
         # Bundle type multiplier
         type_multipliers = {
             'complementary': 1.2,
@@ -621,12 +426,12 @@ class BundleAutomationEngine:
             'cross_sell': 1.3,
             'upsell': 0.8
         }
-        
+
         base_rate *= type_multipliers.get(bundle_type, 1.0)
-        
+
         # Recommendation score multiplier
         base_rate *= recommendation_score
-        
+
         # User profile multiplier
         if user_profile:
             if user_profile.impulse_buying:
@@ -635,13 +440,13 @@ class BundleAutomationEngine:
                 base_rate *= 1.4
             if user_profile.customer_lifecycle_stage == 'loyal':
                 base_rate *= 1.2
-        
+
         return min(0.3, base_rate)  # Cap at 30%
-    
+
     def _get_bundle_reason(
         self,
         bundle_type: str,
-        products: List[Product],
+        products: List[Dict[str, Any]],
         user_profile: Optional[UserBehaviorProfile]
     ) -> str:
         """Get human-readable reason for bundle recommendation"""
@@ -652,20 +457,20 @@ class BundleAutomationEngine:
             'cross_sell': "Complete your order with these related items",
             'upsell': "Upgrade to premium versions"
         }
-        
+
         base_reason = reasons.get(bundle_type, "Recommended bundle for you")
-        
+
         # Add personalization
         if user_profile and user_profile.preferred_categories:
             category_matches = sum(
-                1 for product in products 
-                if str(product.category_id) in user_profile.preferred_categories
+                1 for product in products
+                if product['category_id'] in user_profile.preferred_categories
             )
             if category_matches > 0:
                 base_reason += " based on your preferences"
-        
+
         return base_reason
-    
+
     def _get_seasonal_categories(self, month: int) -> List[str]:
         """Get seasonal categories based on current month"""
         seasonal_map = {
@@ -682,9 +487,9 @@ class BundleAutomationEngine:
             11: ['fall_clothing', 'thanksgiving', 'outdoor_gear'],  # November
             12: ['winter_clothing', 'christmas', 'holiday_gifts']  # December
         }
-        
+
         return seasonal_map.get(month, ['general'])
-    
+
     async def _log_bundle_recommendations(
         self,
         user_id: Optional[str],
@@ -693,27 +498,29 @@ class BundleAutomationEngine:
     ) -> None:
         """Log bundle recommendations for performance tracking"""
         try:
-            for bundle in bundles:
-                bundle_log = BundleRecommendation(
-                    user_id=user_id,
-                    session_id=session_id,
-                    bundle_name=bundle['name'],
-                    bundle_type=bundle['type'],
-                    bundle_products=[p['id'] for p in bundle['products']],
-                    individual_price=bundle['individual_price'],
-                    bundle_price=bundle['bundle_price'],
-                    discount_percentage=bundle['discount_percentage'],
-                    savings_amount=bundle['savings_amount'],
-                    recommendation_score=bundle['recommendation_score'],
-                    confidence_score=bundle['confidence_score'],
-                    expected_conversion_rate=bundle['expected_conversion_rate'],
-                    expected_revenue=bundle['expected_revenue']
-                )
-                
-                self.db.add(bundle_log)
-            
+            await self.db.execute(
+                insert(BundleRecommendation),
+                [
+                    {
+                        'user_id': user_id,
+                        'session_id': session_id,
+                        'bundle_name': bundle['name'],
+                        'bundle_type': bundle['type'],
+                        'bundle_products': [p['id'] for p in bundle['products']],
+                        'individual_price': bundle['individual_price'],
+                        'bundle_price': bundle['bundle_price'],
+                        'discount_percentage': bundle['discount_percentage'],
+                        'savings_amount': bundle['savings_amount'],
+                        'recommendation_score': bundle['recommendation_score'],
+                        'confidence_score': bundle['confidence_score'],
+                        'expected_conversion_rate': bundle['expected_conversion_rate'],
+                        'expected_revenue': bundle['expected_revenue']
+                    }
+                    for bundle in bundles
+                ]
+            )
             await self.db.commit()
-            
+
         except Exception as e:
             self.logger.error(f"Error logging bundle recommendations: {str(e)}")
             await self.db.rollback()
@@ -0,0 +1,433 @@
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import select, update, delete, and_, tuple_, inspect, func, cast, String
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+import asyncio
+import hashlib
+import zlib
+import numpy as np
+from app.features.analytics.models.cardinality_sketch import CardinalitySketch
+from app.core.logging import get_logger
+
+logger = get_logger("cardinality")
+
+# 2^14 registers: ~0.8% standard error, 16 KB per sketch before compression
+HLL_PRECISION = 14
+HLL_REGISTERS = 1 << HLL_PRECISION
+HLL_RANK_BITS = 64 - HLL_PRECISION
+HLL_ALPHA_INF = 1 / (2 * np.log(2))
+
+# Metrics; each is sketched per subject per day
+PRODUCT_VIEWERS = "product_viewers"
+SUPPLIER_VIEWERS = "supplier_viewers"
+SEARCHERS = "searchers"
+SEARCH_QUERIES = "search_queries"  # distinct query terms rather than visitors
+QUERY_SEARCHERS = "query_searchers"
+PRODUCT_SEARCHERS = "product_searchers"  # visitors who clicked the product from search results
+CATEGORY_SEARCHERS = "category_searchers"
+BRAND_SEARCHERS = "brand_searchers"
+# Subject of site-wide metrics
+ALL_SUBJECTS = "all"
+# Metrics that also keep one rolling all-time sketch per subject, so an all-time count
+# reads one row instead of merging every daily sketch
+ALL_TIME_METRICS = {PRODUCT_VIEWERS}
+# Day the all-time sketches are stored under; day ranges and pruning never reach it
+ALL_TIME = date.max
+# Subject of the row marking that a metric's all-time sketches were seeded from its daily ones
+ALL_TIME_SEEDED = "_seeded"
+
+# Upper bound on hashes held between flushes if flushing stalls; new identities are dropped
+MAX_PENDING_HASHES = 1000000
+# Sketch rows per statement, well under the driver's bind-parameter limit
+FLUSH_BATCH = 2000
+# Rows streamed per backfill flush
+BACKFILL_CHUNK = 200000
+
+def hash_value(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+def visitor_key(
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None
+) -> Optional[str]:
+    """Best available identity of a visitor: account, then session, then address and agent"""
+    if user_id:
+        return str(user_id)
+    if session_id:
+        return session_id
+    return f"{ip_address}|{user_agent}" if ip_address else None
+
+def normalize_term(term: Optional[str]) -> str:
+    return (term or "").strip().lower()[:255]
+
+def _sigma(x: float) -> float:
+    if x == 1:
+        return float("inf")
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous, z = z, z + x * y
+        y += y
+        if z == previous:
+            return z
+
+def _tau(x: float) -> float:
+    if x == 0 or x == 1:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = x ** 0.5
+        y *= 0.5
+        previous, z = z, z - (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+class HyperLogLog:
+    """Dense HyperLogLog over 64-bit hashes; sketches merge with a register-wise max"""
+
+    __slots__ = ("registers",)
+
+    def __init__(self, registers: Optional[np.ndarray] = None):
+        self.registers = registers if registers is not None else np.zeros(HLL_REGISTERS, dtype=np.uint8)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        return cls(np.frombuffer(zlib.decompress(data), dtype=np.uint8).copy())
+
+    def to_bytes(self) -> bytes:
+        # Mostly-empty sketches (a product with a handful of viewers) compress to a few dozen bytes
+        return zlib.compress(self.registers.tobytes())
+
+    def add_hashes(self, hashes: Iterable[int]) -> None:
+        values = np.fromiter(hashes, dtype=np.uint64)
+        if not len(values):
+            return
+        index = (values >> np.uint64(HLL_RANK_BITS)).astype(np.intp)
+        rest = values & np.uint64((1 << HLL_RANK_BITS) - 1)
+        # Rank = position of the leftmost 1-bit in the remaining bits; frexp is exact below 2^53
+        _, exponent = np.frexp(rest.astype(np.float64))
+        rank = (HLL_RANK_BITS + 1 - exponent).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        # Ertl's improved estimator: unbiased from tiny to huge cardinalities without the
+        # empirical bias tables or the linear-counting switch-over of classic HyperLogLog
+        counts = np.bincount(self.registers, minlength=HLL_RANK_BITS + 2).tolist()
+        m = HLL_REGISTERS
+        z = m * _tau(1 - counts[HLL_RANK_BITS + 1] / m)
+        for rank in range(HLL_RANK_BITS, 0, -1):
+            z = 0.5 * (z + counts[rank])
+        z += m * _sigma(counts[0] / m)
+        return int(round(HLL_ALPHA_INF * m * m / z))
+
+SketchKey = Tuple[str, str, date]
+
+class SketchBuffer:
+    """Per-process identity hashes seen since the last flush, grouped by (metric, subject, day)"""
+
+    def __init__(self, max_pending: int = MAX_PENDING_HASHES):
+        self.max_pending = max_pending
+        self._pending: Dict[SketchKey, Set[int]] = defaultdict(set)
+        self._size = 0
+        self.dropped = 0
+
+    def add(self, metric: str, subject, value: Optional[str], day: Optional[date] = None) -> None:
+        if not value or subject is None:
+            return
+        if self._size >= self.max_pending:
+            self.dropped += 1
+            return
+        value_hash = hash_value(value)
+        day = day or datetime.utcnow().date()
+        for key_day in ((day, ALL_TIME) if metric in ALL_TIME_METRICS else (day,)):
+            hashes = self._pending[(metric, str(subject), key_day)]
+            before = len(hashes)
+            hashes.add(value_hash)
+            self._size += len(hashes) - before
+
+    def pending(self, metric: str, subjects: Iterable[str], start_day: Optional[date], end_day: date) -> Dict[SketchKey, Set[int]]:
+        wanted = set(subjects)
+        return {
+            key: hashes for key, hashes in self._pending.items()
+            if key[0] == metric and key[1] in wanted and (start_day is None or key[2] >= start_day) and key[2] <= end_day
+        }
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _drain(self) -> Dict[SketchKey, Set[int]]:
+        drained = self._pending
+        self._pending, self._size = defaultdict(set), 0
+        return drained
+
+    def _requeue(self, pending: Dict[SketchKey, Set[int]]) -> None:
+        for key, hashes in pending.items():
+            merged = self._pending[key]
+            before = len(merged)
+            merged |= hashes
+            self._size += len(merged) - before
+
+    async def flush(self, session_factory) -> int:
+        """Merge pending hashes into the stored sketches; returns the number of sketches written"""
+        pending = self._drain()
+        if not pending:
+            return 0
+
+        try:
+            async with session_factory() as db:
+                written = await _merge_into_stored(db, pending, lambda key, sketch: sketch.add_hashes(pending[key]))
+                await db.commit()
+            return written
+        except asyncio.CancelledError:
+            # Shutdown cancelled the flusher mid-write; merging the hashes again is harmless
+            self._requeue(pending)
+            raise
+        except Exception as e:
+            logger.error(f"Error flushing {len(pending)} cardinality sketches: {str(e)}")
+            self._requeue(pending)
+            return 0
+
+async def _merge_into_stored(db, keys: Iterable[SketchKey], combine: Callable[[SketchKey, HyperLogLog], None]) -> int:
+    """Apply `combine` to the stored sketch of every key (empty if missing) and write them back"""
+    # Sorted so concurrent workers lock sketch rows in the same order
+    keys = sorted(keys)
+    now = datetime.utcnow()
+    written = 0
+    for offset in range(0, len(keys), FLUSH_BATCH):
+        batch = keys[offset:offset + FLUSH_BATCH]
+        # Make sure every row exists first so FOR UPDATE serializes concurrent merges
+        await db.execute(
+            pg_insert(CardinalitySketch)
+            .values([
+                {"metric": metric, "subject": subject, "day": day, "registers": EMPTY_SKETCH, "updated_at": now}
+                for metric, subject, day in batch
+            ])
+            .on_conflict_do_nothing()
+        )
+        result = await db.execute(
+            select(CardinalitySketch.metric, CardinalitySketch.subject, CardinalitySketch.day, CardinalitySketch.registers)
+            .where(tuple_(CardinalitySketch.metric, CardinalitySketch.subject, CardinalitySketch.day).in_(batch))
+            .order_by(CardinalitySketch.metric, CardinalitySketch.subject, CardinalitySketch.day)
+            .with_for_update()
+        )
+        updates = []
+        for metric, subject, day, registers in result.all():
+            sketch = HyperLogLog.from_bytes(registers)
+            combine((metric, subject, day), sketch)
+            updates.append({
+                "metric": metric, "subject": subject, "day": day,
+                "registers": sketch.to_bytes(), "updated_at": now
+            })
+        await db.execute(update(CardinalitySketch), updates)
+        written += len(updates)
+    return written
+
+EMPTY_SKETCH = HyperLogLog().to_bytes()
+
+sketch_buffer = SketchBuffer()
+
+async def _load_sketches(db, metric: str, subjects: List[str], start_day: Optional[date], end_day: date) -> List[Tuple[str, date, HyperLogLog]]:
+    """Stored and pending per-day sketches for the subjects in [start_day, end_day]"""
+    conditions = [
+        CardinalitySketch.metric == metric,
+        CardinalitySketch.subject.in_(subjects),
+        CardinalitySketch.day <= end_day
+    ]
+    if start_day is not None:
+        conditions.append(CardinalitySketch.day >= start_day)
+    result = await db.execute(
+        select(CardinalitySketch.subject, CardinalitySketch.day, CardinalitySketch.registers).where(and_(*conditions))
+    )
+    sketches = [(subject, day, HyperLogLog.from_bytes(registers)) for subject, day, registers in result.all()]
+
+    for (_, subject, day), hashes in sketch_buffer.pending(metric, subjects, start_day, end_day).items():
+        sketch = HyperLogLog()
+        sketch.add_hashes(hashes)
+        sketches.append((subject, day, sketch))
+    return sketches
+
+async def estimate_unique_by_subject(
+    db, metric: str, subjects: Iterable, start_day: Optional[date] = None, end_day: Optional[date] = None
+) -> Dict[str, int]:
+    """Distinct count per subject over a date range (all time when neither day is given)"""
+    subjects = list({str(subject) for subject in subjects if subject is not None})
+    if not subjects:
+        return {}
+    if start_day is None and end_day is None and metric in ALL_TIME_METRICS:
+        start_day = end_day = ALL_TIME
+    merged: Dict[str, HyperLogLog] = {}
+    for subject, _, sketch in await _load_sketches(db, metric, subjects, start_day, end_day or datetime.utcnow().date()):
+        if subject in merged:
+            merged[subject].merge(sketch)
+        else:
+            merged[subject] = sketch
+    return {subject: merged[subject].estimate() if subject in merged else 0 for subject in subjects}
+
+async def estimate_unique(
+    db, metric: str, subject=ALL_SUBJECTS, start_day: Optional[date] = None, end_day: Optional[date] = None
+) -> int:
+    estimates = await estimate_unique_by_subject(db, metric, [subject], start_day, end_day)
+    return estimates.get(str(subject), 0)
+
+async def estimate_unique_by_day(
+    db, metric: str, subject=ALL_SUBJECTS, start_day: Optional[date] = None, end_day: Optional[date] = None
+) -> Dict[date, int]:
+    """Distinct count for each day a sketch exists"""
+    merged: Dict[date, HyperLogLog] = {}
+    for _, day, sketch in await _load_sketches(db, metric, [str(subject)], start_day, end_day or datetime.utcnow().date()):
+        if day in merged:
+            merged[day].merge(sketch)
+        else:
+            merged[day] = sketch
+    return {day: sketch.estimate() for day, sketch in merged.items()}
+
+async def backfill_sketches(session_factory, days: int) -> None:
+    """Build sketches from the raw view and search logs of the last `days` days"""
+    from app.features.products.models.product import Product
+    from app.features.products.models.product_view import ProductView
+    from app.features.products.models.product_search_log import ProductSearchLog
+
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    buffer = SketchBuffer(max_pending=BACKFILL_CHUNK * 8)
+
+    try:
+        rows = 0
+        async with session_factory() as db:
+            views = await db.stream(
+                select(
+                    ProductView.product_id, Product.supplier_id, ProductView.viewed_at,
+                    cast(ProductView.user_id, String), ProductView.session_id,
+                    func.host(ProductView.ip_address), ProductView.user_agent
+                )
+                .join(Product, Product.id == ProductView.product_id)
+                .where(ProductView.viewed_at >= cutoff)
+                .execution_options(yield_per=50000)
+            )
+            async for product_id, supplier_id, viewed_at, *identity in views:
+                visitor = visitor_key(*identity)
+                buffer.add(PRODUCT_VIEWERS, product_id, visitor, viewed_at.date())
+                buffer.add(SUPPLIER_VIEWERS, supplier_id, visitor, viewed_at.date())
+                rows += 1
+                if rows % BACKFILL_CHUNK == 0:
+                    await buffer.flush(session_factory)
+
+            searches = await db.stream(
+                select(
+                    ProductSearchLog.query_term, ProductSearchLog.created_at, ProductSearchLog.clicked_product_id,
+                    Product.category_id, Product.brand_id,
+                    cast(ProductSearchLog.user_id, String), ProductSearchLog.session_id,
+                    ProductSearchLog.ip_address, ProductSearchLog.user_agent
+                )
+                .outerjoin(Product, Product.id == ProductSearchLog.clicked_product_id)
+                .where(ProductSearchLog.created_at >= cutoff)
+                .execution_options(yield_per=50000)
+            )
+            async for term, created_at, product_id, category_id, brand_id, *identity in searches:
+                record_search(buffer, term, visitor_key(*identity), created_at.date())
+                if product_id:
+                    record_search_click(buffer, product_id, category_id, brand_id, visitor_key(*identity), created_at.date())
+                rows += 1
+                if rows % BACKFILL_CHUNK == 0:
+                    await buffer.flush(session_factory)
+        await buffer.flush(session_factory)
+        # The buffer fed the all-time sketches as well, so they need no seeding
+        await _store_merged(session_factory, {(metric, ALL_TIME_SEEDED, ALL_TIME): HyperLogLog() for metric in ALL_TIME_METRICS})
+        logger.info(f"Backfilled cardinality sketches from {rows} events over {days} days")
+    except Exception as e:
+        logger.error(f"Cardinality sketch backfill failed: {str(e)}")
+
+async def seed_all_time_sketches(session_factory) -> None:
+    """Build the all-time sketches of tables that predate them by merging their daily sketches, once"""
+    try:
+        for metric in sorted(ALL_TIME_METRICS):
+            async with session_factory() as db:
+                seeded = await db.scalar(
+                    select(CardinalitySketch.metric).where(
+                        CardinalitySketch.metric == metric,
+                        CardinalitySketch.subject == ALL_TIME_SEEDED,
+                        CardinalitySketch.day == ALL_TIME
+                    )
+                )
+                if seeded:
+                    continue
+
+                # One subject at a time in subject order, writing every FLUSH_BATCH subjects
+                merged: Dict[SketchKey, HyperLogLog] = {}
+                sketches = await db.stream(
+                    select(CardinalitySketch.subject, CardinalitySketch.registers)
+                    .where(CardinalitySketch.metric == metric, CardinalitySketch.day < ALL_TIME)
+                    .order_by(CardinalitySketch.subject)
+                    .execution_options(yield_per=FLUSH_BATCH)
+                )
+                async for subject, registers in sketches:
+                    key = (metric, subject, ALL_TIME)
+                    if key not in merged and len(merged) >= FLUSH_BATCH:
+                        await _store_merged(session_factory, merged)
+                        merged = {}
+                    sketch = HyperLogLog.from_bytes(registers)
+                    merged[key] = merged[key].merge(sketch) if key in merged else sketch
+                merged[(metric, ALL_TIME_SEEDED, ALL_TIME)] = HyperLogLog()
+                await _store_merged(session_factory, merged)
+            logger.info(f"Seeded all-time {metric} sketches from daily sketches")
+    except Exception as e:
+        logger.error(f"Seeding all-time cardinality sketches failed: {str(e)}")
+
+async def _store_merged(session_factory, merged: Dict[SketchKey, HyperLogLog]) -> None:
+    # Merged into (not over) the stored rows, which the flusher may already be adding to
+    async with session_factory() as db:
+        await _merge_into_stored(db, merged, lambda key, sketch: sketch.merge(merged[key]))
+        await db.commit()
+
+def record_search(buffer: SketchBuffer, term: Optional[str], visitor: Optional[str], day: Optional[date] = None) -> None:
+    term = normalize_term(term)
+    buffer.add(SEARCHERS, ALL_SUBJECTS, visitor, day)
+    buffer.add(SEARCH_QUERIES, ALL_SUBJECTS, term, day)
+    if term:
+        buffer.add(QUERY_SEARCHERS, term, visitor, day)
+
+def record_search_click(
+    buffer: SketchBuffer, product_id, category_id, brand_id, visitor: Optional[str], day: Optional[date] = None
+) -> None:
+    buffer.add(PRODUCT_SEARCHERS, product_id, visitor, day)
+    buffer.add(CATEGORY_SEARCHERS, category_id, visitor, day)
+    buffer.add(BRAND_SEARCHERS, brand_id, visitor, day)
+
+async def prune_sketches(session_factory, keep_days: int) -> int:
+    cutoff = datetime.utcnow().date() - timedelta(days=keep_days)
+    async with session_factory() as db:
+        result = await db.execute(delete(CardinalitySketch).where(CardinalitySketch.day < cutoff))
+        await db.commit()
+        return result.rowcount or 0
+
+async def ensure_sketch_tables(engine) -> bool:
+    """Create the sketch table; True when it did not exist yet and needs a backfill"""
+    def create(sync_conn) -> bool:
+        existed = inspect(sync_conn).has_table(CardinalitySketch.__tablename__)
+        CardinalitySketch.metadata.create_all(sync_conn, tables=[CardinalitySketch.__table__], checkfirst=True)
+        return not existed
+
+    async with engine.begin() as conn:
+        return await conn.run_sync(create)
+
+async def run_sketch_flusher(session_factory, interval_seconds: float, keep_days: int) -> None:
+    """Background loop that merges buffered identities into stored sketches, pruning once a day"""
+    pruned_on = None
+    while True:
+        await asyncio.sleep(interval_seconds)
+        await sketch_buffer.flush(session_factory)
+        today = datetime.utcnow().date()
+        if pruned_on != today:
+            try:
+                removed = await prune_sketches(session_factory, keep_days)
+                if removed:
+                    logger.info(f"Pruned {removed} cardinality sketches older than {keep_days} days")
+                pruned_on = today
+            except Exception as e:
+                logger.error(f"Cardinality sketch pruning failed: {str(e)}")
@@ -0,0 +1,227 @@
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+from dataclasses import dataclass
+from datetime import datetime
+import json
+import os
+import numpy as np
+
+# Implicit feedback strength per interaction type
+ACTIVITY_WEIGHTS = {
+    "product_view": 1.0,
+    "recommendation_click": 1.0,
+    "wishlist_add": 2.0,
+    "add_to_cart": 3.0,
+    "purchase": 5.0,
+}
+
+CURRENT_POINTER = "CURRENT"
+
+@dataclass
+class InteractionMatrix:
+    """Sparse user x item matrix in CSR form, built from (user, item, weight) triples"""
+    user_ids: np.ndarray
+    item_ids: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.user_ids), len(self.item_ids)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.data)
+
+    @classmethod
+    def from_triples(cls, users: Sequence[str], items: Sequence[str], weights: Sequence[float]) -> "InteractionMatrix":
+        """Duplicate (user, item) pairs are summed, then dampened with log1p"""
+        user_ids, rows = np.unique(np.asarray(users, dtype=str), return_inverse=True)
+        item_ids, cols = np.unique(np.asarray(items, dtype=str), return_inverse=True)
+        weights = np.asarray(weights, dtype=np.float32)
+
+        # Sum duplicates by collapsing (row, col) into one key
+        keys = rows.astype(np.int64) * len(item_ids) + cols
+        keys, inverse = np.unique(keys, return_inverse=True)
+        data = np.log1p(np.bincount(inverse, weights=weights)).astype(np.float32)
+        rows = (keys // len(item_ids)).astype(np.int32)
+        indices = (keys % len(item_ids)).astype(np.int32)
+
+        indptr = np.zeros(len(user_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(user_ids)), out=indptr[1:])
+        return cls(user_ids, item_ids, indptr, indices, data)
+
+    def row_ids(self) -> np.ndarray:
+        return np.repeat(np.arange(len(self.user_ids), dtype=np.int32), np.diff(self.indptr))
+
+    def dot(self, dense: np.ndarray) -> np.ndarray:
+        """self @ dense for a (n_items, k) dense matrix"""
+        rows = self.row_ids()
+        out = np.empty((len(self.user_ids), dense.shape[1]), dtype=np.float32)
+        for j in range(dense.shape[1]):
+            out[:, j] = np.bincount(rows, weights=self.data * dense[self.indices, j], minlength=len(self.user_ids))
+        return out
+
+    def rdot(self, dense: np.ndarray) -> np.ndarray:
+        """self.T @ dense for a (n_users, k) dense matrix"""
+        rows = self.row_ids()
+        out = np.empty((len(self.item_ids), dense.shape[1]), dtype=np.float32)
+        for j in range(dense.shape[1]):
+            out[:, j] = np.bincount(self.indices, weights=self.data * dense[rows, j], minlength=len(self.item_ids))
+        return out
+
+def train_factors(
+    matrix: InteractionMatrix,
+    factors: int = 64,
+    n_iter: int = 4,
+    oversample: int = 10,
+    seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Truncated SVD by randomized range finding (Halko et al.), sparse products only.
+
+    Returns user factors (U * S) and item factors (V) so that user_factors @ item_factors.T
+    approximates the interaction matrix.
+    """
+    rng = np.random.default_rng(seed)
+    rank = min(factors + oversample, *matrix.shape)
+
+    q = matrix.dot(rng.standard_normal((matrix.shape[1], rank)).astype(np.float32))
+    q, _ = np.linalg.qr(q)
+    for _ in range(n_iter):
+        q, _ = np.linalg.qr(matrix.rdot(q))
+        q, _ = np.linalg.qr(matrix.dot(q))
+
+    # B = Q.T @ A is small (rank x n_items)
+    b = matrix.rdot(q).T
+    u_small, s, vt = np.linalg.svd(b, full_matrices=False)
+    k = min(factors, len(s))
+    user_factors = (q @ u_small[:, :k]) * s[:k]
+    item_factors = vt[:k].T
+    return user_factors.astype(np.float32), item_factors.astype(np.float32)
+
+class CollaborativeModel:
+    """Trained factors plus each user's seen items, loaded memory-mapped so workers share pages"""
+
+    def __init__(
+        self,
+        user_ids: np.ndarray,
+        item_ids: np.ndarray,
+        user_factors: np.ndarray,
+        item_factors: np.ndarray,
+        seen_indptr: np.ndarray,
+        seen_indices: np.ndarray,
+        trained_at: Optional[str] = None,
+        version: Optional[str] = None
+    ):
+        self.user_ids = user_ids
+        self.item_ids = item_ids
+        self.user_factors = user_factors
+        self.item_factors = item_factors
+        self.seen_indptr = seen_indptr
+        self.seen_indices = seen_indices
+        self.trained_at = trained_at
+        self.version = version
+        self._user_index = {user_id: i for i, user_id in enumerate(user_ids.tolist())}
+
+    @classmethod
+    def train(cls, matrix: InteractionMatrix, factors: int = 64, **kwargs) -> "CollaborativeModel":
+        user_factors, item_factors = train_factors(matrix, factors=factors, **kwargs)
+        return cls(
+            matrix.user_ids, matrix.item_ids, user_factors, item_factors,
+            matrix.indptr, matrix.indices, datetime.utcnow().isoformat()
+        )
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._user_index
+
+    def save(self, model_dir: str) -> str:
+        """Write a new version under model_dir and switch the CURRENT pointer to it"""
+        version = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        path = os.path.join(model_dir, version)
+        os.makedirs(path, exist_ok=True)
+        for name in ("user_ids", "item_ids", "user_factors", "item_factors", "seen_indptr", "seen_indices"):
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"trained_at": self.trained_at, "factors": int(self.item_factors.shape[1])}, f)
+
+        pointer_tmp = os.path.join(model_dir, f".{CURRENT_POINTER}.tmp")
+        with open(pointer_tmp, "w") as f:
+            f.write(version)
+        os.replace(pointer_tmp, os.path.join(model_dir, CURRENT_POINTER))
+        self.version = version
+        return path
+
+    @classmethod
+    def load(cls, model_dir: str) -> Optional["CollaborativeModel"]:
+        pointer = os.path.join(model_dir, CURRENT_POINTER)
+        if not os.path.exists(pointer):
+            return None
+        with open(pointer) as f:
+            version = f.read().strip()
+        path = os.path.join(model_dir, version)
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+
+        def array(name: str, mmap: bool = True) -> np.ndarray:
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+
+        return cls(
+            array("user_ids", mmap=False),
+            array("item_ids", mmap=False),
+            array("user_factors"),
+            array("item_factors"),
+            array("seen_indptr"),
+            array("seen_indices"),
+            meta.get("trained_at"),
+            version
+        )
+
+    def recommend(
+        self,
+        user_ids: Sequence[str],
+        n: int = 10,
+        exclude_seen: bool = True
+    ) -> Dict[str, List[Tuple[str, float]]]:
+        """Top-n items for each known user from one matrix multiply and argpartition"""
+        known = [user_id for user_id in user_ids if user_id in self._user_index]
+        if not known:
+            return {}
+        rows = np.fromiter((self._user_index[user_id] for user_id in known), dtype=np.int64, count=len(known))
+        scores = np.asarray(self.user_factors[rows]) @ np.asarray(self.item_factors).T
+
+        if exclude_seen:
+            starts, ends = self.seen_indptr[rows], self.seen_indptr[rows + 1]
+            seen_rows = np.repeat(np.arange(len(rows)), ends - starts)
+            seen_cols = np.concatenate([self.seen_indices[s:e] for s, e in zip(starts, ends)]) if len(seen_rows) else []
+            scores[seen_rows, seen_cols] = -np.inf
+
+        n = min(n, scores.shape[1])
+        top = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        return {
+            user_id: [
+                (self.item_ids[col], float(score))
+                for col, score in zip(top[i], top_scores[i])
+                if np.isfinite(score)
+            ]
+            for i, user_id in enumerate(known)
+        }
+
+_model_cache: Dict[str, Any] = {"dir": None, "version": None, "model": None}
+
+def get_collaborative_model(model_dir: str) -> Optional[CollaborativeModel]:
+    """Process-wide model, reloaded when the CURRENT pointer moves to a new version"""
+    pointer = os.path.join(model_dir, CURRENT_POINTER)
+    try:
+        with open(pointer) as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+
+    if _model_cache["dir"] != model_dir or _model_cache["version"] != version:
+        _model_cache.update(dir=model_dir, version=version, model=CollaborativeModel.load(model_dir))
+    return _model_cache["model"]
@@ -0,0 +1,232 @@
+from typing import List, Dict, Any, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_, text
+from datetime import datetime, timedelta
+import asyncio
+from app.features.analytics.models.product_cooccurrence import ProductCoOccurrence, ProductBasketSupport
+from app.features.analytics.models.product_popularity import RollupWatermark
+from app.core.logging import get_logger
+
+logger = get_logger("cooccurrence_index")
+
+VIEW = "view"
+PURCHASE = "purchase"
+
+# Raw rows are processed in windows of this size so a first backfill stays bounded
+REFRESH_CHUNK = timedelta(days=1)
+# Leave recent rows alone until in-flight transactions have committed
+COMMIT_LAG = timedelta(minutes=1)
+# Baskets with more distinct products than this (crawlers, bulk orders) are ignored
+MAX_BASKET_SIZE = 50
+# Single co-occurrences outside a product's top ranks are dropped after this long
+STALE_PAIR_AGE = timedelta(days=30)
+TOP_K = 50
+
+# Postgres does not accept bind parameters in CREATE TABLE AS, so the scratch tables are
+# created empty and filled with INSERT ... SELECT
+CREATE_SCRATCH_SQL = (
+    "CREATE TEMP TABLE cooc_baskets (basket_id text, product_id uuid, first_seen timestamp) ON COMMIT DROP",
+    "CREATE TEMP TABLE cooc_changed (product_id uuid) ON COMMIT DROP",
+)
+
+VIEW_BASKETS_SQL = """
+    INSERT INTO cooc_baskets
+    SELECT v.session_id AS basket_id, v.product_id, min(v.viewed_at) AS first_seen
+    FROM product_views v
+    WHERE v.session_id IN (
+        SELECT DISTINCT session_id FROM product_views
+        WHERE viewed_at >= :start AND viewed_at < :end AND session_id IS NOT NULL
+    )
+    AND v.viewed_at < :end
+    GROUP BY v.session_id, v.product_id
+"""
+
+ORDER_BASKETS_SQL = """
+    INSERT INTO cooc_baskets
+    SELECT oi.order_id::text AS basket_id, oi.product_id, min(o.created_at) AS first_seen
+    FROM order_items oi
+    JOIN orders o ON o.id = oi.order_id
+    WHERE o.created_at >= :start AND o.created_at < :end
+    AND o.status NOT IN ('cancelled', 'refunded')
+    GROUP BY oi.order_id, oi.product_id
+"""
+
+DROP_LARGE_BASKETS_SQL = """
+    DELETE FROM cooc_baskets WHERE basket_id IN (
+        SELECT basket_id FROM cooc_baskets GROUP BY basket_id HAVING count(*) > :max_basket_size
+    )
+"""
+
+# A product joins a basket when first seen in it; pairs count once, when the later of the two joins
+SUPPORT_UPSERT_SQL = """
+    INSERT INTO product_basket_supports (kind, product_id, baskets)
+    SELECT :kind, product_id, count(*) FROM cooc_baskets
+    WHERE first_seen >= :start
+    GROUP BY product_id
+    ON CONFLICT (kind, product_id) DO UPDATE
+    SET baskets = product_basket_supports.baskets + EXCLUDED.baskets
+"""
+
+PAIR_UPSERT_SQL = """
+    INSERT INTO product_cooccurrences (kind, product_id, related_product_id, co_count, score, updated_at)
+    SELECT :kind, a.product_id, b.product_id, count(*), 0, :now
+    FROM cooc_baskets a
+    JOIN cooc_baskets b ON a.basket_id = b.basket_id AND a.product_id <> b.product_id
+    WHERE greatest(a.first_seen, b.first_seen) >= :start
+    GROUP BY a.product_id, b.product_id
+    ON CONFLICT (kind, product_id, related_product_id) DO UPDATE
+    SET co_count = product_cooccurrences.co_count + EXCLUDED.co_count,
+        updated_at = EXCLUDED.updated_at
+"""
+
+CHANGED_PRODUCTS_SQL = """
+    INSERT INTO cooc_changed
+    SELECT DISTINCT product_id FROM cooc_baskets WHERE first_seen >= :start
+"""
+
+# Supports of changed products moved, so every pair touching one of them is rescored
+RESCORE_SQL = """
+    UPDATE product_cooccurrences c
+    SET score = c.co_count::float / nullif(sa.baskets + sb.baskets - c.co_count, 0)
+    FROM product_basket_supports sa, product_basket_supports sb
+    WHERE c.kind = :kind AND sa.kind = :kind AND sb.kind = :kind
+    AND sa.product_id = c.product_id AND sb.product_id = c.related_product_id
+    AND (c.product_id IN (SELECT product_id FROM cooc_changed)
+         OR c.related_product_id IN (SELECT product_id FROM cooc_changed))
+"""
+
+# Pairs are stored in both directions, so the products whose lists changed are the changed
+# products and their neighbours
+RERANK_SQL = """
+    UPDATE product_cooccurrences c
+    SET rank = ranked.rank
+    FROM (
+        SELECT product_id, related_product_id,
+               row_number() OVER (PARTITION BY product_id ORDER BY score DESC, co_count DESC) AS rank
+        FROM product_cooccurrences
+        WHERE kind = :kind AND product_id IN (
+            SELECT product_id FROM cooc_changed
+            UNION
+            SELECT related_product_id FROM product_cooccurrences
+            WHERE kind = :kind AND product_id IN (SELECT product_id FROM cooc_changed)
+        )
+    ) ranked
+    WHERE c.kind = :kind
+    AND c.product_id = ranked.product_id
+    AND c.related_product_id = ranked.related_product_id
+    AND c.rank IS DISTINCT FROM ranked.rank
+"""
+
+PRUNE_SQL = """
+    DELETE FROM product_cooccurrences
+    WHERE kind = :kind AND co_count = 1 AND rank > :top_k AND updated_at < :stale_before
+"""
+
+def related_products_subquery(kind: str, product_id: Any, limit: int):
+    """Top co-occurring products for one product, best first by rank"""
+    cooc = ProductCoOccurrence
+    return select(
+        cooc.related_product_id.label("product_id"),
+        cooc.co_count,
+        cooc.score,
+        cooc.rank
+    ).where(
+        and_(
+            cooc.kind == kind,
+            cooc.product_id == product_id,
+            cooc.rank <= limit
+        )
+    ).subquery("related")
+
+class CoOccurrenceIndexEngine:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.logger = logger
+
+    async def run_refresh(self, until: Optional[datetime] = None) -> Dict[str, Any]:
+        """Fold sessions and orders newer than each watermark into the co-occurrence index"""
+        until = until or datetime.utcnow() - COMMIT_LAG
+        stats = {}
+        for kind, baskets_sql, earliest_sql in (
+            (VIEW, VIEW_BASKETS_SQL, "SELECT min(viewed_at) FROM product_views"),
+            (PURCHASE, ORDER_BASKETS_SQL, "SELECT min(created_at) FROM orders"),
+        ):
+            stats[kind] = await self._refresh_kind(kind, baskets_sql, earliest_sql, until)
+
+        self.logger.info(f"Co-occurrence index refresh complete: {stats}")
+        return stats
+
+    async def _refresh_kind(self, kind: str, baskets_sql: str, earliest_sql: str, until: datetime) -> int:
+        watermark_name = f"cooccurrence_{kind}"
+        watermark = await self.db.get(RollupWatermark, watermark_name)
+        if watermark:
+            start = watermark.high_watermark
+        else:
+            start = (await self.db.execute(text(earliest_sql))).scalar() or until
+
+        pairs = 0
+        while start < until:
+            end = min(start + REFRESH_CHUNK, until)
+            pairs += await self._process_window(kind, baskets_sql, start, end)
+
+            if watermark:
+                watermark.high_watermark = end
+            else:
+                watermark = RollupWatermark(name=watermark_name, high_watermark=end)
+                self.db.add(watermark)
+            await self.db.commit()
+            start = end
+
+        await self.db.execute(text(PRUNE_SQL), {
+            "kind": kind,
+            "top_k": TOP_K,
+            "stale_before": datetime.utcnow() - STALE_PAIR_AGE
+        })
+        await self.db.commit()
+        return pairs
+
+    async def _process_window(self, kind: str, baskets_sql: str, start: datetime, end: datetime) -> int:
+        params = {"kind": kind, "start": start, "end": end}
+        for statement in CREATE_SCRATCH_SQL:
+            await self.db.execute(text(statement))
+        await self.db.execute(text(baskets_sql), params)
+        await self.db.execute(text(DROP_LARGE_BASKETS_SQL), {"max_basket_size": MAX_BASKET_SIZE})
+        await self.db.execute(text(SUPPORT_UPSERT_SQL), params)
+        result = await self.db.execute(text(PAIR_UPSERT_SQL), {**params, "now": datetime.utcnow()})
+        await self.db.execute(text(CHANGED_PRODUCTS_SQL), params)
+        await self.db.execute(text(RESCORE_SQL), params)
+        await self.db.execute(text(RERANK_SQL), params)
+        return result.rowcount or 0
+
+    async def get_related(self, kind: str, product_id: Any, limit: int = 10) -> List[Dict[str, Any]]:
+        related = related_products_subquery(kind, product_id, limit)
+        result = await self.db.execute(select(related).order_by(related.c.rank))
+        return [
+            {
+                "product_id": str(row.product_id),
+                "co_count": row.co_count,
+                "score": row.score
+            }
+            for row in result.all()
+        ]
+
+async def ensure_cooccurrence_tables(engine) -> None:
+    """Create the co-occurrence tables on databases that predate them"""
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            lambda sync_conn: ProductCoOccurrence.metadata.create_all(
+                sync_conn,
+                tables=[ProductCoOccurrence.__table__, ProductBasketSupport.__table__],
+                checkfirst=True
+            )
+        )
+
+async def run_cooccurrence_scheduler(session_factory, interval_seconds: int) -> None:
+    """Background loop that keeps the co-occurrence index current"""
+    while True:
+        try:
+            async with session_factory() as db:
+                await CoOccurrenceIndexEngine(db).run_refresh()
+        except Exception as e:
+            logger.error(f"Co-occurrence index refresh failed: {str(e)}")
+        await asyncio.sleep(interval_seconds)
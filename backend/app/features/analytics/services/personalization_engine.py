@@ -2,6 +2,7 @@ from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_, desc, asc
 from datetime import datetime, timedelta
+from uuid import UUID
 import json
 import math
 from collections import defaultdict, Counter
@@ -10,13 +11,65 @@ from app.features.analytics.models.user_activity import (
     UserActivity, UserBehaviorProfile, RecommendationLog, BundleRecommendation,
     ActivityType
 )
-from app.features.products.models.product import Product
+from app.features.analytics.services.collaborative_filtering import (
+    InteractionMatrix, ACTIVITY_WEIGHTS, get_collaborative_model
+)
+from app.features.analytics.services.recommendation_store import get_stored_recommendations
+from app.features.products.models.product import Product, ProductStatusEnum
+from app.features.products.cruds.product_loading import PRIMARY_IMAGE_URL
 from app.features.products.models.category import Category
 from app.features.products.models.brand import Brand
+from app.features.orders.models.order import Order, OrderItem
+from app.core.config import settings
 from app.core.logging import get_logger
 
 logger = get_logger("personalization_engine")
 
+async def build_interaction_matrix(db: AsyncSession, days: int = 180) -> InteractionMatrix:
+    """User x product implicit-feedback matrix from recent activities and orders"""
+    since = datetime.utcnow() - timedelta(days=days)
+    activity_result = await db.execute(
+        select(
+            UserActivity.user_id,
+            UserActivity.product_id,
+            UserActivity.activity_type,
+            func.count()
+        ).where(
+            and_(
+                UserActivity.user_id.isnot(None),
+                UserActivity.product_id.isnot(None),
+                UserActivity.activity_type.in_(list(ACTIVITY_WEIGHTS)),
+                UserActivity.created_at >= since
+            )
+        ).group_by(UserActivity.user_id, UserActivity.product_id, UserActivity.activity_type)
+    )
+    order_result = await db.execute(
+        select(
+            Order.user_id,
+            OrderItem.product_id,
+            func.count(func.distinct(Order.id))
+        ).join(
+            Order, Order.id == OrderItem.order_id
+        ).where(
+            and_(
+                Order.created_at >= since,
+                Order.status.notin_(("cancelled", "refunded"))
+            )
+        ).group_by(Order.user_id, OrderItem.product_id)
+    )
+
+    users, items, weights = [], [], []
+    for user_id, product_id, activity_type, count in activity_result.all():
+        users.append(str(user_id))
+        items.append(str(product_id))
+        weights.append(ACTIVITY_WEIGHTS[activity_type] * count)
+    for user_id, product_id, count in order_result.all():
+        users.append(str(user_id))
+        items.append(str(product_id))
+        weights.append(ACTIVITY_WEIGHTS["purchase"] * count)
+
+    return InteractionMatrix.from_triples(users, items, weights)
+
 class PersonalizationEngine:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -325,7 +378,18 @@ class PersonalizationEngine:
         try:
             recommendations = []
             
-            if user_id:
+            if user_id and recommendation_type == "product":
+                # Users seen at training time are served from the collaborative model
+                try:
+                    # Savepoint: a failed model query must not roll back the caller's transaction
+                    async with self.db.begin_nested():
+                        recommendations = await self._generate_model_recommendations(str(user_id), limit)
+                except Exception as e:
+                    # Fall through to the profile and popularity recommendations
+                    self.logger.error(f"Error generating model recommendations: {str(e)}")
+                    recommendations = []
+            
+            if user_id and not recommendations:
                 # Get user behavior profile
                 profile_query = select(UserBehaviorProfile).where(
                     UserBehaviorProfile.user_id == user_id
@@ -369,9 +433,9 @@ class PersonalizationEngine:
         try:
             if recommendation_type == "product":
                 # Get products from preferred categories and brands
-                query = select(Product).where(
+                query = select(Product, PRIMARY_IMAGE_URL.label("image_url")).where(
                     and_(
-                        Product.is_active == True,
+                        Product.status == ProductStatusEnum.ACTIVE,
                         or_(
                             Product.category_id.in_(profile.preferred_categories or []),
                             Product.brand_id.in_(profile.preferred_brands or [])
@@ -380,7 +444,9 @@ class PersonalizationEngine:
                 ).limit(limit * 2)  # Get more to filter by price sensitivity
                 
                 result = await self.db.execute(query)
-                products = result.scalars().all()
+                rows = result.all()
+                image_urls = {row.Product.id: row.image_url for row in rows}
+                products = [row.Product for row in rows]
                 
                 # Filter by price sensitivity
                 if profile.price_sensitivity and profile.price_sensitivity < 0.5:
@@ -399,7 +465,7 @@ class PersonalizationEngine:
                         'price': float(product.price),
                         'category_id': str(product.category_id),
                         'brand_id': str(product.brand_id) if product.brand_id else None,
-                        'image_url': product.images[0] if product.images else None,
+                        'image_url': image_urls.get(product.id),
                         'recommendation_score': self._calculate_product_score(product, profile),
                         'recommendation_reason': self._get_recommendation_reason(product, profile)
                     })
@@ -430,7 +496,7 @@ class PersonalizationEngine:
                 Product.price,
                 Product.category_id,
                 Product.brand_id,
-                Product.images,
+                PRIMARY_IMAGE_URL.label('image_url'),
                 func.count(UserActivity.id).label('activity_count')
             ).join(
                 UserActivity, Product.id == UserActivity.product_id
@@ -442,10 +508,10 @@ class PersonalizationEngine:
                         ActivityType.PURCHASE.value
                     ]),
                     UserActivity.created_at >= thirty_days_ago,
-                    Product.is_active == True
+                    Product.status == ProductStatusEnum.ACTIVE
                 )
             ).group_by(
-                Product.id, Product.name, Product.price, Product.category_id, Product.brand_id, Product.images
+                Product.id, Product.name, Product.price, Product.category_id, Product.brand_id
             ).order_by(
                 desc('activity_count')
             ).limit(limit)
@@ -461,7 +527,7 @@ class PersonalizationEngine:
                     'price': float(product.price),
                     'category_id': str(product.category_id),
                     'brand_id': str(product.brand_id) if product.brand_id else None,
-                    'image_url': product.images[0] if product.images else None,
+                    'image_url': product.image_url,
                     'recommendation_score': 0.8,  # Default score for popular items
                     'recommendation_reason': 'Popular among other users'
                 })
@@ -472,6 +538,57 @@ class PersonalizationEngine:
             self.logger.error(f"Error generating collaborative recommendations: {str(e)}")
             return []
     
+    async def _generate_model_recommendations(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Top-N from the precomputed store, else from the collaborative model if it knows this user"""
+        stored = await get_stored_recommendations(self.db, UUID(user_id), limit)
+        if stored:
+            product_ids, scores, _ = stored
+            scored = [(str(product_id), score) for product_id, score in zip(product_ids, scores)]
+        else:
+            model = get_collaborative_model(settings.CF_MODEL_DIR)
+            if model is None or user_id not in model:
+                return []
+            # Over-fetch so products that went inactive since training can be dropped
+            scored = model.recommend([user_id], n=limit * 2).get(user_id, [])
+        if not scored:
+            return []
+        
+        result = await self.db.execute(
+            select(
+                Product.id, Product.name, Product.price, Product.category_id, Product.brand_id,
+                PRIMARY_IMAGE_URL.label("image_url")
+            ).where(
+                and_(
+                    Product.id.in_([product_id for product_id, _ in scored]),
+                    Product.status == ProductStatusEnum.ACTIVE
+                )
+            )
+        )
+        products = {str(product.id): product for product in result.all()}
+        
+        # Map raw dot products into (0, 1] relative to the best candidate
+        best = max(score for _, score in scored) or 1.0
+        recommendations = []
+        for product_id, score in scored:
+            product = products.get(product_id)
+            if not product:
+                continue
+            recommendations.append({
+                'id': product_id,
+                'type': 'product',
+                'name': product.name,
+                'price': float(product.price),
+                'category_id': str(product.category_id),
+                'brand_id': str(product.brand_id) if product.brand_id else None,
+                'image_url': product.image_url,
+                'recommendation_score': round(max(score, 0.0) / best, 4) if best > 0 else 0.0,
+                'recommendation_reason': 'Customers with similar tastes liked this'
+            })
+            if len(recommendations) >= limit:
+                break
+        
+        return recommendations
+    
     def _calculate_product_score(self, product: Product, profile: UserBehaviorProfile) -> float:
         """Calculate recommendation score for a product based on user profile"""
         score = 0.5  # Base score
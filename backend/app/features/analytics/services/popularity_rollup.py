@@ -0,0 +1,414 @@
+from typing import List, Dict, Any, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, and_, desc, literal, union_all, delete, Numeric, Integer
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime, timedelta
+import asyncio
+from app.features.analytics.models.product_popularity import (
+    ProductPopularityRollup, RollupWatermark, CategoryBestSellerLeaderboard
+)
+from app.features.analytics.models.user_activity import UserActivity
+from app.features.products.models.product import Product
+from app.features.products.models.product_view import ProductView
+from app.features.orders.models.order import Order, OrderItem
+from app.core.logging import get_logger
+
+logger = get_logger("popularity_rollup")
+
+WATERMARK_NAME = "product_popularity"
+# Re-aggregate this much history before the watermark to pick up late-arriving rows
+LATE_ARRIVAL_WINDOW = timedelta(hours=1)
+# Windows up to this long are answered from hourly buckets, longer ones from daily buckets
+HOURLY_WINDOW_LIMIT = timedelta(days=2)
+EXCLUDED_ORDER_STATUSES = ("cancelled", "refunded")
+
+METRIC_COLUMNS = ("views", "add_to_carts", "purchases", "units_sold", "revenue")
+
+BEST_SELLER_PERIODS = {"week": 7, "month": 30, "quarter": 90, "year": 365}
+# Ranks kept per hot category and period; covers the largest page the API serves
+LEADERBOARD_DEPTH = 100
+# Categories with the most activity over this window get precomputed leaderboards
+HOT_CATEGORY_WINDOW = timedelta(days=7)
+
+def _bucket_window(since: datetime):
+    if datetime.utcnow() - since <= HOURLY_WINDOW_LIMIT:
+        return "hour", since.replace(minute=0, second=0, microsecond=0)
+    return "day", since.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def popularity_subquery(
+    since: datetime,
+    category_id: Optional[Any] = None,
+    brand_id: Optional[Any] = None
+):
+    """Per-product metric totals since a point in time, read from the rollup table"""
+    granularity, bucket_start = _bucket_window(since)
+    rollup = ProductPopularityRollup
+
+    query = select(
+        rollup.product_id,
+        func.sum(rollup.views).label("views"),
+        func.sum(rollup.add_to_carts).label("add_to_carts"),
+        func.sum(rollup.purchases).label("purchases"),
+        func.sum(rollup.units_sold).label("units_sold"),
+        func.sum(rollup.revenue).label("revenue")
+    ).where(
+        and_(
+            rollup.granularity == granularity,
+            rollup.bucket_start >= bucket_start
+        )
+    )
+
+    if category_id:
+        query = query.where(rollup.category_id == category_id)
+    if brand_id:
+        query = query.where(rollup.brand_id == brand_id)
+
+    return query.group_by(rollup.product_id).subquery("popularity")
+
+def leaderboard_subquery(category_id: Any, time_period: str):
+    """Precomputed best-seller ranks for one category and period"""
+    board = CategoryBestSellerLeaderboard
+    return select(
+        board.product_id,
+        board.rank,
+        board.units_sold,
+        board.orders,
+        board.revenue
+    ).where(
+        and_(
+            board.category_id == category_id,
+            board.time_period == time_period
+        )
+    ).subquery("leaderboard")
+
+class PopularityRollupEngine:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.logger = logger
+
+    async def run_rollup(self, until: Optional[datetime] = None) -> Dict[str, Any]:
+        """Aggregate raw views, cart adds and order items since the high watermark into hourly and daily buckets.
+
+        Buckets in the window are deleted and rebuilt from raw rows, so a bucket whose raw rows went
+        away (a cancelled order, a purged view) drops out instead of keeping its old totals, and
+        running the job twice over the same window is harmless.
+        """
+        until = until or datetime.utcnow()
+
+        watermark = await self.db.get(RollupWatermark, WATERMARK_NAME)
+        if watermark:
+            start = watermark.high_watermark - LATE_ARRIVAL_WINDOW
+        else:
+            start = await self._earliest_raw_timestamp() or until
+        start = start.replace(minute=0, second=0, microsecond=0)
+
+        hourly_rows = await self._rollup_hours(start, until)
+        daily_rows = await self._rollup_days(start.replace(hour=0), until)
+
+        if watermark:
+            watermark.high_watermark = until
+        else:
+            self.db.add(RollupWatermark(name=WATERMARK_NAME, high_watermark=until))
+        await self.db.commit()
+
+        stats = {"from": start.isoformat(), "until": until.isoformat(), "hourly_rows": hourly_rows, "daily_rows": daily_rows}
+        self.logger.info(f"Popularity rollup complete: {stats}")
+        return stats
+
+    async def _earliest_raw_timestamp(self) -> Optional[datetime]:
+        result = await self.db.execute(
+            select(func.least(
+                select(func.min(ProductView.viewed_at)).scalar_subquery(),
+                select(func.min(UserActivity.created_at)).scalar_subquery(),
+                select(func.min(Order.created_at)).scalar_subquery()
+            ))
+        )
+        return result.scalar()
+
+    async def _rollup_hours(self, start: datetime, end: datetime) -> int:
+        zero = literal(0, Integer)
+        zero_revenue = literal(0, Numeric(14, 2))
+
+        view_bucket = func.date_trunc("hour", ProductView.viewed_at)
+        views = select(
+            view_bucket.label("bucket_start"),
+            ProductView.product_id.label("product_id"),
+            func.count().label("views"),
+            zero.label("add_to_carts"),
+            zero.label("purchases"),
+            zero.label("units_sold"),
+            zero_revenue.label("revenue")
+        ).where(
+            and_(ProductView.viewed_at >= start, ProductView.viewed_at < end)
+        ).group_by(view_bucket, ProductView.product_id)
+
+        cart_bucket = func.date_trunc("hour", UserActivity.created_at)
+        cart_adds = select(
+            cart_bucket,
+            UserActivity.product_id,
+            zero,
+            func.count(),
+            zero,
+            zero,
+            zero_revenue
+        ).where(
+            and_(
+                UserActivity.activity_type == "add_to_cart",
+                UserActivity.product_id.isnot(None),
+                UserActivity.created_at >= start,
+                UserActivity.created_at < end
+            )
+        ).group_by(cart_bucket, UserActivity.product_id)
+
+        order_bucket = func.date_trunc("hour", Order.created_at)
+        sales = select(
+            order_bucket,
+            OrderItem.product_id,
+            zero,
+            zero,
+            func.count(func.distinct(OrderItem.order_id)),
+            func.sum(OrderItem.quantity),
+            func.sum(OrderItem.total_price)
+        ).join(
+            Order, Order.id == OrderItem.order_id
+        ).where(
+            and_(
+                Order.created_at >= start,
+                Order.created_at < end,
+                Order.status.notin_(EXCLUDED_ORDER_STATUSES)
+            )
+        ).group_by(order_bucket, OrderItem.product_id)
+
+        raw = union_all(views, cart_adds, sales).subquery("raw")
+        aggregated = select(
+            literal("hour").label("granularity"),
+            raw.c.bucket_start,
+            raw.c.product_id,
+            Product.category_id,
+            Product.brand_id,
+            *[func.sum(raw.c[column]).label(column) for column in METRIC_COLUMNS]
+        ).join(
+            Product, Product.id == raw.c.product_id
+        ).group_by(
+            raw.c.bucket_start, raw.c.product_id, Product.category_id, Product.brand_id
+        )
+
+        return await self._replace_buckets("hour", start, end, aggregated)
+
+    async def _rollup_days(self, start: datetime, end: datetime) -> int:
+        hourly = ProductPopularityRollup
+        day_bucket = func.date_trunc("day", hourly.bucket_start)
+        aggregated = select(
+            literal("day").label("granularity"),
+            day_bucket.label("bucket_start"),
+            hourly.product_id,
+            hourly.category_id,
+            hourly.brand_id,
+            *[func.sum(getattr(hourly, column)).label(column) for column in METRIC_COLUMNS]
+        ).where(
+            and_(
+                hourly.granularity == "hour",
+                hourly.bucket_start >= start,
+                hourly.bucket_start < end
+            )
+        ).group_by(day_bucket, hourly.product_id, hourly.category_id, hourly.brand_id)
+
+        return await self._replace_buckets("day", start, end, aggregated)
+
+    async def _replace_buckets(self, granularity: str, start: datetime, end: datetime, aggregated) -> int:
+        """Swap the stored buckets of one granularity in [start, end) for freshly aggregated ones"""
+        rollup = ProductPopularityRollup
+        async with self.db.begin_nested():
+            await self.db.execute(
+                delete(rollup).where(
+                    and_(
+                        rollup.granularity == granularity,
+                        rollup.bucket_start >= start,
+                        rollup.bucket_start < end
+                    )
+                )
+            )
+            return await self._upsert(aggregated)
+
+    async def _upsert(self, aggregated) -> int:
+        columns = ["granularity", "bucket_start", "product_id", "category_id", "brand_id", *METRIC_COLUMNS]
+        stmt = insert(ProductPopularityRollup).from_select(columns, aggregated)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_product_popularity_bucket",
+            set_={
+                "category_id": stmt.excluded.category_id,
+                "brand_id": stmt.excluded.brand_id,
+                **{column: getattr(stmt.excluded, column) for column in METRIC_COLUMNS}
+            }
+        )
+        result = await self.db.execute(stmt)
+        return result.rowcount or 0
+
+    async def get_top_products(
+        self,
+        since: datetime,
+        limit: int = 10,
+        order_by: str = "views",
+        category_id: Optional[Any] = None,
+        brand_id: Optional[Any] = None
+    ) -> List[Dict[str, Any]]:
+        """Top products by a rollup metric, or by combined activity when order_by is 'activity'"""
+        popularity = popularity_subquery(since, category_id, brand_id)
+        if order_by == "activity":
+            sort_key = popularity.c.views + popularity.c.add_to_carts + popularity.c.purchases
+        else:
+            sort_key = popularity.c[order_by]
+
+        result = await self.db.execute(
+            select(Product.id, Product.name, Product.price, popularity)
+            .join(popularity, Product.id == popularity.c.product_id)
+            .order_by(desc(sort_key))
+            .limit(limit)
+        )
+        return [
+            {
+                "id": str(row.id),
+                "name": row.name,
+                "price": float(row.price) if row.price is not None else 0.0,
+                "views": int(row.views or 0),
+                "add_to_carts": int(row.add_to_carts or 0),
+                "purchases": int(row.purchases or 0),
+                "units_sold": int(row.units_sold or 0),
+                "revenue": float(row.revenue or 0)
+            }
+            for row in result.all()
+        ]
+
+    async def refresh_category_leaderboards(self, hot_categories: int = 20, depth: int = LEADERBOARD_DEPTH) -> int:
+        """Rebuild best-seller leaderboards (by units sold, then revenue) for the most active categories"""
+        granularity, bucket_start = _bucket_window(datetime.utcnow() - HOT_CATEGORY_WINDOW)
+        rollup = ProductPopularityRollup
+        hot_result = await self.db.execute(
+            select(rollup.category_id).where(
+                and_(
+                    rollup.granularity == granularity,
+                    rollup.bucket_start >= bucket_start,
+                    rollup.category_id.isnot(None)
+                )
+            ).group_by(
+                rollup.category_id
+            ).order_by(
+                desc(func.sum(rollup.views + rollup.add_to_carts + rollup.purchases))
+            ).limit(hot_categories)
+        )
+        category_ids = hot_result.scalars().all()
+
+        await self.db.execute(delete(CategoryBestSellerLeaderboard))
+        if not category_ids:
+            await self.db.commit()
+            return 0
+
+        computed_at = datetime.utcnow()
+        inserted = 0
+        for time_period, days in BEST_SELLER_PERIODS.items():
+            granularity, bucket_start = _bucket_window(computed_at - timedelta(days=days))
+            units_sold = func.sum(rollup.units_sold)
+            revenue = func.sum(rollup.revenue)
+            ranked = select(
+                rollup.category_id,
+                rollup.product_id,
+                units_sold.label("units_sold"),
+                func.sum(rollup.purchases).label("orders"),
+                revenue.label("revenue"),
+                func.row_number().over(
+                    partition_by=rollup.category_id,
+                    order_by=(desc(units_sold), desc(revenue))
+                ).label("rank")
+            ).where(
+                and_(
+                    rollup.granularity == granularity,
+                    rollup.bucket_start >= bucket_start,
+                    rollup.category_id.in_(category_ids)
+                )
+            ).group_by(
+                rollup.category_id, rollup.product_id
+            ).having(units_sold > 0).subquery("ranked")
+
+            stmt = insert(CategoryBestSellerLeaderboard).from_select(
+                ["category_id", "time_period", "rank", "product_id", "units_sold", "orders", "revenue", "computed_at"],
+                select(
+                    ranked.c.category_id,
+                    literal(time_period),
+                    ranked.c.rank,
+                    ranked.c.product_id,
+                    ranked.c.units_sold,
+                    ranked.c.orders,
+                    ranked.c.revenue,
+                    literal(computed_at)
+                ).where(ranked.c.rank <= depth)
+            )
+            result = await self.db.execute(stmt)
+            inserted += result.rowcount or 0
+
+        await self.db.commit()
+        self.logger.info(f"Rebuilt best-seller leaderboards for {len(category_ids)} categories ({inserted} rows)")
+        return inserted
+
+    async def get_top_categories(self, since: datetime, limit: int = 10) -> List[Dict[str, Any]]:
+        """Top categories by combined views, cart adds and purchases"""
+        from app.features.products.models.category import Category
+
+        granularity, bucket_start = _bucket_window(since)
+        rollup = ProductPopularityRollup
+        activity = func.sum(rollup.views + rollup.add_to_carts + rollup.purchases)
+
+        result = await self.db.execute(
+            select(
+                Category.id,
+                Category.name,
+                activity.label("activity_count"),
+                func.sum(rollup.revenue).label("revenue")
+            ).join(
+                rollup, Category.id == rollup.category_id
+            ).where(
+                and_(
+                    rollup.granularity == granularity,
+                    rollup.bucket_start >= bucket_start
+                )
+            ).group_by(
+                Category.id, Category.name
+            ).order_by(
+                desc("activity_count")
+            ).limit(limit)
+        )
+        return [
+            {
+                "id": str(row.id),
+                "name": row.name,
+                "activity_count": int(row.activity_count or 0),
+                "revenue": float(row.revenue or 0)
+            }
+            for row in result.all()
+        ]
+
+async def ensure_rollup_tables(engine) -> None:
+    """Create the rollup tables on databases that predate them"""
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            lambda sync_conn: ProductPopularityRollup.metadata.create_all(
+                sync_conn,
+                tables=[
+                    ProductPopularityRollup.__table__,
+                    RollupWatermark.__table__,
+                    CategoryBestSellerLeaderboard.__table__
+                ],
+                checkfirst=True
+            )
+        )
+
+async def run_rollup_scheduler(session_factory, interval_seconds: int, hot_categories: int = 20) -> None:
+    """Background loop that keeps the popularity rollups and hot-category leaderboards current"""
+    while True:
+        try:
+            async with session_factory() as db:
+                engine = PopularityRollupEngine(db)
+                await engine.run_rollup()
+                await engine.refresh_category_leaderboards(hot_categories)
+        except Exception as e:
+            logger.error(f"Popularity rollup run failed: {str(e)}")
+        await asyncio.sleep(interval_seconds)
@@ -9,9 +9,11 @@ import asyncio
 from app.features.analytics.models.user_activity import (
     UserActivity, UserBehaviorProfile, ActivityType
 )
-from app.features.products.models.product import Product
+from app.features.analytics.services.analytics_snapshot import get_analytics_report
+from app.features.products.models.product import Product, ProductStatusEnum
 from app.features.orders.models.order import Order
 # from app.features.orders.models.order_item import OrderItem  # Not available yet
+from app.core.config import settings
 from app.core.logging import get_logger
 
 logger = get_logger("profit_optimization")
@@ -20,10 +22,17 @@ class ProfitOptimizationEngine:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.logger = logger
+        self.snapshot_report: Optional[Dict[str, Any]] = None
     
     async def analyze_user_value_segments(self) -> Dict[str, Any]:
         """Analyze users by value segments for targeted marketing"""
         try:
+            # Served from the nightly columnar snapshot when one exists, live tables otherwise
+            try:
+                self.snapshot_report = await asyncio.to_thread(get_analytics_report, settings.ANALYTICS_SNAPSHOT_DIR)
+            except Exception as e:
+                self.logger.error(f"Error loading analytics snapshot: {str(e)}")
+            
             # Get user value analysis
             value_analysis = await self._get_user_value_analysis()
             
@@ -37,6 +46,8 @@ class ProfitOptimizationEngine:
                 'value_analysis': value_analysis,
                 'segment_recommendations': segment_recommendations,
                 'optimization_strategies': optimization_strategies,
+                'data_source': 'snapshot' if self.snapshot_report else 'live',
+                'snapshot_at': self.snapshot_report['snapshot_at'] if self.snapshot_report else None,
                 'timestamp': datetime.utcnow().isoformat()
             }
             
@@ -47,6 +58,9 @@ class ProfitOptimizationEngine:
     async def _get_user_value_analysis(self) -> Dict[str, Any]:
         """Get comprehensive user value analysis"""
         try:
+            if self.snapshot_report:
+                return self.snapshot_report['user_value_analysis']
+            
             # Get user behavior profiles with purchase data
             profiles_query = select(UserBehaviorProfile).where(
                 UserBehaviorProfile.total_orders > 0
@@ -315,11 +329,14 @@ class ProfitOptimizationEngine:
     async def _get_high_margin_products(self) -> List[Dict[str, Any]]:
         """Get products with high profit margins"""
         try:
+            if self.snapshot_report:
+                return self.snapshot_report['high_margin_products']
+            
             # This would typically query a products table with margin information
             # For now, we'll use price as a proxy for margin
             query = select(Product).where(
                 and_(
-                    Product.is_active == True,
+                    Product.status == ProductStatusEnum.ACTIVE,
                     Product.price > 100
                 )
             ).order_by(desc(Product.price)).limit(10)
@@ -345,9 +362,12 @@ class ProfitOptimizationEngine:
     async def _get_low_margin_products(self) -> List[Dict[str, Any]]:
         """Get products with low profit margins"""
         try:
+            if self.snapshot_report:
+                return self.snapshot_report['low_margin_products']
+            
             query = select(Product).where(
                 and_(
-                    Product.is_active == True,
+                    Product.status == ProductStatusEnum.ACTIVE,
                     Product.price < 50
                 )
             ).order_by(asc(Product.price)).limit(10)
@@ -392,6 +412,9 @@ class ProfitOptimizationEngine:
     async def _get_fast_moving_products(self) -> List[Dict[str, Any]]:
         """Get fast-moving products"""
         try:
+            if self.snapshot_report:
+                return self.snapshot_report['fast_moving_products']
+            
             thirty_days_ago = datetime.utcnow() - timedelta(days=30)
             
             query = select(
@@ -409,7 +432,7 @@ class ProfitOptimizationEngine:
                         ActivityType.PURCHASE.value
                     ]),
                     UserActivity.created_at >= thirty_days_ago,
-                    Product.is_active == True
+                    Product.status == ProductStatusEnum.ACTIVE
                 )
             ).group_by(
                 Product.id, Product.name, Product.price
@@ -437,6 +460,9 @@ class ProfitOptimizationEngine:
     async def _get_slow_moving_products(self) -> List[Dict[str, Any]]:
         """Get slow-moving products"""
         try:
+            if self.snapshot_report:
+                return self.snapshot_report['slow_moving_products']
+            
             thirty_days_ago = datetime.utcnow() - timedelta(days=30)
             
             query = select(
@@ -454,7 +480,7 @@ class ProfitOptimizationEngine:
                         ActivityType.PURCHASE.value
                     ]),
                     UserActivity.created_at >= thirty_days_ago,
-                    Product.is_active == True
+                    Product.status == ProductStatusEnum.ACTIVE
                 )
             ).group_by(
                 Product.id, Product.name, Product.price
@@ -594,6 +620,17 @@ class ProfitOptimizationEngine:
     async def _get_churn_analysis(self) -> Dict[str, Any]:
         """Get churn analysis"""
         try:
+            if self.snapshot_report:
+                return {
+                    **self.snapshot_report['churn_analysis'],
+                    'retention_strategies': [
+                        'Implement win-back campaigns',
+                        'Offer personalized discounts',
+                        'Improve customer service',
+                        'Create loyalty programs'
+                    ]
+                }
+            
             # This would typically analyze churn patterns
             # For now, we'll return mock data
             return {
@@ -0,0 +1,228 @@
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, and_
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime, timedelta
+from uuid import UUID
+import asyncio
+import time
+import numpy as np
+from app.features.analytics.models.user_activity import UserActivity
+from app.features.analytics.models.user_recommendation import UserRecommendation
+from app.features.analytics.models.product_popularity import RollupWatermark
+from app.features.analytics.services.collaborative_filtering import CollaborativeModel, get_collaborative_model
+from app.features.orders.models.order import Order, OrderItem
+from app.features.products.models.product import Product, ProductStatusEnum
+from app.features.products.models.product_inventory import ProductInventory
+from app.core.logging import get_logger
+
+logger = get_logger("recommendation_store")
+
+WATERMARK_NAME = "user_recommendations"
+# Stored per user; deep enough to survive read-time filtering of inactive products
+PRECOMPUTE_DEPTH = 100
+ACTIVE_USER_WINDOW = timedelta(days=90)
+BATCH_SIZE = 1000
+ACTIVE_PRODUCTS_TTL = 60
+
+class ActiveProductBitset:
+    """In-memory set of sellable products: one bit per known product id, rebuilt on a short TTL"""
+
+    def __init__(self, ttl_seconds: int = ACTIVE_PRODUCTS_TTL):
+        self.ttl_seconds = ttl_seconds
+        self._positions: Dict[str, int] = {}
+        self._bits = np.zeros(0, dtype=bool)
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, db: AsyncSession) -> None:
+        available = select(
+            ProductInventory.product_id,
+            func.sum(ProductInventory.quantity - ProductInventory.reserved_quantity).label("available")
+        ).group_by(ProductInventory.product_id).subquery("available")
+
+        result = await db.execute(
+            select(
+                Product.id,
+                and_(
+                    Product.status == ProductStatusEnum.ACTIVE,
+                    Product.approval_status == "approved",
+                    Product.visibility == "visible",
+                    # Products without inventory rows are not stock-managed
+                    func.coalesce(available.c.available, 1) > 0
+                )
+            ).outerjoin(available, available.c.product_id == Product.id)
+        )
+        rows = result.all()
+        self._positions = {str(product_id): i for i, (product_id, _) in enumerate(rows)}
+        self._bits = np.fromiter((bool(sellable) for _, sellable in rows), dtype=bool, count=len(rows))
+        self._loaded_at = time.monotonic()
+
+    async def ensure_fresh(self, db: AsyncSession) -> "ActiveProductBitset":
+        if time.monotonic() - self._loaded_at > self.ttl_seconds:
+            async with self._lock:
+                if time.monotonic() - self._loaded_at > self.ttl_seconds:
+                    await self.refresh(db)
+        return self
+
+    def mask(self, product_ids: Sequence[Any]) -> np.ndarray:
+        positions = np.fromiter((self._positions.get(str(pid), -1) for pid in product_ids), dtype=np.int64, count=len(product_ids))
+        found = positions >= 0
+        mask = np.zeros(len(product_ids), dtype=bool)
+        mask[found] = self._bits[positions[found]]
+        return mask
+
+active_products = ActiveProductBitset()
+
+async def get_stored_recommendations(
+    db: AsyncSession,
+    user_id: Any,
+    limit: int
+) -> Optional[Tuple[List[Any], List[float], str]]:
+    """Precomputed recommendations for a user, minus products that are no longer sellable"""
+    row = await db.get(UserRecommendation, user_id)
+    if not row or not row.product_ids:
+        return None
+
+    await active_products.ensure_fresh(db)
+    keep = np.flatnonzero(active_products.mask(row.product_ids))[:limit]
+    return [row.product_ids[i] for i in keep], [row.scores[i] for i in keep], row.algorithm
+
+class RecommendationPrecomputeEngine:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.logger = logger
+
+    async def run_full(self, model: CollaborativeModel) -> int:
+        """Recompute every recently active user the model knows about"""
+        result = await self.db.execute(
+            select(UserActivity.user_id).where(
+                and_(
+                    UserActivity.user_id.isnot(None),
+                    UserActivity.created_at >= datetime.utcnow() - ACTIVE_USER_WINDOW
+                )
+            ).distinct()
+        )
+        user_ids = [str(user_id) for user_id in result.scalars().all()]
+        stored = await self._store_batches(model, [user_id for user_id in user_ids if user_id in model])
+        await self._set_watermark(datetime.utcnow())
+        self.logger.info(f"Precomputed recommendations for {stored} users with model {model.version}")
+        return stored
+
+    async def run_incremental(self, model: CollaborativeModel) -> int:
+        """Recompute users active since the last run so their new purchases drop out of their lists"""
+        watermark = await self.db.get(RollupWatermark, WATERMARK_NAME)
+        since = watermark.high_watermark if watermark else datetime.utcnow() - timedelta(days=1)
+        until = datetime.utcnow()
+
+        result = await self.db.execute(
+            select(UserActivity.user_id).where(
+                and_(
+                    UserActivity.user_id.isnot(None),
+                    UserActivity.created_at >= since
+                )
+            ).distinct()
+        )
+        user_ids = [str(user_id) for user_id in result.scalars().all() if str(user_id) in model]
+        trained_at = datetime.fromisoformat(model.trained_at) if model.trained_at else since
+        stored = await self._store_batches(model, user_ids, purchased_since=trained_at)
+        await self._set_watermark(until)
+        return stored
+
+    async def stored_model_version(self) -> Optional[str]:
+        result = await self.db.execute(select(func.max(UserRecommendation.model_version)))
+        return result.scalar()
+
+    async def _store_batches(
+        self,
+        model: CollaborativeModel,
+        user_ids: List[str],
+        purchased_since: Optional[datetime] = None
+    ) -> int:
+        stored = 0
+        for start in range(0, len(user_ids), BATCH_SIZE):
+            batch = user_ids[start:start + BATCH_SIZE]
+            purchased = await self._purchased_since(batch, purchased_since) if purchased_since else {}
+            recommendations = model.recommend(batch, n=PRECOMPUTE_DEPTH)
+
+            rows = []
+            for user_id, scored in recommendations.items():
+                owned = purchased.get(user_id, set())
+                scored = [(product_id, score) for product_id, score in scored if product_id not in owned]
+                rows.append({
+                    "user_id": UUID(user_id),
+                    "product_ids": [UUID(product_id) for product_id, _ in scored],
+                    "scores": [round(score, 6) for _, score in scored],
+                    "algorithm": "collaborative",
+                    "model_version": model.version,
+                    "computed_at": datetime.utcnow()
+                })
+            if not rows:
+                continue
+
+            stmt = insert(UserRecommendation).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[UserRecommendation.user_id],
+                set_={
+                    column: getattr(stmt.excluded, column)
+                    for column in ("product_ids", "scores", "algorithm", "model_version", "computed_at")
+                }
+            )
+            await self.db.execute(stmt)
+            await self.db.commit()
+            stored += len(rows)
+        return stored
+
+    async def _purchased_since(self, user_ids: List[str], since: datetime) -> Dict[str, set]:
+        """Products each user ordered after the model was trained"""
+        result = await self.db.execute(
+            select(Order.user_id, OrderItem.product_id).join(
+                Order, Order.id == OrderItem.order_id
+            ).where(
+                and_(
+                    Order.user_id.in_([UUID(user_id) for user_id in user_ids]),
+                    Order.created_at >= since
+                )
+            )
+        )
+        purchased: Dict[str, set] = {}
+        for user_id, product_id in result.all():
+            purchased.setdefault(str(user_id), set()).add(str(product_id))
+        return purchased
+
+    async def _set_watermark(self, until: datetime) -> None:
+        watermark = await self.db.get(RollupWatermark, WATERMARK_NAME)
+        if watermark:
+            watermark.high_watermark = until
+        else:
+            self.db.add(RollupWatermark(name=WATERMARK_NAME, high_watermark=until))
+        await self.db.commit()
+
+async def ensure_recommendation_tables(engine) -> None:
+    """Create the serving table on databases that predate it"""
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            lambda sync_conn: UserRecommendation.metadata.create_all(
+                sync_conn, tables=[UserRecommendation.__table__], checkfirst=True
+            )
+        )
+
+async def run_recommendation_scheduler(session_factory, model_dir: str, interval_seconds: int) -> None:
+    """Full recompute whenever a newly trained model is published, incremental runs in between"""
+    precomputed_version = None
+    while True:
+        try:
+            model = get_collaborative_model(model_dir)
+            if model is not None:
+                async with session_factory() as db:
+                    engine = RecommendationPrecomputeEngine(db)
+                    if precomputed_version is None:
+                        precomputed_version = await engine.stored_model_version()
+                    if model.version != precomputed_version:
+                        await engine.run_full(model)
+                        precomputed_version = model.version
+                    else:
+                        await engine.run_incremental(model)
+        except Exception as e:
+            logger.error(f"Recommendation precompute failed: {str(e)}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,183 @@
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import select, insert, inspect, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from collections import Counter, OrderedDict
+from datetime import datetime
+from uuid import UUID, uuid4
+import asyncio
+import time
+from app.features.products.models.product import Product
+from app.features.products.models.product_view import ProductView, ProductViewCounter
+from app.features.analytics.services.cardinality import sketch_buffer, visitor_key, PRODUCT_VIEWERS, SUPPLIER_VIEWERS
+from app.core.logging import get_logger
+
+logger = get_logger("view_buffer")
+
+# A viewer re-opening the same product within this window is counted but not stored again
+VIEW_DEDUPE_WINDOW = 1800
+# Upper bound on buffered rows if flushing stalls (database down); oldest views are dropped
+MAX_BUFFERED_VIEWS = 100000
+# Upper bound on remembered (viewer, product) pairs; past it the oldest are forgotten early
+MAX_DEDUPE_KEYS = 200000
+
+BACKFILL_COUNTERS_SQL = """
+    INSERT INTO product_view_counters (product_id, views, updated_at)
+    SELECT product_id, count(*), now()
+    FROM product_views
+    GROUP BY product_id
+    ON CONFLICT (product_id) DO NOTHING
+"""
+# Distinct viewers come from the cardinality sketches; counters only keep raw totals
+DROP_UNIQUE_VIEWS_SQL = "ALTER TABLE product_view_counters DROP COLUMN IF EXISTS unique_views"
+
+class ProductViewBuffer:
+    """Per-process view aggregator: dedupes repeat views and flushes in multi-row batches"""
+
+    def __init__(self, dedupe_window: float = VIEW_DEDUPE_WINDOW, max_buffered: int = MAX_BUFFERED_VIEWS,
+                 max_dedupe_keys: int = MAX_DEDUPE_KEYS):
+        self.dedupe_window = dedupe_window
+        self.max_buffered = max_buffered
+        self.max_dedupe_keys = max_dedupe_keys
+        # (viewer, product) -> expiry; insertion order equals expiry order
+        self._seen: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._rows: List[Dict[str, Any]] = []
+        self._views: Counter = Counter()
+        self.dropped = 0
+
+    def add(
+        self,
+        product_id: str,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        referrer: Optional[str] = None
+    ) -> Optional[str]:
+        """Count a view; returns the id of the stored row, or None if it was a repeat"""
+        product_uuid = UUID(str(product_id))
+        product_key = str(product_uuid)
+        self._views[product_key] += 1
+
+        now = time.monotonic()
+        self._expire(now)
+        viewer = visitor_key(user_id, session_id, ip_address, user_agent)
+        if viewer:
+            key = (viewer, product_key)
+            if key in self._seen:
+                return None
+            self._seen[key] = now + self.dedupe_window
+            if len(self._seen) > self.max_dedupe_keys:
+                self._seen.popitem(last=False)
+
+        view_id = uuid4()
+        timestamp = datetime.utcnow()
+        self._rows.append({
+            "id": view_id,
+            "product_id": product_uuid,
+            "user_id": UUID(str(user_id)) if user_id else None,
+            "session_id": session_id,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "referrer": referrer,
+            "viewed_at": timestamp,
+            "created_at": timestamp,
+            "updated_at": timestamp
+        })
+        if len(self._rows) > self.max_buffered:
+            del self._rows[0]
+            self.dropped += 1
+        return str(view_id)
+
+    def pending(self, product_id: str) -> int:
+        """Views buffered but not yet flushed"""
+        return self._views.get(str(product_id), 0)
+
+    def _expire(self, now: float) -> None:
+        while self._seen:
+            _, expires = next(iter(self._seen.items()))
+            if expires > now:
+                break
+            self._seen.popitem(last=False)
+
+    def _drain(self) -> Tuple[List[Dict[str, Any]], Counter]:
+        drained = self._rows, self._views
+        self._rows, self._views = [], Counter()
+        return drained
+
+    def _requeue(self, rows: List[Dict[str, Any]], views: Counter) -> None:
+        self._rows = (rows + self._rows)[-self.max_buffered:]
+        self._views.update(views)
+
+    async def flush(self, session_factory) -> int:
+        """Write buffered views with one multi-row INSERT and one counter upsert"""
+        rows, views = self._drain()
+        if not views:
+            return 0
+
+        try:
+            async with session_factory() as db:
+                # Unknown product ids would fail the whole batch on the foreign key
+                result = await db.execute(
+                    select(Product.id, Product.supplier_id).where(Product.id.in_([UUID(product_id) for product_id in views]))
+                )
+                suppliers = {str(product_id): supplier_id for product_id, supplier_id in result.all()}
+                existing = set(suppliers)
+                stored = [row for row in rows if str(row["product_id"]) in existing]
+                if stored:
+                    await db.execute(insert(ProductView), stored)
+
+                if existing:
+                    # Sorted so concurrent workers lock counter rows in the same order
+                    stmt = pg_insert(ProductViewCounter).values([
+                        {
+                            "product_id": UUID(product_id),
+                            "views": views[product_id],
+                            "updated_at": datetime.utcnow()
+                        }
+                        for product_id in sorted(existing)
+                    ])
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[ProductViewCounter.product_id],
+                        set_={
+                            "views": ProductViewCounter.views + stmt.excluded.views,
+                            "updated_at": stmt.excluded.updated_at
+                        }
+                    )
+                    await db.execute(stmt)
+                await db.commit()
+
+            for row in stored:
+                viewer = visitor_key(row["user_id"], row["session_id"], row["ip_address"], row["user_agent"])
+                day = row["viewed_at"].date()
+                sketch_buffer.add(PRODUCT_VIEWERS, row["product_id"], viewer, day)
+                sketch_buffer.add(SUPPLIER_VIEWERS, suppliers[str(row["product_id"])], viewer, day)
+            return len(stored)
+        except asyncio.CancelledError:
+            # Shutdown cancelled the flusher mid-write; keep the batch for the final flush
+            self._requeue(rows, views)
+            raise
+        except Exception as e:
+            logger.error(f"Error flushing {len(rows)} buffered product views: {str(e)}")
+            self._requeue(rows, views)
+            return 0
+
+view_buffer = ProductViewBuffer()
+
+async def ensure_view_counter_tables(engine) -> None:
+    """Create the counter table, seeding it from product_views the first time"""
+    def create(sync_conn) -> bool:
+        existed = inspect(sync_conn).has_table(ProductViewCounter.__tablename__)
+        ProductViewCounter.metadata.create_all(sync_conn, tables=[ProductViewCounter.__table__], checkfirst=True)
+        return not existed
+
+    async with engine.begin() as conn:
+        if await conn.run_sync(create):
+            await conn.execute(text(BACKFILL_COUNTERS_SQL))
+        else:
+            await conn.execute(text(DROP_UNIQUE_VIEWS_SQL))
+
+async def run_view_flusher(session_factory, interval_seconds: float) -> None:
+    """Background loop that drains the view buffer every few seconds"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        await view_buffer.flush(session_factory)
@@ -5,7 +5,7 @@ import secrets
 import string
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.database.base import get_supabase_client
+from app.database.base import get_supabase_client, supabase_clients, create_auth_client
 from app.core.base import BaseCrud
 from app.features.auth.models.user import User
 from app.core.exceptions import (
@@ -22,26 +22,17 @@ logger = get_logger("auth.crud")
 
 async def get_referrer_by_code(db: AsyncSession, referral_code: str) -> Optional[User]:
     referral_code = (referral_code or "").upper()
-    crud = AuthCrud()
+    crud = get_auth_crud()
     return await crud.get_by_field(db, "referral_code", referral_code)
 
 class AuthCrud(BaseCrud[User]):
     def __init__(self):
         super().__init__(get_supabase_client(), User)
-        # Use service role client for admin operations to bypass rate limits
-        from app.core.config import settings
-        from supabase import create_client
-        if settings.SUPABASE_URL and settings.SUPABASE_SERVICE_ROLE_KEY:
-            # Use service role key for admin operations (bypasses rate limits)
-            self.admin_client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
-            # Also create anon key client for user-facing operations
-            if settings.SUPABASE_ANON_KEY:
-                self.auth_client = create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
-            else:
-                self.auth_client = self.admin_client
-        else:
-            self.auth_client = self.client
-            self.admin_client = self.client
+        # Shared clients from the registry: service role for admin operations (bypasses
+        # rate limits), anon key for session-less auth calls. Sign-ins go through
+        # create_auth_client so no user session lands on a shared client
+        self.admin_client = supabase_clients.admin
+        self.auth_client = supabase_clients.anon
     
     def _user_to_dict(self, user: User) -> Dict[str, Any]:
         # Handle user_type enum - convert to string value
@@ -170,7 +161,7 @@ class AuthCrud(BaseCrud[User]):
                 # Admin API doesn't return a session, so we need to sign in to get session
                 if hasattr(auth_response, 'user') and auth_response.user:
                     try:
-                        session_response = self.auth_client.auth.sign_in_with_password({
+                        session_response = create_auth_client().sign_in_with_password({
                             "email": signup_data["email"],
                             "password": signup_data["password"]
                         })
@@ -193,7 +184,7 @@ class AuthCrud(BaseCrud[User]):
                             # User exists, try to sign in instead
                             logger.info(f"User exists, attempting sign in instead of signup")
                             try:
-                                session_response = self.auth_client.auth.sign_in_with_password({
+                                session_response = create_auth_client().sign_in_with_password({
                                     "email": signup_data["email"],
                                     "password": signup_data["password"]
                                 })
@@ -217,7 +208,7 @@ class AuthCrud(BaseCrud[User]):
                 # Fallback to regular signup if admin API fails (but not rate limit)
                 logger.warning(f"Admin user creation failed, falling back to regular signup: {str(admin_error)}")
                 try:
-                    auth_response = self.auth_client.auth.sign_up({
+                    auth_response = create_auth_client().sign_up({
                         "email": signup_data["email"],
                         "password": signup_data["password"],
                         "options": {
@@ -494,7 +485,7 @@ class AuthCrud(BaseCrud[User]):
                     logger.warning(f"Database check failed, proceeding with OTP: {e}")
 
             # Use Supabase for OTP authentication only
-            auth_response = self.auth_client.auth.sign_in_with_otp({
+            auth_response = create_auth_client().sign_in_with_otp({
                 "phone": signup_data["phone"],
                 "options": {
                     "data": {
@@ -599,7 +590,7 @@ class AuthCrud(BaseCrud[User]):
     
     async def login_with_email(self, db: AsyncSession, email: str, password: str) -> Dict[str, Any]:
         try:
-            auth_response = self.auth_client.auth.sign_in_with_password({
+            auth_response = create_auth_client().sign_in_with_password({
                 "email": email,
                 "password": password
             })
@@ -817,7 +808,7 @@ class AuthCrud(BaseCrud[User]):
             
             user_data = self._user_to_dict(user_obj)
             
-            auth_response = self.auth_client.auth.sign_in_with_password({
+            auth_response = create_auth_client().sign_in_with_password({
                 "email": user_data["email"],
                 "password": password
             })
@@ -848,7 +839,7 @@ class AuthCrud(BaseCrud[User]):
     
     async def google_signin(self, db: AsyncSession) -> Dict[str, Any]:
         try:
-            auth_response = self.auth_client.auth.sign_in_with_oauth({
+            auth_response = create_auth_client().sign_in_with_oauth({
                 "provider": "google",
                 "options": {
                     "redirect_to": "http://localhost:3000"
@@ -1117,4 +1108,13 @@ class AuthCrud(BaseCrud[User]):
             return user_data
         except Exception as e:
             logger.error(f"Error getting full user profile for {user_id}: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+_auth_crud: Optional[AuthCrud] = None
+
+def get_auth_crud() -> AuthCrud:
+    """Shared AuthCrud (it holds no per-request state); also usable as a FastAPI dependency"""
+    global _auth_crud
+    if _auth_crud is None:
+        _auth_crud = AuthCrud()
+    return _auth_crud
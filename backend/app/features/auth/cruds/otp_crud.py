@@ -1,9 +1,11 @@
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
+from uuid import uuid4
+import asyncio
 import secrets
 import string
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, insert, update, delete, case, and_
 from app.database.base import get_supabase_client
 from app.core.base import BaseCrud
 from app.features.auth.models.otp_verification import OTPVerification, OTPTypeEnum
@@ -11,27 +13,49 @@ from app.features.auth.models.user import User
 from app.core.exceptions import ValidationException, RateLimitException
 from app.core.logging import get_logger
 from app.core.config import settings
+from app.core.rate_limit import TokenBucketLimiter, enforce_limits
 
 logger = get_logger("auth.crud")
 
+# Expired OTPs deleted per statement by the sweeper, keeping each delete's locks short
+OTP_SWEEP_BATCH = 5000
+
+# Hourly budgets; the caller's IP is checked first so a blocked client doesn't spend a phone's budget
+otp_send_ip_limiter = TokenBucketLimiter(settings.OTP_SEND_LIMIT_PER_IP, 3600)
+otp_send_phone_limiter = TokenBucketLimiter(settings.OTP_SEND_LIMIT_PER_PHONE, 3600)
+otp_verify_ip_limiter = TokenBucketLimiter(settings.OTP_VERIFY_LIMIT_PER_IP, 3600)
+otp_verify_phone_limiter = TokenBucketLimiter(settings.OTP_VERIFY_LIMIT_PER_PHONE, 3600)
+
+def check_otp_send_limits(phone: str, client_ip: Optional[str]) -> None:
+    enforce_limits(((otp_send_ip_limiter, client_ip, "IP address"), (otp_send_phone_limiter, phone, "phone number")))
+
+def check_otp_verify_limits(phone: str, client_ip: Optional[str]) -> None:
+    enforce_limits(((otp_verify_ip_limiter, client_ip, "IP address"), (otp_verify_phone_limiter, phone, "phone number")))
+
 class OTPCrud(BaseCrud[OTPVerification]):
     def __init__(self):
         super().__init__(get_supabase_client(), OTPVerification)
     
     async def create_otp(self, db: AsyncSession, phone: str, otp_type: str = "phone", user_id: Optional[str] = None) -> Dict[str, Any]:
+        # Expired codes are removed by the sweeper, not on every send
         try:
-            await self.cleanup_expired_otps(db, phone)
             otp_code = "".join(secrets.choice(string.digits) for _ in range(6))
-            expires_at = datetime.utcnow() + timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
-            otp_data = {
-                "user_id": user_id,
-                "phone": phone,
-                "otp_code": otp_code,
-                "type": getattr(OTPTypeEnum, otp_type.upper(), OTPTypeEnum.PHONE),
-                "expires_at": expires_at,
-                "attempts": 0
-            }
-            await self.create(db, otp_data)
+            now = datetime.utcnow()
+            expires_at = now + timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
+            await db.execute(
+                insert(OTPVerification).values(
+                    id=uuid4(),
+                    user_id=user_id,
+                    phone=phone,
+                    otp_code=otp_code,
+                    type=getattr(OTPTypeEnum, otp_type.upper(), OTPTypeEnum.PHONE),
+                    expires_at=expires_at,
+                    attempts=0,
+                    created_at=now,
+                    updated_at=now
+                )
+            )
+            await db.commit()
             logger.info(f"OTP created for phone: {phone}")
             return {
                 "otp_code": otp_code,
@@ -39,78 +63,92 @@ class OTPCrud(BaseCrud[OTPVerification]):
                 "phone": phone
             }
         except Exception as e:
+            await db.rollback()
             logger.error(f"OTP creation error: {str(e)}")
             raise ValidationException("Failed to create OTP")
     
     async def verify_otp(self, db: AsyncSession, phone: str, otp_code: str) -> bool:
+        """
+        Checks the phone's latest unexpired, unverified OTP in one statement
+
+        A matching code with attempts left marks it verified (and the user's phone, in the
+        same statement); any other code uses up an attempt. The row is locked by the UPDATE
+        and re-checked after concurrent ones, so a code verifies once and no attempt is lost.
+        """
         try:
-            result = await db.execute(
-                select(OTPVerification)
+            now = datetime.utcnow()
+            latest = (
+                select(OTPVerification.id)
                 .where(OTPVerification.phone == phone)
-                .where(OTPVerification.otp_code == otp_code)
+                .where(OTPVerification.verified_at.is_(None))
+                .where(OTPVerification.expires_at > now)
                 .order_by(OTPVerification.created_at.desc())
                 .limit(1)
+                .scalar_subquery()
             )
-            otp_record = result.scalar_one_or_none()
-            
-            # Check for any recent OTP for rate limiting
-            if not otp_record:
-                # Check if there's any recent OTP to increment attempts
-                recent_result = await db.execute(
-                    select(OTPVerification)
-                    .where(OTPVerification.phone == phone)
-                    .where(OTPVerification.expires_at > datetime.utcnow())
-                    .order_by(OTPVerification.created_at.desc())
-                    .limit(1)
-                )
-                recent_otp = recent_result.scalar_one_or_none()
-                if recent_otp and recent_otp.attempts < settings.OTP_MAX_ATTEMPTS:
-                    await db.execute(
-                        update(OTPVerification)
-                        .where(OTPVerification.id == recent_otp.id)
-                        .values(attempts=recent_otp.attempts + 1)
-                    )
-                    await db.commit()
-                return False
-                
-            if otp_record.verified_at:
-                return False
-            if otp_record.expires_at < datetime.utcnow():
-                return False
-            if otp_record.attempts >= settings.OTP_MAX_ATTEMPTS:
-                raise RateLimitException(f"Maximum OTP verification attempts exceeded for phone: {phone}")
-                
-            await db.execute(
+            code_matches = OTPVerification.otp_code == otp_code
+            otp = (
                 update(OTPVerification)
-                .where(OTPVerification.id == otp_record.id)
-                .values(verified_at=datetime.utcnow())
-            )
-            
-            if otp_record.user_id:
-                await db.execute(
-                    update(User)
-                    .where(User.id == otp_record.user_id)
-                    .values(is_phone_verified=True)
+                .where(OTPVerification.id == latest)
+                .where(OTPVerification.verified_at.is_(None))
+                .values(
+                    verified_at=case((and_(code_matches, OTPVerification.attempts < settings.OTP_MAX_ATTEMPTS), now)),
+                    attempts=case((code_matches, OTPVerification.attempts), else_=OTPVerification.attempts + 1),
+                    updated_at=now
                 )
-            
+                .returning(OTPVerification.user_id, OTPVerification.verified_at, OTPVerification.attempts)
+                .cte("otp")
+            )
+            verified_user = (
+                update(User)
+                .where(User.id == otp.c.user_id)
+                .where(otp.c.verified_at.is_not(None))
+                .values(is_phone_verified=True)
+                .returning(User.id)
+                .cte("verified_user")
+            )
+            result = await db.execute(select(otp.c.verified_at, otp.c.attempts).add_cte(verified_user))
+            row = result.first()
             await db.commit()
-            logger.info(f"OTP verified for phone: {phone}")
-            return True
-        except RateLimitException:
-            raise
         except Exception as e:
             await db.rollback()
             logger.error(f"OTP verification error: {str(e)}")
             return False
-    
-    async def cleanup_expired_otps(self, db: AsyncSession, phone: str):
-        try:
-            await db.execute(
-                delete(OTPVerification)
-                .where(OTPVerification.phone == phone)
-                .where(OTPVerification.expires_at < datetime.utcnow())
-            )
-            await db.commit()
-        except Exception as e:
-            await db.rollback()
-            logger.error(f"OTP cleanup error: {str(e)}")
+
+        if row is None:
+            return False
+        if row.verified_at is None:
+            if row.attempts >= settings.OTP_MAX_ATTEMPTS:
+                raise RateLimitException(f"Maximum OTP verification attempts exceeded for phone: {phone}")
+            return False
+        logger.info(f"OTP verified for phone: {phone}")
+        return True
+
+async def sweep_expired_otps(session_factory) -> int:
+    """Deletes expired OTPs in batches; returns how many were removed"""
+    removed = 0
+    try:
+        async with session_factory() as db:
+            while True:
+                batch = (
+                    select(OTPVerification.id)
+                    .where(OTPVerification.expires_at < datetime.utcnow())
+                    .limit(OTP_SWEEP_BATCH)
+                    .scalar_subquery()
+                )
+                result = await db.execute(delete(OTPVerification).where(OTPVerification.id.in_(batch)))
+                await db.commit()
+                removed += result.rowcount or 0
+                if (result.rowcount or 0) < OTP_SWEEP_BATCH:
+                    break
+    except Exception as e:
+        logger.error(f"OTP sweep error: {str(e)}")
+    if removed:
+        logger.info(f"Removed {removed} expired OTPs")
+    return removed
+
+async def run_otp_sweeper(session_factory, interval_seconds: float) -> None:
+    """Background loop that clears expired OTPs, replacing the per-send cleanup"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        await sweep_expired_otps(session_factory)
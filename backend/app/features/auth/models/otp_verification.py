@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Enum, UUID
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Enum, UUID, Index
 from enum import Enum as PyEnum
 from app.core.base import Base, BaseUUID, BaseTimeStamp
 
@@ -9,6 +9,10 @@ class OTPTypeEnum(str, PyEnum):
 
 class OTPVerification(BaseUUID, BaseTimeStamp, Base):
     __tablename__ = "otp_verifications"
+    __table_args__ = (
+        # Verification reads a phone's latest code
+        Index("idx_otp_verifications_phone_created_at", "phone", "created_at"),
+    )
 
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     phone = Column(String(25))
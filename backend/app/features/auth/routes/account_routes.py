@@ -3,7 +3,7 @@ from typing import Dict, Any, Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.features.auth.responses.profile_response import UserProfileResponse, AccountStatsResponse
 from app.features.auth.requests.profile_request import CompleteProfileUpdateRequest
-from app.features.auth.cruds.auth_crud import AuthCrud
+from app.features.auth.cruds.auth_crud import AuthCrud, get_auth_crud
 from app.features.auth.cruds.profile_crud import ProfileCrud
 from app.core.role_auth import get_all_users
 from app.core.exceptions import ValidationException, NotFoundException, ConflictException
@@ -18,10 +18,9 @@ logger = get_logger("auth.account")
 async def update_phone_number(
     phone: str = Form(...),
     current_user: Dict[str, Any] = Depends(get_all_users),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_async_session),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
-    
     existing_phone = await auth_crud.get_by_field(db, "phone", phone)
     if existing_phone and str(existing_phone.id) != current_user["id"]:
         raise ConflictException("Phone number already exists")
@@ -34,10 +33,9 @@ async def update_name(
     first_name: Optional[str] = Form(None),
     last_name: Optional[str] = Form(None),
     current_user: Dict[str, Any] = Depends(get_all_users),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_async_session),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
-    
     update_data = {}
     if first_name is not None:
         update_data["first_name"] = first_name
@@ -53,9 +51,9 @@ async def update_name(
 @account_router.get("/activity")
 async def get_account_activity(
     current_user: Dict[str, Any] = Depends(get_all_users),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_async_session),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
     user_data = await auth_crud.get_by_id(db, current_user["id"])
     
     if not user_data:
@@ -75,9 +73,9 @@ async def get_account_activity(
 @account_router.get("/security")
 async def get_security_info(
     current_user: Dict[str, Any] = Depends(get_all_users),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_async_session),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
     user_data = await auth_crud.get_by_id(db, current_user["id"])
     
     if not user_data:
@@ -98,9 +96,9 @@ async def get_security_info(
 @account_router.post("/verify-phone")
 async def request_phone_verification(
     current_user: Dict[str, Any] = Depends(get_all_users),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_async_session),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
     user_data = await auth_crud.get_by_id(db, current_user["id"])
     
     if not user_data:
@@ -117,9 +115,9 @@ async def request_phone_verification(
 @account_router.post("/export-data")
 async def export_user_data(
     current_user: Dict[str, Any] = Depends(get_all_users),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_async_session),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
     profile_crud = ProfileCrud()
     
     user_data = await auth_crud.get_by_id(db, current_user["id"])
@@ -144,7 +142,7 @@ async def get_data_usage_info(
     db: AsyncSession = Depends(get_async_session)
 ):
     from datetime import datetime
-    auth_crud = AuthCrud()
+    auth_crud = get_auth_crud()
     user_data = await auth_crud.get_by_id(db, current_user["id"])
     
     if not user_data:
@@ -181,17 +179,17 @@ async def request_data_download(
 @account_router.post("/lock-account")
 async def lock_account(
     current_user: Dict[str, Any] = Depends(get_all_users),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_async_session),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
     await auth_crud.deactivate_account(db, current_user["id"])
     return SuccessResponse(message="Account has been locked. Contact support to unlock.")
 
 @account_router.post("/unlock-account")
 async def unlock_account(
     current_user: Dict[str, Any] = Depends(get_all_users),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_async_session),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
     await auth_crud.reactivate_account(db, current_user["id"])
     return SuccessResponse(message="Account has been unlocked successfully")
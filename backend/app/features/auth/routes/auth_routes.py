@@ -1,24 +1,26 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from fastapi import APIRouter, Depends, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.exceptions import AuthenticationException
-from app.core.role_auth import get_all_users
+from app.core.role_auth import get_all_users, security
 from app.database.session import get_async_session
-from app.database.base import get_supabase_client
+from app.database.base import get_supabase_client, create_auth_client
+from app.core.supabase_storage import delete_file_from_url_async
 from app.features.auth.requests.phone_referral_request import SignupPhoneRequest
 from app.features.auth.requests.signup_request import SignupRequest
 from app.features.auth.requests.login_request import LoginEmailRequest, LoginPhoneRequest
+from app.features.auth.requests.password_request import RefreshTokenRequest
 from app.features.auth.responses.auth_response import AuthResponse, TokenResponse
 from app.features.auth.responses.user_response import UserResponse
-from app.features.auth.cruds.auth_crud import AuthCrud
+from app.features.auth.cruds.auth_crud import AuthCrud, get_auth_crud
 from app.core.logging import get_logger
 
 auth_router = APIRouter(prefix="/auth", tags=["Authentication"])
 logger = get_logger("auth.routes")
 
 @auth_router.post("/signup", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
-async def signup(request: SignupRequest, db: AsyncSession = Depends(get_async_session)):
-    auth_crud = AuthCrud()
+async def signup(request: SignupRequest, db: AsyncSession = Depends(get_async_session), auth_crud: AuthCrud = Depends(get_auth_crud)):
     result = await auth_crud.signup_with_email(db, request.model_dump())
     
     user_response = UserResponse(**result["user"])
@@ -41,8 +43,7 @@ async def signup(request: SignupRequest, db: AsyncSession = Depends(get_async_se
     )
 
 @auth_router.post("/signup-phone", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
-async def signup_phone(request: SignupPhoneRequest, db: AsyncSession = Depends(get_async_session)):
-    auth_crud = AuthCrud()
+async def signup_phone(request: SignupPhoneRequest, db: AsyncSession = Depends(get_async_session), auth_crud: AuthCrud = Depends(get_auth_crud)):
     result = await auth_crud.signup_with_phone(db, request.model_dump())
     
     user_response = UserResponse(**result["user"])
@@ -65,8 +66,7 @@ async def signup_phone(request: SignupPhoneRequest, db: AsyncSession = Depends(g
     )
 
 @auth_router.post("/login", response_model=AuthResponse)
-async def login_email(request: LoginEmailRequest, db: AsyncSession = Depends(get_async_session)):
-    auth_crud = AuthCrud()
+async def login_email(request: LoginEmailRequest, db: AsyncSession = Depends(get_async_session), auth_crud: AuthCrud = Depends(get_auth_crud)):
     result = await auth_crud.login_with_email(db, request.email, request.password)
     
     user_response = UserResponse(**result["user"])
@@ -88,8 +88,7 @@ async def login_email(request: LoginEmailRequest, db: AsyncSession = Depends(get
     )
 
 @auth_router.post("/login-phone", response_model=AuthResponse)
-async def login_phone(request: LoginPhoneRequest, db: AsyncSession = Depends(get_async_session)):
-    auth_crud = AuthCrud()
+async def login_phone(request: LoginPhoneRequest, db: AsyncSession = Depends(get_async_session), auth_crud: AuthCrud = Depends(get_auth_crud)):
     result = await auth_crud.login_with_phone(db, request.phone, request.password)
     
     user_response = UserResponse(**result["user"])
@@ -111,8 +110,7 @@ async def login_phone(request: LoginPhoneRequest, db: AsyncSession = Depends(get
     )
 
 @auth_router.post("/google", response_model=AuthResponse)
-async def google_signin(db: AsyncSession = Depends(get_async_session)):
-    auth_crud = AuthCrud()
+async def google_signin(db: AsyncSession = Depends(get_async_session), auth_crud: AuthCrud = Depends(get_auth_crud)):
     result = await auth_crud.google_signin(db)
     
     user_response = UserResponse(**result["user"])
@@ -134,10 +132,14 @@ async def google_signin(db: AsyncSession = Depends(get_async_session)):
     )
 
 @auth_router.post("/logout")
-async def logout(current_user: Dict[str, Any] = Depends(get_all_users)):
+async def logout(
+    current_user: Dict[str, Any] = Depends(get_all_users),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+):
     try:
-        supabase = get_supabase_client()
-        supabase.auth.sign_out()
+        # Revoke the caller's session server-side; the shared client holds no session to sign out
+        if credentials and credentials.credentials:
+            get_supabase_client().auth.admin.sign_out(credentials.credentials, "local")
         logger.info(f"User logged out: {current_user['id']}")
         from app.core.base import SuccessResponse
         return SuccessResponse(message="Logged out successfully")
@@ -154,7 +156,7 @@ async def get_current_user_info(
     from app.core.user_helper import ensure_user_exists_in_db
     
     # Ensure user exists in database first
-    auth_crud = AuthCrud()
+    auth_crud = get_auth_crud()
     user_exists = await ensure_user_exists_in_db(db, current_user, auth_crud)
     
     if not user_exists:
@@ -385,10 +387,9 @@ async def get_current_user_info(
             )
 
 @auth_router.post("/refresh")
-async def refresh_token(current_user: Dict[str, Any] = Depends(get_all_users)):
+async def refresh_token(request: RefreshTokenRequest, current_user: Dict[str, Any] = Depends(get_all_users)):
     try:
-        supabase = get_supabase_client()
-        refresh_response = supabase.auth.refresh_session()
+        refresh_response = create_auth_client().refresh_session(request.refresh_token)
         
         if not refresh_response.session:
             raise AuthenticationException("Failed to refresh token")
@@ -417,7 +418,7 @@ async def change_email(
     db: AsyncSession = Depends(get_async_session)
 ):
     try:
-        auth_crud = AuthCrud()
+        auth_crud = get_auth_crud()
         
         existing_user = await auth_crud.get_by_field(db, "email", new_email)
         if existing_user:
@@ -447,7 +448,7 @@ async def resend_email_verification(
     db: AsyncSession = Depends(get_async_session)
 ):
     try:
-        auth_crud = AuthCrud()
+        auth_crud = get_auth_crud()
         user_data = await auth_crud.get_by_id(db, current_user["id"])
         
         if not user_data:
@@ -482,13 +483,12 @@ async def delete_account(
     db: AsyncSession = Depends(get_async_session)
 ):
     try:
-        auth_crud = AuthCrud()
+        auth_crud = get_auth_crud()
         
         user_data = await auth_crud.get_by_id(db, current_user["id"])
         if user_data and user_data.avatar_url:
-            storage_client = SupabaseStorageClient()
             try:
-                delete_file_from_url(user_data.avatar_url)
+                await delete_file_from_url_async(user_data.avatar_url)
             except:
                 pass
         
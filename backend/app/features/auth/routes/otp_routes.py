@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.features.auth.requests.otp_request import SendOTPRequest, VerifyOTPRequest
 from app.features.auth.responses.otp_response import OTPResponse
-from app.features.auth.cruds.otp_crud import OTPCrud
-from app.core.whatsapp import get_whatsapp_service
+from app.features.auth.cruds.otp_crud import OTPCrud, check_otp_send_limits, check_otp_verify_limits
+from app.core.whatsapp import get_whatsapp_dispatcher
 from app.core.exceptions import ValidationException
 from app.core.logging import get_logger
 from app.core.config import settings
+from app.core.rate_limit import client_ip
 from app.core.base import SuccessResponse
 from app.features.auth.routes.auth_routes import auth_router
 from app.database.session import get_async_session
@@ -14,13 +15,14 @@ from app.database.session import get_async_session
 logger = get_logger("auth.routes")
 
 @auth_router.post("/send-otp", response_model=OTPResponse)
-async def send_otp(request: SendOTPRequest, db: AsyncSession = Depends(get_async_session)):
+async def send_otp(request: SendOTPRequest, http_request: Request, db: AsyncSession = Depends(get_async_session)):
+    check_otp_send_limits(request.phone, client_ip(http_request))
     otp_crud = OTPCrud()
-    whatsapp_service = get_whatsapp_service()
+    whatsapp_dispatcher = get_whatsapp_dispatcher()
     
     otp_result = await otp_crud.create_otp(db, request.phone)
     
-    await whatsapp_service.send_otp(request.phone, otp_result["otp_code"])
+    whatsapp_dispatcher.send_otp(request.phone, otp_result["otp_code"])
     
     return OTPResponse(
         message="OTP sent successfully",
@@ -29,7 +31,8 @@ async def send_otp(request: SendOTPRequest, db: AsyncSession = Depends(get_async
     )
 
 @auth_router.post("/verify-otp")
-async def verify_otp(request: VerifyOTPRequest, db: AsyncSession = Depends(get_async_session)):
+async def verify_otp(request: VerifyOTPRequest, http_request: Request, db: AsyncSession = Depends(get_async_session)):
+    check_otp_verify_limits(request.phone, client_ip(http_request))
     otp_crud = OTPCrud()
     
     is_verified = await otp_crud.verify_otp(db, request.phone, request.otp_code)
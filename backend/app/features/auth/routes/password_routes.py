@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends
 from typing import Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.features.auth.requests.password_request import ForgotPasswordRequest, ResetPasswordRequest, ChangePasswordRequest
-from app.features.auth.cruds.auth_crud import AuthCrud
+from app.features.auth.cruds.auth_crud import AuthCrud, get_auth_crud
 from app.core.role_auth import get_all_users
 from app.core.logging import get_logger
 from app.core.exceptions import ValidationException, AuthenticationException
@@ -13,8 +13,7 @@ from app.database.session import get_async_session
 logger = get_logger("auth.routes")
 
 @auth_router.post("/forgot-password")
-async def forgot_password(request: ForgotPasswordRequest, db: AsyncSession = Depends(get_async_session)):
-    auth_crud = AuthCrud()
+async def forgot_password(request: ForgotPasswordRequest, db: AsyncSession = Depends(get_async_session), auth_crud: AuthCrud = Depends(get_auth_crud)):
     await auth_crud.forgot_password(db, request.email)
     return SuccessResponse(message="Password reset email sent")
 
@@ -22,9 +21,9 @@ async def forgot_password(request: ForgotPasswordRequest, db: AsyncSession = Dep
 async def reset_password(
     request: ResetPasswordRequest,
     db: AsyncSession = Depends(get_async_session),
-    current_user: Dict[str, Any] = Depends(get_all_users)
+    current_user: Dict[str, Any] = Depends(get_all_users),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
     await auth_crud.reset_password(db, current_user["id"], request.new_password)
     return SuccessResponse(message="Password reset successful")
 
@@ -35,7 +34,7 @@ async def change_password(
     current_user: Dict[str, Any] = Depends(get_all_users)
 ):
     """Change password for authenticated user - requires current password"""
-    auth_crud = AuthCrud()
+    auth_crud = get_auth_crud()
     
     # Verify current password by attempting login
     user_data = await auth_crud.get_by_id(db, current_user["id"])
@@ -44,9 +43,8 @@ async def change_password(
     
     try:
         # Verify current password
-        from app.database.base import get_supabase_client
-        supabase = get_supabase_client()
-        verify_result = supabase.auth.sign_in_with_password({
+        from app.database.base import create_auth_client
+        verify_result = create_auth_client().sign_in_with_password({
             "email": user_data.email,
             "password": request.current_password
         })
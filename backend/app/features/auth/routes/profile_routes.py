@@ -10,10 +10,10 @@ from app.features.auth.requests.profile_request import (
     NotificationSettingsRequest, SocialLinksRequest, CompleteProfileUpdateRequest
 )
 from app.features.auth.cruds.profile_crud import ProfileCrud
-from app.features.auth.cruds.auth_crud import AuthCrud
+from app.features.auth.cruds.auth_crud import AuthCrud, get_auth_crud
 from app.core.role_auth import get_all_users
 from app.core.exceptions import ValidationException, AuthenticationException, NotFoundException
-from app.core.supabase_storage import SupabaseStorageClient, upload_user_avatar, delete_file_from_url
+from app.core.supabase_storage import SupabaseStorageClient, upload_user_avatar, delete_file_from_url_async
 from app.database.session import get_async_session
 from app.core.logging import get_logger
 from app.core.base import SuccessResponse
@@ -54,7 +54,7 @@ async def get_complete_profile(
     if not current_user or not current_user.get("id"):
         raise HTTPException(status_code=401, detail="Authentication required")
     
-    auth_crud = AuthCrud()
+    auth_crud = get_auth_crud()
     try:
         user_data = await auth_crud.get_full_user_profile(db, current_user["id"])
         return CompleteUserProfileResponse(**user_data)
@@ -120,16 +120,16 @@ async def get_complete_profile(
 async def update_basic_profile(
     request: ProfileUpdateRequest,
     current_user: Dict[str, Any] = Depends(get_all_users),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_async_session),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
     profile_data = request.model_dump(exclude_none=True)
     
     if "avatar_url" in profile_data and profile_data["avatar_url"] == "":
         user_obj = await auth_crud.get_by_id(db, current_user["id"])
         if user_obj and user_obj.avatar_url:
             try:
-                delete_file_from_url(user_obj.avatar_url)
+                await delete_file_from_url_async(user_obj.avatar_url)
             except:
                 pass
     
@@ -151,9 +151,9 @@ async def update_user_profile(
 async def update_complete_profile(
     request: CompleteProfileUpdateRequest,
     current_user: Dict[str, Any] = Depends(get_all_users),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_async_session),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
     profile_crud = ProfileCrud()
     
     user_data = {}
@@ -225,12 +225,12 @@ async def upload_avatar(
     if isinstance(avatar, str):
         raise ValidationException("Avatar must be a file upload")
     
-    auth_crud = AuthCrud()
+    auth_crud = get_auth_crud()
     
     user_obj = await auth_crud.get_by_id(db, current_user["id"])
     if user_obj and user_obj.avatar_url:
         try:
-            delete_file_from_url(user_obj.avatar_url)
+            await delete_file_from_url_async(user_obj.avatar_url)
         except:
             pass
     
@@ -251,14 +251,13 @@ async def upload_avatar(
 async def update_avatar(
     avatar: Union[UploadFile, str, None] = File(None),
     current_user: Dict[str, Any] = Depends(get_all_users),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_async_session),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
-    
     user_obj = await auth_crud.get_by_id(db, current_user["id"])
     if user_obj and user_obj.avatar_url:
         try:
-            delete_file_from_url(user_obj.avatar_url)
+            await delete_file_from_url_async(user_obj.avatar_url)
         except:
             pass
     
@@ -294,14 +293,13 @@ async def update_avatar(
 @profile_router.delete("/avatar")
 async def delete_avatar(
     current_user: Dict[str, Any] = Depends(get_all_users),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_async_session),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
-    
     user_obj = await auth_crud.get_by_id(db, current_user["id"])
     if user_obj and user_obj.avatar_url:
         try:
-            delete_file_from_url(user_obj.avatar_url)
+            await delete_file_from_url_async(user_obj.avatar_url)
         except:
             pass
     
@@ -311,15 +309,15 @@ async def delete_avatar(
 @profile_router.delete("/profile")
 async def delete_profile(
     current_user: Dict[str, Any] = Depends(get_all_users),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_async_session),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
     profile_crud = ProfileCrud()
     
     user_obj = await auth_crud.get_by_id(db, current_user["id"])
     if user_obj and user_obj.avatar_url:
         try:
-            delete_file_from_url(user_obj.avatar_url)
+            await delete_file_from_url_async(user_obj.avatar_url)
         except:
             pass
     
@@ -333,18 +331,18 @@ async def delete_profile(
 @profile_router.post("/deactivate")
 async def deactivate_account(
     current_user: Dict[str, Any] = Depends(get_all_users),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_async_session),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
     await auth_crud.deactivate_account(db, current_user["id"])
     return SuccessResponse(message="Account deactivated successfully")
 
 @profile_router.post("/reactivate")
 async def reactivate_account(
     current_user: Dict[str, Any] = Depends(get_all_users),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_async_session),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
     await auth_crud.reactivate_account(db, current_user["id"])
     return SuccessResponse(message="Account reactivated successfully")
 
@@ -354,7 +352,7 @@ async def get_account_stats(
     db: AsyncSession = Depends(get_async_session)
 ):
     from datetime import datetime
-    auth_crud = AuthCrud()
+    auth_crud = get_auth_crud()
     user_obj = await auth_crud.get_by_id(db, current_user["id"])
     
     if not user_obj:
@@ -369,8 +367,8 @@ async def get_account_stats(
 @profile_router.get("/overview", response_model=CompleteUserProfileResponse)
 async def get_account_overview(
     current_user: Dict[str, Any] = Depends(get_all_users),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_async_session),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
     user_data = await auth_crud.get_full_user_profile(db, current_user["id"])
     return CompleteUserProfileResponse(**user_data)
\ No newline at end of file
@@ -1,18 +1,19 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from typing import Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.features.auth.cruds.otp_crud import OTPCrud
+from app.features.auth.cruds.otp_crud import OTPCrud, check_otp_send_limits
 from app.features.auth.cruds.referral_crud import ReferralCrud
 from app.features.auth.requests.phone_referral_request import PhoneReferralRequest
 from app.features.auth.responses.referral_response import UserReferralResponse
 from app.features.auth.responses.user_response import UserResponse
-from app.features.auth.cruds.auth_crud import AuthCrud
+from app.features.auth.cruds.auth_crud import AuthCrud, get_auth_crud
 from app.core.role_auth import get_all_users
 from app.core.exceptions import ValidationException, AuthenticationException
 from app.database.session import get_async_session
-from app.core.whatsapp import get_whatsapp_service
+from app.core.whatsapp import get_whatsapp_dispatcher
 from app.core.logging import get_logger
 from app.core.config import settings
+from app.core.rate_limit import client_ip
 from app.features.auth.responses.otp_response import OTPResponse
 from pydantic import BaseModel
 
@@ -22,9 +23,9 @@ logger = get_logger("auth.referral")
 @referral_router.get("/referrals", response_model=UserReferralResponse)
 async def get_user_referrals(
     current_user: Dict[str, Any] = Depends(get_all_users),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_async_session),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
     referral_data = await auth_crud.get_user_referral_stats(db, current_user["id"])
     
     try:
@@ -36,10 +37,13 @@ async def get_user_referrals(
 @referral_router.post("/phone-referral")
 async def update_phone_and_referral(
     request: PhoneReferralRequest,
+    http_request: Request,
     current_user: Dict[str, Any] = Depends(get_all_users),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_async_session),
+    auth_crud: AuthCrud = Depends(get_auth_crud)
 ):
-    auth_crud = AuthCrud()
+    if request.phone:
+        check_otp_send_limits(request.phone, client_ip(http_request))
     updated_user = await auth_crud.update_phone_and_referral(
         db,
         current_user["id"], 
@@ -49,10 +53,10 @@ async def update_phone_and_referral(
     
     if request.phone:
         otp_crud = OTPCrud()
-        whatsapp_service = get_whatsapp_service()
+        whatsapp_dispatcher = get_whatsapp_dispatcher()
         
         otp_result = await otp_crud.create_otp(db, request.phone, "phone", current_user["id"])
-        await whatsapp_service.send_otp(request.phone, otp_result["otp_code"])
+        whatsapp_dispatcher.send_otp(request.phone, otp_result["otp_code"])
         
         otp_response = OTPResponse(
             message="Phone number updated and OTP sent",
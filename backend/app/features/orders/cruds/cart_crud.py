@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, delete, func, update, text
@@ -14,10 +14,43 @@ from datetime import datetime
 from app.features.products.cruds.product_inventory_crud import ProductInventoryCrud
 from app.features.orders.responses.cart_response import CartResponse, CartWithItemsResponse, CartItemResponse
 from app.database.base import get_supabase_client
+from app.database.supabase_async import async_supabase
 from app.core.config import settings  # Import at module level for all functions
+from app.features.orders.services.cart_cache import cart_read_cache, CachedCart
 
 logger = get_logger("crud.cart")
 
+# Columns the cart view needs; rows go straight into the response models, no ORM objects
+CART_COLUMNS = (
+    Cart.id, Cart.user_id, Cart.session_id, Cart.currency, Cart.subtotal, Cart.tax_amount,
+    Cart.shipping_amount, Cart.discount_amount, Cart.total_amount, Cart.expires_at,
+    Cart.created_at, Cart.updated_at
+)
+CART_ITEM_COLUMNS = (
+    CartItem.id, CartItem.cart_id, CartItem.product_id, CartItem.variant_id, CartItem.quantity,
+    CartItem.unit_price, CartItem.total_price, CartItem.created_at, CartItem.updated_at,
+    Product.name.label("product_name"), Product.slug.label("product_slug"), Product.sku.label("product_sku"),
+    ProductVariant.title.label("variant_title"), ProductVariant.sku.label("variant_sku")
+)
+
+def _cart_item_row(row) -> Dict[str, Any]:
+    """A CartItemResponse-shaped dict straight from projected columns"""
+    return dict(
+        id=str(row.id),
+        cart_id=str(row.cart_id),
+        product_id=str(row.product_id),
+        variant_id=str(row.variant_id) if row.variant_id else None,
+        quantity=row.quantity,
+        unit_price=float(row.unit_price or 0),
+        total_price=float(row.total_price or 0),
+        product_name=row.product_name,
+        product_slug=row.product_slug,
+        variant_title=row.variant_title,
+        sku=row.variant_sku or row.product_sku,
+        created_at=row.created_at.isoformat() if row.created_at else "",
+        updated_at=row.updated_at.isoformat() if row.updated_at else ""
+    )
+
 
 class CartCrud(BaseCrud[Cart]):
     def __init__(self):
@@ -39,10 +72,7 @@ class CartCrud(BaseCrud[Cart]):
                 
                 # Check if user exists in public.users table
                 try:
-                    from app.features.auth.cruds.auth_crud import AuthCrud
-                    auth_crud = AuthCrud()
-                    rest_supabase = auth_crud.admin_client
-                    rest_user_check = rest_supabase.table("users").select("id").eq("id", user_id).limit(1).execute()
+                    rest_user_check = await async_supabase.admin.table("users").select("id").eq("id", user_id).limit(1).execute()
                     
                     if rest_user_check.data and len(rest_user_check.data) > 0:
                         logger.info(f"✅ User {user_id} exists in public.users table")
@@ -60,8 +90,8 @@ class CartCrud(BaseCrud[Cart]):
                     logger.warning(f"User {user_id} not found in users table, creating user record via user_helper before cart creation")
                     # Use user_helper which handles user creation reliably
                     from app.core.user_helper import ensure_user_exists_in_db
-                    from app.features.auth.cruds.auth_crud import AuthCrud
-                    auth_crud = AuthCrud()
+                    from app.features.auth.cruds.auth_crud import get_auth_crud
+                    auth_crud = get_auth_crud()
                     
                     # Build current_user dict from available info
                     current_user_dict = {
@@ -76,7 +106,7 @@ class CartCrud(BaseCrud[Cart]):
                     
                     # Try to get user info from Supabase Auth
                     try:
-                        auth_user_response = auth_crud.admin_client.auth.admin.get_user_by_id(user_id)
+                        auth_user_response = await async_supabase.admin.auth.admin.get_user_by_id(user_id)
                         if auth_user_response and hasattr(auth_user_response, 'user') and auth_user_response.user:
                             auth_user = auth_user_response.user
                             current_user_dict["email"] = getattr(auth_user, 'email', None)
@@ -108,11 +138,8 @@ class CartCrud(BaseCrud[Cart]):
                 # User exists in REST API but not visible in SQLAlchemy - use REST API to check for cart
                 logger.info(f"Checking for existing cart via REST API (user verified via REST API)")
                 try:
-                    # Use admin_client (service role) for reliable access
-                    from app.features.auth.cruds.auth_crud import AuthCrud
-                    auth_crud = AuthCrud()
-                    rest_supabase_cart = auth_crud.admin_client
-                    rest_cart_check = rest_supabase_cart.table("carts").select("*").eq("user_id", user_id).limit(1).execute()
+                    # Use the service-role client for reliable access
+                    rest_cart_check = await async_supabase.admin.table("carts").select("*").eq("user_id", user_id).limit(1).execute()
                     if rest_cart_check.data and len(rest_cart_check.data) > 0:
                         # Cart exists - create Cart object from REST response
                         cart_data = rest_cart_check.data[0]
@@ -155,13 +182,13 @@ class CartCrud(BaseCrud[Cart]):
                 # User is authenticated (via require_buyer/require_supplier), so they exist in auth.users
                 # But they might not exist in public.users yet (propagation delay or signup issue)
                 if user_id:
-                    from app.features.auth.cruds.auth_crud import AuthCrud
-                    auth_crud = AuthCrud()
+                    from app.features.auth.cruds.auth_crud import get_auth_crud
+                    auth_crud = get_auth_crud()
                     
                     # Check if user exists in public.users via REST API
                     user_exists_in_db = False
                     try:
-                        user_check = auth_crud.admin_client.table("users").select("id").eq("id", user_id).limit(1).execute()
+                        user_check = await async_supabase.admin.table("users").select("id").eq("id", user_id).limit(1).execute()
                         if user_check.data and len(user_check.data) > 0:
                             user_exists_in_db = True
                             logger.info(f"✅ User {user_id} exists in public.users")
@@ -180,7 +207,7 @@ class CartCrud(BaseCrud[Cart]):
                         for retry in range(max_retries):
                             try:
                                 # Get user info from Supabase Auth
-                                auth_user = auth_crud.admin_client.auth.admin.get_user_by_id(user_id)
+                                auth_user = await async_supabase.admin.auth.admin.get_user_by_id(user_id)
                                 if auth_user and hasattr(auth_user, 'user') and auth_user.user:
                                     user_email = auth_user.user.email
                                     user_meta = getattr(auth_user.user, 'user_metadata', {}) or {}
@@ -205,14 +232,14 @@ class CartCrud(BaseCrud[Cart]):
                                     
                                     # Create user via REST API
                                     logger.info(f"Creating user {user_id} via REST API (attempt {retry + 1}/{max_retries})")
-                                    user_rest_response = auth_crud.admin_client.table("users").insert(user_data_rest).execute()
+                                    user_rest_response = await async_supabase.admin.table("users").insert(user_data_rest).execute()
                                     if user_rest_response.data:
                                         logger.info(f"✅ Created user {user_id} in public.users via REST API")
                                         import asyncio
                                         await asyncio.sleep(1.5)  # Allow propagation
                                         
                                         # Verify user was created
-                                        verify_check = auth_crud.admin_client.table("users").select("id").eq("id", user_id).limit(1).execute()
+                                        verify_check = await async_supabase.admin.table("users").select("id").eq("id", user_id).limit(1).execute()
                                         if verify_check.data and len(verify_check.data) > 0:
                                             user_exists_in_db = True
                                             logger.info(f"✅ Verified user {user_id} exists in public.users")
@@ -225,7 +252,7 @@ class CartCrud(BaseCrud[Cart]):
                                     else:
                                         # Check if user exists (duplicate)
                                         try:
-                                            user_check = auth_crud.admin_client.table("users").select("id").eq("id", user_id).limit(1).execute()
+                                            user_check = await async_supabase.admin.table("users").select("id").eq("id", user_id).limit(1).execute()
                                             if user_check.data and len(user_check.data) > 0:
                                                 user_exists_in_db = True
                                                 logger.info(f"✅ User {user_id} exists in public.users (duplicate)")
@@ -238,7 +265,7 @@ class CartCrud(BaseCrud[Cart]):
                                     logger.info(f"User {user_id} already exists (duplicate)")
                                     # Verify it exists
                                     try:
-                                        user_check = auth_crud.admin_client.table("users").select("id").eq("id", user_id).limit(1).execute()
+                                        user_check = await async_supabase.admin.table("users").select("id").eq("id", user_id).limit(1).execute()
                                         if user_check.data and len(user_check.data) > 0:
                                             user_exists_in_db = True
                                             logger.info(f"✅ Verified user {user_id} exists")
@@ -257,7 +284,7 @@ class CartCrud(BaseCrud[Cart]):
                                             wait_time = 1.0 + (verify_attempt * 0.5)  # 1.0, 1.5, 2.0, 2.5, 3.0 seconds
                                             await asyncio.sleep(wait_time)
                                             try:
-                                                verify_check = auth_crud.admin_client.table("users").select("id").eq("id", user_id).limit(1).execute()
+                                                verify_check = await async_supabase.admin.table("users").select("id").eq("id", user_id).limit(1).execute()
                                                 if verify_check.data and len(verify_check.data) > 0:
                                                     user_exists_in_db = True
                                                     verification_passed = True
@@ -391,9 +418,9 @@ class CartCrud(BaseCrud[Cart]):
                         logger.warning(f"⚠️ Attempting final user creation via user_helper for {user_id}")
                         try:
                             from app.core.user_helper import ensure_user_exists_in_db
-                            from app.features.auth.cruds.auth_crud import AuthCrud
-                            auth_crud_final = AuthCrud()
-                            auth_user_final = auth_crud_final.admin_client.auth.admin.get_user_by_id(user_id)
+                            from app.features.auth.cruds.auth_crud import get_auth_crud
+                            auth_crud_final = get_auth_crud()
+                            auth_user_final = await async_supabase.admin.auth.admin.get_user_by_id(user_id)
                             
                             if auth_user_final and hasattr(auth_user_final, 'user') and auth_user_final.user:
                                 # Build current_user dict
@@ -474,55 +501,76 @@ class CartCrud(BaseCrud[Cart]):
 
     async def get_cart_with_items(self, db: AsyncSession, cart_id: str) -> CartWithItemsResponse:
         try:
-            query = select(Cart).where(Cart.id == cart_id)
-            if "supabase.co" in (settings.DATABASE_URL or ""):
-                result = await db.execute(query.execution_options(prepared_statement_cache_size=0))
-            else:
-
-                result = await db.execute(query)
-            cart = result.scalar_one_or_none()
-            
-            if not cart:
-                raise NotFoundException("Cart not found")
+            cached = cart_read_cache.get(cart_id)
+            if await self._is_current(db, cart_id, cached):
+                return cached.cart
+            return await self._load_cart(db, cart_id)
+        except Exception as e:
+            logger.error(f"Error getting cart with items: {str(e)}")
+            raise
 
-            items_query = select(CartItem).where(CartItem.cart_id == cart_id).options(
-                selectinload(CartItem.product),
-                selectinload(CartItem.variant)
-            )
+    async def _is_current(self, db: AsyncSession, cart_id: str, cached: Optional[CachedCart]) -> bool:
+        """Whether a cached cart still matches the database; counts the hit or the stale entry"""
+        if cached is None:
+            return False
+        if settings.CART_CACHE_REVALIDATE:
+            # Another worker may have changed the cart; any change moves carts.updated_at
+            version_query = select(Cart.updated_at).where(Cart.id == cart_id)
             if "supabase.co" in (settings.DATABASE_URL or ""):
-                items_result = await db.execute(items_query.execution_options(prepared_statement_cache_size=0))
-            else:
+                version_query = version_query.execution_options(prepared_statement_cache_size=0)
+            if (await db.execute(version_query)).scalar_one_or_none() != cached.version:
+                cart_read_cache.stale(cart_id)
+                return False
+        cart_read_cache.hit()
+        return True
 
-                items_result = await db.execute(items_query)
-            cart_items = items_result.scalars().all()
+    async def _load_cart(self, db: AsyncSession, cart_id: str) -> CartWithItemsResponse:
+        """Builds the cart view from the database and caches it unless the cart changed meanwhile"""
+        token = cart_read_cache.begin()
+        query = select(*CART_COLUMNS).where(Cart.id == cart_id)
+        items_query = (
+            select(*CART_ITEM_COLUMNS)
+            .outerjoin(Product, Product.id == CartItem.product_id)
+            .outerjoin(ProductVariant, ProductVariant.id == CartItem.variant_id)
+            .where(CartItem.cart_id == cart_id)
+        )
+        if "supabase.co" in (settings.DATABASE_URL or ""):
+            query = query.execution_options(prepared_statement_cache_size=0)
+            items_query = items_query.execution_options(prepared_statement_cache_size=0)
 
-            cart_dict = cart.to_dict()
-            items_with_details = []
-            for item in cart_items:
-                item_dict = item.to_dict()
-                if item.product:
-                    item_dict["product_name"] = item.product.name
-                    item_dict["product_slug"] = item.product.slug
-                    item_dict["sku"] = item.product.sku
-                if item.variant:
-                    item_dict["variant_title"] = item.variant.title
-                    if item.variant.sku:
-                        item_dict["sku"] = item.variant.sku
-                items_with_details.append(item_dict)
-            
-            cart_dict["items"] = items_with_details
-            
-            return CartWithItemsResponse(**cart_dict)
-        except Exception as e:
-            logger.error(f"Error getting cart with items: {str(e)}")
-            raise
+        cart = (await db.execute(query)).one_or_none()
+        if not cart:
+            raise NotFoundException("Cart not found")
+        items = [_cart_item_row(row) for row in (await db.execute(items_query))]
+
+        response = CartWithItemsResponse.model_construct(
+            id=str(cart.id),
+            user_id=str(cart.user_id) if cart.user_id else None,
+            session_id=cart.session_id,
+            currency=cart.currency,
+            subtotal=float(cart.subtotal or 0),
+            tax_amount=float(cart.tax_amount or 0),
+            shipping_amount=float(cart.shipping_amount or 0),
+            discount_amount=float(cart.discount_amount or 0),
+            total_amount=float(cart.total_amount or 0),
+            items_count=len(items),
+            expires_at=cart.expires_at.isoformat() if cart.expires_at else None,
+            items=items,
+            created_at=cart.created_at.isoformat() if cart.created_at else None,
+            updated_at=cart.updated_at.isoformat() if cart.updated_at else None
+        )
+        cart_read_cache.store(
+            cart_id, response, sum(item["quantity"] or 0 for item in items), cart.updated_at, token
+        )
+        return response
 
     async def add_item_to_cart(self, db: AsyncSession, cart_id: str, product_id: str, quantity: int, variant_id: Optional[str] = None) -> CartItemResponse:
         import uuid
         import traceback
-        logger.info("=" * 80)
-        logger.info(f"🚀 ADD_ITEM_TO_CART START: cart_id={cart_id}, product_id={product_id}, quantity={quantity}, variant_id={variant_id}")
-        logger.info("=" * 80)
+        logger.info(
+            "ADD_ITEM_TO_CART START: cart_id=%s, product_id=%s, quantity=%s, variant_id=%s",
+            cart_id, product_id, quantity, variant_id
+        )
         
         # Ensure clean transaction state
         try:
@@ -535,7 +583,7 @@ class CartCrud(BaseCrud[Cart]):
             # Ensure cart_id is a UUID string
             try:
                 cart_uuid = uuid.UUID(cart_id)
-                logger.info(f"Cart UUID parsed: {cart_uuid}")
+                logger.debug("Cart UUID parsed: %s", cart_uuid)
             except ValueError as ve:
                 logger.error(f"Invalid cart ID format: {cart_id} - {ve}")
                 raise ValidationException(f"Invalid cart ID format: {cart_id}")
@@ -544,7 +592,7 @@ class CartCrud(BaseCrud[Cart]):
             cart = None
             try:
                 cart = await self.get_by_id(db, cart_id)
-                logger.info(f"Cart retrieved via SQLAlchemy: {cart.id if cart else 'None'}")
+                logger.debug("Cart retrieved via SQLAlchemy: %s", cart.id if cart else None)
             except Exception as cart_err:
                 logger.warning(f"Error getting cart via SQLAlchemy {cart_id}: {cart_err}, trying REST API...")
             
@@ -552,11 +600,8 @@ class CartCrud(BaseCrud[Cart]):
             if not cart:
                 logger.info(f"Cart {cart_id} not found via SQLAlchemy, checking REST API...")
                 try:
-                    # Use admin_client (service role) for reliable access
-                    from app.features.auth.cruds.auth_crud import AuthCrud
-                    auth_crud = AuthCrud()
-                    rest_supabase = auth_crud.admin_client
-                    rest_cart_check = rest_supabase.table("carts").select("*").eq("id", cart_id).limit(1).execute()
+                    # Use the service-role client for reliable access
+                    rest_cart_check = await async_supabase.admin.table("carts").select("*").eq("id", cart_id).limit(1).execute()
                     
                     if rest_cart_check.data and len(rest_cart_check.data) > 0:
                         # Cart exists in REST API - create Cart object from REST response
@@ -629,7 +674,7 @@ class CartCrud(BaseCrud[Cart]):
                                         # Store as string for manual validation
                                         setattr(product, key, str(value) if value else None)
                             product.id = product_uuid
-                            logger.info(f"Product loaded via raw query (bypassed enum validation)")
+                            logger.debug("Product loaded via raw query (bypassed enum validation)")
                     except Exception as raw_err:
                         logger.error(f"Raw query also failed: {raw_err}")
                         await db.rollback()
@@ -828,20 +873,12 @@ class CartCrud(BaseCrud[Cart]):
                 if variant_uuid:
                     cart_item_data["variant_id"] = variant_uuid
                 
-                logger.info(f"📦 Creating NEW cart item with data: {cart_item_data}")
-                logger.info(f"   - cart_id (UUID): {type(cart_item_data.get('cart_id'))} = {cart_item_data.get('cart_id')}")
-                logger.info(f"   - product_id (UUID): {type(cart_item_data.get('product_id'))} = {cart_item_data.get('product_id')}")
-                logger.info(f"   - variant_id (UUID): {type(cart_item_data.get('variant_id'))} = {cart_item_data.get('variant_id')}")
-                logger.info(f"   - quantity: {cart_item_data.get('quantity')}")
-                logger.info(f"   - unit_price: {cart_item_data.get('unit_price')}")
-                logger.info(f"   - total_price: {cart_item_data.get('total_price')}")
+                logger.debug("Creating new cart item with data: %s", cart_item_data)
                 try:
                     cart_item = CartItem(**cart_item_data)
-                    logger.info(f"✅ CartItem object created, adding to session...")
                     db.add(cart_item)
-                    logger.info(f"✅ CartItem added to session, committing...")
                     await db.commit()
-                    logger.info(f"✅✅ Cart item COMMITTED successfully: {cart_item.id}")
+                    logger.debug("Cart item committed: %s", cart_item.id)
                     try:
                         await db.refresh(cart_item)
                         # Load relationships for product/variant info - use selectinload query instead
@@ -887,14 +924,11 @@ class CartCrud(BaseCrud[Cart]):
                     await db.rollback()
                     raise
 
-            logger.info(f"📊 Updating cart totals for cart {cart_id}...")
             await self._update_cart_totals(db, str(cart_uuid))
-            logger.info(f"✅ Cart totals updated")
-            
-            logger.info("=" * 80)
-            logger.info(f"✅✅ ADD_ITEM_TO_CART SUCCESS: cart_id={cart_id}, product_id={product_id}, quantity={quantity}")
-            logger.info(f"   Cart Item ID: {cart_item.id}")
-            logger.info("=" * 80)
+            logger.info(
+                "ADD_ITEM_TO_CART SUCCESS: cart_id=%s, product_id=%s, quantity=%s, cart_item_id=%s",
+                cart_id, product_id, quantity, cart_item.id
+            )
             
             # Build response dict with all required fields
             cart_item_dict = cart_item.to_dict()
@@ -1055,6 +1089,8 @@ class CartCrud(BaseCrud[Cart]):
                 session_cart.user_id = user_id
                 session_cart.session_id = None
                 await db.commit()
+                # Cached under the guest session; the next read caches it for the user
+                cart_read_cache.invalidate(str(session_cart.id))
                 await db.refresh(session_cart)
                 return CartResponse(**session_cart.to_dict())
             else:
@@ -1089,6 +1125,7 @@ class CartCrud(BaseCrud[Cart]):
 
                 await db.delete(session_cart)
                 await db.commit()
+                cart_read_cache.invalidate(str(session_cart.id))
                 
                 await self._update_cart_totals(db, str(user_cart.id))
                 
@@ -1101,34 +1138,29 @@ class CartCrud(BaseCrud[Cart]):
     async def get_cart_count(self, db: AsyncSession, user_id: Optional[str] = None, session_id: Optional[str] = None) -> int:
         try:
             from app.core.config import settings
-            # First find the cart
-            cart_query = select(Cart)
+            if not user_id and not session_id:
+                return 0
+
+            # The header badge asks on every page: answer from the cached cart when there is one
+            cart_id = cart_read_cache.cart_id_for(user_id=user_id, session_id=session_id)
+            cached = cart_read_cache.get(cart_id)
+            if await self._is_current(db, cart_id, cached):
+                return cached.count
+
+            cart_query = select(Cart.id)
             if user_id:
                 cart_query = cart_query.where(Cart.user_id == user_id)
-            elif session_id:
-                cart_query = cart_query.where(Cart.session_id == session_id)
             else:
-                return 0
-            
+                cart_query = cart_query.where(Cart.session_id == session_id)
             if "supabase.co" in (settings.DATABASE_URL or ""):
-                cart_result = await db.execute(cart_query.execution_options(prepared_statement_cache_size=0))
-            else:
-
-                cart_result = await db.execute(cart_query)
-            cart = cart_result.scalar_one_or_none()
-            
-            if not cart:
+                cart_query = cart_query.execution_options(prepared_statement_cache_size=0)
+            cart_id = (await db.execute(cart_query)).scalar_one_or_none()
+            if not cart_id:
                 return 0
-            
-            # Then count items in that cart
-            count_query = select(func.sum(CartItem.quantity)).where(CartItem.cart_id == cart.id)
-            if "supabase.co" in (settings.DATABASE_URL or ""):
-                result = await db.execute(count_query.execution_options(prepared_statement_cache_size=0))
-            else:
 
-                result = await db.execute(count_query)
-            count = result.scalar() or 0
-            return int(count)
+            # Build the whole cart view: the mini-cart usually asks for it next
+            cart = await self._load_cart(db, str(cart_id))
+            return int(sum(item["quantity"] or 0 for item in cart.items))
         except Exception as e:
             logger.error(f"Error getting cart count: {str(e)}")
             return 0
@@ -1150,6 +1182,7 @@ class CartCrud(BaseCrud[Cart]):
                 count += 1
 
             await db.commit()
+            cart_read_cache.invalidate(*(str(cart.id) for cart in expired_carts))
             logger.info(f"Cleaned up {count} expired carts")
             return count
         except Exception as e:
@@ -1182,3 +1215,7 @@ class CartCrud(BaseCrud[Cart]):
         except Exception as e:
             logger.error(f"Error updating cart totals: {str(e)}")
             raise
+        finally:
+            # Every item mutation ends here after committing, so this is where cached views
+            # of the cart are dropped, even if only the item change made it in
+            cart_read_cache.invalidate(cart_id)
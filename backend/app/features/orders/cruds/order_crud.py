@@ -15,12 +15,50 @@ from app.core.pagination import PaginationParams, PaginatedResponse
 from app.features.orders.models.order import Order, OrderItem, OrderStatusEnum, PaymentStatusEnum
 from app.features.orders.models.cart import Cart, CartItem
 from app.features.orders.models.payment import Payment
+from app.features.orders.services.cart_cache import cart_read_cache
 from app.features.auth.models.address import Address
 from app.features.orders.requests.order_request import OrderCreateRequest, OrderUpdateStatusRequest, OrderCancelRequest
 from app.features.orders.responses.order_response import OrderResponse, OrderWithItemsResponse, OrderSummaryResponse
 
 logger = get_logger("crud.orders")
 
+ORDER_LIST_COLUMNS = (
+    Order.id, Order.user_id, Order.order_number, Order.status, Order.payment_status, Order.fulfillment_status,
+    Order.currency, Order.subtotal, Order.tax_amount, Order.shipping_amount, Order.discount_amount,
+    Order.total_amount, Order.billing_address, Order.shipping_address, Order.customer_notes, Order.admin_notes,
+    Order.processed_at, Order.shipped_at, Order.delivered_at, Order.cancelled_at, Order.cancel_reason,
+    Order.created_at, Order.updated_at
+)
+
+def _order_row(row) -> Dict[str, Any]:
+    """An OrderResponse-shaped dict straight from projected columns, skipping to_dict and re-validation"""
+    return dict(
+        id=str(row.id),
+        user_id=str(row.user_id),
+        order_number=row.order_number,
+        status=row.status,
+        payment_status=row.payment_status,
+        fulfillment_status=row.fulfillment_status,
+        currency=row.currency,
+        subtotal=float(row.subtotal or 0),
+        tax_amount=float(row.tax_amount or 0),
+        shipping_amount=float(row.shipping_amount or 0),
+        discount_amount=float(row.discount_amount or 0),
+        total_amount=float(row.total_amount or 0),
+        billing_address=row.billing_address,
+        shipping_address=row.shipping_address,
+        customer_notes=row.customer_notes,
+        admin_notes=row.admin_notes,
+        processed_at=row.processed_at,
+        shipped_at=row.shipped_at,
+        delivered_at=row.delivered_at,
+        cancelled_at=row.cancelled_at,
+        cancel_reason=row.cancel_reason,
+        items_count=row.items_count,
+        created_at=row.created_at,
+        updated_at=row.updated_at
+    )
+
 class OrderCRUD(BaseCrud[Order]):
     def __init__(self):
         super().__init__(get_supabase_client(), Order)
@@ -120,8 +158,11 @@ class OrderCRUD(BaseCrud[Order]):
             await db.execute(delete(CartItem).where(CartItem.cart_id == cart.id))
             cart.subtotal = 0
             cart.total_amount = 0
+            # Set even when the totals were already 0, so other workers' cached copies go stale
+            cart.updated_at = datetime.utcnow()
             
             await db.commit()
+            cart_read_cache.invalidate(str(cart.id))
             await db.refresh(order)
             logger.info(f"Order created: {order.id} for user {user_id}")
             return OrderResponse(**order.to_dict())
@@ -145,10 +186,14 @@ class OrderCRUD(BaseCrud[Order]):
     
     async def get_user_orders(self, db: AsyncSession, user_id: UUID, pagination: PaginationParams, status_filter: Optional[OrderStatusEnum] = None) -> PaginatedResponse[OrderResponse]:
         try:
-            query = select(Order).where(Order.user_id == user_id).options(
-                selectinload(Order.items),
-                selectinload(Order.payments)
-            ).order_by(desc(Order.created_at))
+            # Item counts come from a correlated count instead of loading every item and payment
+            items_count = (
+                select(func.count(OrderItem.id))
+                .where(OrderItem.order_id == Order.id)
+                .scalar_subquery()
+                .label("items_count")
+            )
+            query = select(*ORDER_LIST_COLUMNS, items_count).where(Order.user_id == user_id).order_by(desc(Order.created_at))
             
             if status_filter:
                 query = query.where(Order.status == status_filter)
@@ -164,9 +209,7 @@ class OrderCRUD(BaseCrud[Order]):
             query = query.offset(offset).limit(pagination.limit)
             
             result = await db.execute(query)
-            orders = result.scalars().all()
-            
-            orders_data = [OrderResponse(**order.to_dict()) for order in orders]
+            orders_data = [_order_row(row) for row in result]
             
             return PaginatedResponse.create(
                 items=orders_data,
@@ -6,6 +6,7 @@ from app.core.pagination import PaginationParams, PaginatedResponse
 from app.core.base import SuccessResponse
 from app.core.exceptions import ValidationException, NotFoundException
 from app.core.logging import get_logger
+from app.core.serialization import FastJSONResponse
 from app.database.session import get_async_session
 from app.features.orders.cruds import CartCrud, OrderCRUD, PaymentCrud, ReturnCrud
 from app.features.orders.requests import (
@@ -33,8 +34,8 @@ async def get_cart(
         # Ensure user exists in database if authenticated
         if current_user and current_user.get("id"):
             from app.core.user_helper import ensure_user_exists_in_db
-            from app.features.auth.cruds.auth_crud import AuthCrud
-            auth_crud = AuthCrud()
+            from app.features.auth.cruds.auth_crud import get_auth_crud
+            auth_crud = get_auth_crud()
             user_exists = await ensure_user_exists_in_db(db, current_user, auth_crud)
             
             if not user_exists:
@@ -57,7 +58,7 @@ async def get_cart(
             cart = await cart_crud.get_or_create_cart(db, session_id=session_id)
         
         cart_with_items = await cart_crud.get_cart_with_items(db, str(cart.id))
-        return cart_with_items
+        return FastJSONResponse(cart_with_items)
     except Exception as e:
         logger.error(f"Error in get_cart: {e}")
         import traceback
@@ -82,8 +83,8 @@ async def add_to_cart(
             
             # Ensure user exists in database
             from app.core.user_helper import ensure_user_exists_in_db
-            from app.features.auth.cruds.auth_crud import AuthCrud
-            auth_crud = AuthCrud()
+            from app.features.auth.cruds.auth_crud import get_auth_crud
+            auth_crud = get_auth_crud()
             user_exists = await ensure_user_exists_in_db(db, current_user, auth_crud)
             
             if not user_exists:
@@ -219,7 +220,7 @@ async def get_user_orders(
 ):
     order_crud = OrderCRUD()
     orders = await order_crud.get_user_orders(db, current_user["id"], pagination, status_filter)
-    return orders
+    return FastJSONResponse(orders)
 
 
 @orders_buyer_router.get("/{order_id}", response_model=OrderWithItemsResponse)
@@ -0,0 +1,157 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from collections import Counter, OrderedDict
+from datetime import datetime
+import time
+from app.core.config import settings
+
+# Invalidation marks remembered per cart; past this, the oldest are folded into one floor
+MAX_INVALIDATION_MARKS = 100000
+
+class CachedCart(NamedTuple):
+    cart: Any
+    # Units in the cart (what the header badge shows), not the number of lines
+    count: int
+    # carts.updated_at when the read model was built; every cart mutation moves it
+    version: Optional[datetime]
+    owners: Tuple[Tuple[str, str], ...]
+    expires: float
+
+class CartReadCache:
+    """
+    Per-process read model of carts: the cart view (items with product name, slug and sku,
+    totals) and the item count, built once and served until the cart changes
+
+    Every cart mutation invalidates its entry after committing. A read takes a token
+    before it queries and may only store what it built if the cart was not invalidated
+    since, so a read racing a mutation can never put the old cart back. Other worker
+    processes do not see these invalidations; with CART_CACHE_REVALIDATE a hit is first
+    checked against carts.updated_at, one indexed lookup instead of rebuilding the cart.
+    """
+
+    def __init__(self, max_carts: int = settings.CART_CACHE_SIZE, ttl: float = settings.CART_CACHE_TTL):
+        self.max_carts = max_carts
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CachedCart]" = OrderedDict()
+        # ("user" | "session", id) -> cart id
+        self._owners: Dict[Tuple[str, str], str] = {}
+        # cart id -> sequence number of its last invalidation, oldest first
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        self._sequence = 0
+        self._floor = 0
+        self.stats: Counter = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_carts > 0
+
+    @staticmethod
+    def owner_keys(user_id: Optional[str] = None, session_id: Optional[str] = None) -> Tuple[Tuple[str, str], ...]:
+        keys = []
+        if user_id:
+            keys.append(("user", str(user_id)))
+        if session_id:
+            keys.append(("session", session_id))
+        return tuple(keys)
+
+    def begin(self) -> int:
+        """Token to take before reading a cart from the database"""
+        return self._sequence
+
+    def get(self, cart_id: Optional[str]) -> Optional[CachedCart]:
+        """The cached cart, counting a miss if there is none; the caller counts the hit once it trusts it"""
+        entry = self._entries.get(str(cart_id)) if cart_id else None
+        if entry is None or entry.expires <= time.monotonic():
+            if entry is not None:
+                self._drop(str(cart_id))
+            self.stats["miss"] += 1
+            return None
+        self._entries.move_to_end(str(cart_id))
+        return entry
+
+    def cart_id_for(self, user_id: Optional[str] = None, session_id: Optional[str] = None) -> Optional[str]:
+        """Id of the cached cart of a user (or, without one, a guest session)"""
+        keys = self.owner_keys(user_id, session_id)
+        return self._owners.get(keys[0]) if keys else None
+
+    def hit(self) -> None:
+        self.stats["hit"] += 1
+
+    def stale(self, cart_id: str) -> None:
+        """A cached cart that another process changed (failed revalidation)"""
+        self.stats["stale"] += 1
+        self._drop(str(cart_id))
+
+    def store(self, cart_id: str, cart: Any, count: int, version: Optional[datetime], token: int) -> bool:
+        if not self.enabled:
+            return False
+        cart_id = str(cart_id)
+        if self._invalidated.get(cart_id, self._floor) > token:
+            # Invalidated while this read was in flight; what it read may predate the change
+            self.stats["discarded"] += 1
+            return False
+        self._drop(cart_id)
+        owners = self.owner_keys(getattr(cart, "user_id", None), getattr(cart, "session_id", None))
+        self._entries[cart_id] = CachedCart(cart, count, version, owners, time.monotonic() + self.ttl)
+        for key in owners:
+            self._owners[key] = cart_id
+        while len(self._entries) > self.max_carts:
+            oldest, _ = next(iter(self._entries.items()))
+            self._drop(oldest)
+            self.stats["evicted"] += 1
+        return True
+
+    def invalidate(self, *cart_ids: str) -> None:
+        for cart_id in cart_ids:
+            if not cart_id:
+                continue
+            cart_id = str(cart_id)
+            self._sequence += 1
+            self._invalidated.pop(cart_id, None)
+            self._invalidated[cart_id] = self._sequence
+            if len(self._invalidated) > MAX_INVALIDATION_MARKS:
+                _, sequence = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, sequence)
+            self._drop(cart_id)
+            self.stats["invalidated"] += 1
+
+    def clear(self) -> None:
+        self.invalidate(*list(self._entries))
+
+    def _drop(self, cart_id: str) -> None:
+        entry = self._entries.pop(cart_id, None)
+        if entry is None:
+            return
+        for key in entry.owners:
+            if self._owners.get(key) == cart_id:
+                del self._owners[key]
+
+    def hit_rate(self) -> float:
+        lookups = self.stats["hit"] + self.stats["miss"] + self.stats["stale"]
+        return self.stats["hit"] / lookups if lookups else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "carts": len(self._entries),
+            "hit_rate": round(self.hit_rate(), 4),
+            **self.stats
+        }
+
+    def render(self) -> str:
+        """Prometheus text, appended to /metrics"""
+        lines: List[str] = [
+            "# HELP aveo_cart_cache_lookups_total Cart read model lookups by result",
+            "# TYPE aveo_cart_cache_lookups_total counter",
+            *(f'aveo_cart_cache_lookups_total{{result="{result}"}} {self.stats[result]}' for result in ("hit", "miss", "stale")),
+            "# HELP aveo_cart_cache_hit_ratio Share of cart lookups served from the read model",
+            "# TYPE aveo_cart_cache_hit_ratio gauge",
+            f"aveo_cart_cache_hit_ratio {self.hit_rate():g}",
+            "# HELP aveo_cart_cache_invalidations_total Cart read models dropped by cart mutations",
+            "# TYPE aveo_cart_cache_invalidations_total counter",
+            f"aveo_cart_cache_invalidations_total {self.stats['invalidated']}",
+            "# HELP aveo_cart_cache_carts Carts currently cached",
+            "# TYPE aveo_cart_cache_carts gauge",
+            f"aveo_cart_cache_carts {len(self._entries)}",
+        ]
+        return "\n".join(lines) + "\n"
+
+cart_read_cache = CartReadCache()
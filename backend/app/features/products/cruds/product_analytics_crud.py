@@ -13,6 +13,12 @@ from app.features.products.models.product_review import ProductReview
 from app.database.base import get_supabase_client
 from app.core.base import BaseCrud
 from app.core.logging import get_logger
+from app.features.analytics.services.cardinality import (
+    sketch_buffer, record_search, record_search_click, visitor_key, normalize_term,
+    estimate_unique, estimate_unique_by_subject, estimate_unique_by_day,
+    PRODUCT_VIEWERS, SEARCHERS, SEARCH_QUERIES, QUERY_SEARCHERS, PRODUCT_SEARCHERS,
+    CATEGORY_SEARCHERS, BRAND_SEARCHERS
+)
 
 logger = get_logger("crud.product_analytics")
 
@@ -35,6 +41,11 @@ class ProductAnalyticsCrud(BaseCrud[ProductSearchLog]):
             }
             
             search_log = await self.create(db, search_log_data)
+            record_search(
+                sketch_buffer,
+                search_log_data["query_term"],
+                visitor_key(search_log_data["user_id"], search_log_data["session_id"], search_log_data["ip_address"], search_log_data["user_agent"])
+            )
             logger.info(f"Search logged: {search_log.id} for query: {search_data.get('query_term')}")
             return search_log
         except Exception as e:
@@ -43,7 +54,17 @@ class ProductAnalyticsCrud(BaseCrud[ProductSearchLog]):
 
     async def log_product_click(self, db: AsyncSession, log_id: str, product_id: str) -> bool:
         try:
-            await self.update(db, log_id, {"clicked_product_id": product_id})
+            search_log = await self.update(db, log_id, {"clicked_product_id": product_id})
+            result = await db.execute(
+                select(Product.category_id, Product.brand_id).where(Product.id == product_id)
+            )
+            product = result.first()
+            if product:
+                record_search_click(
+                    sketch_buffer, product_id, product.category_id, product.brand_id,
+                    visitor_key(search_log.user_id, search_log.session_id, search_log.ip_address, search_log.user_agent),
+                    search_log.created_at.date()
+                )
             logger.info(f"Product click logged: {product_id} for search log: {log_id}")
             return True
         except Exception as e:
@@ -65,9 +86,7 @@ class ProductAnalyticsCrud(BaseCrud[ProductSearchLog]):
             
             trends_query = select(
                 func.date(ProductSearchLog.created_at).label('search_date'),
-                func.count().label('total_searches'),
-                func.count(func.distinct(ProductSearchLog.user_id)).label('unique_users'),
-                func.count(func.distinct(ProductSearchLog.query_term)).label('unique_queries')
+                func.count().label('total_searches')
             ).where(
                 ProductSearchLog.created_at >= cutoff_date
             ).group_by(
@@ -77,14 +96,16 @@ class ProductAnalyticsCrud(BaseCrud[ProductSearchLog]):
             )
             
             result = await db.execute(trends_query)
+            unique_users = await estimate_unique_by_day(db, SEARCHERS, start_day=cutoff_date.date())
+            unique_queries = await estimate_unique_by_day(db, SEARCH_QUERIES, start_day=cutoff_date.date())
             trends_data = []
             
             for row in result.fetchall():
                 trends_data.append({
                     "date": row[0].isoformat(),
                     "total_searches": row[1],
-                    "unique_users": row[2],
-                    "unique_queries": row[3],
+                    "unique_users": unique_users.get(row[0], 0),
+                    "unique_queries": unique_queries.get(row[0], 0),
                     "avg_duration_ms": 0
                 })
             
@@ -100,7 +121,6 @@ class ProductAnalyticsCrud(BaseCrud[ProductSearchLog]):
             popular_query = select(
                 ProductSearchLog.query_term,
                 func.count().label('search_count'),
-                func.count(func.distinct(ProductSearchLog.user_id)).label('unique_users'),
                 func.count(case((ProductSearchLog.clicked_product_id.isnot(None), 1))).label('clicks'),
                 func.count(case((ProductSearchLog.resulted_in_purchase == True, 1))).label('conversions'),
                 (func.count(case((ProductSearchLog.resulted_in_purchase == True, 1))) * 100.0 / func.count()).label('conversion_rate')
@@ -113,16 +133,20 @@ class ProductAnalyticsCrud(BaseCrud[ProductSearchLog]):
             ).limit(limit)
             
             result = await db.execute(popular_query)
+            rows = result.fetchall()
+            unique_users = await estimate_unique_by_subject(
+                db, QUERY_SEARCHERS, [normalize_term(row[0]) for row in rows], cutoff_date.date()
+            )
             popular_terms = []
             
-            for row in result.fetchall():
+            for row in rows:
                 popular_terms.append({
                     "term": row[0],
                     "search_count": row[1],
-                    "unique_users": row[2],
-                    "clicks": row[3],
-                    "conversions": row[4],
-                    "conversion_rate": round(float(row[5]), 2) if row[5] else 0.0
+                    "unique_users": unique_users.get(normalize_term(row[0]), 0),
+                    "clicks": row[2],
+                    "conversions": row[3],
+                    "conversion_rate": round(float(row[4]), 2) if row[4] else 0.0
                 })
             
             return popular_terms
@@ -169,67 +193,46 @@ class ProductAnalyticsCrud(BaseCrud[ProductSearchLog]):
 
     async def get_product_performance_metrics(self, db: AsyncSession, product_id: str, days_back: int = 30) -> Dict[str, Any]:
         try:
-            from app.features.products.models.product_review import ProductReview
-            
             cutoff_date = datetime.utcnow() - timedelta(days=days_back)
             
-            performance_query = select(
-                func.count(func.distinct(ProductView.user_id)).label('unique_viewers'),
-                func.count(ProductView.id).label('total_views'),
-                func.count(func.distinct(
-                    case((ProductSearchLog.clicked_product_id == product_id, ProductSearchLog.user_id))
-                )).label('search_clicks'),
-                func.count(
-                    case((
-                        and_(
-                            ProductSearchLog.resulted_in_purchase == True,
-                            ProductSearchLog.clicked_product_id == product_id
-                        ), 1
-                    ))
-                ).label('conversions'),
-                func.avg(ProductReview.rating).label('avg_rating'),
-                func.count(ProductReview.id).label('review_count')
-            ).select_from(
-                Product.__table__.outerjoin(ProductView.__table__, 
-                    and_(Product.id == ProductView.product_id, ProductView.viewed_at >= cutoff_date)
-                ).outerjoin(ProductSearchLog.__table__,
-                    and_(Product.id == ProductSearchLog.clicked_product_id, ProductSearchLog.created_at >= cutoff_date)
-                ).outerjoin(ProductReview.__table__,
-                    and_(Product.id == ProductReview.product_id, 
-                         ProductReview.created_at >= cutoff_date)
+            # Separate aggregates: joining views, searches and reviews in one query multiplies the counts
+            views_result = await db.execute(
+                select(func.count()).select_from(ProductView).where(
+                    and_(ProductView.product_id == product_id, ProductView.viewed_at >= cutoff_date)
                 )
-            ).where(
-                Product.id == product_id
-            ).group_by(Product.id)
+            )
+            total_views = views_result.scalar() or 0
             
-            result = await db.execute(performance_query)
-            row = result.fetchone()
+            conversions_result = await db.execute(
+                select(func.count()).select_from(ProductSearchLog).where(
+                    and_(
+                        ProductSearchLog.clicked_product_id == product_id,
+                        ProductSearchLog.resulted_in_purchase == True,
+                        ProductSearchLog.created_at >= cutoff_date
+                    )
+                )
+            )
+            conversions = conversions_result.scalar() or 0
             
-            if row:
-                conversion_rate = (row[3] / row[1] * 100) if row[1] > 0 else 0
-                return {
-                    "product_id": product_id,
-                    "unique_viewers": row[0] or 0,
-                    "total_views": row[1] or 0,
-                    "search_clicks": row[2] or 0,
-                    "conversions": row[3] or 0,
-                    "conversion_rate": round(conversion_rate, 2),
-                    "avg_rating": float(row[4]) if row[4] else 0,
-                    "review_count": row[5] or 0,
-                    "period_days": days_back
-                }
-            else:
-                return {
-                    "product_id": product_id,
-                    "unique_viewers": 0,
-                    "total_views": 0,
-                    "search_clicks": 0,
-                    "conversions": 0,
-                    "conversion_rate": 0,
-                    "avg_rating": 0,
-                    "review_count": 0,
-                    "period_days": days_back
-                }
+            reviews_result = await db.execute(
+                select(func.avg(ProductReview.rating), func.count(ProductReview.id)).where(
+                    and_(ProductReview.product_id == product_id, ProductReview.created_at >= cutoff_date)
+                )
+            )
+            avg_rating, review_count = reviews_result.one()
+            
+            conversion_rate = (conversions / total_views * 100) if total_views > 0 else 0
+            return {
+                "product_id": product_id,
+                "unique_viewers": await estimate_unique(db, PRODUCT_VIEWERS, product_id, cutoff_date.date()),
+                "total_views": total_views,
+                "search_clicks": await estimate_unique(db, PRODUCT_SEARCHERS, product_id, cutoff_date.date()),
+                "conversions": conversions,
+                "conversion_rate": round(conversion_rate, 2),
+                "avg_rating": float(avg_rating) if avg_rating else 0,
+                "review_count": review_count or 0,
+                "period_days": days_back
+            }
         except Exception as e:
             logger.error(f"Error getting product performance metrics: {str(e)}")
             raise
@@ -244,7 +247,6 @@ class ProductAnalyticsCrud(BaseCrud[ProductSearchLog]):
                 Category.name.label('category_name'),
                 Category.id.label('category_id'),
                 func.count(func.distinct(ProductSearchLog.id)).label('total_searches'),
-                func.count(func.distinct(ProductSearchLog.user_id)).label('unique_searchers'),
                 func.count(case((ProductSearchLog.clicked_product_id.isnot(None), 1))).label('clicks'),
                 func.count(case((ProductSearchLog.resulted_in_purchase == True, 1))).label('conversions'),
                 case(
@@ -272,17 +274,21 @@ class ProductAnalyticsCrud(BaseCrud[ProductSearchLog]):
             )
             
             result = await db.execute(category_query)
+            rows = result.fetchall()
+            unique_searchers = await estimate_unique_by_subject(
+                db, CATEGORY_SEARCHERS, [row[1] for row in rows], cutoff_date.date()
+            )
             category_analytics = []
             
-            for row in result.fetchall():
+            for row in rows:
                 category_analytics.append({
                     "category_name": row[0],
                     "category_id": str(row[1]),
                     "total_searches": row[2] or 0,
-                    "unique_searchers": row[3] or 0,
-                    "clicks": row[4] or 0,
-                    "conversions": row[5] or 0,
-                    "conversion_rate": float(row[6]) if row[6] else 0
+                    "unique_searchers": unique_searchers.get(str(row[1]), 0),
+                    "clicks": row[3] or 0,
+                    "conversions": row[4] or 0,
+                    "conversion_rate": float(row[5]) if row[5] else 0
                 })
             
             return category_analytics
@@ -300,7 +306,6 @@ class ProductAnalyticsCrud(BaseCrud[ProductSearchLog]):
                 Brand.name.label('brand_name'),
                 Brand.id.label('brand_id'),
                 func.count(func.distinct(ProductSearchLog.id)).label('total_searches'),
-                func.count(func.distinct(ProductSearchLog.user_id)).label('unique_searchers'),
                 func.count(case((ProductSearchLog.clicked_product_id.isnot(None), 1))).label('clicks'),
                 func.count(case((ProductSearchLog.resulted_in_purchase == True, 1))).label('conversions'),
                 case(
@@ -328,17 +333,21 @@ class ProductAnalyticsCrud(BaseCrud[ProductSearchLog]):
             )
             
             result = await db.execute(brand_query)
+            rows = result.fetchall()
+            unique_searchers = await estimate_unique_by_subject(
+                db, BRAND_SEARCHERS, [row[1] for row in rows], cutoff_date.date()
+            )
             brand_analytics = []
             
-            for row in result.fetchall():
+            for row in rows:
                 brand_analytics.append({
                     "brand_name": row[0],
                     "brand_id": str(row[1]),
                     "total_searches": row[2] or 0,
-                    "unique_searchers": row[3] or 0,
-                    "clicks": row[4] or 0,
-                    "conversions": row[5] or 0,
-                    "conversion_rate": float(row[6]) if row[6] else 0
+                    "unique_searchers": unique_searchers.get(str(row[1]), 0),
+                    "clicks": row[3] or 0,
+                    "conversions": row[4] or 0,
+                    "conversion_rate": float(row[5]) if row[5] else 0
                 })
             
             return brand_analytics
@@ -1,19 +1,85 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
+from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, desc
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func, and_, or_, desc, text, tuple_
 from app.database.base import get_supabase_client
 from app.core.base import BaseCrud
 from app.core.pagination import PaginationParams, PaginatedResponse
-from app.features.products.models.product import Product, ProductStatusEnum, ProductApprovalEnum, ProductVisibilityEnum
+from app.features.products.models.product import Product, ProductStatusEnum, ProductApprovalEnum, ProductVisibilityEnum, PUBLIC_PRODUCT_FILTER
 from app.features.products.models.product_image import ProductImage
-from app.features.products.models.product_variant import ProductVariant
-from app.core.exceptions import NotFoundException, AuthorizationException, ConflictException
+from app.features.products.cruds.product_loading import ProductLoadProfile, product_load_options
+from app.features.products.responses import product_response
+from app.features.products.responses.product_response import ProductListResponse
+from app.core.exceptions import NotFoundException, AuthorizationException, ConflictException, ValidationException
 from app.core.logging import get_logger
+import base64
+import binascii
+import json
+import uuid
 
 logger = get_logger("crud.products")
 
+# Sorts offered by the public listing; id breaks ties so keyset order is total
+PUBLIC_SORT_COLUMNS = {
+    "created_at": Product.created_at,
+    "price": Product.price,
+    "name": Product.name,
+}
+# Only what ProductListResponse shows; description, SEO and JSON detail columns stay in the table
+PUBLIC_LIST_COLUMNS = (
+    Product.id, Product.supplier_id, Product.category_id, Product.brand_id, Product.sku, Product.name,
+    Product.slug, Product.short_description, Product.price, Product.compare_at_price, Product.tags,
+    Product.created_at
+)
+
+def _encode_cursor(sort_by: str, descending: bool, value: Any, product_id: uuid.UUID) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = str(value)
+    payload = json.dumps([sort_by, descending, value, str(product_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, sort_by: str, descending: bool) -> Tuple[Any, uuid.UUID]:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, cursor_descending, value, product_id = json.loads(payload)
+        if cursor_sort != sort_by or cursor_descending != descending:
+            raise ValueError("cursor belongs to a different sort")
+        if sort_by == "created_at":
+            value = datetime.fromisoformat(value)
+        elif sort_by == "price":
+            value = Decimal(value)
+        return value, uuid.UUID(product_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise ValidationException("Invalid pagination cursor")
+
+def _public_list_item(row) -> ProductListResponse:
+    """Rows come typed from the driver (UUID, Decimal, datetime, JSONB list) and already passed
+    the public filter, so the response is built without validation or re-parsing"""
+    return ProductListResponse.model_construct(
+        id=str(row.id),
+        supplier_id=str(row.supplier_id),
+        category_id=str(row.category_id),
+        brand_id=str(row.brand_id) if row.brand_id else None,
+        sku=row.sku,
+        name=row.name,
+        slug=row.slug,
+        short_description=row.short_description,
+        price=row.price,
+        compare_at_price=row.compare_at_price,
+        status=product_response.ProductStatusEnum.ACTIVE,
+        approval_status=product_response.ProductApprovalEnum.APPROVED,
+        visibility=product_response.ProductVisibilityEnum.VISIBLE,
+        tags=row.tags or [],
+        category=None,
+        brand=None,
+        images=[],
+        sustainability_scores=[],
+        created_at=row.created_at
+    )
+
 class ProductCrud(BaseCrud[Product]):
     def __init__(self):
         super().__init__(get_supabase_client(), Product)
@@ -23,13 +89,7 @@ class ProductCrud(BaseCrud[Product]):
             result = await db.execute(
                 select(Product)
                 .where(Product.id == id)
-                .options(
-                    selectinload(Product.category),
-                    selectinload(Product.brand),
-                    selectinload(Product.images),
-                    selectinload(Product.variants).selectinload(ProductVariant.images),
-                    selectinload(Product.sustainability_scores)
-                )
+                .options(*product_load_options(ProductLoadProfile.DETAIL))
             )
             return result.scalar_one_or_none()
         except Exception as e:
@@ -52,13 +112,7 @@ class ProductCrud(BaseCrud[Product]):
             result = await db.execute(
                 select(Product)
                 .where(Product.slug == slug)
-                .options(
-                    selectinload(Product.category),
-                    selectinload(Product.brand),
-                    selectinload(Product.images),
-                    selectinload(Product.variants).selectinload(ProductVariant.images),
-                    selectinload(Product.sustainability_scores)
-                )
+                .options(*product_load_options(ProductLoadProfile.DETAIL))
             )
             return result.scalar_one_or_none()
         except Exception as e:
@@ -136,11 +190,7 @@ class ProductCrud(BaseCrud[Product]):
                         Product.description.ilike(search_term)
                     )
                 )
-            query = query.options(
-                selectinload(Product.category),
-                selectinload(Product.brand),
-                selectinload(Product.images)
-            ).order_by(desc(Product.created_at))
+            query = query.options(*product_load_options(ProductLoadProfile.ADMIN)).order_by(desc(Product.created_at))
             count_query = select(func.count()).select_from(Product).where(Product.supplier_id == supplier_id)
             if status:
                 count_query = count_query.where(Product.status == status)
@@ -177,7 +227,7 @@ class ProductCrud(BaseCrud[Product]):
 
     async def get_public_products(
         self,
-        db: Optional[AsyncSession],
+        db: AsyncSession,
         pagination: PaginationParams,
         category_id: Optional[str] = None,
         brand_id: Optional[str] = None,
@@ -185,272 +235,67 @@ class ProductCrud(BaseCrud[Product]):
         max_price: Optional[float] = None,
         search: Optional[str] = None,
         sort_by: Optional[str] = "created_at",
-        sort_order: Optional[str] = "desc"
-    ) -> PaginatedResponse[Dict[str, Any]]:
-        # PRIORITY: Use Supabase REST API (products are created via Supabase RPC)
-        from app.core.config import settings
-        import httpx
-        
-        supabase_url = (settings.SUPABASE_URL or "").strip()
-        service_role_key = (settings.SUPABASE_SERVICE_ROLE_KEY or "").strip()
-        
-        if not supabase_url or not service_role_key:
-            logger.warning(f"Supabase not configured - URL: {bool(supabase_url)}, Key: {bool(service_role_key)}")
-            return PaginatedResponse[Dict[str, Any]](
-                items=[],
-                total=0,
+        sort_order: Optional[str] = "desc",
+        cursor: Optional[str] = None
+    ) -> PaginatedResponse[ProductListResponse]:
+        """
+        Buyer product listing in one query: filters and sort are served by the partial
+        idx_products_public_* indexes, and the page is either an offset (page numbers) or a
+        keyset seek from `cursor`, which stays cheap however deep the buyer scrolls
+        """
+        try:
+            sort_column = PUBLIC_SORT_COLUMNS.get(sort_by, Product.created_at)
+            descending = sort_order != "asc"
+            filters = [text(PUBLIC_PRODUCT_FILTER)]
+            if category_id:
+                filters.append(Product.category_id == category_id)
+            if brand_id:
+                filters.append(Product.brand_id == brand_id)
+            if min_price is not None:
+                filters.append(Product.price >= min_price)
+            if max_price is not None:
+                filters.append(Product.price <= max_price)
+            if search:
+                search_term = f"%{search}%"
+                filters.append(or_(Product.name.ilike(search_term), Product.description.ilike(search_term)))
+            
+            # Evaluated once alongside the page, so the total is exact without a second round trip
+            total_query = select(func.count()).select_from(Product).where(*filters).correlate(None).scalar_subquery()
+            query = select(*PUBLIC_LIST_COLUMNS, total_query.label("total")).where(*filters)
+            if cursor:
+                value, last_id = _decode_cursor(cursor, sort_column.key, descending)
+                position = tuple_(sort_column, Product.id)
+                query = query.where(position < (value, last_id) if descending else position > (value, last_id))
+            else:
+                query = query.offset(pagination.offset)
+            ordering = (desc(sort_column), desc(Product.id)) if descending else (sort_column, Product.id)
+            # One extra row tells whether there is a next page
+            result = await db.execute(query.order_by(*ordering).limit(pagination.limit + 1))
+            rows = result.all()
+            
+            if rows:
+                total = rows[0].total
+            else:
+                total_result = await db.execute(select(func.count()).select_from(Product).where(*filters))
+                total = total_result.scalar()
+            page_rows = rows[:pagination.limit]
+            next_cursor = None
+            if len(rows) > pagination.limit:
+                last = page_rows[-1]
+                next_cursor = _encode_cursor(sort_column.key, descending, getattr(last, sort_column.key), last.id)
+            
+            return PaginatedResponse.create(
+                items=[_public_list_item(row) for row in page_rows],
+                total=total,
                 page=pagination.page,
                 limit=pagination.limit,
-                total_pages=0
+                next_cursor=next_cursor
             )
-        
-        if supabase_url and service_role_key:
-            try:
-                # Build Supabase REST API query using PostgREST syntax
-                from urllib.parse import quote
-                base_url = f"{supabase_url}/rest/v1/products"
-                
-                # Select specific columns - include all required fields for ProductListResponse
-                select_cols = "id,supplier_id,name,slug,sku,price,short_description,category_id,brand_id,status,approval_status,visibility,created_at,tags"
-                
-                # Build the filtered query
-                query_params = [f"select={select_cols}"]
-                
-                # DEBUG: Query all products first (client-side filtering workaround for PostgREST enum filter issue)
-                debug_url_no_filters = f"{base_url}?select={select_cols}&limit=50"
-                try:
-                    async with httpx.AsyncClient(timeout=10.0) as debug_client:
-                        debug_response = await debug_client.get(
-                            debug_url_no_filters,
-                            headers={
-                                "apikey": service_role_key,
-                                "Authorization": f"Bearer {service_role_key}",
-                                "Content-Type": "application/json"
-                            }
-                        )
-                        if debug_response.status_code == 200:
-                            debug_data = debug_response.json()
-                            if isinstance(debug_data, list) and len(debug_data) > 0:
-                                # Filter client-side for products matching our criteria
-                                matching = [p for p in debug_data if str(p.get('status', '')).upper() == 'ACTIVE' and str(p.get('approval_status', '')).upper() == 'APPROVED' and str(p.get('visibility', '')).upper() == 'VISIBLE']
-                                if len(matching) > 0:
-                                    logger.info(f"✅ Found {len(matching)} matching products (client-side filtered)")
-                                    # Apply pagination
-                                    start_idx = (pagination.page - 1) * pagination.limit
-                                    end_idx = start_idx + pagination.limit
-                                    paginated_products = matching[start_idx:end_idx]
-                                    # Convert to response format - match ProductListResponse schema
-                                    items = []
-                                    for p in paginated_products:
-                                        from datetime import datetime
-                                        import json
-                                        try:
-                                            tags_list = json.loads(p.get("tags", "[]")) if isinstance(p.get("tags"), str) else (p.get("tags") or [])
-                                        except:
-                                            tags_list = []
-                                        created_at_val = p.get("created_at")
-                                        if isinstance(created_at_val, str):
-                                            try:
-                                                created_at_val = datetime.fromisoformat(created_at_val.replace("Z", "+00:00"))
-                                            except:
-                                                created_at_val = datetime.utcnow()
-                                        elif created_at_val is None:
-                                            created_at_val = datetime.utcnow()
-                                        items.append({
-                                            "id": str(p.get("id")),
-                                            "supplier_id": str(p.get("supplier_id")) if p.get("supplier_id") else "00000000-0000-0000-0000-000000000000",
-                                            "category_id": str(p.get("category_id")) if p.get("category_id") else "00000000-0000-0000-0000-000000000000",
-                                            "brand_id": str(p.get("brand_id")) if p.get("brand_id") else None,
-                                            "sku": p.get("sku", ""),
-                                            "name": p.get("name", ""),
-                                            "slug": p.get("slug", ""),
-                                            "short_description": p.get("short_description") or None,
-                                            "price": float(p.get("price", 0)),
-                                            "compare_at_price": None,
-                                            "status": p.get("status", "ACTIVE"),
-                                            "approval_status": p.get("approval_status", "approved"),
-                                            "visibility": p.get("visibility", "visible"),
-                                            "tags": tags_list,
-                                            "category": None,
-                                            "brand": None,
-                                            "images": [],
-                                            "sustainability_scores": [],
-                                            "created_at": created_at_val
-                                        })
-                                    return PaginatedResponse.create(
-                                        items=items,
-                                        total=len(matching),
-                                        page=pagination.page,
-                                        limit=pagination.limit
-                                    )
-                except Exception as debug_err:
-                    logger.warning(f"Debug query failed: {debug_err}")
-                
-                # Continue with PostgREST query if client-side filtering didn't return results
-                # Add filters for PostgREST query
-                query_params.extend([
-                    "status=eq.ACTIVE",
-                    "approval_status=eq.approved",
-                    "visibility=eq.visible"
-                ])
-                logger.info(f"Querying with filters: status=ACTIVE, approval_status=APPROVED, visibility=VISIBLE")
-                print(f"🔍 Filters: status=ACTIVE, approval_status=APPROVED, visibility=VISIBLE")
-                
-                if category_id:
-                    query_params.append(f"category_id=eq.{category_id}")
-                if brand_id:
-                    query_params.append(f"brand_id=eq.{brand_id}")
-                if min_price is not None:
-                    query_params.append(f"price=gte.{min_price}")
-                if max_price is not None:
-                    query_params.append(f"price=lte.{max_price}")
-                if search:
-                    # PostgREST search: use ilike with % wildcards
-                    search_encoded = quote(f"%{search}%")
-                    query_params.append(f"or=(name.ilike.{search_encoded},description.ilike.{search_encoded})")
-                
-                # Add ordering and pagination
-                query_params.append(f"order={sort_by}.{sort_order}")
-                query_params.append(f"limit={pagination.limit}")
-                query_params.append(f"offset={(pagination.page - 1) * pagination.limit}")
-                
-                url = f"{base_url}?{'&'.join(query_params)}"
-                logger.info(f"🔍 Querying Supabase REST API: {url[:300]}")
-                print(f"🔍 Supabase query: {url[:300]}")
-                
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    response = await client.get(
-                        url,
-                        headers={
-                            "apikey": service_role_key,
-                            "Authorization": f"Bearer {service_role_key}",
-                            "Content-Type": "application/json",
-                            "Prefer": "count=exact"
-                        }
-                    )
-                    
-                    response_text = response.text
-                    logger.info(f"Supabase response: status={response.status_code}, headers={dict(response.headers)}, body={response_text[:500]}")
-                    print(f"📥 Supabase response: status={response.status_code}, body={response_text[:500]}")
-                    
-                    if response.status_code == 200:
-                        try:
-                            products_data = response.json()
-                            if not isinstance(products_data, list):
-                                logger.warning(f"Supabase returned non-list data: {type(products_data)}, value={products_data}")
-                                products_data = []
-                            
-                            # Get total count from Content-Range header
-                            content_range = response.headers.get("content-range", "")
-                            total = len(products_data)
-                            if content_range and "/" in content_range:
-                                try:
-                                    # Format: "0-4/100" means items 0-4 of 100 total
-                                    total = int(content_range.split("/")[1])
-                                    logger.info(f"Got total from Content-Range: {total}")
-                                except Exception as range_err:
-                                    logger.warning(f"Could not parse Content-Range '{content_range}': {range_err}")
-                            
-                            logger.info(f"Parsed {len(products_data)} products from Supabase response, total={total}")
-                            if len(products_data) > 0:
-                                logger.info(f"First product sample: status={products_data[0].get('status')}, approval_status={products_data[0].get('approval_status')}, visibility={products_data[0].get('visibility')}")
-                            
-                            # Convert to response format - match ProductListResponse schema
-                            items = []
-                            for p in products_data:
-                                from datetime import datetime
-                                import json
-                                try:
-                                    tags_list = json.loads(p.get("tags", "[]")) if isinstance(p.get("tags"), str) else (p.get("tags") or [])
-                                except:
-                                    tags_list = []
-                                created_at_val = p.get("created_at")
-                                if isinstance(created_at_val, str):
-                                    try:
-                                        created_at_val = datetime.fromisoformat(created_at_val.replace("Z", "+00:00"))
-                                    except:
-                                        created_at_val = datetime.utcnow()
-                                elif created_at_val is None:
-                                    created_at_val = datetime.utcnow()
-                                items.append({
-                                    "id": str(p.get("id")),
-                                    "supplier_id": str(p.get("supplier_id")) if p.get("supplier_id") else "00000000-0000-0000-0000-000000000000",
-                                    "category_id": str(p.get("category_id")) if p.get("category_id") else "00000000-0000-0000-0000-000000000000",
-                                    "brand_id": str(p.get("brand_id")) if p.get("brand_id") else None,
-                                    "sku": p.get("sku", ""),
-                                    "name": p.get("name", ""),
-                                    "slug": p.get("slug", ""),
-                                    "short_description": p.get("short_description") or None,
-                                    "price": float(p.get("price", 0)),
-                                    "compare_at_price": None,
-                                    "status": p.get("status", "ACTIVE"),
-                                    "approval_status": p.get("approval_status", "approved"),
-                                    "visibility": p.get("visibility", "visible"),
-                                    "tags": tags_list,
-                                    "category": None,
-                                    "brand": None,
-                                    "images": [],
-                                    "sustainability_scores": [],
-                                    "created_at": created_at_val
-                                })
-                            
-                            logger.info(f"✅ Found {total} products from Supabase REST API")
-                            return PaginatedResponse.create(
-                                items=items,
-                                total=total,
-                                page=pagination.page,
-                                limit=pagination.limit
-                            )
-                        except Exception as parse_error:
-                            logger.error(f"Failed to parse Supabase response: {parse_error}, body: {response_text[:500]}")
-                            # Don't raise - return empty instead
-                            return PaginatedResponse[Dict[str, Any]](
-                                items=[],
-                                total=0,
-                                page=pagination.page,
-                                limit=pagination.limit,
-                                total_pages=0
-                            )
-                    else:
-                        error_msg = f"Supabase REST API returned {response.status_code}: {response_text[:500]}"
-                        logger.error(error_msg)
-                        # Don't raise - return empty instead
-                        return PaginatedResponse[Dict[str, Any]](
-                            items=[],
-                            total=0,
-                            page=pagination.page,
-                            limit=pagination.limit,
-                            total_pages=0
-                        )
-            except Exception as supabase_error:
-                import traceback
-                error_trace = traceback.format_exc()
-                logger.error(f"❌ Supabase REST API query failed: {supabase_error}")
-                logger.error(f"Error traceback: {error_trace}")
-                print(f"❌ Supabase query error: {supabase_error}")
-                print(f"Full traceback: {error_trace}")
-                # Return empty instead of raising - Supabase only approach
-                logger.warning("Returning empty products list due to Supabase query error")
-                return PaginatedResponse[Dict[str, Any]](
-                    items=[],
-                    total=0,
-                    page=pagination.page,
-                    limit=pagination.limit,
-                    total_pages=0
-                )
-        
-        # If Supabase query failed, return empty (Supabase-only approach)
-        logger.warning("Supabase query not available or failed, returning empty products list")
-        return PaginatedResponse[Dict[str, Any]](
-            items=[],
-            total=0,
-            page=pagination.page,
-            limit=pagination.limit,
-            total_pages=0
-        )
-        
-        # REMOVED: Database fallback - using Supabase only
-        # All product queries should go through Supabase REST API
+        except ValidationException:
+            raise
+        except Exception as e:
+            logger.error(f"Error getting public products: {str(e)}")
+            raise
 
     async def publish_product(self, db: AsyncSession, product_id: str, supplier_id: str) -> Dict[str, Any]:
         try:
@@ -586,11 +431,7 @@ class ProductImageCrud(BaseCrud[ProductImage]):
             if status:
                 query = query.where(Product.approval_status == status)
                 
-            query = query.options(
-                selectinload(Product.category),
-                selectinload(Product.brand),
-                selectinload(Product.images)
-            ).order_by(desc(Product.created_at))
+            query = query.options(*product_load_options(ProductLoadProfile.ADMIN)).order_by(desc(Product.created_at))
             count_query = select(func.count()).select_from(Product)
             if supplier_id:
                 count_query = count_query.where(Product.supplier_id == supplier_id)
@@ -619,11 +460,7 @@ class ProductImageCrud(BaseCrud[ProductImage]):
         pagination: PaginationParams
     ) -> tuple[List[Dict[str, Any]], int]:
         try:
-            query = select(Product).options(
-                selectinload(Product.category),
-                selectinload(Product.brand),
-                selectinload(Product.images)
-            ).order_by(desc(Product.created_at))
+            query = select(Product).options(*product_load_options(ProductLoadProfile.ADMIN)).order_by(desc(Product.created_at))
             count_query = select(func.count()).select_from(Product)
             total_result = await db.execute(count_query)
             total = total_result.scalar()
@@ -0,0 +1,94 @@
+from typing import Tuple
+from enum import Enum
+from functools import lru_cache
+from sqlalchemy import select, func, desc
+from sqlalchemy.orm import joinedload, selectinload, load_only, with_expression
+from app.features.auth.models.user import User
+from app.features.products.models.product import Product
+from app.features.products.models.brand import Brand
+from app.features.products.models.category import Category
+from app.features.products.models.product_image import ProductImage
+from app.features.products.models.product_inventory import ProductInventory
+from app.features.products.models.product_sustainability_score import ProductSustainabilityScore
+from app.features.products.models.product_variant import ProductVariant
+
+class ProductLoadProfile(str, Enum):
+    LIST_CARD = "list_card"      # search, filter and recommendation cards
+    DETAIL = "detail"            # product page
+    COMPARISON = "comparison"    # side-by-side compare
+    ADMIN = "admin"              # supplier/admin product tables
+
+# What a card shows (ProductSearchItemResponse.product_row) plus the keys callers compare on;
+# description, SEO and the JSON detail columns stay unloaded
+LIST_CARD_COLUMNS = (
+    Product.id, Product.supplier_id, Product.category_id, Product.brand_id, Product.sku, Product.name,
+    Product.slug, Product.short_description, Product.price, Product.compare_at_price, Product.tags,
+    Product.created_at
+)
+
+# Per-row values computed in the main query instead of loading whole child collections
+PRIMARY_IMAGE_URL = (
+    select(ProductImage.url)
+    .where(ProductImage.product_id == Product.id)
+    .order_by(desc(ProductImage.is_primary), ProductImage.sort_order, ProductImage.created_at)
+    .limit(1)
+    .correlate(Product)
+    .scalar_subquery()
+)
+AVAILABLE_QUANTITY = (
+    select(func.coalesce(func.sum(ProductInventory.quantity - ProductInventory.reserved_quantity), 0))
+    .where(ProductInventory.product_id == Product.id)
+    .correlate(Product)
+    .scalar_subquery()
+)
+SUSTAINABILITY_SCORE = (
+    select(ProductSustainabilityScore.overall_score)
+    .where(ProductSustainabilityScore.product_id == Product.id)
+    .order_by(desc(ProductSustainabilityScore.calculated_at))
+    .limit(1)
+    .correlate(Product)
+    .scalar_subquery()
+)
+
+@lru_cache(maxsize=None)
+def product_load_options(profile: ProductLoadProfile) -> Tuple:
+    """
+    Loader options for select(Product) in the given profile
+
+    Products loaded as LIST_CARD only have the card columns: reading description, to_dict()
+    or an unloaded relationship would lazy-load, which fails under AsyncSession. Use a fuller
+    profile for callers that need them.
+    """
+    # Built on first use, not at import: options configure the mappers, which needs every
+    # model imported. Many-to-one relations are joined into the main query (one row per
+    # product, no extra round trip); collections stay selectin so rows aren't multiplied under LIMIT
+    if profile == ProductLoadProfile.LIST_CARD:
+        return (
+            load_only(*LIST_CARD_COLUMNS),
+            joinedload(Product.brand).load_only(Brand.name),
+            joinedload(Product.category).load_only(Category.name),
+            joinedload(Product.supplier).load_only(User.first_name, User.last_name),
+            with_expression(Product.primary_image_url, PRIMARY_IMAGE_URL),
+            with_expression(Product.available_quantity, AVAILABLE_QUANTITY),
+            with_expression(Product.sustainability_score, SUSTAINABILITY_SCORE)
+        )
+    if profile == ProductLoadProfile.DETAIL:
+        return (
+            joinedload(Product.category),
+            joinedload(Product.brand),
+            selectinload(Product.images),
+            selectinload(Product.variants).selectinload(ProductVariant.images),
+            selectinload(Product.sustainability_scores)
+        )
+    if profile == ProductLoadProfile.COMPARISON:
+        return (
+            joinedload(Product.category),
+            joinedload(Product.brand),
+            selectinload(Product.images),
+            selectinload(Product.sustainability_scores)
+        )
+    return (
+        joinedload(Product.category),
+        joinedload(Product.brand),
+        selectinload(Product.images)
+    )
@@ -1,12 +1,11 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_, desc, asc, text, case, cast, String
-from sqlalchemy.orm import selectinload, joinedload
 from typing import Optional, List, Dict, Any, Tuple
 from uuid import UUID
 from decimal import Decimal
 
 from app.database.base import get_supabase_client
-from app.features.products.models.product import Product
+from app.features.products.models.product import Product, ProductStatusEnum
 from app.features.products.models.category import Category
 from app.features.products.models.brand import Brand
 from app.features.products.models.product_inventory import ProductInventory
@@ -14,6 +13,7 @@ from app.features.products.models.product_review import ProductReview
 from app.features.products.models.product_sustainability_score import ProductSustainabilityScore
 from app.features.products.models.product_image import ProductImage
 from app.features.products.models.product_view import ProductView
+from app.features.products.cruds.product_loading import ProductLoadProfile, product_load_options
 from app.features.products.requests.product_search_request import (
     ProductSearchRequest, SortByEnum, ProductFilterRequest, ProductComparisonRequest,
     ProductAutoCompleteRequest, ProductSearchSuggestionsRequest, ProductTrendingRequest,
@@ -23,11 +23,25 @@ from app.features.products.requests.product_search_request import (
     ProductLocationBasedRequest, ProductPriceHistoryRequest, ProductStockAlertRequest,
     ProductBulkSearchRequest, ProductSearchAnalyticsRequest, AdvancedFilterRequest
 )
+from app.features.analytics.services.cooccurrence_index import related_products_subquery, VIEW
+from app.features.analytics.services.recommendation_store import get_stored_recommendations
+from app.features.analytics.services.popularity_rollup import (
+    popularity_subquery, leaderboard_subquery, BEST_SELLER_PERIODS
+)
 from app.core.base import BaseCrud
 from app.core.logging import get_logger
+from datetime import datetime, timedelta
         
 logger = get_logger("products.search_crud")
 
+# Event history is partitioned by month; bounded lookbacks keep scans to recent partitions
+VIEW_HISTORY_WINDOW = timedelta(days=90)
+SEARCH_HISTORY_WINDOW = timedelta(days=90)
+# JSON columns that Product.to_dict reports as empty containers rather than null
+BULK_SEARCH_EMPTY_DEFAULTS = {"dimensions": dict, "materials": list, "manufacturing_details": dict, "tags": list, "seo_meta": dict}
+# ...and numeric columns it reports as floats
+BULK_SEARCH_FLOAT_COLUMNS = ("price", "compare_at_price", "cost_per_item", "weight")
+
 class ProductSearchCRUD(BaseCrud[Product]):
     def __init__(self):
         super().__init__(get_supabase_client(), Product)
@@ -139,14 +153,7 @@ class ProductSearchCRUD(BaseCrud[Product]):
         
         base_query = self._apply_sorting(base_query, request.sort_by)
         
-        base_query = base_query.options(
-            selectinload(Product.brand),
-            selectinload(Product.category),
-            selectinload(Product.images),
-            selectinload(Product.inventory),
-            selectinload(Product.sustainability_scores),
-            selectinload(Product.supplier)
-        )
+        base_query = base_query.options(*product_load_options(ProductLoadProfile.LIST_CARD))
         
         offset = (request.page - 1) * request.per_page
         base_query = base_query.offset(offset).limit(request.per_page)
@@ -342,35 +349,13 @@ class ProductSearchCRUD(BaseCrud[Product]):
                 Product.approval_status == "approved",
                 Product.visibility == "visible"
             )
-        ).options(
-            selectinload(Product.brand),
-            selectinload(Product.category),
-            selectinload(Product.images)
-        ).limit(limit)
+        ).options(*product_load_options(ProductLoadProfile.LIST_CARD)).limit(limit)
         
         result = await db.execute(similar_query)
         return result.scalars().all()
     
     async def _get_frequently_viewed_together(self, db: AsyncSession, product_id: UUID, limit: int) -> List[Product]:
-        product_sessions_subquery = select(
-            ProductView.session_id
-        ).where(
-            ProductView.product_id == product_id
-        ).distinct().subquery()
-        
-        co_viewed_subquery = select(
-            ProductView.product_id,
-            func.count().label('co_view_count')
-        ).select_from(
-            ProductView.join(product_sessions_subquery, 
-                           ProductView.session_id == product_sessions_subquery.c.session_id)
-        ).where(
-            ProductView.product_id != product_id
-        ).group_by(
-            ProductView.product_id
-        ).order_by(
-            desc('co_view_count')
-        ).limit(limit).subquery()
+        co_viewed_subquery = related_products_subquery(VIEW, product_id, limit)
         
         products_query = select(Product).join(
             co_viewed_subquery, Product.id == co_viewed_subquery.c.product_id
@@ -379,11 +364,7 @@ class ProductSearchCRUD(BaseCrud[Product]):
                 Product.status == ProductStatusEnum.ACTIVE,
                 Product.approval_status == "approved"
             )
-        ).options(
-            selectinload(Product.brand),
-            selectinload(Product.category),
-            selectinload(Product.images)
-        ).order_by(desc(co_viewed_subquery.c.co_view_count))
+        ).options(*product_load_options(ProductLoadProfile.LIST_CARD)).order_by(co_viewed_subquery.c.rank)
         
         result = await db.execute(products_query)
         products = result.scalars().all()
@@ -405,11 +386,7 @@ class ProductSearchCRUD(BaseCrud[Product]):
                         Product.approval_status == "approved",
                         Product.visibility == "visible"
                     )
-                ).options(
-                    selectinload(Product.brand),
-                    selectinload(Product.category),
-                    selectinload(Product.images)
-                ).limit(limit)
+                ).options(*product_load_options(ProductLoadProfile.LIST_CARD)).limit(limit)
                 
                 fallback_result = await db.execute(fallback_query)
                 products = fallback_result.scalars().all()
@@ -418,31 +395,32 @@ class ProductSearchCRUD(BaseCrud[Product]):
     
     async def _get_trending_products(self, db: AsyncSession, limit: int) -> List[Product]:
         try:
-            # Try with ProductView join first
+            # Try the popularity rollup first
             try:
-                trending_query = select(Product).outerjoin(ProductView).where(
+                popularity = popularity_subquery(datetime.utcnow() - timedelta(days=7))
+                trending_query = select(Product).join(
+                    popularity, Product.id == popularity.c.product_id
+                ).where(
                     and_(
                         Product.status == ProductStatusEnum.ACTIVE,
                         Product.approval_status == "approved",
                         Product.visibility == "visible"
                     )
-                ).group_by(Product.id).order_by(
-                    desc(func.coalesce(func.count(ProductView.id), 0)),
+                ).order_by(
+                    desc(popularity.c.views),
                     desc(Product.created_at)
-                ).options(
-                    selectinload(Product.brand),
-                    selectinload(Product.category),
-                    selectinload(Product.images)
-                ).limit(limit)
+                ).options(*product_load_options(ProductLoadProfile.LIST_CARD)).limit(limit)
                 
-                result = await db.execute(trending_query)
-                products = result.scalars().all()
+                # Savepoint: a failed rollup query must not abort the transaction the fallback runs in
+                async with db.begin_nested():
+                    result = await db.execute(trending_query)
+                    products = result.scalars().all()
                 
                 if products:
                     return products
-            except Exception:
-                # If ProductView join fails, use simple query
-                pass
+            except Exception as e:
+                # If the rollup is unavailable, use simple query
+                logger.warning(f"Popularity rollup unavailable for trending products: {str(e)}")
             
             # Fallback: simple query without ProductView join
             fallback_query = select(Product).where(
@@ -451,11 +429,7 @@ class ProductSearchCRUD(BaseCrud[Product]):
                     Product.approval_status == "approved",
                     Product.visibility == "visible"
                 )
-            ).order_by(desc(Product.created_at)).options(
-                selectinload(Product.brand),
-                selectinload(Product.category),
-                selectinload(Product.images)
-            ).limit(limit)
+            ).order_by(desc(Product.created_at)).options(*product_load_options(ProductLoadProfile.LIST_CARD)).limit(limit)
             
             fallback_result = await db.execute(fallback_query)
             products = fallback_result.scalars().all()
@@ -465,20 +439,22 @@ class ProductSearchCRUD(BaseCrud[Product]):
             return []  # Return empty list on error
     
     async def _get_top_rated_products(self, db: AsyncSession, limit: int) -> List[Product]:
-        top_rated_query = select(Product).outerjoin(ProductReview).where(
+        # Correlated rather than GROUP BY, so the card profile can join brand and category
+        avg_rating = (
+            select(func.avg(ProductReview.rating))
+            .where(ProductReview.product_id == Product.id)
+            .scalar_subquery()
+        )
+        top_rated_query = select(Product).where(
             and_(
                 Product.status == ProductStatusEnum.ACTIVE,
                 Product.approval_status == "approved",
                 Product.visibility == "visible"
             )
-        ).group_by(Product.id).order_by(
-            desc(func.coalesce(func.avg(ProductReview.rating), 0)),
+        ).order_by(
+            desc(func.coalesce(avg_rating, 0)),
             desc(Product.created_at)
-        ).options(
-            selectinload(Product.brand),
-            selectinload(Product.category),
-            selectinload(Product.images)
-        ).limit(limit)
+        ).options(*product_load_options(ProductLoadProfile.LIST_CARD)).limit(limit)
         
         result = await db.execute(top_rated_query)
         products = result.scalars().all()
@@ -490,11 +466,7 @@ class ProductSearchCRUD(BaseCrud[Product]):
                     Product.approval_status == "approved",
                     Product.visibility == "visible"
                 )
-            ).order_by(desc(Product.created_at)).options(
-                selectinload(Product.brand),
-                selectinload(Product.category),
-                selectinload(Product.images)
-            ).limit(limit)
+            ).order_by(desc(Product.created_at)).options(*product_load_options(ProductLoadProfile.LIST_CARD)).limit(limit)
             
             fallback_result = await db.execute(fallback_query)
             products = fallback_result.scalars().all()
@@ -503,7 +475,10 @@ class ProductSearchCRUD(BaseCrud[Product]):
     
     async def _get_user_based_recommendations(self, db: AsyncSession, user_id: UUID, limit: int) -> List[Product]:
         user_viewed_categories = select(Product.category_id).join(ProductView).where(
-            ProductView.user_id == user_id
+            and_(
+                ProductView.user_id == user_id,
+                ProductView.viewed_at >= datetime.utcnow() - VIEW_HISTORY_WINDOW
+            )
         ).distinct().subquery()
         
         recommendations_query = select(Product).where(
@@ -513,11 +488,7 @@ class ProductSearchCRUD(BaseCrud[Product]):
                 Product.approval_status == "approved",
                 Product.visibility == "visible"
             )
-        ).options(
-            selectinload(Product.brand),
-            selectinload(Product.category),
-            selectinload(Product.images)
-        ).order_by(desc(Product.created_at)).limit(limit)
+        ).options(*product_load_options(ProductLoadProfile.LIST_CARD)).order_by(desc(Product.created_at)).limit(limit)
         
         result = await db.execute(recommendations_query)
         products = result.scalars().all()
@@ -529,11 +500,7 @@ class ProductSearchCRUD(BaseCrud[Product]):
                     Product.approval_status == "approved",
                     Product.visibility == "visible"
                 )
-            ).order_by(desc(Product.created_at)).options(
-                selectinload(Product.brand),
-                selectinload(Product.category),
-                selectinload(Product.images)
-            ).limit(limit)
+            ).order_by(desc(Product.created_at)).options(*product_load_options(ProductLoadProfile.LIST_CARD)).limit(limit)
             
             fallback_result = await db.execute(fallback_query)
             products = fallback_result.scalars().all()
@@ -584,14 +551,7 @@ class ProductSearchCRUD(BaseCrud[Product]):
         
         base_query = self._apply_sorting(base_query, request.sort_by)
         
-        base_query = base_query.options(
-            selectinload(Product.brand),
-            selectinload(Product.category),
-            selectinload(Product.supplier),
-            selectinload(Product.images),
-            selectinload(Product.inventory),
-            selectinload(Product.sustainability_scores)
-        )
+        base_query = base_query.options(*product_load_options(ProductLoadProfile.LIST_CARD))
         
         offset = (request.page - 1) * request.per_page
         base_query = base_query.offset(offset).limit(request.per_page)
@@ -612,15 +572,7 @@ class ProductSearchCRUD(BaseCrud[Product]):
                 Product.approval_status == "approved",
                 Product.visibility == "visible"
             )
-        ).options(
-            selectinload(Product.brand),
-            selectinload(Product.category),
-            selectinload(Product.supplier),
-            selectinload(Product.images),
-            selectinload(Product.inventory),
-            selectinload(Product.sustainability_scores),
-            selectinload(Product.variants)
-        )
+        ).options(*product_load_options(ProductLoadProfile.COMPARISON))
         
         result = await db.execute(comparison_query)
         return result.scalars().all()
@@ -681,7 +633,9 @@ class ProductSearchCRUD(BaseCrud[Product]):
     async def get_search_suggestions(self, db: AsyncSession, request: ProductSearchSuggestionsRequest) -> Dict[str, Any]:
         from app.features.products.models.product_search_log import ProductSearchLog
         
-        cutoff_date = func.current_date() - text("INTERVAL '7 days'")
+        # Plain timestamps rather than current_date() so partitions are pruned at plan time
+        cutoff_date = datetime.utcnow() - timedelta(days=7)
+        history_cutoff = datetime.utcnow() - SEARCH_HISTORY_WINDOW
         
         trending_query = select(
             ProductSearchLog.query_term,
@@ -703,7 +657,10 @@ class ProductSearchCRUD(BaseCrud[Product]):
                 ProductSearchLog.query_term,
                 ProductSearchLog.created_at
             ).where(
-                ProductSearchLog.user_id == request.user_id
+                and_(
+                    ProductSearchLog.user_id == request.user_id,
+                    ProductSearchLog.created_at >= history_cutoff
+                )
             ).distinct().order_by(
                 desc(ProductSearchLog.created_at)
             ).limit(request.limit)
@@ -719,7 +676,8 @@ class ProductSearchCRUD(BaseCrud[Product]):
             ).where(
                 and_(
                     ProductSearchLog.query_term.ilike(f"%{request.query}%"),
-                    ProductSearchLog.query_term != request.query
+                    ProductSearchLog.query_term != request.query,
+                    ProductSearchLog.created_at >= history_cutoff
                 )
             ).distinct().order_by(
                 desc(ProductSearchLog.created_at)
@@ -736,35 +694,29 @@ class ProductSearchCRUD(BaseCrud[Product]):
 
     async def get_trending_products_advanced(self, db: AsyncSession, request: ProductTrendingRequest) -> Tuple[List[Product], int]:
         time_mapping = {
-            "day": "1 day",
-            "week": "7 days",
-            "month": "30 days",
-            "year": "365 days"
+            "day": 1,
+            "week": 7,
+            "month": 30,
+            "year": 365
         }
-        interval = time_mapping.get(request.time_period, "7 days")
+        days = time_mapping.get(request.time_period, 7)
+        popularity = popularity_subquery(
+            datetime.utcnow() - timedelta(days=days),
+            category_id=request.category_id,
+            brand_id=request.brand_id
+        )
         
-        trending_query = select(Product).join(ProductView).where(
+        trending_query = select(Product).join(
+            popularity, Product.id == popularity.c.product_id
+        ).where(
             and_(
                 Product.status == ProductStatusEnum.ACTIVE,
                 Product.approval_status == "approved",
-                Product.visibility == "visible",
-                ProductView.viewed_at >= func.current_date() - text(f"INTERVAL '{interval}'")
+                Product.visibility == "visible"
             )
-        )
-        
-        if request.category_id:
-            trending_query = trending_query.where(Product.category_id == request.category_id)
-        
-        if request.brand_id:
-            trending_query = trending_query.where(Product.brand_id == request.brand_id)
-        
-        trending_query = trending_query.group_by(Product.id).order_by(
-            desc(func.count(ProductView.id))
-        ).options(
-            selectinload(Product.brand),
-            selectinload(Product.category),
-            selectinload(Product.images)
-        ).limit(request.limit)
+        ).order_by(
+            desc(popularity.c.views)
+        ).options(*product_load_options(ProductLoadProfile.LIST_CARD)).limit(request.limit)
         
         result = await db.execute(trending_query)
         products = result.scalars().all()
@@ -793,11 +745,7 @@ class ProductSearchCRUD(BaseCrud[Product]):
         if request.category_id:
             seasonal_query = seasonal_query.where(Product.category_id == request.category_id)
         
-        seasonal_query = seasonal_query.options(
-            selectinload(Product.brand),
-            selectinload(Product.category),
-            selectinload(Product.images)
-        ).order_by(desc(Product.created_at)).limit(request.limit)
+        seasonal_query = seasonal_query.options(*product_load_options(ProductLoadProfile.LIST_CARD)).order_by(desc(Product.created_at)).limit(request.limit)
         
         result = await db.execute(seasonal_query)
         products = result.scalars().all()
@@ -822,11 +770,7 @@ class ProductSearchCRUD(BaseCrud[Product]):
         if request.brand_id:
             new_arrivals_query = new_arrivals_query.where(Product.brand_id == request.brand_id)
         
-        new_arrivals_query = new_arrivals_query.options(
-            selectinload(Product.brand),
-            selectinload(Product.category),
-            selectinload(Product.images)
-        ).order_by(desc(Product.created_at)).limit(request.limit)
+        new_arrivals_query = new_arrivals_query.options(*product_load_options(ProductLoadProfile.LIST_CARD)).order_by(desc(Product.created_at)).limit(request.limit)
         
         result = await db.execute(new_arrivals_query)
         products = result.scalars().all()
@@ -834,62 +778,59 @@ class ProductSearchCRUD(BaseCrud[Product]):
         return products, len(products)
 
     async def get_best_sellers(self, db: AsyncSession, request: ProductBestSellersRequest) -> Tuple[List[Product], Dict[str, Any]]:
-        trending_query = select(Product).join(ProductView).where(
-            and_(
-                Product.status == ProductStatusEnum.ACTIVE,
-                Product.approval_status == "approved",
-                Product.visibility == "visible"
-            )
+        visible = and_(
+            Product.status == ProductStatusEnum.ACTIVE,
+            Product.approval_status == "approved",
+            Product.visibility == "visible"
         )
-        
-        if request.category_id:
-            trending_query = trending_query.where(Product.category_id == request.category_id)
-        
-        if request.brand_id:
-            trending_query = trending_query.where(Product.brand_id == request.brand_id)
-        
-        time_mapping = {
-            "week": 7,
-            "month": 30,
-            "quarter": 90,
-            "year": 365
-        }
-        days = time_mapping.get(request.time_period, 30)
-        cutoff_date = func.current_date() - text(f"INTERVAL '{days} days'")
-        
-        trending_query = trending_query.where(
-            ProductView.viewed_at >= cutoff_date
-        ).group_by(Product.id).order_by(
-            desc(func.count(ProductView.id))
-        ).options(
-            selectinload(Product.brand),
-            selectinload(Product.category),
-            selectinload(Product.images)
-        ).limit(request.limit)
-        
-        result = await db.execute(trending_query)
-        products = result.scalars().all()
-        
-        sales_data = []
-        for product in products:
-            view_count_query = select(
-                func.count(ProductView.id)
-            ).where(
-                and_(
-                    ProductView.product_id == product.id,
-                    ProductView.viewed_at >= cutoff_date
-                )
+        eager = product_load_options(ProductLoadProfile.LIST_CARD)
+
+        rows = []
+        if request.category_id and not request.brand_id:
+            # Hot categories have precomputed leaderboards
+            leaderboard = leaderboard_subquery(request.category_id, request.time_period)
+            result = await db.execute(
+                select(
+                    Product, leaderboard.c.units_sold, leaderboard.c.orders, leaderboard.c.revenue
+                ).join(
+                    leaderboard, Product.id == leaderboard.c.product_id
+                ).where(visible).order_by(
+                    leaderboard.c.rank
+                ).options(*eager).limit(request.limit)
             )
-            
-            view_result = await db.execute(view_count_query)
-            view_count = view_result.scalar()
-            
-            sales_data.append({
+            rows = result.all()
+
+        if not rows:
+            days = BEST_SELLER_PERIODS.get(request.time_period, 30)
+            popularity = popularity_subquery(
+                datetime.utcnow() - timedelta(days=days),
+                category_id=request.category_id,
+                brand_id=request.brand_id
+            )
+            result = await db.execute(
+                select(
+                    Product, popularity.c.units_sold, popularity.c.purchases, popularity.c.revenue
+                ).join(
+                    popularity, Product.id == popularity.c.product_id
+                ).where(
+                    and_(visible, popularity.c.units_sold > 0)
+                ).order_by(
+                    desc(popularity.c.units_sold), desc(popularity.c.revenue)
+                ).options(*eager).limit(request.limit)
+            )
+            rows = result.all()
+
+        products = [row[0] for row in rows]
+        sales_data = [
+            {
                 "product_id": str(product.id),
-                "sales_count": view_count or 0,
-                "revenue": 0
-            })
-        
+                "sales_count": int(units_sold or 0),
+                "orders": int(orders or 0),
+                "revenue": float(revenue or 0)
+            }
+            for product, units_sold, orders, revenue in rows
+        ]
+
         return products, {"sales_data": sales_data, "time_period": request.time_period}
 
     async def get_cross_selling_products(self, db: AsyncSession, request: ProductCrossSellingRequest) -> Tuple[List[Product], List[float]]:
@@ -910,11 +851,7 @@ class ProductSearchCRUD(BaseCrud[Product]):
                 Product.status == ProductStatusEnum.ACTIVE,
                 Product.approval_status == "approved"
             )
-        ).options(
-            selectinload(Product.brand),
-            selectinload(Product.category),
-            selectinload(Product.images)
-        ).limit(request.limit)
+        ).options(*product_load_options(ProductLoadProfile.LIST_CARD)).limit(request.limit)
         
         result = await db.execute(similar_products_query)
         products = result.scalars().all()
@@ -953,11 +890,7 @@ class ProductSearchCRUD(BaseCrud[Product]):
                 Product.approval_status == "approved",
                 Product.visibility == "visible"
             )
-        ).options(
-            selectinload(Product.brand),
-            selectinload(Product.category),
-            selectinload(Product.images)
-        ).order_by(Product.price).limit(request.limit)
+        ).options(*product_load_options(ProductLoadProfile.LIST_CARD)).order_by(Product.price).limit(request.limit)
         
         result = await db.execute(upsell_query)
         products = result.scalars().all()
@@ -967,6 +900,11 @@ class ProductSearchCRUD(BaseCrud[Product]):
         return products, price_differences
 
     async def get_personalized_recommendations(self, db: AsyncSession, request: ProductPersonalizedRequest) -> Tuple[List[Product], List[str]]:
+        if request.recommendation_type == "mixed":
+            products, reasons = await self._get_precomputed_recommendations(db, request)
+            if products:
+                return products, reasons
+        
         if request.recommendation_type == "viewed":
             return await self._get_based_on_viewed_products(db, request)
         elif request.recommendation_type == "purchased":
@@ -978,9 +916,26 @@ class ProductSearchCRUD(BaseCrud[Product]):
         else:
             return await self._get_mixed_recommendations(db, request)
 
+    async def _get_precomputed_recommendations(self, db: AsyncSession, request: ProductPersonalizedRequest) -> Tuple[List[Product], List[str]]:
+        stored = await get_stored_recommendations(db, request.user_id, request.limit)
+        if not stored:
+            return [], []
+        
+        product_ids, _, _ = stored
+        result = await db.execute(
+            select(Product).where(Product.id.in_(product_ids)).options(*product_load_options(ProductLoadProfile.LIST_CARD))
+        )
+        products_by_id = {product.id: product for product in result.scalars().all()}
+        products = [products_by_id[product_id] for product_id in product_ids if product_id in products_by_id]
+        
+        return products, ["Customers with similar tastes liked this"] * len(products)
+
     async def _get_based_on_viewed_products(self, db: AsyncSession, request: ProductPersonalizedRequest) -> Tuple[List[Product], List[str]]:
         viewed_categories_query = select(Product.category_id).join(ProductView).where(
-            ProductView.user_id == request.user_id
+            and_(
+                ProductView.user_id == request.user_id,
+                ProductView.viewed_at >= datetime.utcnow() - VIEW_HISTORY_WINDOW
+            )
         ).distinct().limit(5)
         
         viewed_categories_result = await db.execute(viewed_categories_query)
@@ -996,11 +951,7 @@ class ProductSearchCRUD(BaseCrud[Product]):
                 Product.approval_status == "approved",
                 Product.visibility == "visible"
             )
-        ).options(
-            selectinload(Product.brand),
-            selectinload(Product.category),
-            selectinload(Product.images)
-        ).order_by(desc(Product.created_at)).limit(request.limit)
+        ).options(*product_load_options(ProductLoadProfile.LIST_CARD)).order_by(desc(Product.created_at)).limit(request.limit)
         
         result = await db.execute(recommendations_query)
         products = result.scalars().all()
@@ -1010,7 +961,10 @@ class ProductSearchCRUD(BaseCrud[Product]):
 
     async def _get_based_on_purchased_products(self, db: AsyncSession, request: ProductPersonalizedRequest) -> Tuple[List[Product], List[str]]:
         viewed_categories_query = select(Product.category_id).join(ProductView).where(
-            ProductView.user_id == request.user_id
+            and_(
+                ProductView.user_id == request.user_id,
+                ProductView.viewed_at >= datetime.utcnow() - VIEW_HISTORY_WINDOW
+            )
         ).distinct().limit(5)
         
         viewed_categories_result = await db.execute(viewed_categories_query)
@@ -1026,11 +980,7 @@ class ProductSearchCRUD(BaseCrud[Product]):
                 Product.approval_status == "approved", 
                 Product.visibility == "visible"
             )
-        ).options(
-            selectinload(Product.brand),
-            selectinload(Product.category),
-            selectinload(Product.images)
-        ).order_by(desc(Product.created_at)).limit(request.limit)
+        ).options(*product_load_options(ProductLoadProfile.LIST_CARD)).order_by(desc(Product.created_at)).limit(request.limit)
         
         result = await db.execute(recommendations_query)
         products = result.scalars().all()
@@ -1075,11 +1025,7 @@ class ProductSearchCRUD(BaseCrud[Product]):
                 Product.approval_status == "approved",
                 Product.visibility == "visible"
             )
-        ).options(
-            selectinload(Product.brand),
-            selectinload(Product.category),
-            selectinload(Product.images)
-        ).limit(request.limit)
+        ).options(*product_load_options(ProductLoadProfile.LIST_CARD)).limit(request.limit)
         
         result = await db.execute(recommendations_query)
         products = result.scalars().all()
@@ -1221,58 +1167,75 @@ class ProductSearchCRUD(BaseCrud[Product]):
         }
 
     async def bulk_search_products(self, db: AsyncSession, request: ProductBulkSearchRequest) -> Dict[str, Any]:
-        products_query = select(Product).where(
-            and_(
-                Product.id.in_(request.product_ids),
-                Product.status == ProductStatusEnum.ACTIVE,
-                Product.approval_status == "approved"
+        """
+        Rows come back as plain mappings of projected columns and go to the response as-is
+        (orjson encodes UUID, datetime and Decimal), instead of ORM object -> to_dict -> model
+        """
+        result = await db.execute(
+            select(*Product.__table__.columns).where(
+                and_(
+                    Product.id.in_(request.product_ids),
+                    Product.status == ProductStatusEnum.ACTIVE,
+                    Product.approval_status == "approved"
+                )
             )
-        ).options(
-            selectinload(Product.brand),
-            selectinload(Product.category),
-            selectinload(Product.images)
         )
-        
-        if request.include_inventory:
-            products_query = products_query.options(selectinload(Product.inventory))
-        
-        result = await db.execute(products_query)
-        found_products = result.scalars().all()
-        
-        found_ids = {product.id for product in found_products}
-        not_found_ids = [pid for pid in request.product_ids if pid not in found_ids]
-        
         products_data = []
-        inventory_data = []
-        pricing_data = []
+        for row in result.mappings():
+            product = dict(row)
+            for key, empty in BULK_SEARCH_EMPTY_DEFAULTS.items():
+                if product[key] is None:
+                    product[key] = empty()
+            for key in BULK_SEARCH_FLOAT_COLUMNS:
+                product[key] = float(product[key]) if product[key] else None
+            products_data.append(product)
+        
+        found_ids = [product["id"] for product in products_data]
+        found = set(found_ids)
+        not_found_ids = [pid for pid in request.product_ids if pid not in found]
+        
+        if request.include_details and found_ids:
+            category_ids = {product["category_id"] for product in products_data if product["category_id"]}
+            brand_ids = {product["brand_id"] for product in products_data if product["brand_id"]}
+            categories = {
+                category.id: category.to_dict()
+                for category in (await db.execute(select(Category).where(Category.id.in_(category_ids)))).scalars()
+            } if category_ids else {}
+            brands = {
+                brand.id: brand.to_dict()
+                for brand in (await db.execute(select(Brand).where(Brand.id.in_(brand_ids)))).scalars()
+            } if brand_ids else {}
+            images: Dict[UUID, List[Dict[str, Any]]] = {}
+            for image in (await db.execute(select(ProductImage).where(ProductImage.product_id.in_(found_ids)))).scalars():
+                images.setdefault(image.product_id, []).append(image.to_dict())
+            for product in products_data:
+                product["category"] = categories.get(product["category_id"])
+                product["brand"] = brands.get(product["brand_id"])
+                product["images"] = images.get(product["id"], [])
         
-        for product in found_products:
-            product_dict = product.to_dict()
-            
-            if request.include_details:
-                product_dict["category"] = product.category.to_dict() if product.category else None
-                product_dict["brand"] = product.brand.to_dict() if product.brand else None
-                product_dict["images"] = [img.to_dict() for img in product.images] if product.images else []
-            
-            products_data.append(product_dict)
-            
-            if request.include_inventory and product.inventory:
-                inventory_data.extend([inv.to_dict() for inv in product.inventory])
-            
-            if request.include_pricing:
-                pricing_data.append({
-                    "product_id": str(product.id),
-                    "price": float(product.price),
-                    "compare_at_price": float(product.compare_at_price) if product.compare_at_price else None,
-                    "cost_per_item": float(product.cost_per_item) if product.cost_per_item else None
-                })
+        inventory_data = []
+        if request.include_inventory and found_ids:
+            inventory_result = await db.execute(
+                select(ProductInventory).where(ProductInventory.product_id.in_(found_ids))
+            )
+            inventory_data = [inventory.to_dict() for inventory in inventory_result.scalars()]
+        
+        pricing_data = [
+            {
+                "product_id": product["id"],
+                "price": product["price"],
+                "compare_at_price": product["compare_at_price"],
+                "cost_per_item": product["cost_per_item"]
+            }
+            for product in products_data
+        ] if request.include_pricing else None
         
         return {
             "products": products_data,
-            "found_count": len(found_products),
+            "found_count": len(products_data),
             "not_found_ids": not_found_ids,
             "inventory_data": inventory_data if request.include_inventory else None,
-            "pricing_data": pricing_data if request.include_pricing else None
+            "pricing_data": pricing_data
         }
 
     async def get_search_analytics(self, db: AsyncSession, request: ProductSearchAnalyticsRequest) -> Dict[str, Any]:
@@ -1412,12 +1375,7 @@ class ProductSearchCRUD(BaseCrud[Product]):
         total_result = await db.execute(count_query)
         total = total_result.scalar() or 0
         
-        base_query = base_query.options(
-            selectinload(Product.brand),
-            selectinload(Product.category),
-            selectinload(Product.images),
-            selectinload(Product.sustainability_scores)
-        )
+        base_query = base_query.options(*product_load_options(ProductLoadProfile.LIST_CARD))
         
         offset = (request.page - 1) * request.per_page
         base_query = base_query.offset(offset).limit(request.per_page)
@@ -9,7 +9,7 @@ from app.features.products.models.product_variant import ProductVariant
 from app.features.products.models.product_image import ProductImage
 from app.core.exceptions import NotFoundException, ConflictException
 from app.core.logging import get_logger
-from app.core.supabase_storage import SupabaseStorageClient, extract_blob_path_from_url, delete_file_from_url, upload_product_image
+from app.core.supabase_storage import SupabaseStorageClient, extract_blob_path_from_url, delete_file_from_url_async, upload_product_image
 import asyncio
 
 logger = get_logger("crud.product_variants")
@@ -217,7 +217,7 @@ class ProductVariantImageCrud(BaseCrud[ProductImage]):
                 for url in uploaded_urls:
                     try:
                         blob_path = extract_blob_path_from_url(url)[1]
-                        storage_client.delete_file("aveoearth-product-assets", blob_path)
+                        await storage_client.delete_file_async("aveoearth-product-assets", blob_path)
                     except:
                         pass
                 raise Exception(f"Image upload failed: {'; '.join(upload_errors)}")
@@ -238,7 +238,7 @@ class ProductVariantImageCrud(BaseCrud[ProductImage]):
                 for url in uploaded_urls:
                     try:
                         blob_path = extract_blob_path_from_url(url)[1]
-                        storage_client.delete_file("aveoearth-product-assets", blob_path)
+                        await storage_client.delete_file_async("aveoearth-product-assets", blob_path)
                     except:
                         pass
             logger.error(f"Error uploading images for variant {variant_id}: {str(e)}")
@@ -264,7 +264,7 @@ class ProductVariantImageCrud(BaseCrud[ProductImage]):
                 raise NotFoundException("Image not found")
             
             try:
-                delete_file_from_url(image.url)
+                await delete_file_from_url_async(image.url)
             except Exception as e:
                 logger.warning(f"Failed to delete file from storage: {str(e)}")
             
@@ -1,9 +1,13 @@
 from typing import Dict, Any, Optional
+from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc, and_
 from app.database.base import get_supabase_client
 from app.core.base import BaseCrud
-from app.features.products.models.product_view import ProductView
+from app.features.products.models.product import Product
+from app.features.products.models.product_view import ProductView, ProductViewCounter
+from app.features.analytics.services.view_buffer import view_buffer
+from app.features.analytics.services.cardinality import estimate_unique, PRODUCT_VIEWERS, SUPPLIER_VIEWERS
 from app.core.logging import get_logger
 
 logger = get_logger("crud.product_views")
@@ -22,19 +26,17 @@ class ProductViewCrud(BaseCrud[ProductView]):
         user_agent: Optional[str] = None,
         referrer: Optional[str] = None
     ) -> Dict[str, Any]:
+        """Buffered: repeat views by the same viewer are only counted, and rows are flushed in batches"""
         try:
-            view_data = {
-                "product_id": product_id,
-                "user_id": user_id,
-                "session_id": session_id,
-                "ip_address": ip_address,
-                "user_agent": user_agent,
-                "referrer": referrer
-            }
-            
-            created_view = await self.create(db, view_data)
-            logger.debug(f"Product view recorded for product {product_id}")
-            return created_view.to_dict()
+            view_id = view_buffer.add(
+                product_id,
+                user_id=user_id,
+                session_id=session_id,
+                ip_address=ip_address,
+                user_agent=user_agent,
+                referrer=referrer
+            )
+            return {"id": view_id, "product_id": str(product_id), "recorded": view_id is not None}
         except Exception as e:
             logger.error(f"Error recording view for product {product_id}: {str(e)}")
             raise
@@ -42,65 +44,47 @@ class ProductViewCrud(BaseCrud[ProductView]):
     async def get_product_view_count(self, db: AsyncSession, product_id: str) -> int:
         try:
             result = await db.execute(
-                select(func.count())
-                .select_from(ProductView)
-                .where(ProductView.product_id == product_id)
+                select(ProductViewCounter.views).where(ProductViewCounter.product_id == product_id)
             )
-            return result.scalar() or 0
+            return (result.scalar() or 0) + view_buffer.pending(product_id)
         except Exception as e:
             logger.error(f"Error getting view count for product {product_id}: {str(e)}")
             return 0
 
-    async def get_product_unique_views(self, db: AsyncSession, product_id: str) -> int:
+    async def get_product_unique_views(self, db: AsyncSession, product_id: str, days: Optional[int] = None) -> int:
+        """Estimated distinct viewers (HyperLogLog, ~1% error) over the last `days` days, or all time"""
         try:
-            result = await db.execute(
-                select(func.count(func.distinct(
-                    func.coalesce(ProductView.user_id, ProductView.session_id)
-                )))
-                .where(ProductView.product_id == product_id)
-            )
-            return result.scalar() or 0
+            start_day = (datetime.utcnow() - timedelta(days=days)).date() if days else None
+            return await estimate_unique(db, PRODUCT_VIEWERS, product_id, start_day)
         except Exception as e:
             logger.error(f"Error getting unique views for product {product_id}: {str(e)}")
             return 0
 
     async def get_supplier_analytics(self, db: AsyncSession, supplier_id: str, days: int = 30) -> Dict[str, Any]:
         try:
-            from datetime import datetime, timedelta
             start_date = datetime.utcnow() - timedelta(days=days)
             
             total_views_result = await db.execute(
                 select(func.count())
                 .select_from(ProductView)
-                .join("products")
+                .join(Product, Product.id == ProductView.product_id)
                 .where(and_(
-                    "products.supplier_id == supplier_id",
+                    Product.supplier_id == supplier_id,
                     ProductView.viewed_at >= start_date
                 ))
             )
             total_views = total_views_result.scalar() or 0
             
-            unique_views_result = await db.execute(
-                select(func.count(func.distinct(
-                    func.coalesce(ProductView.user_id, ProductView.session_id)
-                )))
-                .select_from(ProductView)
-                .join("products")
-                .where(and_(
-                    "products.supplier_id == supplier_id",
-                    ProductView.viewed_at >= start_date
-                ))
-            )
-            unique_views = unique_views_result.scalar() or 0
+            unique_views = await estimate_unique(db, SUPPLIER_VIEWERS, supplier_id, start_date.date())
             
             most_viewed_result = await db.execute(
                 select(
                     ProductView.product_id,
                     func.count().label("view_count")
                 )
-                .join("products")
+                .join(Product, Product.id == ProductView.product_id)
                 .where(and_(
-                    "products.supplier_id == supplier_id",
+                    Product.supplier_id == supplier_id,
                     ProductView.viewed_at >= start_date
                 ))
                 .group_by(ProductView.product_id)
@@ -1,6 +1,6 @@
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy import Column, String, Text, DECIMAL, Boolean, DateTime, UUID, ForeignKey, Enum, TypeDecorator
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, DECIMAL, Boolean, DateTime, UUID, ForeignKey, Enum, TypeDecorator, Index, text
+from sqlalchemy.orm import relationship, query_expression
 from enum import Enum as PyEnum
 from app.core.base import Base, BaseTimeStamp, BaseUUID
 
@@ -41,8 +41,21 @@ class ProductVisibilityEnum(str, PyEnum):
     HIDDEN = "HIDDEN"
     SCHEDULED = "SCHEDULED"
 
+# What buyers may see. Status columns hold mixed-case values, hence upper(); kept as literal SQL
+# so the listing query's WHERE matches the partial indexes below and the planner can use them
+PUBLIC_PRODUCT_FILTER = "upper(status) = 'ACTIVE' AND upper(approval_status) = 'APPROVED' AND upper(visibility) = 'VISIBLE'"
+
 class Product(BaseUUID, BaseTimeStamp, Base):
     __tablename__ = "products"
+    # Keyset pagination indexes for the public listing, one per sort (scanned either direction)
+    __table_args__ = (
+        Index("idx_products_public_created", "created_at", "id", postgresql_where=text(PUBLIC_PRODUCT_FILTER)),
+        Index("idx_products_public_price", "price", "id", postgresql_where=text(PUBLIC_PRODUCT_FILTER)),
+        Index("idx_products_public_name", "name", "id", postgresql_where=text(PUBLIC_PRODUCT_FILTER)),
+        Index("idx_products_public_category_created", "category_id", "created_at", "id", postgresql_where=text(PUBLIC_PRODUCT_FILTER)),
+        Index("idx_products_public_category_price", "category_id", "price", "id", postgresql_where=text(PUBLIC_PRODUCT_FILTER)),
+        Index("idx_products_public_brand_created", "brand_id", "created_at", "id", postgresql_where=text(PUBLIC_PRODUCT_FILTER)),
+    )
 
     supplier_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     category_id = Column(UUID(as_uuid=True), ForeignKey("categories.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -86,6 +99,11 @@ class Product(BaseUUID, BaseTimeStamp, Base):
     views = relationship("ProductView", back_populates="product", cascade="all, delete-orphan", passive_deletes=True)
     price_history = relationship("ProductPriceHistory", back_populates="product", cascade="all, delete-orphan", passive_deletes=True)
 
+    # Card values computed in SQL by the list-card load profile (with_expression); None otherwise
+    primary_image_url = query_expression()
+    available_quantity = query_expression()
+    sustainability_score = query_expression()
+
     def to_dict(self):
         return {
             "id": str(self.id),
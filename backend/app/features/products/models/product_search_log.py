@@ -1,10 +1,18 @@
-from sqlalchemy import Column, String, Boolean, DateTime, UUID, ForeignKey, Text
+from datetime import datetime
+from sqlalchemy import Column, String, Boolean, DateTime, UUID, ForeignKey, Text, Index, PrimaryKeyConstraint
 from sqlalchemy.orm import relationship
 from app.core.base import Base, BaseTimeStamp, BaseUUID
 
 class ProductSearchLog(BaseUUID, BaseTimeStamp, Base):
     __tablename__ = "product_search_logs"
+    # Monthly range partitions on created_at, managed by app.database.partitions
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "created_at"),
+        Index("ix_product_search_logs_created_at_brin", "created_at", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     
+    created_at = Column(DateTime, default=datetime.utcnow, primary_key=True, nullable=False)  # partition key
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
     session_id = Column(String(255), nullable=True, index=True)
     query_term = Column(String(500), nullable=False, index=True)
@@ -1,11 +1,17 @@
 from datetime import datetime
-from sqlalchemy import Column, String, Text, DateTime, UUID, ForeignKey
+from sqlalchemy import Column, String, Text, DateTime, UUID, ForeignKey, Index, PrimaryKeyConstraint, BigInteger
 from sqlalchemy.dialects.postgresql import INET
 from sqlalchemy.orm import relationship
 from app.core.base import Base, BaseUUID, BaseTimeStamp
 
 class ProductView(BaseUUID, Base, BaseTimeStamp):
     __tablename__ = "product_views"
+    # Monthly range partitions on viewed_at, managed by app.database.partitions
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "viewed_at"),
+        Index("ix_product_views_viewed_at_brin", "viewed_at", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (viewed_at)"},
+    )
 
     product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), index=True)
@@ -13,7 +19,7 @@ class ProductView(BaseUUID, Base, BaseTimeStamp):
     ip_address = Column(INET)
     user_agent = Column(Text)
     referrer = Column(Text)
-    viewed_at = Column(DateTime, default=datetime.utcnow(), index=True)
+    viewed_at = Column(DateTime, default=datetime.utcnow, primary_key=True, nullable=False)  # partition key
 
     product = relationship("Product", back_populates="views", passive_deletes=True)
     user = relationship("User", passive_deletes=True)
@@ -29,3 +35,11 @@ class ProductView(BaseUUID, Base, BaseTimeStamp):
             "referrer": self.referrer,
             "viewed_at": self.viewed_at.isoformat() if self.viewed_at else None
         }
+
+class ProductViewCounter(Base):
+    """Running view totals per product, maintained by the buffered view recorder"""
+    __tablename__ = "product_view_counters"
+
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    views = Column(BigInteger, default=0, nullable=False)  # every hit, refreshes included
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -30,6 +30,54 @@ class ProductSearchItemResponse(BaseModel):
     class Config:
         from_attributes = True
 
+    @staticmethod
+    def product_row(product) -> Dict[str, Any]:
+        """
+        A Product as a dict of this model's fields, for FastJSONResponse or for validating into
+        the model. Reads the list-card profile's SQL-computed values, falling back to whichever
+        relationships the query eager-loaded (loaded ones sit in the instance __dict__), so
+        nothing lazy-loads here
+        """
+        loaded = vars(product)
+        images = loaded.get("images") or []
+        brand = loaded.get("brand")
+        category = loaded.get("category")
+        supplier = loaded.get("supplier")
+        scores = loaded.get("sustainability_scores") or []
+        price = product.price
+        compare_at_price = product.compare_at_price
+        primary_image = loaded.get("primary_image_url")
+        if primary_image is None and images:
+            primary_image = images[0].url
+        sustainability_score = loaded.get("sustainability_score")
+        if sustainability_score is None and scores:
+            sustainability_score = scores[0].overall_score
+        stock_quantity = loaded.get("available_quantity")
+        if stock_quantity is None and "inventory" in loaded:
+            stock_quantity = loaded["inventory"][0].available_quantity if loaded["inventory"] else 0
+        return dict(
+            id=product.id,
+            sku=product.sku,
+            name=product.name,
+            slug=product.slug,
+            short_description=product.short_description,
+            price=price,
+            compare_at_price=compare_at_price,
+            discount_percentage=float((compare_at_price - price) / compare_at_price * 100) if compare_at_price else None,
+            primary_image=primary_image,
+            rating=None,
+            review_count=0,
+            in_stock=stock_quantity > 0 if stock_quantity is not None else True,
+            stock_quantity=stock_quantity,
+            brand_name=brand.name if brand else None,
+            category_name=category.name if category else None,
+            supplier_name=f"{supplier.first_name} {supplier.last_name}" if supplier else None,
+            sustainability_score=float(sustainability_score) if sustainability_score is not None else None,
+            is_on_sale=compare_at_price is not None,
+            tags=product.tags or [],
+            created_at=product.created_at
+        )
+
 
 class ProductSearchResponse(BaseModel):
     products: List[ProductSearchItemResponse]
@@ -70,8 +70,8 @@ async def bulk_import_products_csv(
         # Ensure supplier exists in Supabase Auth (for DEBUG mode or if user doesn't exist)
         supplier_id = current_user["id"]
         try:
-            from supabase import create_client
-            admin_client = create_client(supabase_url, service_role_key)
+            from app.database.base import supabase_clients
+            admin_client = supabase_clients.admin
             
             # Check if user exists in auth
             try:
@@ -4,6 +4,7 @@ from typing import Optional, Dict, Any
 from uuid import UUID
 
 from app.database.session import get_async_session
+from app.core.serialization import FastJSONResponse
 from app.core.role_auth import get_all_users, get_optional_user, require_buyer_or_supplier
 from app.features.products.cruds.product_search_crud import ProductSearchCRUD
 from app.features.products.cruds.product_view_crud import ProductViewCrud
@@ -66,46 +67,11 @@ async def search_products(
                 logger = get_logger("search")
                 logger.warning(f"Could not log search analytics: {e}")
         
-        product_items = []
-        for product in products:
-            try:
-                item = ProductSearchItemResponse(
-                    id=product.id,
-                    sku=product.sku,
-                    name=product.name,
-                    slug=product.slug,
-                    short_description=product.short_description,
-                    price=product.price,
-                    compare_at_price=product.compare_at_price,
-                    discount_percentage=None,
-                    primary_image=product.images[0].url if product.images and len(product.images) > 0 else None,
-                    rating=None,
-                    review_count=0,
-                    in_stock=product.inventory[0].available_quantity > 0 if product.inventory and len(product.inventory) > 0 else False,
-                    stock_quantity=product.inventory[0].available_quantity if product.inventory and len(product.inventory) > 0 else 0,
-                    brand_name=product.brand.name if product.brand else None,
-                    category_name=product.category.name if product.category else None,
-                    supplier_name=f"{product.supplier.first_name} {product.supplier.last_name}" if product.supplier else None,
-                    sustainability_score=product.sustainability_score[0].overall_score if product.sustainability_score and len(product.sustainability_score) > 0 else None,
-                    is_on_sale=product.compare_at_price is not None,
-                    tags=product.tags or [],
-                    created_at=product.created_at
-                )
-                
-                if product.compare_at_price:
-                    item.discount_percentage = float(((product.compare_at_price - product.price) / product.compare_at_price) * 100)
-                
-                product_items.append(item)
-            except Exception as e:
-                # Skip products that fail to convert
-                from app.core.logging import get_logger
-                logger = get_logger("search")
-                logger.warning(f"Could not convert product to response: {e}")
-                continue
+        product_items = [ProductSearchItemResponse.product_row(product) for product in products]
         
         total_pages = (total + request.per_page - 1) // request.per_page if request.per_page > 0 else 0
         
-        return ProductSearchResponse(
+        return FastJSONResponse(ProductSearchResponse.model_construct(
             products=product_items,
             total=total,
             page=request.page,
@@ -113,7 +79,7 @@ async def search_products(
             total_pages=total_pages,
             filters_applied=request.model_dump(exclude_none=True),
             available_filters={}
-        )
+        ))
     except Exception as e:
         from app.core.logging import get_logger
         logger = get_logger("search")
@@ -156,24 +122,7 @@ async def get_product_recommendations(
         limit=limit
     )
     
-    product_items = []
-    for product in products:
-        item = ProductSearchItemResponse(
-            id=product.id,
-            sku=product.sku,
-            name=product.name,
-            slug=product.slug,
-            short_description=product.short_description,
-            price=product.price,
-            compare_at_price=product.compare_at_price,
-            primary_image=product.images[0].url if product.images else None,
-            brand_name=product.brand.name if product.brand else None,
-            category_name=product.category.name if product.category else None,
-            is_on_sale=product.compare_at_price is not None,
-            tags=product.tags or [],
-            created_at=product.created_at
-        )
-        product_items.append(item)
+    product_items = [ProductSearchItemResponse.product_row(product) for product in products]
     
     return ProductRecommendationResponse(
         products=product_items,
@@ -205,21 +154,7 @@ async def get_trending_products(
         product_items = []
         for product in products:
             try:
-                item = ProductSearchItemResponse(
-                    id=str(product.id),
-                    sku=product.sku or "",
-                    name=product.name or "",
-                    slug=product.slug or "",
-                    short_description=product.short_description or "",
-                    price=float(product.price) if product.price else 0.0,
-                    compare_at_price=float(product.compare_at_price) if product.compare_at_price else None,
-                    primary_image=product.images[0].url if product.images and len(product.images) > 0 else None,
-                    brand_name=product.brand.name if product.brand else None,
-                    category_name=product.category.name if product.category else None,
-                    is_on_sale=product.compare_at_price is not None,
-                    tags=product.tags or [],
-                    created_at=product.created_at
-                )
+                item = ProductSearchItemResponse.product_row(product)
                 product_items.append(item)
             except Exception as e:
                 # Skip products that can't be serialized
@@ -251,24 +186,7 @@ async def get_top_rated_products(
         limit=limit
     )
     
-    product_items = []
-    for product in products:
-        item = ProductSearchItemResponse(
-            id=product.id,
-            sku=product.sku,
-            name=product.name,
-            slug=product.slug,
-            short_description=product.short_description,
-            price=product.price,
-            compare_at_price=product.compare_at_price,
-            primary_image=product.images[0].url if product.images else None,
-            brand_name=product.brand.name if product.brand else None,
-            category_name=product.category.name if product.category else None,
-            is_on_sale=product.compare_at_price is not None,
-            tags=product.tags or [],
-            created_at=product.created_at
-        )
-        product_items.append(item)
+    product_items = [ProductSearchItemResponse.product_row(product) for product in products]
     
     return ProductRecommendationResponse(
         products=product_items,
@@ -284,28 +202,11 @@ async def filter_products(
     crud = ProductSearchCRUD()
     products, total = await crud.filter_products(db, request)
     
-    product_items = []
-    for product in products:
-        item = ProductSearchItemResponse(
-            id=product.id,
-            sku=product.sku,
-            name=product.name,
-            slug=product.slug,
-            short_description=product.short_description,
-            price=product.price,
-            compare_at_price=product.compare_at_price,
-            primary_image=product.images[0].url if product.images else None,
-            brand_name=product.brand.name if product.brand else None,
-            category_name=product.category.name if product.category else None,
-            is_on_sale=product.compare_at_price is not None,
-            tags=product.tags or [],
-            created_at=product.created_at
-        )
-        product_items.append(item)
+    product_items = [ProductSearchItemResponse.product_row(product) for product in products]
     
     total_pages = (total + request.per_page - 1) // request.per_page
     
-    return ProductAdvancedFilterResponse(
+    return FastJSONResponse(ProductAdvancedFilterResponse.model_construct(
         products=product_items,
         total=total,
         applied_filters=request.model_dump(exclude_none=True),
@@ -314,7 +215,7 @@ async def filter_products(
         page=request.page,
         per_page=request.per_page,
         total_pages=total_pages
-    )
+    ))
 
 @product_search_router.post("/compare", response_model=ProductComparisonDetailResponse)
 async def compare_products(
@@ -394,24 +295,7 @@ async def get_trending_products_advanced(
     )
     products, total = await crud.get_trending_products_advanced(db, request)
     
-    product_items = []
-    for product in products:
-        item = ProductSearchItemResponse(
-            id=product.id,
-            sku=product.sku,
-            name=product.name,
-            slug=product.slug,
-            short_description=product.short_description,
-            price=product.price,
-            compare_at_price=product.compare_at_price,
-            primary_image=product.images[0].url if product.images else None,
-            brand_name=product.brand.name if product.brand else None,
-            category_name=product.category.name if product.category else None,
-            is_on_sale=product.compare_at_price is not None,
-            tags=product.tags or [],
-            created_at=product.created_at
-        )
-        product_items.append(item)
+    product_items = [ProductSearchItemResponse.product_row(product) for product in products]
     
     return ProductTrendingResponse(
         products=product_items,
@@ -434,24 +318,7 @@ async def get_seasonal_products(
     )
     products, total = await crud.get_seasonal_products(db, request)
     
-    product_items = []
-    for product in products:
-        item = ProductSearchItemResponse(
-            id=product.id,
-            sku=product.sku,
-            name=product.name,
-            slug=product.slug,
-            short_description=product.short_description,
-            price=product.price,
-            compare_at_price=product.compare_at_price,
-            primary_image=product.images[0].url if product.images else None,
-            brand_name=product.brand.name if product.brand else None,
-            category_name=product.category.name if product.category else None,
-            is_on_sale=product.compare_at_price is not None,
-            tags=product.tags or [],
-            created_at=product.created_at
-        )
-        product_items.append(item)
+    product_items = [ProductSearchItemResponse.product_row(product) for product in products]
     
     return ProductSeasonalResponse(
         products=product_items,
@@ -476,24 +343,7 @@ async def get_new_arrivals(
     )
     products, total = await crud.get_new_arrivals(db, request)
     
-    product_items = []
-    for product in products:
-        item = ProductSearchItemResponse(
-            id=product.id,
-            sku=product.sku,
-            name=product.name,
-            slug=product.slug,
-            short_description=product.short_description,
-            price=product.price,
-            compare_at_price=product.compare_at_price,
-            primary_image=product.images[0].url if product.images else None,
-            brand_name=product.brand.name if product.brand else None,
-            category_name=product.category.name if product.category else None,
-            is_on_sale=product.compare_at_price is not None,
-            tags=product.tags or [],
-            created_at=product.created_at
-        )
-        product_items.append(item)
+    product_items = [ProductSearchItemResponse.product_row(product) for product in products]
     
     return ProductNewArrivalsResponse(
         products=product_items,
@@ -518,24 +368,7 @@ async def get_best_sellers(
     )
     products, sales_data = await crud.get_best_sellers(db, request)
     
-    product_items = []
-    for product in products:
-        item = ProductSearchItemResponse(
-            id=product.id,
-            sku=product.sku,
-            name=product.name,
-            slug=product.slug,
-            short_description=product.short_description,
-            price=product.price,
-            compare_at_price=product.compare_at_price,
-            primary_image=product.images[0].url if product.images else None,
-            brand_name=product.brand.name if product.brand else None,
-            category_name=product.category.name if product.category else None,
-            is_on_sale=product.compare_at_price is not None,
-            tags=product.tags or [],
-            created_at=product.created_at
-        )
-        product_items.append(item)
+    product_items = [ProductSearchItemResponse.product_row(product) for product in products]
     
     return ProductBestSellersResponse(
         products=product_items,
@@ -557,24 +390,7 @@ async def get_cross_selling_products(
     )
     products, scores = await crud.get_cross_selling_products(db, request)
     
-    product_items = []
-    for product in products:
-        item = ProductSearchItemResponse(
-            id=product.id,
-            sku=product.sku,
-            name=product.name,
-            slug=product.slug,
-            short_description=product.short_description,
-            price=product.price,
-            compare_at_price=product.compare_at_price,
-            primary_image=product.images[0].url if product.images else None,
-            brand_name=product.brand.name if product.brand else None,
-            category_name=product.category.name if product.category else None,
-            is_on_sale=product.compare_at_price is not None,
-            tags=product.tags or [],
-            created_at=product.created_at
-        )
-        product_items.append(item)
+    product_items = [ProductSearchItemResponse.product_row(product) for product in products]
     
     return ProductCrossSellingResponse(
         products=product_items,
@@ -598,24 +414,7 @@ async def get_upselling_products(
     )
     products, price_differences = await crud.get_upselling_products(db, request)
     
-    product_items = []
-    for product in products:
-        item = ProductSearchItemResponse(
-            id=product.id,
-            sku=product.sku,
-            name=product.name,
-            slug=product.slug,
-            short_description=product.short_description,
-            price=product.price,
-            compare_at_price=product.compare_at_price,
-            primary_image=product.images[0].url if product.images else None,
-            brand_name=product.brand.name if product.brand else None,
-            category_name=product.category.name if product.category else None,
-            is_on_sale=product.compare_at_price is not None,
-            tags=product.tags or [],
-            created_at=product.created_at
-        )
-        product_items.append(item)
+    product_items = [ProductSearchItemResponse.product_row(product) for product in products]
     
     return ProductUpSellingResponse(
         products=product_items,
@@ -640,24 +439,7 @@ async def get_personalized_recommendations(
     )
     products, reasons = await crud.get_personalized_recommendations(db, request)
     
-    product_items = []
-    for product in products:
-        item = ProductSearchItemResponse(
-            id=product.id,
-            sku=product.sku,
-            name=product.name,
-            slug=product.slug,
-            short_description=product.short_description,
-            price=product.price,
-            compare_at_price=product.compare_at_price,
-            primary_image=product.images[0].url if product.images else None,
-            brand_name=product.brand.name if product.brand else None,
-            category_name=product.category.name if product.category else None,
-            is_on_sale=product.compare_at_price is not None,
-            tags=product.tags or [],
-            created_at=product.created_at
-        )
-        product_items.append(item)
+    product_items = [ProductSearchItemResponse.product_row(product) for product in products]
     
     return ProductPersonalizedResponse(
         products=product_items,
@@ -697,7 +479,7 @@ async def bulk_search_products(
 ):
     crud = ProductSearchCRUD()
     bulk_data = await crud.bulk_search_products(db, request)
-    return ProductBulkSearchResponse(**bulk_data)
+    return FastJSONResponse(bulk_data)
 
 @product_search_router.get("/analytics", response_model=ProductSearchAnalyticsResponse)
 async def get_search_analytics(
@@ -728,26 +510,9 @@ async def advanced_filter_products(
     crud = ProductSearchCRUD()
     products, filter_results = await crud.advanced_filter_products(db, request)
     
-    product_items = []
-    for product in products:
-        item = ProductSearchItemResponse(
-            id=product.id,
-            sku=product.sku,
-            name=product.name,
-            slug=product.slug,
-            short_description=product.short_description,
-            price=product.price,
-            compare_at_price=product.compare_at_price,
-            primary_image=product.images[0].url if product.images else None,
-            brand_name=product.brand.name if product.brand else None,
-            category_name=product.category.name if product.category else None,
-            is_on_sale=product.compare_at_price is not None,
-            tags=product.tags or [],
-            created_at=product.created_at
-        )
-        product_items.append(item)
+    product_items = [ProductSearchItemResponse.product_row(product) for product in products]
     
-    return ProductAdvancedFilterResponse(
+    return FastJSONResponse(ProductAdvancedFilterResponse.model_construct(
         products=product_items,
         total=filter_results["total"],
         applied_filters=filter_results["applied_filters"],
@@ -756,4 +521,4 @@ async def advanced_filter_products(
         page=filter_results["page"],
         per_page=filter_results["per_page"],
         total_pages=filter_results["total_pages"]
-    )
+    ))
@@ -7,7 +7,7 @@ from app.core.pagination import PaginationParams
 from app.database.session import get_async_session
 from app.core.exceptions import ValidationException, NotFoundException, AuthorizationException, ConflictException, BadRequestException
 from app.core.logging import get_logger
-from app.core.supabase_storage import SupabaseStorageClient
+from app.core.supabase_storage import SupabaseStorageClient, delete_file_from_url_async
 from app.features.products.cruds.product_crud import ProductCrud, ProductImageCrud, ProductImageCrud
 from app.features.products.cruds.category_crud import CategoryCrud
 from app.features.products.cruds.brand_crud import BrandCrud
@@ -130,7 +130,7 @@ async def delete_product(
                 if img.url:
                     try:
                         blob_path = extract_blob_path_from_url(img.url)[1]
-                        storage_client.delete_file("aveoearth-product-assets", blob_path)
+                        await storage_client.delete_file_async("aveoearth-product-assets", blob_path)
                     except:
                         pass
         
@@ -141,7 +141,7 @@ async def delete_product(
                         if variant_img.url:
                             try:
                                 blob_path = extract_blob_path_from_url(variant_img.url)[1]
-                                storage_client.delete_file("aveoearth-product-assets", blob_path)
+                                await storage_client.delete_file_async("aveoearth-product-assets", blob_path)
                             except:
                                 pass
     
@@ -404,7 +404,7 @@ async def create_category(
     except Exception as e:
         for file_url in uploaded_files:
             try:
-                delete_file_from_url(file_url)
+                await delete_file_from_url_async(file_url)
             except:
                 pass
         raise ValidationException(f"Category creation failed: {str(e)}")
@@ -453,7 +453,7 @@ async def update_category(
         if icon and hasattr(icon, 'filename') and icon.filename:
             if category and hasattr(category, 'icon_url') and category.icon_url:
                 try:
-                    delete_file_from_url(category.icon_url)
+                    await delete_file_from_url_async(category.icon_url)
                 except:
                     pass
             icon_url = await upload_category_icon(icon, current_user["id"])
@@ -463,7 +463,7 @@ async def update_category(
         if image and hasattr(image, 'filename') and image.filename:
             if category and hasattr(category, 'image_url') and category.image_url:
                 try:
-                    delete_file_from_url(category.image_url)
+                    await delete_file_from_url_async(category.image_url)
                 except:
                     pass
             image_url = await upload_category_image(image, current_user["id"])
@@ -476,7 +476,7 @@ async def update_category(
     except Exception as e:
         for file_url in uploaded_files:
             try:
-                delete_file_from_url(file_url)
+                await delete_file_from_url_async(file_url)
             except:
                 pass
         raise
@@ -509,13 +509,13 @@ async def delete_category(
     if category:
         if hasattr(category, 'image_url') and category.image_url:
             try:
-                delete_file_from_url(category.image_url)
+                await delete_file_from_url_async(category.image_url)
             except:
                 pass
         
         if hasattr(category, 'icon_url') and category.icon_url:
             try:
-                delete_file_from_url(category.icon_url)
+                await delete_file_from_url_async(category.icon_url)
             except:
                 pass
     
@@ -564,7 +564,7 @@ async def create_brand(
     except Exception as e:
         for file_url in uploaded_files:
             try:
-                delete_file_from_url(file_url)
+                await delete_file_from_url_async(file_url)
             except:
                 pass
         raise ValidationException(f"Brand creation failed: {str(e)}")
@@ -609,7 +609,7 @@ async def update_brand(
         if logo and hasattr(logo, 'filename') and logo.filename:
             if brand and hasattr(brand, 'logo_url') and brand.logo_url:
                 try:
-                    delete_file_from_url(brand.logo_url)
+                    await delete_file_from_url_async(brand.logo_url)
                 except:
                     pass
             logo_url = await upload_brand_logo(logo, current_user["id"])
@@ -622,7 +622,7 @@ async def update_brand(
     except Exception as e:
         for file_url in uploaded_files:
             try:
-                delete_file_from_url(file_url)
+                await delete_file_from_url_async(file_url)
             except:
                 pass
         raise
@@ -647,7 +647,7 @@ async def delete_brand(
     
     if brand and hasattr(brand, 'logo_url') and brand.logo_url:
         try:
-            delete_file_from_url(brand.logo_url)
+            await delete_file_from_url_async(brand.logo_url)
         except:
             pass
     
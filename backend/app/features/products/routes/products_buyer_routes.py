@@ -39,6 +39,7 @@ from app.features.products.responses.product_search_response import (
 )
 from app.core.pagination import PaginatedResponse
 from app.core.config import settings
+from app.core.rate_limit import client_ip
 import os
 from datetime import datetime
 
@@ -56,6 +57,7 @@ async def get_products(
     sort_order: Optional[str] = Query("desc", pattern="^(asc|desc)$"),
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces page for deep scrolling"),
     db: Optional[AsyncSession] = Depends(get_async_session)
 ):
     allow_fake = settings.DEBUG and os.getenv("ALLOW_FAKE_UPLOADS", "true").lower() in ("1","true","yes")
@@ -80,9 +82,12 @@ async def get_products(
             max_price=max_price,
             search=search,
             sort_by=sort_by,
-            sort_order=sort_order
+            sort_order=sort_order,
+            cursor=cursor
         )
         return result
+    except ValidationException:
+        raise
     except Exception as e:
         logger.error(f"Database error in get_products: {str(e)}")
         # Always return empty on error to prevent 500s - no fake/demo products
@@ -136,7 +141,7 @@ async def get_product_by_slug(
         product_id=str(product.id),
         user_id=current_user["id"] if current_user else None,
         session_id=request.headers.get("session-id"),
-        ip_address=request.client.host if request.client else None,
+        ip_address=client_ip(request),
         user_agent=request.headers.get("user-agent"),
         referrer=request.headers.get("referer")
     )
@@ -203,8 +208,8 @@ async def get_wishlist(
     try:
         # Ensure user exists in database
         from app.core.user_helper import ensure_user_exists_in_db
-        from app.features.auth.cruds.auth_crud import AuthCrud
-        auth_crud = AuthCrud()
+        from app.features.auth.cruds.auth_crud import get_auth_crud
+        auth_crud = get_auth_crud()
         await ensure_user_exists_in_db(db, current_user, auth_crud)
         
         pagination = PaginationParams(page=page, limit=limit)
@@ -233,8 +238,8 @@ async def add_to_wishlist(
     try:
         # Ensure user exists in public.users before adding to wishlist
         from app.core.user_helper import ensure_user_exists_in_db
-        from app.features.auth.cruds.auth_crud import AuthCrud
-        auth_crud = AuthCrud()
+        from app.features.auth.cruds.auth_crud import get_auth_crud
+        auth_crud = get_auth_crud()
         user_exists = await ensure_user_exists_in_db(db, current_user, auth_crud)
         
         if not user_exists:
@@ -396,35 +401,7 @@ async def get_personalized_recommendations(
     )
     products, reasons = await search_crud.get_personalized_recommendations(db, request)
     
-    product_items = []
-    for i, product in enumerate(products):
-        item = ProductSearchItemResponse(
-            id=product.id,
-            sku=product.sku,
-            name=product.name,
-            slug=product.slug,
-            short_description=product.short_description,
-            price=product.price,
-            compare_at_price=product.compare_at_price,
-            discount_percentage=None,
-            primary_image=product.images[0].url if product.images else None,
-            rating=None,
-            review_count=0,
-            in_stock=product.inventory[0].available_quantity > 0 if product.inventory else False,
-            stock_quantity=product.inventory[0].available_quantity if product.inventory else 0,
-            brand_name=product.brand.name if product.brand else None,
-            category_name=product.category.name if product.category else None,
-            supplier_name=f"{product.supplier.first_name} {product.supplier.last_name}" if product.supplier else None,
-            sustainability_score=product.sustainability_score[0].overall_score if product.sustainability_score else None,
-            is_on_sale=product.compare_at_price is not None,
-            tags=product.tags or [],
-            created_at=product.created_at
-        )
-        
-        if product.compare_at_price:
-            item.discount_percentage = float(((product.compare_at_price - product.price) / product.compare_at_price) * 100)
-        
-        product_items.append(item)
+    product_items = [ProductSearchItemResponse.product_row(product) for product in products]
     
     return ProductPersonalizedResponse(
         products=product_items,
@@ -478,26 +455,9 @@ async def get_personalized_recommendations(
         recommendation_type=recommendation_type,
         limit=limit
     )
-    products, reasons = await crud.get_personalized_recommendations(request)
+    products, reasons = await crud.get_personalized_recommendations(db, request)
     
-    product_items = []
-    for product in products:
-        item = ProductSearchItemResponse(
-            id=product.id,
-            sku=product.sku,
-            name=product.name,
-            slug=product.slug,
-            short_description=product.short_description,
-            price=product.price,
-            compare_at_price=product.compare_at_price,
-            primary_image=product.images[0].url if product.images else None,
-            brand_name=product.brand.name if product.brand else None,
-            category_name=product.category.name if product.category else None,
-            is_on_sale=product.compare_at_price is not None,
-            tags=product.tags or [],
-            created_at=product.created_at
-        )
-        product_items.append(item)
+    product_items = [ProductSearchItemResponse.product_row(product) for product in products]
     
     return ProductPersonalizedResponse(
         products=product_items,
@@ -609,7 +569,7 @@ async def track_product_view(
         product_id=product_id,
         user_id=current_user["id"] if current_user else None,
         session_id=request.headers.get("session-id"),
-        ip_address=request.client.host if request.client else None,
+        ip_address=client_ip(request),
         user_agent=request.headers.get("user-agent"),
         referrer=request.headers.get("referer")
     )
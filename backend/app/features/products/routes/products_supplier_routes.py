@@ -224,7 +224,7 @@ async def create_product(
         for uploaded_img in uploaded_images:
             try:
                 blob_path = extract_blob_path_from_url(uploaded_img["url"])[1]
-                storage_client.delete_file("product-assets", blob_path)
+                await storage_client.delete_file_async("product-assets", blob_path)
             except:
                 pass
         raise ValidationException(f"Image upload failed: {'; '.join(upload_errors)}")
@@ -249,8 +249,8 @@ async def create_product(
         if supabase_url and service_role_key and not allow_fake:
             # Ensure supplier exists in Supabase Auth
             try:
-                from supabase import create_client
-                admin_client = create_client(supabase_url, service_role_key)
+                from app.database.base import supabase_clients
+                admin_client = supabase_clients.admin
                 try:
                     auth_user = admin_client.auth.admin.get_user_by_id(current_user["id"])
                     if not auth_user or not auth_user.user:
@@ -479,7 +479,7 @@ async def create_product(
             for uploaded_img in uploaded_images:
                 try:
                     blob_path = extract_blob_path_from_url(uploaded_img["url"])[1]
-                    storage_client.delete_file("product-assets", blob_path)
+                    await storage_client.delete_file_async("product-assets", blob_path)
                 except:
                     pass
             logger.error(f"Error creating product: {str(e)}")
@@ -666,7 +666,7 @@ async def update_product(
                 if img.url:
                     try:
                         blob_path = extract_blob_path_from_url(img.url)[1]
-                        storage_client.delete_file("product-assets", blob_path)
+                        await storage_client.delete_file_async("product-assets", blob_path)
                     except:
                         pass
         
@@ -686,7 +686,7 @@ async def update_product(
                     for uploaded_img in uploaded_images:
                         try:
                             blob_path = extract_blob_path_from_url(uploaded_img["url"])[1]
-                            storage_client.delete_file("product-assets", blob_path)
+                            await storage_client.delete_file_async("product-assets", blob_path)
                         except:
                             pass
                     logger.error(f"Failed to upload image {i}: {str(e)}")
@@ -718,7 +718,7 @@ async def update_product(
             for uploaded_img in update_data["new_images"]:
                 try:
                     blob_path = extract_blob_path_from_url(uploaded_img["url"])[1]
-                    storage_client.delete_file("product-assets", blob_path)
+                    await storage_client.delete_file_async("product-assets", blob_path)
                 except:
                     pass
         logger.error(f"Error updating product: {str(e)}")
@@ -745,7 +745,7 @@ async def delete_product(
             if img.url:
                 try:
                     blob_path = extract_blob_path_from_url(img.url)[1]
-                    storage_client.delete_file("product-assets", blob_path)
+                    await storage_client.delete_file_async("product-assets", blob_path)
                 except:
                     pass
     
@@ -756,7 +756,7 @@ async def delete_product(
                     if variant_img.url:
                         try:
                             blob_path = extract_blob_path_from_url(variant_img.url)[1]
-                            storage_client.delete_file("product-assets", blob_path)
+                            await storage_client.delete_file_async("product-assets", blob_path)
                         except:
                             pass
     
@@ -833,7 +833,7 @@ async def upload_product_images(
             try:
                 storage_client = SupabaseStorageClient()
                 blob_path = extract_blob_path_from_url(uploaded_image_url)[1]
-                storage_client.delete_file("product-assets", blob_path)
+                await storage_client.delete_file_async("product-assets", blob_path)
             except:
                 pass
         logger.error(f"Failed to upload image: {str(e)}")
@@ -902,7 +902,7 @@ async def delete_product_image(
 ):
     storage_client = SupabaseStorageClient()
     try:
-        result = storage_client.delete_file("product-assets", file_name)
+        result = await storage_client.delete_file_async("product-assets", file_name)
         if result:
             logger.info(f"Product image {file_name} deleted by supplier {current_user['id']}")
             return SuccessResponse(message=f"Image {file_name} deleted successfully")
@@ -930,7 +930,7 @@ async def delete_business_image(
 ):
     storage_client = SupabaseStorageClient()
     try:
-        result = storage_client.delete_file("supplier-assets", file_name)
+        result = await storage_client.delete_file_async("supplier-assets", file_name)
         if result:
             logger.info(f"Business image {file_name} deleted by supplier {current_user['id']}")
             return SuccessResponse(message=f"Image {file_name} deleted successfully")
@@ -995,7 +995,7 @@ async def delete_product_image_by_id(
         if image_to_delete.url:
             storage_client = SupabaseStorageClient()
             blob_path = extract_blob_path_from_url(image_to_delete.url)[1]
-            storage_client.delete_file("product-assets", blob_path)
+            await storage_client.delete_file_async("product-assets", blob_path)
         
         await product_crud.delete_product_image_simple(db, image_id)
         logger.info(f"Product image {image_id} deleted by supplier {current_user['id']}")
@@ -1181,7 +1181,7 @@ async def delete_product_variant(
             if variant_img.url:
                 try:
                     blob_path = extract_blob_path_from_url(variant_img.url)[1]
-                    storage_client.delete_file("product-assets", blob_path)
+                    await storage_client.delete_file_async("product-assets", blob_path)
                 except:
                     pass
     
@@ -1271,7 +1271,7 @@ async def delete_variant_image(
         storage_client = SupabaseStorageClient()
         try:
             blob_path = extract_blob_path_from_url(variant_image.url)[1]
-            storage_client.delete_file("product-assets", blob_path)
+            await storage_client.delete_file_async("product-assets", blob_path)
         except:
             pass
     
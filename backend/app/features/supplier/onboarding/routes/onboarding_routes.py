@@ -16,7 +16,7 @@ from app.core.role_auth import require_supplier, get_all_users
 from app.core.exceptions import ValidationException, NotFoundException, AuthorizationException
 from app.core.logging import get_logger
 from app.core.base import SuccessResponse
-from app.core.supabase_storage import SupabaseStorageClient
+from app.core.supabase_storage import SupabaseStorageClient, delete_file_from_url_async
 from app.database.session import get_async_session
 from fastapi import APIRouter, Depends, File, Form, status
 from fastapi.datastructures import UploadFile
@@ -142,13 +142,13 @@ async def delete_business_profile(
     
     if business.get("logo_url"):
         try:
-            delete_file_from_url(business["logo_url"])
+            await delete_file_from_url_async(business["logo_url"])
         except:
             pass
     
     if business.get("banner_url"):
         try:
-            delete_file_from_url(business["banner_url"])
+            await delete_file_from_url_async(business["banner_url"])
         except:
             pass
     
@@ -157,7 +157,7 @@ async def delete_business_profile(
     for doc in documents:
         if doc.file_url:
             try:
-                delete_file_from_url(doc.file_url)
+                await delete_file_from_url_async(doc.file_url)
             except:
                 pass
         try:
@@ -193,7 +193,7 @@ async def delete_document(
         storage_client = SupabaseStorageClient()
         blob_path = extract_blob_path_from_url(document.file_path)
         if blob_path:
-            storage_client.delete_file("supplier-assets", blob_path)
+            await storage_client.delete_file_async("supplier-assets", blob_path)
     except:
         pass
     
@@ -268,7 +268,7 @@ async def update_sustainability_profile(
         for cert in sustainability.certifications:
             if isinstance(cert, dict) and cert.get('file_url'):
                 try:
-                    delete_file_from_url(cert['file_url'])
+                    await delete_file_from_url_async(cert['file_url'])
                 except:
                     pass
     
@@ -308,7 +308,7 @@ async def delete_sustainability_profile(
         for cert in sustainability.certifications:
             if isinstance(cert, dict) and cert.get('file_url'):
                 try:
-                    delete_file_from_url(cert['file_url'])
+                    await delete_file_from_url_async(cert['file_url'])
                 except:
                     pass
     
@@ -483,7 +483,7 @@ async def business_onboarding(
         try:
             for key, url in file_urls.items():
                 if url and url != "":
-                    delete_file_from_url(url)
+                    await delete_file_from_url_async(url)
         except:
             pass
         raise ValidationException(f"Onboarding failed: {str(e)}")
@@ -525,14 +525,14 @@ async def update_business_onboarding(
             hasattr(logo, 'size') and logo.filename and logo.filename.strip() != "" and logo.size > 0):
             if existing_business.get("logo_url"):
                 try:
-                    delete_file_from_url(existing_business["logo_url"])
+                    await delete_file_from_url_async(existing_business["logo_url"])
                 except:
                     pass
             upload_tasks.append(("logo", upload_supplier_logo(logo, current_user["id"])))
         elif logo == "":
             if existing_business.get("logo_url"):
                 try:
-                    delete_file_from_url(existing_business["logo_url"])
+                    await delete_file_from_url_async(existing_business["logo_url"])
                 except:
                     pass
             file_urls["logo_url"] = ""
@@ -541,14 +541,14 @@ async def update_business_onboarding(
             hasattr(banner, 'size') and banner.filename and banner.filename.strip() != "" and banner.size > 0):
             if existing_business.get("banner_url"):
                 try:
-                    delete_file_from_url(existing_business["banner_url"])
+                    await delete_file_from_url_async(existing_business["banner_url"])
                 except:
                     pass
             upload_tasks.append(("banner", upload_supplier_banner(banner, current_user["id"])))
         elif banner == "":
             if existing_business.get("banner_url"):
                 try:
-                    delete_file_from_url(existing_business["banner_url"])
+                    await delete_file_from_url_async(existing_business["banner_url"])
                 except:
                     pass
             file_urls["banner_url"] = ""
@@ -640,7 +640,7 @@ async def update_business_onboarding(
                         if existing_doc.document_type == doc_type:
                             try:
                                 if existing_doc.file_url:
-                                    delete_file_from_url(existing_doc.file_url)
+                                    await delete_file_from_url_async(existing_doc.file_url)
                                 await doc_crud.delete_document(db, existing_doc.id)
                             except:
                                 pass
@@ -696,7 +696,7 @@ async def update_business_onboarding(
         try:
             for key, url in file_urls.items():
                 if url and url != "":
-                    delete_file_from_url(url)
+                    await delete_file_from_url_async(url)
         except:
             pass
         raise ValidationException(f"Business onboarding update failed: {str(e)}")
@@ -717,7 +717,7 @@ async def upload_logo(
         
         if existing_business and existing_business.get("logo_url"):
             try:
-                delete_file_from_url(existing_business["logo_url"])
+                await delete_file_from_url_async(existing_business["logo_url"])
             except:
                 pass
         
@@ -744,7 +744,7 @@ async def upload_banner(
         
         if existing_business and existing_business.get("banner_url"):
             try:
-                delete_file_from_url(existing_business["banner_url"])
+                await delete_file_from_url_async(existing_business["banner_url"])
             except:
                 pass
         
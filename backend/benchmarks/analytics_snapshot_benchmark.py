@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for profit analytics over the columnar snapshot
+
+Writes a synthetic snapshot (same Parquet layout as the nightly export) and reports:
+  * snapshot size on disk
+  * cold load + RFM/velocity/margin/churn computation
+  * warm report lookup, i.e. what every /analytics/profit-optimization call pays
+
+Usage (from backend/):
+    python -m benchmarks.analytics_snapshot_benchmark [--users 200000] [--orders 1000000] [--products 20000]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from app.features.analytics.services.analytics_snapshot import (
+    AnalyticsSnapshot, SNAPSHOT_SCHEMAS, CURRENT_POINTER
+)
+
+def synthetic_snapshot(path: str, users: int, orders: int, products: int, items_per_order: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    now = np.datetime64(datetime.utcnow(), "us")
+    day = np.timedelta64(1, "D")
+
+    user_ids = np.array([f"u{i}" for i in range(users)])
+    product_ids = np.array([f"p{i}" for i in range(products)])
+    order_ids = np.array([f"o{i}" for i in range(orders)])
+
+    # Heavy-tailed customers and products, orders spread over two years
+    buyers = (rng.pareto(1.2, orders) * users / 20).astype(np.int64) % users
+    order_age = rng.exponential(120, orders).clip(max=730)
+    statuses = rng.choice(["delivered", "shipped", "cancelled", "refunded"], orders, p=[0.85, 0.08, 0.05, 0.02])
+
+    item_orders = np.repeat(np.arange(orders), items_per_order)
+    item_products = (rng.zipf(1.3, len(item_orders)) - 1) % products
+    price = rng.lognormal(4, 1, products).round(2)
+    quantity = rng.integers(1, 4, len(item_orders))
+    item_totals = price[item_products] * quantity
+    order_totals = np.bincount(item_orders, weights=item_totals, minlength=orders)
+
+    cost = np.where(rng.random(products) < 0.8, price * rng.uniform(0.3, 0.95, products), np.nan).round(2)
+    tables = {
+        "orders": [order_ids, user_ids[buyers], statuses, order_totals, now - (order_age * day).astype("timedelta64[us]")],
+        "order_items": [order_ids[item_orders], product_ids[item_products], quantity.astype(np.int32), item_totals],
+        "products": [
+            product_ids, np.array([f"Product {i}" for i in range(products)]),
+            np.array([f"c{i % 50}" for i in range(products)]), price,
+            pa.array(cost, from_pandas=True), rng.random(products) < 0.95,
+            now - (rng.uniform(0, 900, products) * day).astype("timedelta64[us]")
+        ],
+        "users": [user_ids, np.full(users, "buyer"), now - (rng.uniform(0, 900, users) * day).astype("timedelta64[us]")],
+    }
+
+    version = "00000000000000"
+    os.makedirs(os.path.join(path, version))
+    for name, columns in tables.items():
+        schema = SNAPSHOT_SCHEMAS[name]
+        table = pa.Table.from_arrays([pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema)
+        pq.write_table(table, os.path.join(path, version, f"{name}.parquet"), compression="zstd")
+    with open(os.path.join(path, version, "meta.json"), "w") as f:
+        json.dump({"exported_at": datetime.utcnow().isoformat()}, f)
+    with open(os.path.join(path, CURRENT_POINTER), "w") as f:
+        f.write(version)
+    return version
+
+def main(users: int, orders: int, products: int, items_per_order: int, repeats: int):
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        start = time.perf_counter()
+        version = synthetic_snapshot(snapshot_dir, users, orders, products, items_per_order)
+        print(f"Generated {orders:,} orders / {orders * items_per_order:,} items in {time.perf_counter() - start:.1f}s")
+
+        size = sum(
+            os.path.getsize(os.path.join(snapshot_dir, version, name))
+            for name in os.listdir(os.path.join(snapshot_dir, version))
+        )
+        print(f"Snapshot size: {size / 1e6:.1f} MB")
+
+        cold = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            snapshot = AnalyticsSnapshot.load(snapshot_dir)
+            report = snapshot.report()
+            cold.append(time.perf_counter() - start)
+        print(f"Cold load + compute: median {np.median(cold) * 1000:.0f} ms over {repeats} runs")
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            snapshot.report()
+        print(f"Warm report: {(time.perf_counter() - start) * 1000:.3f} us per call")
+
+        segments = report["user_value_analysis"]["segments"]
+        print("Segments: " + ", ".join(f"{name}={metrics['count']:,}" for name, metrics in segments.items()))
+        print(f"Churn rate: {report['churn_analysis']['churn_rate']:.1%}")
+        print(f"Fastest mover: {report['fast_moving_products'][0]['name']} ({report['fast_moving_products'][0]['units_sold']} units/30d)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200000)
+    parser.add_argument("--orders", type=int, default=1000000)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--items-per-order", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    main(args.users, args.orders, args.products, args.items_per_order, args.repeats)
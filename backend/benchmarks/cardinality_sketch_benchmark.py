@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Accuracy and cost benchmark for the HyperLogLog unique-count sketches
+
+Reports:
+  * relative error of single sketches across cardinalities (the ~1% target)
+  * error of a 30-day range merged from daily sketches with returning visitors
+  * stored (compressed) sketch size, ingest rate, and merge + estimate latency
+
+Usage (from backend/):
+    python -m benchmarks.cardinality_sketch_benchmark [--trials 20] [--days 30] [--daily 20000]
+"""
+import argparse
+import time
+import numpy as np
+from app.features.analytics.services.cardinality import HyperLogLog, SketchBuffer, hash_value
+
+def single_sketch_errors(cardinalities, trials: int):
+    print("Cardinality   mean |error|   max |error|   stored bytes")
+    for n in cardinalities:
+        errors, sizes = [], []
+        for trial in range(trials):
+            sketch = HyperLogLog()
+            sketch.add_hashes(hash_value(f"t{trial}-v{i}") for i in range(n))
+            errors.append(abs(sketch.estimate() - n) / n)
+            sizes.append(len(sketch.to_bytes()))
+        print(f"{n:>11,}   {np.mean(errors):>11.2%}   {np.max(errors):>10.2%}   {np.mean(sizes):>12,.0f}")
+
+def date_range_merge(days: int, daily: int, returning: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    pool = days * daily
+    seen = set()
+    sketches = []
+    start = time.perf_counter()
+    for day in range(days):
+        # A share of each day's visitors are regulars drawn from a small loyal pool
+        regulars = rng.integers(0, pool // 20, int(daily * returning))
+        newcomers = rng.integers(pool // 20, pool * 4, daily - len(regulars))
+        visitors = np.concatenate([regulars, newcomers])
+        seen.update(visitors.tolist())
+        buffer = SketchBuffer()
+        for visitor in visitors:
+            buffer.add("product_viewers", "p", f"v{visitor}")
+        sketch = HyperLogLog()
+        sketch.add_hashes(next(iter(buffer._pending.values())))
+        sketches.append(sketch.to_bytes())
+    ingest = time.perf_counter() - start
+
+    start = time.perf_counter()
+    merged = HyperLogLog.from_bytes(sketches[0])
+    for data in sketches[1:]:
+        merged.merge(HyperLogLog.from_bytes(data))
+    estimate = merged.estimate()
+    merge = time.perf_counter() - start
+
+    exact = len(seen)
+    print(
+        f"{days} daily sketches of {daily:,} visitors ({returning:.0%} regulars): "
+        f"exact {exact:,}, estimate {estimate:,}, error {abs(estimate - exact) / exact:.2%}"
+    )
+    print(f"  ingest {days * daily / ingest:,.0f} events/s, merge + estimate {merge * 1000:.1f} ms")
+
+def main(trials: int, days: int, daily: int):
+    single_sketch_errors([10, 100, 1000, 10000, 40000, 100000, 1000000], trials)
+    print()
+    date_range_merge(days, daily, returning=0.4)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--daily", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.trials, args.days, args.daily)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Offline recall@K and latency benchmark for the collaborative-filtering recommender
+
+Generates synthetic implicit feedback with latent user/item structure, holds out one
+interaction per user, trains the SVD model and reports:
+  * recall@K for the model vs a most-popular baseline
+  * single-user and batched top-N latency
+  * load time of the memory-mapped model
+
+Usage (from backend/):
+    python -m benchmarks.collaborative_filtering_benchmark [--users 20000] [--items 5000] [--factors 64]
+"""
+import argparse
+import tempfile
+import time
+import numpy as np
+from app.features.analytics.services.collaborative_filtering import (
+    InteractionMatrix, CollaborativeModel, ACTIVITY_WEIGHTS
+)
+
+def synthetic_interactions(users: int, items: int, per_user: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    taste = rng.standard_normal((users, 16)).astype(np.float32)
+    traits = rng.standard_normal((items, 16)).astype(np.float32)
+    popularity = rng.zipf(1.5, items).clip(max=1000).astype(np.float32)
+
+    user_col, item_col = [], []
+    for start in range(0, users, 1000):
+        block = taste[start:start + 1000] @ traits.T + np.log(popularity)
+        block = np.exp(block - block.max(axis=1, keepdims=True))
+        block /= block.sum(axis=1, keepdims=True)
+        for offset, probs in enumerate(block):
+            chosen = rng.choice(items, size=per_user, replace=False, p=probs)
+            user_col.extend([start + offset] * per_user)
+            item_col.extend(chosen.tolist())
+
+    kinds = rng.choice(["product_view", "add_to_cart", "purchase"], size=len(user_col), p=[0.8, 0.15, 0.05])
+    return np.array(user_col), np.array(item_col), kinds
+
+def leave_one_out(user_col, item_col, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(user_col))
+    _, first = np.unique(user_col[order], return_index=True)
+    held = np.zeros(len(user_col), dtype=bool)
+    held[order[first]] = True
+    return ~held, held
+
+def recall_at_k(recommended, held_out, k: int) -> float:
+    hits = sum(1 for user_id, item_id in held_out.items() if item_id in recommended.get(user_id, [])[:k])
+    return hits / len(held_out)
+
+def main(users: int, items: int, per_user: int, factors: int, k: int):
+    user_col, item_col, kinds = synthetic_interactions(users, items, per_user)
+    train_mask, test_mask = leave_one_out(user_col, item_col)
+    weights = np.array([ACTIVITY_WEIGHTS[kind] for kind in kinds], dtype=np.float32)
+
+    start = time.perf_counter()
+    matrix = InteractionMatrix.from_triples(
+        [f"u{u}" for u in user_col[train_mask]],
+        [f"p{i}" for i in item_col[train_mask]],
+        weights[train_mask]
+    )
+    build_seconds = time.perf_counter() - start
+    print(f"Matrix {matrix.shape[0]:,} x {matrix.shape[1]:,}, {matrix.nnz:,} non-zeros, built in {build_seconds:.2f}s")
+
+    start = time.perf_counter()
+    model = CollaborativeModel.train(matrix, factors=factors)
+    print(f"Trained {factors} factors in {time.perf_counter() - start:.2f}s")
+
+    model_dir = tempfile.mkdtemp()
+    model.save(model_dir)
+    start = time.perf_counter()
+    model = CollaborativeModel.load(model_dir)
+    print(f"Loaded memory-mapped model in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    held_out = {f"u{u}": f"p{i}" for u, i in zip(user_col[test_mask], item_col[test_mask])}
+    eval_users = list(held_out)[:5000]
+    held_out = {user_id: held_out[user_id] for user_id in eval_users}
+
+    recs = model.recommend(eval_users, n=k)
+    recommended = {user_id: [item for item, _ in items_] for user_id, items_ in recs.items()}
+
+    counts = np.bincount(item_col[train_mask], minlength=items)
+    popular = [f"p{i}" for i in np.argsort(-counts)[:k + per_user]]
+    seen = {}
+    for u, i in zip(user_col[train_mask], item_col[train_mask]):
+        seen.setdefault(f"u{u}", set()).add(f"p{i}")
+    baseline = {user_id: [item for item in popular if item not in seen.get(user_id, ())][:k] for user_id in eval_users}
+
+    print(f"\nrecall@{k} ({len(eval_users):,} users, leave-one-out)")
+    print(f"  collaborative filtering  {recall_at_k(recommended, held_out, k):.4f}")
+    print(f"  most popular baseline    {recall_at_k(baseline, held_out, k):.4f}")
+
+    print(f"\nTop-{k} latency")
+    single = []
+    for user_id in eval_users[:500]:
+        start = time.perf_counter()
+        model.recommend([user_id], n=k)
+        single.append((time.perf_counter() - start) * 1000)
+    print(f"  single user  p50 {np.percentile(single, 50):.2f} ms  p99 {np.percentile(single, 99):.2f} ms")
+
+    for batch_size in (100, 1000):
+        start = time.perf_counter()
+        model.recommend(eval_users[:batch_size], n=k)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"  batch of {batch_size:<5} {elapsed:8.1f} ms total, {elapsed / batch_size:.3f} ms/user")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the collaborative-filtering recommender")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--per-user", type=int, default=30)
+    parser.add_argument("--factors", type=int, default=64)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+    main(args.users, args.items, args.per_user, args.factors, args.k)
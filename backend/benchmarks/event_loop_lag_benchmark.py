@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Event-loop lag benchmark: sync vs async Supabase calls inside async handlers
+
+Runs the same burst of concurrent "requests" (each a PostgREST select, as the cart
+and user-helper paths do) through the sync client, which blocks the loop for every
+round trip, and through the async registry client. The Supabase server is replaced
+by an in-process transport that answers after a fixed latency, so only client
+behaviour is measured.
+
+Reports wall time for the burst and the loop lag seen by EventLoopLagMonitor.
+
+Usage (from backend/):
+    python -m benchmarks.event_loop_lag_benchmark [--requests 200] [--latency-ms 40]
+"""
+import argparse
+import asyncio
+import json
+import time
+import httpx
+from supabase import create_client, ClientOptions, acreate_client, AsyncClientOptions
+from app.core.loop_monitor import EventLoopLagMonitor
+from app.database.supabase_async import RetryTransport
+
+URL = "https://benchmark.supabase.co"
+KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.benchmark"
+BODY = json.dumps([{"id": "00000000-0000-0000-0000-000000000000"}]).encode()
+
+def sync_client(latency: float):
+    def handler(request: httpx.Request) -> httpx.Response:
+        time.sleep(latency)
+        return httpx.Response(200, content=BODY, headers={"content-type": "application/json"})
+    http = httpx.Client(transport=httpx.MockTransport(handler))
+    return create_client(URL, KEY, ClientOptions(httpx_client=http, persist_session=False, auto_refresh_token=False))
+
+async def async_client(latency: float):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        return httpx.Response(200, content=BODY, headers={"content-type": "application/json"})
+    http = httpx.AsyncClient(transport=RetryTransport(httpx.MockTransport(handler)))
+    return await acreate_client(URL, KEY, AsyncClientOptions(httpx_client=http, persist_session=False, auto_refresh_token=False))
+
+async def burst(label: str, call, requests: int):
+    monitor = EventLoopLagMonitor(interval=0.01)
+    probe = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    await asyncio.sleep(0.05)
+    probe.cancel()
+    lag = monitor.snapshot()
+    print(
+        f"{label:<8} {elapsed:>7.2f} s   {requests / elapsed:>8.0f} req/s   "
+        f"loop lag p99 {lag['p99_ms']:>8.1f} ms   max {lag['max_ms']:>8.1f} ms   stalls {lag['stalls']}"
+    )
+
+async def main(requests: int, latency: float):
+    blocking = sync_client(latency)
+    non_blocking = await async_client(latency)
+
+    async def sync_call():
+        # What the handlers did before: a sync .execute() straight from async code
+        return blocking.table("users").select("id").eq("id", "x").limit(1).execute()
+
+    async def async_call():
+        return await non_blocking.table("users").select("id").eq("id", "x").limit(1).execute()
+
+    print(f"{requests} concurrent requests, {latency * 1000:.0f} ms simulated Supabase latency")
+    await burst("sync", sync_call, requests)
+    await burst("async", async_call, requests)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=40)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.latency_ms / 1000))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Request latency with logging off, inline, queued and queued + sampled
+
+Serves one FastAPI route that logs the way the cart and auth hot paths used to (a dozen
+INFO lines per request, some dumping a dict) around a short awaited "query", and drives
+it in-process with concurrent clients. Modes:
+  * off      logger level WARNING: the INFO calls return immediately
+  * inline   StreamHandler on the request path, no sampling (the old pipeline)
+  * queued   QueueHandler -> writer thread, no sampling
+  * sampled  queued, plus the per-call-site rate limit (LOG_INFO_RATE_LIMIT)
+
+Logs go to --output (default: a temporary file). --sink-latency adds a blocking pause
+to every write, like stdout backed up behind a slow log collector.
+
+Usage (from backend/):
+    python -m benchmarks.logging_benchmark [--requests 4000] [--concurrency 32] [--output PATH]
+        [--sink-latency 0.2]
+"""
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+import uuid
+import httpx
+import numpy as np
+from fastapi import FastAPI
+from app.core import logging as app_logging
+from app.core.config import settings
+
+log = app_logging.get_logger("benchmark")
+app = FastAPI()
+
+@app.post("/cart/items")
+async def add_item():
+    cart_id, product_id = uuid.uuid4(), uuid.uuid4()
+    item = {"cart_id": cart_id, "product_id": product_id, "quantity": 2, "unit_price": 799.0, "total_price": 1598.0}
+    log.info("=" * 80)
+    log.info(f"ADD_ITEM_TO_CART START: cart_id={cart_id}, product_id={product_id}, quantity=2")
+    log.info("=" * 80)
+    log.info(f"get_user_from_token called: path=/cart/items, has_token=True")
+    log.info(f"Cart UUID parsed: {cart_id}")
+    await asyncio.sleep(0.001)
+    log.info(f"Creating NEW cart item with data: {item}")
+    for key, value in item.items():
+        log.info(f"   - {key}: {type(value)} = {value}")
+    log.info(f"Cart item COMMITTED successfully: {uuid.uuid4()}")
+    log.info(f"ADD_ITEM_TO_CART SUCCESS: cart_id={cart_id}")
+    return {"ok": True}
+
+class SlowSink:
+    """A file whose writes block for `latency` ms, releasing the GIL as a full pipe would"""
+
+    def __init__(self, stream, latency: float):
+        self.stream = stream
+        self.latency = latency / 1000
+
+    def write(self, text: str) -> int:
+        if self.latency:
+            time.sleep(self.latency)
+        return self.stream.write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+def configure(mode: str, stream) -> logging.Handler:
+    settings.LOG_INFO_RATE_LIMIT = 20.0 if mode == "sampled" else 0
+    logger = app_logging.setup_logging(async_writes=mode in ("queued", "sampled"), stream=stream)
+    if mode == "off":
+        logger.setLevel(logging.WARNING)
+    return logger.handlers[0]
+
+async def run(requests: int, concurrency: int) -> np.ndarray:
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def client_loop(client: httpx.AsyncClient):
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.post("/cart/items")
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await client.post("/cart/items")
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+    return np.array(latencies) * 1000
+
+async def main(requests: int, concurrency: int, output: str, sink_latency: float):
+    print(f"{requests} requests, concurrency {concurrency}, logs -> {output}, {sink_latency} ms per write")
+    print("Mode       p50 ms   p95 ms   p99 ms    req/s   lines written   dropped (queue full)")
+    with open(output, "a", buffering=1) as stream:
+        for mode in ("off", "inline", "queued", "sampled"):
+            handler = configure(mode, SlowSink(stream, sink_latency))
+            lines_before = stream.tell()
+            start = time.perf_counter()
+            latencies = await run(requests, concurrency)
+            elapsed = time.perf_counter() - start
+            # Drain the writer thread so the next mode starts from an empty queue
+            app_logging.stop_logging()
+            with open(output) as written:
+                written.seek(lines_before)
+                lines = sum(1 for _ in written)
+            print(
+                f"{mode:<8} {np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 95):>8.2f} "
+                f"{np.percentile(latencies, 99):>8.2f} {requests / elapsed:>8.0f}   {lines:>13}   "
+                f"{getattr(handler, 'dropped', 0):>7}"
+            )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--sink-latency", type=float, default=0.0, help="ms each log write blocks for")
+    args = parser.parse_args()
+    output = args.output or tempfile.NamedTemporaryFile(prefix="aveo-logs-", suffix=".jsonl", delete=False).name
+    asyncio.run(main(args.requests, args.concurrency, output, args.sink_latency))
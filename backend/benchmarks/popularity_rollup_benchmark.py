@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark trending/best-seller queries on raw product_views vs the popularity rollup
+
+Builds an isolated schema with synthetic data (10M views by default), then times:
+  * the old GROUP BY over raw product_views for day/week/month/year windows
+  * the initial rollup build and an incremental run
+  * the same windows answered from product_popularity_rollups
+
+Usage (from backend/):
+    python -m benchmarks.popularity_rollup_benchmark [--views 10000000] [--products 5000] [--keep]
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import text, select, func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+import app.database.session as db_session
+from app.features.analytics.models.product_popularity import ProductPopularityRollup, RollupWatermark
+from app.features.analytics.services.popularity_rollup import PopularityRollupEngine, popularity_subquery
+
+SCHEMA = "bench_popularity"
+
+WINDOWS = {"day": 1, "week": 7, "month": 30, "year": 365}
+
+SETUP_SQL = [
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"SET search_path TO {SCHEMA}, public",
+    """CREATE TABLE products (
+        id uuid PRIMARY KEY, category_id uuid, brand_id uuid, name text, price numeric(12,2),
+        status varchar(50), approval_status varchar(50), visibility varchar(50), created_at timestamp
+    )""",
+    "CREATE TABLE product_views (id uuid PRIMARY KEY, product_id uuid, session_id varchar(255), user_id uuid, viewed_at timestamp)",
+    "CREATE TABLE user_activities (id uuid PRIMARY KEY, product_id uuid, activity_type varchar, created_at timestamp)",
+    "CREATE TABLE orders (id uuid PRIMARY KEY, status varchar(50), created_at timestamp)",
+    "CREATE TABLE order_items (id uuid PRIMARY KEY, order_id uuid, product_id uuid, quantity int, total_price numeric(12,2))",
+]
+
+def data_sql(views: int, products: int):
+    return [
+        f"""INSERT INTO products
+            SELECT gen_random_uuid(), md5((i % 50)::text)::uuid, md5((i % 200)::text || 'b')::uuid,
+                   'Product ' || i, (random() * 5000)::numeric(12,2), 'ACTIVE', 'approved', 'visible', now()
+            FROM generate_series(1, {products}) i""",
+        f"""INSERT INTO product_views
+            SELECT gen_random_uuid(), p.id, md5(random()::text), NULL,
+                   now() - (power(random(), 2) * interval '365 days')
+            FROM generate_series(1, {views}) g
+            JOIN LATERAL (SELECT id FROM products OFFSET floor(power(random(), 3) * {products}) LIMIT 1) p ON true""",
+        f"""INSERT INTO user_activities
+            SELECT gen_random_uuid(), product_id, 'add_to_cart', viewed_at
+            FROM product_views TABLESAMPLE SYSTEM (5)""",
+        f"""INSERT INTO orders
+            SELECT gen_random_uuid(), 'confirmed', created_at FROM user_activities TABLESAMPLE SYSTEM (30)""",
+        """INSERT INTO order_items
+            SELECT gen_random_uuid(), o.id, p.id, 1 + floor(random() * 3)::int, (random() * 5000)::numeric(12,2)
+            FROM orders o
+            JOIN LATERAL (SELECT id FROM products OFFSET floor(random() * 100) LIMIT 1) p ON true""",
+        "CREATE INDEX ON product_views (viewed_at)",
+        "CREATE INDEX ON product_views (product_id)",
+        "CREATE INDEX ON user_activities (created_at)",
+        "CREATE INDEX ON orders (created_at)",
+        "CREATE INDEX ON order_items (order_id)",
+        "ANALYZE",
+    ]
+
+async def timed(label: str, coro):
+    start = time.perf_counter()
+    result = await coro
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"  {label:<40} {elapsed:10.1f} ms")
+    return result
+
+async def raw_trending(session: AsyncSession, days: int):
+    result = await session.execute(text(
+        """SELECT p.id, count(v.id) AS views
+           FROM products p JOIN product_views v ON v.product_id = p.id
+           WHERE v.viewed_at >= now() - make_interval(days => :days)
+           GROUP BY p.id ORDER BY views DESC LIMIT 20"""
+    ), {"days": days})
+    return result.all()
+
+async def rollup_trending(session: AsyncSession, days: int):
+    popularity = popularity_subquery(datetime.utcnow() - timedelta(days=days))
+    result = await session.execute(
+        select(popularity.c.product_id, popularity.c.views).order_by(desc(popularity.c.views)).limit(20)
+    )
+    return result.all()
+
+async def main(views: int, products: int, keep: bool):
+    if not await db_session.init_database():
+        print("DATABASE_URL is not configured")
+        return
+
+    async with db_session.async_engine.connect() as conn:
+        print(f"Generating {views:,} views over {products:,} products in schema {SCHEMA}...")
+        for statement in SETUP_SQL:
+            await conn.execute(text(statement))
+        await conn.run_sync(lambda sync_conn: ProductPopularityRollup.metadata.create_all(
+            sync_conn, tables=[ProductPopularityRollup.__table__, RollupWatermark.__table__]
+        ))
+        start = time.perf_counter()
+        for statement in data_sql(views, products):
+            await conn.execute(text(statement))
+        await conn.commit()
+        print(f"  data generated in {time.perf_counter() - start:.1f}s")
+
+        session = AsyncSession(bind=conn)
+        await session.execute(text(f"SET search_path TO {SCHEMA}, public"))
+        engine = PopularityRollupEngine(session)
+
+        print("\nRaw product_views GROUP BY:")
+        for name, days in WINDOWS.items():
+            await timed(f"trending {name}", raw_trending(session, days))
+
+        print("\nRollup maintenance:")
+        stats = await timed("initial rollup build", engine.run_rollup())
+        print(f"  {stats}")
+        await session.execute(text(
+            "INSERT INTO product_views SELECT gen_random_uuid(), product_id, session_id, NULL, now() "
+            "FROM product_views LIMIT 10000"
+        ))
+        await timed("incremental run (+10k views)", engine.run_rollup())
+
+        print("\nRollup reads:")
+        for name, days in WINDOWS.items():
+            await timed(f"trending {name}", rollup_trending(session, days))
+        await timed("top categories (month)", engine.get_top_categories(datetime.utcnow() - timedelta(days=30)))
+
+        rollup_rows = (await session.execute(select(func.count()).select_from(ProductPopularityRollup))).scalar()
+        print(f"\nRollup rows: {rollup_rows:,}")
+
+        if not keep:
+            await session.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+            await session.commit()
+
+    await db_session.close_database_connections()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the product popularity rollup")
+    parser.add_argument("--views", type=int, default=10_000_000)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark schema afterwards")
+    args = parser.parse_args()
+    asyncio.run(main(args.views, args.products, args.keep))
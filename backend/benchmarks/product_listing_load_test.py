@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the buyer product listing (GET /products/)
+
+Drives a running server with concurrent clients for a fixed time per scenario:
+  * first     page 1 with a random sort (the landing-page hit)
+  * offset    random page number up to --max-page (deep page links)
+  * cursor    each client scrolls by following next_cursor, restarting at the end
+
+Reports req/s, latency percentiles and errors per scenario, and checks that `total`
+agrees across pages. Run it against the old and the new build on the same database
+to compare; the old REST path has no next_cursor, so its cursor scenario degrades
+to repeated first pages.
+
+Usage (from backend/, with the API running):
+    python -m benchmarks.product_listing_load_test [--base-url http://localhost:8000]
+        [--concurrency 32] [--duration 20] [--limit 20] [--max-page 50]
+"""
+import argparse
+import asyncio
+import random
+import time
+import httpx
+import numpy as np
+
+SORTS = [("created_at", "desc"), ("created_at", "asc"), ("price", "asc"), ("price", "desc"), ("name", "asc")]
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.totals = set()
+
+    def report(self, label: str, elapsed: float) -> None:
+        latencies = np.array(self.latencies) * 1000
+        if not len(latencies):
+            print(f"{label:<8} no successful requests, {self.errors} errors")
+            return
+        print(
+            f"{label:<8} {len(latencies) / elapsed:>8.0f} req/s   "
+            f"p50 {np.percentile(latencies, 50):>7.1f} ms   p95 {np.percentile(latencies, 95):>7.1f} ms   "
+            f"p99 {np.percentile(latencies, 99):>7.1f} ms   errors {self.errors}   "
+            f"distinct totals {sorted(self.totals)[:5]}"
+        )
+
+async def fetch(client: httpx.AsyncClient, stats: Stats, params: dict):
+    start = time.perf_counter()
+    try:
+        response = await client.get("/products/", params=params)
+        response.raise_for_status()
+        body = response.json()
+    except Exception:
+        stats.errors += 1
+        return None
+    stats.latencies.append(time.perf_counter() - start)
+    stats.totals.add(body.get("total"))
+    return body
+
+async def first_page_client(client, stats, deadline, limit, max_page):
+    while time.perf_counter() < deadline:
+        sort_by, sort_order = random.choice(SORTS)
+        await fetch(client, stats, {"sort_by": sort_by, "sort_order": sort_order, "limit": limit})
+
+async def offset_client(client, stats, deadline, limit, max_page):
+    while time.perf_counter() < deadline:
+        await fetch(client, stats, {"page": random.randint(1, max_page), "limit": limit})
+
+async def cursor_client(client, stats, deadline, limit, max_page):
+    cursor = None
+    while time.perf_counter() < deadline:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        body = await fetch(client, stats, params)
+        cursor = body.get("next_cursor") if body else None
+
+async def scenario(label: str, client_fn, base_url: str, concurrency: int, duration: float, limit: int, max_page: int):
+    stats = Stats()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        # Warm the server's pools and caches before timing
+        await fetch(client, Stats(), {"limit": limit})
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(client_fn(client, stats, deadline, limit, max_page) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    stats.report(label, elapsed)
+
+async def main(base_url: str, concurrency: int, duration: float, limit: int, max_page: int):
+    print(f"{base_url}/products/  concurrency {concurrency}, {duration:.0f} s per scenario, limit {limit}")
+    for label, client_fn in (("first", first_page_client), ("offset", offset_client), ("cursor", cursor_client)):
+        await scenario(label, client_fn, base_url, concurrency, duration, limit, max_page)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--max-page", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.base_url, args.concurrency, args.duration, args.limit, args.max_page))
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Query count, bytes transferred and latency per product endpoint: old eager loads vs load profiles
+
+Runs each endpoint's product query against the configured database (read-only, uses the
+products already there) twice: with the selectinload sets the cruds used before, and with
+the named load profile that replaced them:
+  * search page   20 public products, newest first        (old: 6 selectin collections)
+  * detail        one product by id                       (old: 5 selectin loads)
+  * comparison    4 products by id                        (old: 7 selectin loads)
+  * admin         20 products for the supplier/admin table (old: 3 selectin loads)
+
+Every statement the ORM sends is captured; bytes are the summed pg_column_size of the rows
+each one returns (re-run wrapped in a subquery), close to what crosses the wire.
+
+Usage (from backend/):
+    python -m benchmarks.product_load_profile_benchmark [--repeat 20]
+"""
+import argparse
+import asyncio
+import importlib
+import time
+from pathlib import Path
+import numpy as np
+from sqlalchemy import event, select, desc, text
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+import app.database.session as db_session
+import app.features
+from app.features.products.models.product import Product, PUBLIC_PRODUCT_FILTER
+from app.features.products.models.product_variant import ProductVariant
+from app.features.products.cruds.product_loading import ProductLoadProfile, product_load_options
+
+PROFILES = {
+    "search page": ProductLoadProfile.LIST_CARD,
+    "detail": ProductLoadProfile.DETAIL,
+    "comparison": ProductLoadProfile.COMPARISON,
+    "admin": ProductLoadProfile.ADMIN,
+}
+
+def load_models():
+    """Import every feature's models so all mappers resolve, as the app does through its routers"""
+    root = Path(app.features.__path__[0])
+    for path in sorted(root.glob("**/models/*.py")):
+        importlib.import_module(".".join(("app.features",) + path.relative_to(root).with_suffix("").parts))
+
+def old_options(endpoint: str):
+    """The selectinload sets the cruds used per endpoint before the load profiles"""
+    if endpoint == "search page":
+        return (
+            selectinload(Product.brand), selectinload(Product.category), selectinload(Product.images),
+            selectinload(Product.inventory), selectinload(Product.sustainability_scores), selectinload(Product.supplier)
+        )
+    if endpoint == "detail":
+        return (
+            selectinload(Product.category), selectinload(Product.brand), selectinload(Product.images),
+            selectinload(Product.variants).selectinload(ProductVariant.images), selectinload(Product.sustainability_scores)
+        )
+    if endpoint == "comparison":
+        return (
+            selectinload(Product.brand), selectinload(Product.category), selectinload(Product.supplier),
+            selectinload(Product.images), selectinload(Product.inventory), selectinload(Product.sustainability_scores),
+            selectinload(Product.variants)
+        )
+    return (selectinload(Product.category), selectinload(Product.brand), selectinload(Product.images))
+
+def endpoint_query(endpoint: str, product_ids):
+    if endpoint == "search page":
+        return select(Product).where(text(PUBLIC_PRODUCT_FILTER)).order_by(desc(Product.created_at)).limit(20)
+    if endpoint == "detail":
+        return select(Product).where(Product.id == product_ids[0])
+    if endpoint == "comparison":
+        return select(Product).where(Product.id.in_(product_ids[:4]))
+    return select(Product).order_by(desc(Product.created_at)).limit(20)
+
+class StatementCapture:
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._capture)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._capture)
+
+    def _capture(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+async def result_bytes(conn, statements) -> int:
+    total = 0
+    for statement, parameters in statements:
+        wrapped = f"SELECT coalesce(sum(pg_column_size(t.*)), 0) FROM ({statement}) AS t"
+        total += (await conn.exec_driver_sql(wrapped, parameters)).scalar()
+    return total
+
+async def measure(conn, query, options, repeat: int):
+    with StatementCapture(db_session.async_engine.sync_engine) as capture:
+        async with AsyncSession(bind=conn) as session:
+            (await session.execute(query.options(*options))).unique().scalars().all()
+    size = await result_bytes(conn, capture.statements)
+
+    timings = []
+    for _ in range(repeat):
+        async with AsyncSession(bind=conn) as session:
+            start = time.perf_counter()
+            (await session.execute(query.options(*options))).unique().scalars().all()
+            timings.append(time.perf_counter() - start)
+    return len(capture.statements), size, float(np.percentile(np.array(timings) * 1000, 50))
+
+async def main(repeat: int):
+    load_models()
+    if not await db_session.init_database():
+        print("DATABASE_URL is not configured")
+        return
+
+    async with db_session.async_engine.connect() as conn:
+        product_ids = (await conn.execute(
+            select(Product.id).where(text(PUBLIC_PRODUCT_FILTER)).order_by(desc(Product.created_at)).limit(4)
+        )).scalars().all()
+        if not product_ids:
+            print("No public products in the database")
+            return
+
+        print("Endpoint       profile      queries (old -> new)   bytes (old -> new)        p50 ms (old -> new)")
+        for endpoint, profile in PROFILES.items():
+            query = endpoint_query(endpoint, product_ids)
+            old_queries, old_bytes, old_ms = await measure(conn, query, old_options(endpoint), repeat)
+            new_queries, new_bytes, new_ms = await measure(conn, query, product_load_options(profile), repeat)
+            print(
+                f"{endpoint:<14} {profile.value:<12} {old_queries:>7} -> {new_queries:<7}      "
+                f"{old_bytes:>9,} -> {new_bytes:<9,}   {old_ms:>8.2f} -> {new_ms:.2f}"
+            )
+
+    await db_session.close_database_connections()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.repeat))
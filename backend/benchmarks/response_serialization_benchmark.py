@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Serializer micro-benchmark for list endpoint pages (20 / 100 / 1000 items)
+
+Compares, per page, the time from fetched rows to response body bytes:
+  * old   ORM row -> to_dict() -> Model(**dict) -> FastAPI response_model handling
+          (validate against the response model again, then encode)
+  * new   projected row -> response-shaped dict -> envelope via model_construct
+          -> FastJSONResponse (one orjson encode)
+
+for the search results page (ProductSearchResponse) and the buyer order list
+(PaginatedResponse[OrderResponse]). The response_model step uses the installed
+FastAPI's own serialize_response, so the comparison tracks whatever FastAPI does.
+No database is involved; rows are synthetic.
+
+Usage (from backend/):
+    python -m benchmarks.response_serialization_benchmark [--repeat 50]
+"""
+import argparse
+import asyncio
+import inspect
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Dict
+import numpy as np
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from app.core.pagination import PaginatedResponse
+from app.core.serialization import FastJSONResponse
+from app.features.orders.cruds.order_crud import _order_row, ORDER_LIST_COLUMNS
+from app.features.orders.models.order import Order
+from app.features.orders.responses.order_response import OrderResponse
+from app.features.products.responses.product_search_response import ProductSearchResponse, ProductSearchItemResponse
+
+PAGE_SIZES = (20, 100, 1000)
+# FastAPI >= 0.130 encodes validated responses in pydantic-core directly (dump_json)
+DUMP_JSON = "dump_json" in inspect.signature(serialize_response).parameters
+NOW = datetime(2025, 6, 1, 12, 30, tzinfo=timezone.utc)
+
+def search_row(i: int) -> SimpleNamespace:
+    """A Product with brand, category and images loaded, as the search query returns it"""
+    return SimpleNamespace(
+        id=uuid.uuid4(), sku=f"SKU-{i:06d}", name=f"Organic cotton tee {i}", slug=f"organic-cotton-tee-{i}",
+        short_description="Soft, breathable everyday tee made from certified organic cotton",
+        price=Decimal("799.00"), compare_at_price=Decimal("999.00") if i % 3 else None, tags=["cotton", "organic", "tee"],
+        created_at=NOW - timedelta(minutes=i), images=[SimpleNamespace(url=f"https://cdn.example.com/p/{i}.webp")],
+        brand=SimpleNamespace(name="Greenline"), category=SimpleNamespace(name="T-Shirts")
+    )
+
+def order_row(i: int) -> SimpleNamespace:
+    address = {"line1": f"{i} Market Road", "city": "Pune", "state": "MH", "postal_code": "411001", "country": "IN"}
+    columns = {column.key: None for column in ORDER_LIST_COLUMNS}
+    columns.update(
+        id=uuid.uuid4(), user_id=uuid.uuid4(), order_number=f"ORD-20250601-{i:06d}", status="confirmed",
+        payment_status="paid", fulfillment_status="unfulfilled", currency="INR", subtotal=Decimal("1598.00"),
+        tax_amount=Decimal("287.64"), shipping_amount=Decimal("0"), discount_amount=Decimal("100.00"),
+        total_amount=Decimal("1785.64"), billing_address=address, shipping_address=address,
+        processed_at=NOW, created_at=NOW - timedelta(hours=i), updated_at=NOW, items_count=2
+    )
+    return SimpleNamespace(**columns)
+
+async def fastapi_encode(field, content: Any) -> bytes:
+    """What FastAPI does with a route's return value when response_model is set"""
+    if DUMP_JSON:
+        return await serialize_response(field=field, response_content=content, dump_json=True)
+    return JSONResponse(await serialize_response(field=field, response_content=content)).body
+
+async def old_search(rows, field) -> bytes:
+    items = []
+    for product in rows:
+        item = ProductSearchItemResponse(
+            id=product.id, sku=product.sku, name=product.name, slug=product.slug,
+            short_description=product.short_description, price=product.price,
+            compare_at_price=product.compare_at_price,
+            primary_image=product.images[0].url if product.images else None,
+            brand_name=product.brand.name if product.brand else None,
+            category_name=product.category.name if product.category else None,
+            is_on_sale=product.compare_at_price is not None, tags=product.tags or [],
+            created_at=product.created_at
+        )
+        if product.compare_at_price:
+            item.discount_percentage = float((product.compare_at_price - product.price) / product.compare_at_price * 100)
+        items.append(item)
+    page = ProductSearchResponse(
+        products=items, total=len(items), page=1, per_page=len(items), total_pages=1,
+        filters_applied={}, available_filters={}
+    )
+    return await fastapi_encode(field, page)
+
+async def new_search(rows, field) -> bytes:
+    page = ProductSearchResponse.model_construct(
+        products=[ProductSearchItemResponse.product_row(product) for product in rows],
+        total=len(rows), page=1, per_page=len(rows), total_pages=1, filters_applied={}, available_filters={}
+    )
+    return FastJSONResponse(page).body
+
+async def old_orders(rows, field) -> bytes:
+    # Order.to_dict only reads attributes, so the plain row stands in for the ORM object
+    items = [OrderResponse(**Order.to_dict(row)) for row in rows]
+    return await fastapi_encode(field, PaginatedResponse.create(items=items, total=len(items), page=1, limit=len(items)))
+
+async def new_orders(rows, field) -> bytes:
+    items = [_order_row(row) for row in rows]
+    return FastJSONResponse(PaginatedResponse.create(items=items, total=len(items), page=1, limit=len(items))).body
+
+async def measure(fn, rows, field, repeat: int) -> Dict[str, float]:
+    await fn(rows, field)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = await fn(rows, field)
+        timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1000
+    return {"p50": float(np.percentile(timings, 50)), "p95": float(np.percentile(timings, 95)), "bytes": len(body)}
+
+async def main(repeat: int):
+    cases = (
+        ("search", search_row, create_model_field("Response", ProductSearchResponse), old_search, new_search),
+        ("orders", order_row, create_model_field("Response", PaginatedResponse[OrderResponse]), old_orders, new_orders)
+    )
+    print(f"FastAPI response_model path: {'pydantic dump_json' if DUMP_JSON else 'serialize + json.dumps'}")
+    print("Endpoint  items    old p50 ms   old p95 ms    new p50 ms   new p95 ms   speedup   body KB")
+    for label, make_row, field, old, new in cases:
+        for size in PAGE_SIZES:
+            rows = [make_row(i) for i in range(size)]
+            before = await measure(old, rows, field, repeat)
+            after = await measure(new, rows, field, repeat)
+            print(
+                f"{label:<8} {size:>6}   {before['p50']:>10.2f}   {before['p95']:>10.2f}    "
+                f"{after['p50']:>10.2f}   {after['p95']:>10.2f}   {before['p50'] / after['p50']:>6.1f}x   "
+                f"{after['bytes'] / 1024:>7.1f}"
+            )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.repeat))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Construction-cost benchmark for the shared Supabase client registry
+
+Compares what a request used to pay to get an AuthCrud (two fresh Supabase clients,
+each with its own PostgREST/GoTrue/Storage HTTP pools) against the shared instance,
+and reports the one-time startup cost of the registry. No network calls are made:
+only client construction is measured.
+
+Usage (from backend/):
+    python -m benchmarks.supabase_client_benchmark [--requests 200]
+"""
+import argparse
+import time
+import tracemalloc
+from supabase import create_client
+from app.core.config import settings
+from app.database.base import supabase_clients
+from app.features.auth.cruds.auth_crud import get_auth_crud
+
+# Construction never contacts the server, so placeholders are enough when unconfigured
+PLACEHOLDER_URL = "https://benchmark.supabase.co"
+PLACEHOLDER_KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.benchmark"
+
+def per_call_clients():
+    """What AuthCrud.__init__ did before the registry"""
+    admin = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+    anon = create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
+    return admin, anon
+
+def measure(label: str, fn, requests: int):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(requests):
+        fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size for stat in snapshot.statistics("filename"))
+    print(
+        f"{label:<28} {elapsed / requests * 1000:>9.3f} ms/request   "
+        f"{allocated / requests / 1024:>9.1f} KiB retained/request   peak {peak / 1024 / 1024:.1f} MiB"
+    )
+    return elapsed / requests
+
+def main(requests: int):
+    settings.SUPABASE_URL = settings.SUPABASE_URL or PLACEHOLDER_URL
+    settings.SUPABASE_SERVICE_ROLE_KEY = settings.SUPABASE_SERVICE_ROLE_KEY or PLACEHOLDER_KEY
+    settings.SUPABASE_ANON_KEY = settings.SUPABASE_ANON_KEY or PLACEHOLDER_KEY
+
+    start = time.perf_counter()
+    supabase_clients.init()
+    print(f"Registry startup (admin + anon clients): {(time.perf_counter() - start) * 1000:.1f} ms, once per process")
+
+    # Held so tracemalloc attributes what each construction allocates
+    kept = []
+    before = measure("AuthCrud() per call", lambda: kept.append(per_call_clients()), requests)
+    after = measure("get_auth_crud() shared", get_auth_crud, requests)
+    print(f"Saved per request: {(before - after) * 1000:.2f} ms")
+    print(f"At 100 authenticated requests/s that is {(before - after) * 100:.1f} CPU-seconds per second of client setup")
+    supabase_clients.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    main(args.requests)
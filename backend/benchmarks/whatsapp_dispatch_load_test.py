@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Stub WhatsApp Cloud API plus a dispatch throughput test
+
+The stub accepts POST /{phone_number_id}/messages like the Graph API, answering after
+--latency ms (uniformly jittered +-50%) and failing --error-rate of calls with 503/429.
+
+Load test (default): starts the stub in-process and sends --messages OTPs to distinct
+numbers two ways:
+  * inline      the old path: each send opens its own AsyncClient and the caller waits
+                for the API, --concurrency callers at a time
+  * dispatcher  WhatsAppDispatcher: callers only enqueue; the pooled workers send and
+                retry failures in the background
+Reports what a request handler waits per message (p50/p99), end-to-end throughput, and
+how many messages got through.
+
+Stub only, e.g. to point a running API at it (WHATSAPP_API_URL=http://127.0.0.1:8099):
+    python -m benchmarks.whatsapp_dispatch_load_test --serve [--port 8099]
+
+Usage (from backend/):
+    python -m benchmarks.whatsapp_dispatch_load_test [--messages 2000] [--concurrency 64]
+        [--latency 150] [--error-rate 0.05]
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+import httpx
+import numpy as np
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+
+stub = FastAPI()
+stub.state.latency = 0.15
+stub.state.error_rate = 0.0
+stub.state.received = 0
+
+@stub.post("/{phone_number_id}/messages")
+async def stub_messages(phone_number_id: str):
+    stub.state.received += 1
+    await asyncio.sleep(stub.state.latency * random.uniform(0.5, 1.5))
+    if random.random() < stub.state.error_rate:
+        return JSONResponse({"error": {"message": "Temporarily unavailable"}}, status_code=random.choice((429, 503)))
+    return {"messaging_product": "whatsapp", "messages": [{"id": f"wamid.{uuid.uuid4().hex}"}]}
+
+async def start_stub(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(stub, host="127.0.0.1", port=port, log_level="warning"))
+    asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server
+
+def phones(n: int):
+    return [f"+9190{i:08d}" for i in range(n)]
+
+async def inline_sends(service, messages: int, concurrency: int):
+    """The request handler calling the API itself, one client per message"""
+    waits, delivered = [], 0
+    queue = iter(phones(messages))
+
+    async def caller():
+        nonlocal delivered
+        for phone in queue:
+            start = time.perf_counter()
+            try:
+                async with httpx.AsyncClient() as client:
+                    await service.deliver(client, service.otp_message(phone, "123456"))
+                delivered += 1
+            except Exception:
+                pass
+            waits.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    return np.array(waits) * 1000, delivered
+
+async def dispatched_sends(dispatcher, messages: int, concurrency: int):
+    waits = []
+    queue = iter(phones(messages))
+
+    async def caller():
+        for phone in queue:
+            start = time.perf_counter()
+            dispatcher.send_otp(phone, "123456")
+            waits.append(time.perf_counter() - start)
+            # Let other handlers run, as separate requests would
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    while dispatcher.stats["sent"] + dispatcher.stats["failed"] < messages:
+        await asyncio.sleep(0.01)
+    return np.array(waits) * 1000, dispatcher.stats["sent"]
+
+async def main(args):
+    stub.state.latency = args.latency / 1000
+    stub.state.error_rate = args.error_rate
+    server = await start_stub(args.port)
+    settings.WHATSAPP_API_URL = f"http://127.0.0.1:{args.port}"
+    settings.WHATSAPP_API_TOKEN = settings.WHATSAPP_API_TOKEN or "stub-token"
+    settings.WHATSAPP_PHONE_NUMBER_ID = settings.WHATSAPP_PHONE_NUMBER_ID or "1234567890"
+    from app.core import whatsapp
+
+    print(
+        f"{args.messages} messages, {args.concurrency} callers, stub latency {args.latency:.0f} ms, "
+        f"error rate {args.error_rate:.0%}, dispatcher workers {settings.WHATSAPP_CONCURRENCY}"
+    )
+    print("Path         wait p50 ms   wait p99 ms   msgs/s   delivered   API calls")
+    for label in ("inline", "dispatcher"):
+        stub.state.received = 0
+        start = time.perf_counter()
+        if label == "inline":
+            waits, delivered = await inline_sends(whatsapp.WhatsAppService(), args.messages, args.concurrency)
+        else:
+            # Short backoff so retries finish within the run
+            whatsapp.RETRY_BACKOFF, whatsapp.RETRY_MAX_BACKOFF = 0.05, 1.0
+            dispatcher = whatsapp.WhatsAppDispatcher().start()
+            waits, delivered = await dispatched_sends(dispatcher, args.messages, args.concurrency)
+        elapsed = time.perf_counter() - start
+        if label == "dispatcher":
+            await dispatcher.stop()
+        print(
+            f"{label:<11} {np.percentile(waits, 50):>12.3f} {np.percentile(waits, 99):>13.3f} "
+            f"{args.messages / elapsed:>8.0f}   {delivered:>9}   {stub.state.received:>9}"
+        )
+
+    server.should_exit = True
+    await asyncio.sleep(0.2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--serve", action="store_true", help="only run the stub API")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=150, help="stub response time, ms")
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    args = parser.parse_args()
+    if args.serve:
+        stub.state.latency = args.latency / 1000
+        stub.state.error_rate = args.error_rate
+        uvicorn.run(stub, host="127.0.0.1", port=args.port, log_level="warning")
+    else:
+        asyncio.run(main(args))
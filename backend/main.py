@@ -3,12 +3,15 @@ from datetime import datetime
 from fastapi import FastAPI, Request, status
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
+import asyncio
 from app.core.config import settings
 from app.core.exceptions import AveoException
 from app.core.logging import get_logger
+from app.core.query_profiler import QueryProfilerMiddleware
 from app.database.session import init_database, close_database_connections
+import app.database.session as db_session
 from app.features.auth.routes.auth_routes import auth_router
 from app.features.auth.routes.profile_routes import profile_router
 from app.features.auth.routes.referral_routes import referral_router
@@ -46,23 +49,161 @@ async def lifespan(app: FastAPI):
         app_logger.error(f"Database initialization failed: {str(e)}")
         app_logger.info("Continuing with limited functionality")
     
+    try:
+        from app.database.base import supabase_clients
+        app.state.supabase_clients = supabase_clients.init()
+    except Exception as e:
+        app_logger.error(f"Supabase client initialization failed: {str(e)}")
+    
+    try:
+        from app.database.supabase_async import async_supabase
+        app.state.async_supabase = await async_supabase.init()
+    except Exception as e:
+        app_logger.error(f"Async Supabase client initialization failed: {str(e)}")
+    
     try:
         from app.core.supabase_storage import SupabaseStorageClient
         storage_client = SupabaseStorageClient()
         # Initialize storage buckets
-        storage_client._ensure_bucket_exists("supplier-assets")
-        storage_client._ensure_bucket_exists("product-assets")
-        storage_client._ensure_bucket_exists("category-assets")
-        storage_client._ensure_bucket_exists("user-uploads")
+        await storage_client.ensure_buckets_exist_async([
+            "supplier-assets",
+            "product-assets",
+            "category-assets",
+            "user-uploads"
+        ])
         app_logger.info("Supabase storage buckets initialized")
     except Exception as e:
         app_logger.error(f"Supabase storage initialization failed: {str(e)}")
         app_logger.info("Continuing without Supabase storage")
     
+    from app.core.loop_monitor import event_loop_monitor
+    background_tasks = [asyncio.create_task(event_loop_monitor.run())]
+    from app.core.whatsapp import whatsapp_dispatcher
+    whatsapp_dispatcher.start()
+    if db_session.async_engine:
+        try:
+            from app.database.partitions import maintain_partitions, run_partition_scheduler
+            # Before anything writes events: inserts need this month's partition to exist
+            await maintain_partitions(db_session.async_engine, settings.EVENT_RETENTION_MONTHS)
+            background_tasks.append(asyncio.create_task(
+                run_partition_scheduler(
+                    db_session.async_engine,
+                    settings.EVENT_RETENTION_MONTHS,
+                    settings.PARTITION_MAINTENANCE_INTERVAL
+                )
+            ))
+            app_logger.info("Partition maintenance job started")
+        except Exception as e:
+            app_logger.error(f"Partition maintenance job failed to start: {str(e)}")
+        # Built concurrently in the background: listings work without them meanwhile
+        from app.database.indexes import ensure_product_listing_indexes
+        background_tasks.append(asyncio.create_task(
+            ensure_product_listing_indexes(db_session.async_engine)
+        ))
+        try:
+            from app.database.indexes import ensure_otp_indexes
+            from app.features.auth.cruds.otp_crud import run_otp_sweeper
+            await ensure_otp_indexes(db_session.async_engine)
+            background_tasks.append(asyncio.create_task(
+                run_otp_sweeper(db_session.AsyncSessionLocal, settings.OTP_SWEEP_INTERVAL)
+            ))
+            app_logger.info("Expired OTP sweeper started")
+        except Exception as e:
+            app_logger.error(f"Expired OTP sweeper failed to start: {str(e)}")
+        try:
+            from app.features.analytics.services.view_buffer import ensure_view_counter_tables, run_view_flusher
+            await ensure_view_counter_tables(db_session.async_engine)
+            background_tasks.append(asyncio.create_task(
+                run_view_flusher(db_session.AsyncSessionLocal, settings.VIEW_FLUSH_INTERVAL)
+            ))
+            app_logger.info("Product view flusher started")
+        except Exception as e:
+            app_logger.error(f"Product view flusher failed to start: {str(e)}")
+        try:
+            from app.features.analytics.services.cardinality import (
+                ensure_sketch_tables, backfill_sketches, seed_all_time_sketches, run_sketch_flusher
+            )
+            sketch_days = settings.EVENT_RETENTION_MONTHS * 31
+            if await ensure_sketch_tables(db_session.async_engine):
+                background_tasks.append(asyncio.create_task(
+                    backfill_sketches(db_session.AsyncSessionLocal, sketch_days)
+                ))
+            else:
+                background_tasks.append(asyncio.create_task(
+                    seed_all_time_sketches(db_session.AsyncSessionLocal)
+                ))
+            background_tasks.append(asyncio.create_task(
+                run_sketch_flusher(db_session.AsyncSessionLocal, settings.SKETCH_FLUSH_INTERVAL, sketch_days)
+            ))
+            app_logger.info("Cardinality sketch flusher started")
+        except Exception as e:
+            app_logger.error(f"Cardinality sketch flusher failed to start: {str(e)}")
+        try:
+            from app.features.analytics.services.popularity_rollup import ensure_rollup_tables, run_rollup_scheduler
+            await ensure_rollup_tables(db_session.async_engine)
+            background_tasks.append(asyncio.create_task(
+                run_rollup_scheduler(
+                    db_session.AsyncSessionLocal,
+                    settings.POPULARITY_ROLLUP_INTERVAL,
+                    settings.BEST_SELLER_HOT_CATEGORIES
+                )
+            ))
+            app_logger.info("Popularity rollup job started")
+        except Exception as e:
+            app_logger.error(f"Popularity rollup job failed to start: {str(e)}")
+        try:
+            from app.features.analytics.services.cooccurrence_index import ensure_cooccurrence_tables, run_cooccurrence_scheduler
+            await ensure_cooccurrence_tables(db_session.async_engine)
+            background_tasks.append(asyncio.create_task(
+                run_cooccurrence_scheduler(db_session.AsyncSessionLocal, settings.COOCCURRENCE_REFRESH_INTERVAL)
+            ))
+            app_logger.info("Co-occurrence index job started")
+        except Exception as e:
+            app_logger.error(f"Co-occurrence index job failed to start: {str(e)}")
+        try:
+            from app.features.analytics.services.recommendation_store import ensure_recommendation_tables, run_recommendation_scheduler
+            await ensure_recommendation_tables(db_session.async_engine)
+            background_tasks.append(asyncio.create_task(
+                run_recommendation_scheduler(
+                    db_session.AsyncSessionLocal,
+                    settings.CF_MODEL_DIR,
+                    settings.RECOMMENDATION_REFRESH_INTERVAL
+                )
+            ))
+            app_logger.info("Recommendation precompute job started")
+        except Exception as e:
+            app_logger.error(f"Recommendation precompute job failed to start: {str(e)}")
+        try:
+            from app.features.analytics.services.analytics_snapshot import run_snapshot_scheduler
+            background_tasks.append(asyncio.create_task(
+                run_snapshot_scheduler(
+                    db_session.AsyncSessionLocal,
+                    settings.ANALYTICS_SNAPSHOT_DIR,
+                    settings.ANALYTICS_SNAPSHOT_INTERVAL
+                )
+            ))
+            app_logger.info("Analytics snapshot job started")
+        except Exception as e:
+            app_logger.error(f"Analytics snapshot job failed to start: {str(e)}")
+    
     yield
     
     app_logger.info("Shutting down application...")
+    for task in background_tasks:
+        task.cancel()
+    # Let cancelled flushers put back what they had drained before the final flush
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    if db_session.AsyncSessionLocal:
+        from app.features.analytics.services.view_buffer import view_buffer
+        from app.features.analytics.services.cardinality import sketch_buffer
+        await view_buffer.flush(db_session.AsyncSessionLocal)
+        await sketch_buffer.flush(db_session.AsyncSessionLocal)
+    await whatsapp_dispatcher.stop()
     await close_database_connections()
+    from app.database.base import supabase_clients
+    supabase_clients.close()
+    from app.database.supabase_async import async_supabase
+    await async_supabase.close()
     app_logger.info("Application shutdown completed")
 
 
@@ -98,6 +239,7 @@ app.add_middleware(
     expose_headers=["*"],
     max_age=3600,
 )
+app.add_middleware(QueryProfilerMiddleware)
 
 # Serve local media when Supabase isn't available
 try:
@@ -184,13 +326,37 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    from app.core.loop_monitor import event_loop_monitor
+    from app.core.whatsapp import whatsapp_dispatcher
+    from app.features.orders.services.cart_cache import cart_read_cache
     return {
         "status": "healthy",
         "service": settings.PROJECT_NAME,
         "version": settings.PROJECT_VERSION,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow().isoformat(),
+        "event_loop_lag": event_loop_monitor.snapshot(),
+        "whatsapp_dispatch": whatsapp_dispatcher.snapshot(),
+        "cart_cache": cart_read_cache.snapshot()
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    from app.core.query_profiler import query_metrics, token_matches
+    from app.features.orders.services.cart_cache import cart_read_cache
+    # Route and timing data stays internal: scrapers send Authorization: Bearer <METRICS_TOKEN>
+    if not settings.METRICS_TOKEN:
+        return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"detail": "Not Found"})
+    scheme, _, presented = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token_matches(presented.strip(), settings.METRICS_TOKEN):
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"detail": "Unauthorized"},
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return PlainTextResponse(
+        query_metrics.render() + cart_read_cache.render(), media_type="text/plain; version=0.0.4"
+    )
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
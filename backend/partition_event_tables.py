@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+One-off conversion of user_activities, product_views and product_search_logs from plain
+heap tables into monthly range-partitioned tables
+
+The existing table is not copied. It is attached as a single "legacy" partition covering
+everything before next month, and dropped by the retention job once it ages out. The
+indexes and constraints attach needs are built first without blocking writes, so the
+final swap only holds its lock for catalog changes.
+"""
+import asyncio
+import sys
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, '.')
+
+from sqlalchemy import text
+import app.database.session as db_session
+from app.core.logging import get_logger
+from app.database.partitions import (
+    PARTITIONED_TABLES, PREMAKE_MONTHS, table_kind, ensure_partitions, month_start, add_months
+)
+from app.features.analytics.models.user_activity import UserActivity
+from app.features.products.models.product_view import ProductView
+from app.features.products.models.product_search_log import ProductSearchLog
+
+logger = get_logger("partition_event_tables")
+
+MODELS = {
+    "user_activities": UserActivity,
+    "product_views": ProductView,
+    "product_search_logs": ProductSearchLog,
+}
+# Older rows may predate NOT NULL on the partition key
+NULL_KEY_FALLBACK = {
+    "user_activities": "coalesce(updated_at, now())",
+    "product_views": "created_at",
+    "product_search_logs": "created_at",
+}
+
+async def prepare(table: str, key: str, boundary: datetime) -> None:
+    """Build the partition-compatible indexes and bound constraint while writes continue"""
+    async with db_session.async_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"UPDATE {table} SET {key} = {NULL_KEY_FALLBACK[table]} WHERE {key} IS NULL"))
+        await conn.execute(text(f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {table}_legacy_pk ON {table} (id, {key})"))
+        await conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_legacy_brin ON {table} USING brin ({key})"))
+        existing = await conn.execute(
+            text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": f"{table}_legacy_bound"}
+        )
+        if existing.scalar() is None:
+            await conn.execute(text(
+                f"ALTER TABLE {table} ADD CONSTRAINT {table}_legacy_bound "
+                f"CHECK ({key} IS NOT NULL AND {key} < '{boundary.isoformat(sep=' ')}') NOT VALID"
+            ))
+        await conn.execute(text(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_legacy_bound"))
+
+async def swap(table: str, key: str, boundary: datetime) -> None:
+    """Rename the heap table aside, create the partitioned parent and attach the old table to it"""
+    legacy = f"{table}_legacy"
+    async with db_session.async_engine.begin() as conn:
+        await conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+        await conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+
+        # Free the index names the parent is about to create
+        result = await conn.execute(text(
+            "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE i.indrelid = to_regclass(:legacy)"
+        ), {"legacy": legacy})
+        for index_name in result.scalars().all():
+            if not index_name.startswith(f"{table}_legacy"):
+                await conn.execute(text(f"ALTER INDEX {index_name} RENAME TO {index_name[:55]}_legacy"))
+
+        await conn.run_sync(lambda sync_conn: MODELS[table].__table__.create(sync_conn))
+        # Implied by the validated bound constraint, so no table scan
+        await conn.execute(text(f"ALTER TABLE {legacy} ALTER COLUMN {key} SET NOT NULL"))
+        await conn.execute(text(
+            f"ALTER TABLE {table} ATTACH PARTITION {legacy} "
+            f"FOR VALUES FROM (MINVALUE) TO ('{boundary.isoformat(sep=' ')}')"
+        ))
+        await ensure_partitions(conn, table, key, boundary, add_months(boundary, PREMAKE_MONTHS))
+
+async def main():
+    if not await db_session.init_database():
+        logger.error("Database is not configured")
+        return
+
+    # Rows written until the swap must still fit under the legacy bound
+    boundary = add_months(month_start(datetime.utcnow()), 1)
+    try:
+        for table, key in PARTITIONED_TABLES.items():
+            async with db_session.async_engine.connect() as conn:
+                kind = await table_kind(conn, table)
+            if kind != "r":
+                logger.info(f"{table}: {'already partitioned' if kind == 'p' else 'missing'}, skipping")
+                continue
+
+            await prepare(table, key, boundary)
+            await swap(table, key, boundary)
+            logger.info(f"{table}: partitioned by month on {key}, history before {boundary:%Y-%m} kept in {table}_legacy")
+    finally:
+        await db_session.close_database_connections()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,40 @@
+import pytest
+from starlette.requests import Request
+from app.core.config import settings
+from app.core.exceptions import RateLimitException
+from app.core.rate_limit import client_ip
+from app.features.auth.cruds.otp_crud import check_otp_send_limits, otp_send_ip_limiter, otp_send_phone_limiter
+
+PROXY = "10.0.0.1"
+
+def make_request(forwarded_for=None):
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "method": "POST", "path": "/auth/send-otp", "headers": headers, "client": (PROXY, 443)})
+
+@pytest.fixture
+def behind_one_proxy(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_HOPS", 1)
+    otp_send_ip_limiter._buckets.clear()
+    otp_send_phone_limiter._buckets.clear()
+    yield
+    otp_send_ip_limiter._buckets.clear()
+    otp_send_phone_limiter._buckets.clear()
+
+def test_client_ip_uses_socket_peer_without_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_HOPS", 0)
+    assert client_ip(make_request("203.0.113.5")) == PROXY
+
+def test_client_ip_ignores_entries_the_client_sent(behind_one_proxy):
+    assert client_ip(make_request("198.51.100.9, 203.0.113.5")) == "203.0.113.5"
+    assert client_ip(make_request()) == PROXY
+
+def test_forwarded_callers_get_separate_otp_send_buckets(behind_one_proxy):
+    first, second = make_request("203.0.113.5"), make_request("203.0.113.6")
+
+    for n in range(int(otp_send_ip_limiter.capacity)):
+        check_otp_send_limits(f"+1555000{n:04d}", client_ip(first))
+    with pytest.raises(RateLimitException):
+        check_otp_send_limits("+15559999999", client_ip(first))
+
+    # Same proxy peer, different caller: not blocked by the first caller's budget
+    check_otp_send_limits("+15558888888", client_ip(second))
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Train the collaborative-filtering recommender offline, publish it to CF_MODEL_DIR and
+precompute recommendations for active users (meant to run nightly)
+Running API workers pick up the new version on their next recommendation request
+"""
+import asyncio
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, '.')
+
+import app.database.session as db_session
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.features.analytics.services.collaborative_filtering import CollaborativeModel
+from app.features.analytics.services.personalization_engine import build_interaction_matrix
+from app.features.analytics.services.recommendation_store import (
+    RecommendationPrecomputeEngine, ensure_recommendation_tables
+)
+
+logger = get_logger("train_recommender")
+
+async def main():
+    if not await db_session.init_database():
+        logger.error("Database is not configured")
+        return
+
+    try:
+        async with db_session.AsyncSessionLocal() as db:
+            matrix = await build_interaction_matrix(db, days=settings.CF_TRAINING_DAYS)
+
+        if matrix.nnz == 0:
+            logger.warning("No interactions to train on")
+            return
+
+        start = time.perf_counter()
+        model = CollaborativeModel.train(matrix, factors=settings.CF_FACTORS)
+        path = model.save(settings.CF_MODEL_DIR)
+        logger.info(
+            f"Trained {settings.CF_FACTORS} factors on {matrix.shape[0]} users x {matrix.shape[1]} products "
+            f"({matrix.nnz} interactions) in {time.perf_counter() - start:.1f}s, saved to {path}"
+        )
+
+        await ensure_recommendation_tables(db_session.async_engine)
+        async with db_session.AsyncSessionLocal() as db:
+            await RecommendationPrecomputeEngine(db).run_full(model)
+    finally:
+        await db_session.close_database_connections()
+
+if __name__ == "__main__":
+    asyncio.run(main())